@@ -2,32 +2,41 @@
 
 from .prompts import (
     DISCORD_LOGIN_PROMPT,
+    VERIFY_DISCORD_SESSION_PROMPT,
     JOIN_VOICE_CHANNEL_PROMPT,
     OPEN_URL_IN_NEW_TAB_PROMPT,
     START_SCREEN_SHARE_PROMPT,
     STOP_SCREEN_SHARE_PROMPT,
     LEAVE_VOICE_CHANNEL_PROMPT,
+    RESET_TO_IDLE_PROMPT,
     TAKE_SCREENSHOT_PROMPT,
     HANDLE_ERROR_PROMPT,
 )
 from .sandbox import SandboxConfig, SandboxManager, create_sandbox
+from .pool import SandboxPool, SandboxLease, PoolExhaustedError
 from .streamer import StreamingAgent, AgentContext, AgentState, AgentRun
 from .controller import app
 
 __all__ = [
     # Prompts
     "DISCORD_LOGIN_PROMPT",
+    "VERIFY_DISCORD_SESSION_PROMPT",
     "JOIN_VOICE_CHANNEL_PROMPT",
     "OPEN_URL_IN_NEW_TAB_PROMPT",
     "START_SCREEN_SHARE_PROMPT",
     "STOP_SCREEN_SHARE_PROMPT",
     "LEAVE_VOICE_CHANNEL_PROMPT",
+    "RESET_TO_IDLE_PROMPT",
     "TAKE_SCREENSHOT_PROMPT",
     "HANDLE_ERROR_PROMPT",
     # Sandbox
     "SandboxConfig",
     "SandboxManager",
     "create_sandbox",
+    # Pool
+    "SandboxPool",
+    "SandboxLease",
+    "PoolExhaustedError",
     # Streamer
     "StreamingAgent",
     "AgentContext",
@@ -0,0 +1,326 @@
+"""Forecast-driven warm capacity for Jamie agent.
+
+Stream requests come in bursts (evenings and weekends), so a fixed
+``min_size`` either keeps sandboxes warm all day or leaves peak-hour users
+waiting for boots. The autoscaler learns a request-rate profile per hour of
+the week from the stream counter in ``MetricsCollector``, and before each
+hour arrives it sets the pool's idle target to the arrivals expected within
+one sandbox boot.
+
+Each hour of the week keeps an exponentially weighted average of the rate
+seen in that hour on previous weeks, so a new week refines rather than
+replaces it; hours not seen yet fall back to the same hour of any day. A
+short-term average of the last few minutes covers bursts the profile
+doesn't predict. The profile is saved to a JSON file, since it takes weeks
+to learn.
+"""
+
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+from jamie.agent.pool import SandboxPool
+from jamie.shared.config import AutoscalerConfig
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+HOURS_PER_DAY = 24
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Hours observed for less than this share (e.g. the controller started late) aren't learned
+MIN_COVERAGE = 0.5
+
+
+def hour_of_week(timestamp: float, utc_offset_hours: float = 0.0) -> int:
+    """0 for Monday 00:00-01:00 through 167 for Sunday 23:00-24:00."""
+    t = time.gmtime(timestamp + utc_offset_hours * 3600)
+    return t.tm_wday * HOURS_PER_DAY + t.tm_hour
+
+
+def _average(previous: Optional[float], value: float, alpha: float) -> float:
+    return value if previous is None else previous + alpha * (value - previous)
+
+
+class DemandForecaster:
+    """Stream requests per hour, learned per hour of the week.
+
+    ``observe`` is fed the requests that arrived since its previous call;
+    ``forecast`` predicts the rate at any time from the profile and the
+    recent rate.
+    """
+
+    def __init__(
+        self,
+        level_window: float = 900.0,
+        season_alpha: float = 0.3,
+        utc_offset_hours: float = 0.0,
+    ):
+        self.level_window = level_window
+        self.season_alpha = season_alpha
+        self.utc_offset_hours = utc_offset_hours
+        # Recent requests per hour
+        self.level: Optional[float] = None
+        # Hour of week / hour of day -> learned requests per hour
+        self.weekly: Dict[int, float] = {}
+        self.daily: Dict[int, float] = {}
+
+        self._last: Optional[float] = None
+        self._hour: Optional[int] = None
+        self._hour_started = 0.0
+        self._hour_requests = 0.0
+
+    def observe(self, requests: float, now: float) -> bool:
+        """Account for requests since the last call. Returns whether an hour was learned."""
+        hour = hour_of_week(now, self.utc_offset_hours)
+        if self._last is None:
+            self._last, self._hour, self._hour_started = now, hour, now
+            return False
+
+        elapsed = now - self._last
+        if elapsed > 0:
+            # Averages over level_window seconds however often it is fed
+            alpha = 1 - math.exp(-elapsed / self.level_window)
+            self.level = _average(self.level, requests / elapsed * 3600, alpha)
+        self._last = now
+        # Requests of a call that spans the hour boundary count towards the hour ending
+        self._hour_requests += requests
+
+        if hour == self._hour:
+            return False
+        learned = self._learn_hour(now)
+        self._hour, self._hour_started, self._hour_requests = hour, now, 0.0
+        return learned
+
+    def _learn_hour(self, now: float) -> bool:
+        duration = now - self._hour_started
+        if duration < MIN_COVERAGE * 3600:
+            return False
+        rate = self._hour_requests / duration * 3600
+        hour = self._hour
+        self.weekly[hour] = _average(self.weekly.get(hour), rate, self.season_alpha)
+        daily = hour % HOURS_PER_DAY
+        self.daily[daily] = _average(self.daily.get(daily), rate, self.season_alpha)
+        return True
+
+    def seasonal(self, timestamp: float) -> Optional[float]:
+        """The learned rate for the hour containing timestamp, if any."""
+        hour = hour_of_week(timestamp, self.utc_offset_hours)
+        rate = self.weekly.get(hour)
+        return self.daily.get(hour % HOURS_PER_DAY) if rate is None else rate
+
+    def forecast(self, timestamp: float) -> float:
+        """Expected requests per hour at timestamp.
+
+        The larger of the learned and the recent rate: the profile raises
+        capacity ahead of a predicted peak, and the recent rate keeps it up
+        through a burst the profile didn't see coming.
+        """
+        seasonal = self.seasonal(timestamp)
+        return max(seasonal or 0.0, self.level or 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "weekly": {str(hour): rate for hour, rate in sorted(self.weekly.items())},
+            "daily": {str(hour): rate for hour, rate in sorted(self.daily.items())},
+        }
+
+    def load(self, state: Dict[str, Any]) -> None:
+        self.level = state.get("level")
+        self.weekly = {int(hour): float(rate) for hour, rate in state["weekly"].items()}
+        self.daily = {int(hour): float(rate) for hour, rate in state["daily"].items()}
+
+
+@dataclass
+class ScalingDecision:
+    """A change of the pool's idle target."""
+
+    at: float
+    previous: int
+    target: int
+    forecast_per_hour: float
+
+
+class WarmCapacityAutoscaler:
+    """Sets the warm pool's idle target from forecast demand."""
+
+    def __init__(
+        self,
+        pool: SandboxPool,
+        config: Optional[AutoscalerConfig] = None,
+        metrics: Optional[MetricsCollector] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.pool = pool
+        self.config = config or AutoscalerConfig()
+        self._metrics = metrics
+        self._clock = clock
+        self.forecaster = DemandForecaster(
+            level_window=self.config.level_window,
+            season_alpha=self.config.season_alpha,
+            utc_offset_hours=self.config.utc_offset_hours,
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._seen_requests: Optional[int] = None
+        # Since when the wanted target has been below the current one
+        self._lower_since: Optional[float] = None
+        self._forecast = 0.0
+        self._wanted = pool.target_idle
+        self._decisions: Deque[ScalingDecision] = deque(maxlen=20)
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def start(self) -> None:
+        """Load the learned profile and start deciding in the background."""
+        if self._task is None:
+            self._load()
+            self._task = asyncio.create_task(self._loop())
+            log.info(
+                "autoscaler_started",
+                learned_hours=len(self.forecaster.weekly),
+                lead_time=self.config.lead_time,
+            )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._save()
+
+    def desired_idle(self, now: float) -> int:
+        """Sandboxes to keep ready so arrivals within one lead time find one."""
+        # The rate can change within the lead time, e.g. at 17:58 for an 18:00 peak
+        self._forecast = max(
+            self.forecaster.forecast(now),
+            self.forecaster.forecast(now + self.config.lead_time),
+        )
+        expected = self._forecast * self.config.lead_time / 3600
+        ceiling = self.config.max_idle or self.pool.capacity
+        wanted = math.ceil(expected * self.config.headroom - 1e-9)
+        return max(self.config.min_idle, min(wanted, ceiling))
+
+    async def evaluate(self) -> int:
+        """Learn from requests since the last call and resize the pool. Returns the target."""
+        now = self._clock()
+        total = self.metrics.get_stats()["streams"]["total"]
+        arrivals = 0 if self._seen_requests is None else max(0, total - self._seen_requests)
+        self._seen_requests = total
+        if self.forecaster.observe(arrivals, now):
+            self._save()
+
+        self._wanted = self.desired_idle(now)
+        current = self.pool.target_idle
+        target = current
+        if self._wanted > current:
+            target = self._wanted
+            self._lower_since = None
+        elif self._wanted < current:
+            # Release capacity only once demand has stayed lower for a while
+            if self._lower_since is None:
+                self._lower_since = now
+            if now - self._lower_since >= self.config.scale_down_delay:
+                target = self._wanted
+                self._lower_since = None
+        else:
+            self._lower_since = None
+
+        if target != current:
+            target = await self.pool.set_target_idle(target)
+            self._record(now, current, target)
+
+        self.metrics.set_gauge("autoscaler_forecast_requests_per_hour", self._forecast)
+        self.metrics.set_gauge("autoscaler_recent_requests_per_hour", self.forecaster.level or 0.0)
+        self.metrics.set_gauge("autoscaler_desired_idle", self._wanted)
+        self.metrics.set_gauge("autoscaler_target_idle", target)
+        return target
+
+    def stats(self) -> Dict[str, Any]:
+        """Forecast, decisions and the learned profile for /stats."""
+        forecaster = self.forecaster
+        return {
+            "target_idle": self.pool.target_idle,
+            "desired_idle": self._wanted,
+            "forecast_requests_per_hour": round(self._forecast, 2),
+            "recent_requests_per_hour": round(forecaster.level or 0.0, 2),
+            "lead_time": self.config.lead_time,
+            "learned_hours": len(forecaster.weekly),
+            "decisions": [asdict(decision) for decision in self._decisions],
+            # Requests per hour by weekday and hour; None where nothing is learned yet
+            "profile": {
+                day: [
+                    self._rounded(forecaster.weekly.get(index * HOURS_PER_DAY + hour))
+                    for hour in range(HOURS_PER_DAY)
+                ]
+                for index, day in enumerate(WEEKDAYS)
+            },
+        }
+
+    @staticmethod
+    def _rounded(rate: Optional[float]) -> Optional[float]:
+        return None if rate is None else round(rate, 2)
+
+    def _record(self, now: float, previous: int, target: int) -> None:
+        action = "scale_up" if target > previous else "scale_down"
+        self._decisions.append(ScalingDecision(
+            at=now,
+            previous=previous,
+            target=target,
+            forecast_per_hour=round(self._forecast, 2),
+        ))
+        self.metrics.increment("autoscaler_decisions_total", action=action)
+        log.info(
+            "autoscaler_resized_pool",
+            action=action,
+            previous=previous,
+            target=target,
+            forecast_per_hour=round(self._forecast, 2),
+        )
+
+    def _load(self) -> None:
+        path = self.config.state_file
+        if not path:
+            return
+        try:
+            with open(path) as f:
+                self.forecaster.load(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            log.warning("autoscaler_state_unreadable", path=path, error=str(e))
+
+    def _save(self) -> None:
+        """Write the profile atomically so a crash never leaves a torn file."""
+        path = self.config.state_file
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".autoscaler-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.forecaster.to_dict(), f, indent=2)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("autoscaler_state_save_failed", path=path, error=str(e))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.evaluate()
+            except Exception as e:
+                log.error("autoscaler_evaluate_failed", error=str(e))
+            await asyncio.sleep(self.config.interval)
@@ -0,0 +1,205 @@
+"""Persistent browser profiles for Jamie sandboxes.
+
+Each Discord account gets a browser profile directory on the controller
+(the ``./browser-profile`` volume in docker-compose). Before the VLM runs, the
+live profile is checked; a healthy one is copied into the sandbox so Discord
+opens already logged in. A corrupted or logged-out live profile is restored
+from the account's golden copy, which is only ever replaced after a
+successful login.
+
+Layout under the profile root::
+
+    <account_key>/live/     profile synced back after each session
+    <account_key>/golden/   last known-good profile
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+from jamie.agent.sandbox import SandboxManager
+from jamie.agent.snapshot import account_key
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+DISCORD_COOKIE_HOSTS = ("discord.com", ".discord.com")
+# Cookie store in a profile: Chromium 96+ first, then the older location
+COOKIE_PATHS = (
+    os.path.join("Default", "Network", "Cookies"),
+    os.path.join("Default", "Cookies"),
+)
+
+
+class ProfileHealth(str, Enum):
+    """Result of checking a browser profile directory."""
+    HEALTHY = "healthy"
+    MISSING = "missing"
+    CORRUPTED = "corrupted"
+    LOGGED_OUT = "logged_out"
+
+
+def check_profile(path: str) -> ProfileHealth:
+    """Check a Chromium profile directory without launching a browser.
+
+    A profile is healthy when its ``Local State`` parses, its cookie store is
+    a readable SQLite database, and it holds Discord cookies.
+    """
+    if not os.path.isdir(path):
+        return ProfileHealth.MISSING
+
+    try:
+        with open(os.path.join(path, "Local State")) as f:
+            json.load(f)
+    except FileNotFoundError:
+        return ProfileHealth.MISSING
+    except (ValueError, OSError):
+        return ProfileHealth.CORRUPTED
+
+    cookies = next(
+        (os.path.join(path, store) for store in COOKIE_PATHS
+         if os.path.exists(os.path.join(path, store))),
+        os.path.join(path, COOKIE_PATHS[0]),
+    )
+    try:
+        with open(cookies, "rb") as f:
+            if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                return ProfileHealth.CORRUPTED
+    except FileNotFoundError:
+        return ProfileHealth.LOGGED_OUT
+    except OSError:
+        return ProfileHealth.CORRUPTED
+
+    try:
+        conn = sqlite3.connect(f"file:{cookies}?mode=ro", uri=True)
+        try:
+            placeholders = ",".join("?" for _ in DISCORD_COOKIE_HOSTS)
+            (count,) = conn.execute(
+                f"SELECT COUNT(*) FROM cookies WHERE host_key IN ({placeholders})",
+                DISCORD_COOKIE_HOSTS,
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return ProfileHealth.CORRUPTED
+
+    return ProfileHealth.HEALTHY if count else ProfileHealth.LOGGED_OUT
+
+
+def _replace_dir(source: str, destination: str) -> None:
+    """Copy ``source`` over ``destination`` so readers never see a partial copy.
+
+    The copy is built in a sibling temp directory and swapped in with renames.
+    """
+    parent = os.path.dirname(destination)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=".staging-")
+    try:
+        copy = os.path.join(staging, "profile")
+        shutil.copytree(source, copy, symlinks=True)
+        old = os.path.join(staging, "old")
+        if os.path.exists(destination):
+            os.rename(destination, old)
+        os.rename(copy, destination)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+class BrowserProfileManager:
+    """Keeps per-account browser profiles and moves them in and out of sandboxes."""
+
+    def __init__(self, root_dir: str, metrics: Optional[MetricsCollector] = None):
+        self.root_dir = root_dir
+        self._metrics = metrics
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    def live_path(self, email: str) -> str:
+        return os.path.join(self.root_dir, account_key(email), "live")
+
+    def golden_path(self, email: str) -> str:
+        return os.path.join(self.root_dir, account_key(email), "golden")
+
+    def prepare(self, email: str) -> ProfileHealth:
+        """Make the live profile usable, restoring from golden if needed.
+
+        Returns HEALTHY when a logged-in profile is ready to attach (a hit);
+        anything else means the session has to log in (a miss).
+        """
+        health = check_profile(self.live_path(email))
+        if health is ProfileHealth.HEALTHY:
+            self.metrics.increment("profile_lookups_total", result="hit")
+            return health
+
+        golden = check_profile(self.golden_path(email))
+        if golden is ProfileHealth.HEALTHY:
+            _replace_dir(self.golden_path(email), self.live_path(email))
+            log.info("profile_restored_from_golden", account=account_key(email), live=health.value)
+            self.metrics.increment("profile_lookups_total", result="restored")
+            return golden
+
+        log.info("profile_miss", account=account_key(email), live=health.value, golden=golden.value)
+        self.metrics.increment("profile_lookups_total", result="miss")
+        return health
+
+    async def attach(self, sandbox: SandboxManager, email: str) -> None:
+        """Copy the account's live profile into the sandbox's browser profile path."""
+        await sandbox.copy_in(
+            self.live_path(email) + "/.",
+            sandbox.config.browser_profile_path,
+        )
+
+    async def capture(self, sandbox: SandboxManager, email: str, promote: bool = False) -> None:
+        """Copy the sandbox's profile back to the live copy.
+
+        With ``promote`` the captured profile also becomes the golden copy,
+        which should only happen right after a verified login.
+        """
+        started = time.monotonic()
+        account_dir = os.path.join(self.root_dir, account_key(email))
+        os.makedirs(account_dir, exist_ok=True)
+        download = tempfile.mkdtemp(dir=account_dir, prefix=".capture-")
+        try:
+            await sandbox.copy_out(sandbox.config.browser_profile_path + "/.", download)
+            health = check_profile(download)
+            if health is not ProfileHealth.HEALTHY:
+                # Never overwrite a usable profile with a broken one
+                log.warning(
+                    "profile_capture_unhealthy",
+                    account=account_key(email),
+                    health=health.value,
+                )
+                return
+            _replace_dir(download, self.live_path(email))
+            if promote:
+                _replace_dir(download, self.golden_path(email))
+        finally:
+            shutil.rmtree(download, ignore_errors=True)
+        log.info(
+            "profile_captured",
+            account=account_key(email),
+            promoted=promote,
+            duration=round(time.monotonic() - started, 2),
+        )
+
+    def stats(self) -> Dict:
+        """Get profile hit/miss counts and hit rate."""
+        hits = self.metrics.get_counter("profile_lookups_total", result="hit")
+        restored = self.metrics.get_counter("profile_lookups_total", result="restored")
+        misses = self.metrics.get_counter("profile_lookups_total", result="miss")
+        total = hits + restored + misses
+        return {
+            "hits": int(hits),
+            "restored": int(restored),
+            "misses": int(misses),
+            "hit_rate_percent": round((hits + restored) / total * 100, 2) if total else 0.0,
+        }
@@ -1,7 +1,7 @@
 """FastAPI controller for CUA streaming agent."""
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import Dict, Optional
 import asyncio
 
@@ -10,17 +10,55 @@ from jamie.shared.models import (
     StreamResponse,
     StopRequest,
     HealthResponse,
+    PrepareRequest,
+    PrepareResponse,
+    ReadinessResponse,
     StreamStatus,
 )
 from jamie.shared.config import (
     AgentConfig,
     ObservabilityConfig,
     get_agent_config,
+    get_autoscaler_config,
+    get_launch_config,
+    get_multiplex_config,
     get_observability_config,
+    get_performance_config,
+    get_pool_config,
+    get_profile_config,
+    get_proxy_config,
+    get_reaper_config,
+    get_reservation_config,
+    get_snapshot_config,
+    get_telemetry_config,
+    get_warmup_config,
+    get_watchdog_config,
 )
 from jamie.shared.logging import get_logger, setup_logging
 from jamie.shared.metrics import get_metrics
-from jamie.agent.streamer import StreamingAgent, AgentContext
+from jamie.agent.autoscaler import WarmCapacityAutoscaler
+from jamie.agent.browser_profiles import BrowserProfileManager
+from jamie.agent.cpuset import get_cpu_allocator
+from jamie.agent.hosts import HostPlacer, get_host_placer
+from jamie.agent.launch import LaunchGovernor, start_sandbox
+from jamie.agent.multiplex import SandboxMultiplexer
+from jamie.agent.performance import get_performance_profile
+from jamie.agent.pool import PoolExhaustedError, SandboxLease, SandboxPool
+from jamie.agent.proxy import CachingProxy
+from jamie.agent.reaper import SandboxReaper
+from jamie.agent.reservations import ReservationLimitError, ReservationManager
+from jamie.agent.sandbox import (
+    SandboxConfig,
+    SandboxManager,
+    load_sandbox_defaults,
+    memory_footprint,
+    set_sandbox_defaults,
+)
+from jamie.agent.snapshot import SnapshotStore
+from jamie.agent.streamer import StreamingAgent, AgentContext, login_sandbox
+from jamie.agent.telemetry import TelemetryCollector
+from jamie.agent.warmup import ControllerWarmup
+from jamie.agent.watchdog import SandboxWatchdog
 
 log = get_logger(__name__)
 
@@ -31,6 +69,20 @@ _agents: Dict[str, StreamingAgent] = {}
 _agent_tasks: Dict[str, asyncio.Task] = {}
 _config: Optional[AgentConfig] = None
 _obs_config: Optional[ObservabilityConfig] = None
+_pool: Optional[SandboxPool] = None
+_autoscaler: Optional[WarmCapacityAutoscaler] = None
+_launcher: Optional[LaunchGovernor] = None
+_placer: Optional[HostPlacer] = None
+_snapshots: Optional[SnapshotStore] = None
+_profiles: Optional[BrowserProfileManager] = None
+_reservations: Optional[ReservationManager] = None
+_reaper: Optional[SandboxReaper] = None
+_multiplexer: Optional[SandboxMultiplexer] = None
+_proxy: Optional[CachingProxy] = None
+_watchdog: Optional[SandboxWatchdog] = None
+_telemetry: Optional[TelemetryCollector] = None
+_warmup: Optional[ControllerWarmup] = None
+_warmup_task: Optional[asyncio.Task] = None
 
 
 def get_config() -> AgentConfig:
@@ -49,12 +101,231 @@ def get_obs_config() -> ObservabilityConfig:
     return _obs_config
 
 
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Get the login snapshot store, or None if snapshots are disabled."""
+    global _snapshots
+    if _snapshots is None:
+        snapshot_config = get_snapshot_config()
+        if snapshot_config.enabled:
+            _snapshots = SnapshotStore(
+                snapshot_config.state_dir,
+                repository=snapshot_config.repository,
+                keep=snapshot_config.keep,
+            )
+    return _snapshots
+
+
+def get_profile_manager() -> Optional[BrowserProfileManager]:
+    """Get the browser profile manager, or None if profiles are disabled."""
+    global _profiles
+    if _profiles is None:
+        profile_config = get_profile_config()
+        if profile_config.enabled:
+            _profiles = BrowserProfileManager(profile_config.root_dir)
+    return _profiles
+
+
+def get_reservation_manager() -> Optional[ReservationManager]:
+    """Get the sandbox reservation manager, or None if reservations are disabled."""
+    global _reservations
+    if _reservations is None:
+        reservation_config = get_reservation_config()
+        if reservation_config.enabled:
+            _reservations = ReservationManager(_reserve_sandbox, reservation_config)
+    return _reservations
+
+
+def _sandbox_image(config: AgentConfig) -> str:
+    """Image to boot: the account's current login snapshot if there is one."""
+    snapshots = get_snapshot_store()
+    if snapshots:
+        email = config.discord_email.get_secret_value()
+        snapshot = snapshots.current(email, config.sandbox_image)
+        if snapshot:
+            return snapshot.image
+    return config.sandbox_image
+
+
+async def _reserve_sandbox() -> SandboxLease:
+    """Get a sandbox for a reservation, from the pool if there is one."""
+    if _pool:
+        return await _pool.acquire()
+    config = get_config()
+    manager = SandboxManager(SandboxConfig(
+        image=_sandbox_image(config),
+        display=config.display_resolution,
+    ))
+    await start_sandbox(manager, _launcher)
+    return SandboxLease(manager)
+
+
+def _build_pool() -> SandboxPool:
+    """Create the warm sandbox pool from configuration."""
+    config = get_config()
+    
+    # Pooled sandboxes are logged in ahead of time with a session-less context
+    login_context = AgentContext(
+        session_id="pool-warmup",
+        url="",
+        guild_id="",
+        channel_id="",
+        channel_name="",
+        discord_email=config.discord_email.get_secret_value(),
+        discord_password=config.discord_password.get_secret_value(),
+        model=config.model,
+        max_budget=config.max_budget_per_session,
+        sandbox_image=config.sandbox_image,
+        display_resolution=config.display_resolution,
+    )
+    
+    snapshots = get_snapshot_store()
+    profiles = get_profile_manager()
+    
+    def sandbox_config() -> SandboxConfig:
+        return SandboxConfig(image=_sandbox_image(config), display=config.display_resolution)
+    
+    def manager_factory() -> SandboxManager:
+        return SandboxManager(sandbox_config())
+    
+    async def warmup(manager: SandboxManager) -> None:
+        await login_sandbox(manager, login_context, snapshots=snapshots, profiles=profiles)
+    
+    return SandboxPool(
+        get_pool_config(),
+        manager_factory=manager_factory,
+        warmup=warmup,
+        footprint_bytes=memory_footprint(sandbox_config()),
+        governor=_launcher,
+    )
+
+
+async def _warm_up() -> None:
+    """Pull and warm the sandbox image, then start the pool and report ready."""
+    global _autoscaler, _multiplexer, _pool
+    try:
+        config = get_config()
+    except Exception as e:
+        _warmup.fail(f"Configuration error: {e}")
+        return
+    
+    await _warmup.run(config.sandbox_image, config.display_resolution)
+    if not _warmup.ready:
+        # Sessions still boot their own sandboxes; so do the pool and multiplexer
+        log.warning("warmup_failed_starting_anyway", error=_warmup.error)
+    
+    # Sandbox boots start after the pull so they don't race it
+    multiplex_config = get_multiplex_config()
+    if multiplex_config.enabled:
+        if get_pool_config().enabled:
+            log.warning("pool_disabled_by_multiplexing")
+        _multiplexer = SandboxMultiplexer(
+            multiplex_config, config.sandbox_image, governor=_launcher, placer=_placer
+        )
+    elif get_pool_config().enabled:
+        _pool = _build_pool()
+        await _pool.start()
+    
+    # Move the pool's warm capacity ahead of forecast demand
+    autoscaler_config = get_autoscaler_config()
+    if autoscaler_config.enabled:
+        if _pool is None:
+            log.warning("autoscaler_disabled_without_pool")
+        else:
+            _autoscaler = WarmCapacityAutoscaler(_pool, autoscaler_config)
+            await _autoscaler.start()
+
+
 @app.on_event("startup")
 async def startup():
     """Initialize the controller on startup."""
+    global _launcher, _placer, _proxy, _reaper, _telemetry, _warmup, _warmup_task, _watchdog
     obs = get_obs_config()
     setup_logging(level=obs.log_level, json_output=obs.log_json)
     log.info("controller_started", log_level=obs.log_level, metrics_enabled=obs.metrics_enabled)
+    
+    # Reclaim sandboxes a previous, crashed controller left running
+    reaper_config = get_reaper_config()
+    if reaper_config.enabled:
+        _reaper = SandboxReaper(reaper_config)
+        await _reaper.start()
+    
+    # Fail sessions as soon as their sandbox dies
+    watchdog_config = get_watchdog_config()
+    if watchdog_config.enabled:
+        _watchdog = SandboxWatchdog(watchdog_config)
+        await _watchdog.start()
+    
+    # Sample what sandboxes actually use
+    telemetry_config = get_telemetry_config()
+    if telemetry_config.enabled:
+        _telemetry = TelemetryCollector(telemetry_config)
+        await _telemetry.start()
+    
+    # Sandboxes are pointed at the proxy as they boot, so it must be up first
+    proxy_config = get_proxy_config()
+    if proxy_config.enabled:
+        _proxy = CachingProxy(proxy_config)
+        await _proxy.start()
+    
+    # Read once here (with the proxy's CA now in place) instead of per sandbox
+    set_sandbox_defaults(load_sandbox_defaults(proxy=proxy_config))
+    
+    # Spread sandboxes over the configured docker hosts
+    _placer = get_host_placer()
+    if _placer:
+        await _placer.start()
+    
+    # Boots from concurrent requests queue instead of all starting at once
+    launch_config = get_launch_config()
+    if launch_config.enabled:
+        _launcher = LaunchGovernor(launch_config)
+    
+    # Warm up in the background; /ready reports when it is done
+    _warmup = ControllerWarmup(get_warmup_config())
+    _warmup_task = asyncio.create_task(_warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop warm-up, release reserved, pooled and shared sandboxes, and stop the proxy."""
+    global _autoscaler, _multiplexer, _pool, _proxy, _reaper, _reservations, _telemetry
+    global _launcher, _placer, _warmup_task, _watchdog
+    if _warmup_task and not _warmup_task.done():
+        _warmup_task.cancel()
+        try:
+            await _warmup_task
+        except asyncio.CancelledError:
+            pass
+    _warmup_task = None
+    # Sandboxes stopped from here on aren't crashes
+    if _watchdog:
+        await _watchdog.stop()
+        _watchdog = None
+    if _reservations:
+        await _reservations.stop()
+        _reservations = None
+    if _autoscaler:
+        await _autoscaler.stop()
+        _autoscaler = None
+    if _pool:
+        await _pool.stop()
+        _pool = None
+    if _multiplexer:
+        await _multiplexer.stop()
+        _multiplexer = None
+    if _reaper:
+        await _reaper.stop()
+        _reaper = None
+    if _telemetry:
+        await _telemetry.stop()
+        _telemetry = None
+    if _proxy:
+        await _proxy.stop()
+        _proxy = None
+    _launcher = None
+    if _placer:
+        await _placer.stop()
+        _placer = None
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -75,6 +346,22 @@ async def health_check():
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """Readiness endpoint: 200 once warm-up is done, 503 while warming or failed."""
+    if _warmup is None:
+        response = ReadinessResponse(ready=False, state="starting")
+    else:
+        response = ReadinessResponse(
+            ready=_warmup.ready,
+            state=_warmup.state.value,
+            warmup_seconds=_warmup.duration_seconds,
+            detail=_warmup.error,
+        )
+    status_code = 200 if response.ready else 503
+    return JSONResponse(status_code=status_code, content=response.model_dump())
+
+
 @app.get("/metrics", response_class=PlainTextResponse)
 async def prometheus_metrics():
     """Prometheus-compatible metrics endpoint."""
@@ -90,7 +377,72 @@ async def prometheus_metrics():
 async def detailed_stats():
     """Detailed metrics and statistics."""
     metrics = get_metrics()
-    return metrics.get_stats()
+    stats = metrics.get_stats()
+    if _warmup:
+        stats["readiness"] = _warmup.status()
+    if _pool:
+        stats["pool"] = _pool.stats()
+    if _autoscaler:
+        stats["autoscaler"] = _autoscaler.stats()
+    if _launcher:
+        stats["launch"] = _launcher.stats()
+    if _placer:
+        stats["hosts"] = _placer.stats()
+    cpus = get_cpu_allocator()
+    if cpus:
+        stats["cpusets"] = cpus.stats()
+    if _multiplexer:
+        stats["multiplex"] = _multiplexer.stats()
+    if _proxy:
+        stats["proxy"] = _proxy.stats()
+    snapshots = get_snapshot_store()
+    if snapshots:
+        stats["snapshots"] = snapshots.entries()
+    profiles = get_profile_manager()
+    if profiles:
+        stats["profiles"] = profiles.stats()
+    if _reservations:
+        stats["reservations"] = _reservations.stats()
+    if _reaper:
+        stats["reaper"] = _reaper.stats()
+    if _watchdog:
+        stats["watchdog"] = _watchdog.stats()
+    if _telemetry:
+        stats["telemetry"] = _telemetry.stats()
+    return stats
+
+
+@app.post("/prepare", response_model=PrepareResponse)
+async def prepare_sandbox(request: PrepareRequest):
+    """Start readying a sandbox for a stream request that is about to arrive.
+    
+    The returned token goes in the StreamRequest; unclaimed reservations
+    expire and release their sandbox.
+    """
+    reservations = get_reservation_manager()
+    if reservations is None:
+        raise HTTPException(status_code=404, detail="Reservations disabled")
+    if _warmup is not None and not _warmup.ready:
+        raise HTTPException(status_code=503, detail="Controller not ready")
+    
+    try:
+        reservation = reservations.prepare(request.requester_id)
+    except ReservationLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return PrepareResponse(
+        token=reservation.token,
+        expires_in_seconds=reservation.expires_in,
+    )
+
+
+@app.delete("/prepare/{token}")
+async def release_reservation(token: str):
+    """Give back a reservation the bot won't claim, instead of letting it expire."""
+    reservations = get_reservation_manager()
+    if reservations is None or not reservations.cancel(token):
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return {"token": token, "status": "released"}
 
 
 @app.post("/stream", response_model=StreamResponse)
@@ -101,7 +453,25 @@ async def start_stream(request: StreamRequest, background_tasks: BackgroundTasks
     if request.session_id in _agents:
         raise HTTPException(status_code=409, detail="Session already exists")
     
+    performance_profile = request.performance_profile or get_performance_config().default_profile
+    try:
+        get_performance_profile(performance_profile)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    
     config = get_config()
+    email = config.discord_email.get_secret_value()
+    password = config.discord_password.get_secret_value()
+    
+    # Shared sandboxes run one Discord account per slot
+    account = None
+    if _multiplexer:
+        try:
+            account = _multiplexer.checkout_account()
+        except PoolExhaustedError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        email = account.email
+        password = account.password.get_secret_value()
     
     # Create agent context
     context = AgentContext(
@@ -110,17 +480,35 @@ async def start_stream(request: StreamRequest, background_tasks: BackgroundTasks
         guild_id=request.guild_id,
         channel_id=request.channel_id,
         channel_name=request.channel_name,
-        discord_email=config.discord_email.get_secret_value(),
-        discord_password=config.discord_password.get_secret_value(),
+        discord_email=email,
+        discord_password=password,
         model=config.model,
         max_budget=config.max_budget_per_session,
         sandbox_image=config.sandbox_image,
         display_resolution=config.display_resolution,
+        performance_profile=performance_profile,
         webhook_url=str(request.webhook_url) if request.webhook_url else None,
     )
     
-    # Create and store agent
-    agent = StreamingAgent(context)
+    # Claim the sandbox a /prepare call started for this request, if any
+    reserved = None
+    reservations = get_reservation_manager()
+    if account:
+        reserved = asyncio.ensure_future(_multiplexer.acquire(account.email))
+    elif request.reservation_token and reservations:
+        reserved = reservations.claim(request.reservation_token)
+    
+    # Create and store agent; shared sandboxes can't be snapshotted per account
+    agent = StreamingAgent(
+        context,
+        pool=_pool,
+        snapshots=None if account else get_snapshot_store(),
+        profiles=get_profile_manager(),
+        reserved=reserved,
+        watchdog=_watchdog,
+        governor=_launcher,
+        telemetry=_telemetry,
+    )
     _agents[request.session_id] = agent
     
     # Track metrics
@@ -143,6 +531,8 @@ async def start_stream(request: StreamRequest, background_tasks: BackgroundTasks
             # Cleanup
             _agents.pop(request.session_id, None)
             _agent_tasks.pop(request.session_id, None)
+            if account and _multiplexer:
+                _multiplexer.return_account(account.email)
     
     task = asyncio.create_task(run_agent())
     _agent_tasks[request.session_id] = task
@@ -196,3 +586,14 @@ async def list_sessions():
         "count": len(_agents),
         "sessions": list(_agents.keys()),
     }
+
+
+@app.get("/sessions/{session_id}/telemetry")
+async def session_telemetry(session_id: str):
+    """Resource use samples of a session's sandbox, recent sessions included."""
+    if _telemetry is None:
+        raise HTTPException(status_code=404, detail="Telemetry disabled")
+    telemetry = _telemetry.session(session_id)
+    if telemetry is None:
+        raise HTTPException(status_code=404, detail="No telemetry for session")
+    return telemetry
@@ -0,0 +1,267 @@
+"""CPU pinning for co-located sandboxes.
+
+Left to the scheduler, the processes of every sandbox on a host migrate
+across all of its cores, so one session's video encode evicts another's
+caches and waits behind it on a busy core. With pinning enabled each docker
+sandbox gets cores of its own (``docker update --cpuset-cpus``), as many as
+its CPU limit, all on one NUMA node when a node has room; its memory is then
+kept on that node too. Sandboxes that don't fit run unpinned. Cores go back
+to the host when the sandbox stops.
+
+NUMA nodes come from sysfs for the controller's own daemon and from
+``SandboxHost.numa_nodes`` for others; without either, a host's CPUs are
+one node and memory isn't pinned.
+"""
+
+import glob
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from jamie.agent.docker import CONTROLLER_DOCKER_HOST, DockerCLI
+from jamie.shared.config import CpusetConfig, SandboxHost, get_cpuset_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+NODE_ROOT = "/sys/devices/system/node"
+
+# Stats key of the controller's own daemon when sandboxes aren't placed on hosts
+LOCAL_HOST = "local"
+
+# Same as jamie.agent.sandbox.CONTAINER_PREFIX, which imports this module
+SANDBOX_PREFIX = "jamie-sbx-"
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """Parse a kernel CPU list such as "0-3,8,10-11"."""
+    cpus: Set[int] = set()
+    for part in text.strip().split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus: Iterable[int]) -> str:
+    """Format CPUs as a kernel CPU list, the inverse of parse_cpulist."""
+    ranges: List[str] = []
+    start = previous = None
+    for cpu in sorted(set(cpus)):
+        if previous is not None and cpu == previous + 1:
+            previous = cpu
+            continue
+        if start is not None:
+            ranges.append(str(start) if start == previous else f"{start}-{previous}")
+        start = previous = cpu
+    if start is not None:
+        ranges.append(str(start) if start == previous else f"{start}-{previous}")
+    return ",".join(ranges)
+
+
+def read_numa_nodes(root: str = NODE_ROOT) -> Dict[int, List[int]]:
+    """This machine's NUMA nodes and their CPUs; empty if sysfs doesn't say."""
+    nodes: Dict[int, List[int]] = {}
+    for path in glob.glob(os.path.join(root, "node[0-9]*", "cpulist")):
+        node = int(os.path.basename(os.path.dirname(path))[len("node"):])
+        with open(path) as f:
+            cpus = parse_cpulist(f.read())
+        if cpus:
+            nodes[node] = cpus
+    return nodes
+
+
+def cores_needed(cpu: str) -> int:
+    """Dedicated cores for a sandbox with docker CPU limit cpu, e.g. "1.5" -> 2."""
+    return max(1, math.ceil(float(cpu)))
+
+
+@dataclass(frozen=True)
+class CpusetAllocation:
+    """Cores dedicated to one sandbox."""
+
+    cpus: Tuple[int, ...]
+    nodes: Tuple[int, ...]
+    # Whether nodes are the host's real NUMA nodes, so memory can follow
+    numa: bool = True
+
+    @property
+    def cpuset(self) -> str:
+        """The cores as docker's --cpuset-cpus."""
+        return format_cpulist(self.cpus)
+
+    @property
+    def mems(self) -> str:
+        """The nodes as docker's --cpuset-mems; empty when the topology isn't known."""
+        return format_cpulist(self.nodes) if self.numa else ""
+
+
+class HostCpus:
+    """Which of one host's cores are dedicated to which sandbox."""
+
+    def __init__(
+        self,
+        nodes: Dict[int, Sequence[int]],
+        reserved: Sequence[int] = (),
+        numa: bool = True,
+    ):
+        held = set(reserved)
+        self.numa = numa
+        self.reserved = sorted(cpu for cpus in nodes.values() for cpu in cpus if cpu in held)
+        self.nodes: Dict[int, List[int]] = {
+            node: [cpu for cpu in sorted(cpus) if cpu not in held]
+            for node, cpus in sorted(nodes.items())
+        }
+        self._node_of = {cpu: node for node, cpus in self.nodes.items() for cpu in cpus}
+        self._taken: Set[int] = set()
+        self.allocations: Dict[str, CpusetAllocation] = {}
+
+    def free(self, node: Optional[int] = None) -> List[int]:
+        """Unallocated cores of one node, or of the whole host."""
+        nodes = self.nodes if node is None else {node: self.nodes[node]}
+        return [cpu for cpus in nodes.values() for cpu in cpus if cpu not in self._taken]
+
+    def allocate(self, name: str, count: int) -> Optional[CpusetAllocation]:
+        """Dedicate count cores to a sandbox, on one NUMA node if any has room.
+
+        Of the nodes with room the fullest is used, keeping emptier nodes
+        whole for later sandboxes. Returns None if the host has fewer than
+        count free cores.
+        """
+        if name in self.allocations:
+            return self.allocations[name]
+        fitting = [node for node in self.nodes if len(self.free(node)) >= count]
+        if fitting:
+            node = min(fitting, key=lambda n: (len(self.free(n)), n))
+            cpus = self.free(node)[:count]
+        else:
+            # Split across nodes, as few as possible
+            cpus = []
+            for node in sorted(self.nodes, key=lambda n: -len(self.free(n))):
+                cpus += self.free(node)[:count - len(cpus)]
+            if len(cpus) < count:
+                return None
+        allocation = CpusetAllocation(
+            cpus=tuple(cpus),
+            nodes=tuple(sorted({self._node_of[cpu] for cpu in cpus})),
+            numa=self.numa,
+        )
+        self._taken.update(cpus)
+        self.allocations[name] = allocation
+        return allocation
+
+    def release(self, name: str) -> Optional[CpusetAllocation]:
+        """Give a sandbox's cores back."""
+        allocation = self.allocations.pop(name, None)
+        if allocation:
+            self._taken.difference_update(allocation.cpus)
+        return allocation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "numa": self.numa,
+            "reserved": format_cpulist(self.reserved),
+            "free": len(self.free()),
+            "nodes": {
+                str(node): {"cpus": format_cpulist(cpus), "free": len(self.free(node))}
+                for node, cpus in self.nodes.items()
+            },
+            "sandboxes": {
+                name: {"cpus": allocation.cpuset, "nodes": format_cpulist(allocation.nodes)}
+                for name, allocation in sorted(self.allocations.items())
+            },
+        }
+
+
+class CpuAllocator:
+    """Hands out dedicated cores on each host sandboxes run on."""
+
+    def __init__(
+        self,
+        config: Optional[CpusetConfig] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+        topology: Callable[[], Dict[int, List[int]]] = read_numa_nodes,
+    ):
+        self.config = config or CpusetConfig()
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        self._read_topology = topology
+        self._reserved = parse_cpulist(self.config.reserved_cpus)
+        self.hosts: Dict[str, HostCpus] = {}
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def allocate(
+        self, name: str, count: int, host: Optional[SandboxHost] = None
+    ) -> Optional[CpusetAllocation]:
+        """Dedicate count cores of host (the controller's daemon if None) to a sandbox.
+
+        Returns None when the host has no room; the sandbox then runs unpinned.
+
+        Raises:
+            DockerError: If a host's CPU count had to be asked for and couldn't be
+        """
+        key = host.name if host else LOCAL_HOST
+        if key not in self.hosts:
+            self.hosts[key] = await self._host_cpus(host)
+        cpus = self.hosts[key]
+        allocation = cpus.allocate(name, count)
+        if allocation is None:
+            self.metrics.increment("sandbox_cpuset_exhausted_total", host=key)
+            log.warning("sandbox_cpuset_exhausted", sandbox=name, host=key, cores=count)
+        else:
+            log.info(
+                "sandbox_cpuset_allocated",
+                sandbox=name,
+                host=key,
+                cpus=allocation.cpuset,
+                nodes=format_cpulist(allocation.nodes),
+            )
+        self.metrics.set_gauge("sandbox_cpus_free", len(cpus.free()), host=key)
+        return allocation
+
+    def release(self, name: str) -> None:
+        """Give back the cores of a sandbox that stopped."""
+        for key, cpus in self.hosts.items():
+            if cpus.release(name) is not None:
+                self.metrics.set_gauge("sandbox_cpus_free", len(cpus.free()), host=key)
+
+    async def _host_cpus(self, host: Optional[SandboxHost]) -> HostCpus:
+        if host and host.numa_nodes:
+            nodes = {i: parse_cpulist(cpus) for i, cpus in enumerate(host.numa_nodes)}
+            return HostCpus(nodes, self._reserved)
+        daemon = (host.docker_host if host else "") or CONTROLLER_DOCKER_HOST
+        if not daemon or daemon.startswith("unix://"):
+            nodes = self._read_topology()
+            if nodes:
+                return HostCpus(nodes, self._reserved)
+            # No sysfs: the CPUs we may use, as one node
+            return HostCpus({0: sorted(os.sched_getaffinity(0))}, self._reserved, numa=False)
+        docker = self._docker.for_host(daemon)
+        count, _, _ = await docker.host_report(SANDBOX_PREFIX)
+        return HostCpus({0: list(range(count))}, self._reserved, numa=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Each host's cores and which sandbox has them, for /stats."""
+        return {key: cpus.stats() for key, cpus in self.hosts.items()}
+
+
+# Global instance
+_allocator: Optional[CpuAllocator] = None
+
+
+def get_cpu_allocator() -> Optional[CpuAllocator]:
+    """Get the process-wide CPU allocator, or None if pinning is disabled."""
+    global _allocator
+    if _allocator is None:
+        config = get_cpuset_config()
+        if config.enabled:
+            _allocator = CpuAllocator(config)
+    return _allocator
@@ -0,0 +1,289 @@
+"""Thin async wrapper around the Docker CLI.
+
+The CUA provider owns container creation; the controller only needs a few
+side operations on those containers (commit, inspect, remove, ...), so we
+shell out to the same ``docker`` binary the provider uses instead of pulling
+in a Docker SDK.
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+_SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3, "tb": 1000 ** 4,
+    "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4,
+}
+_SIZE_PATTERN = re.compile(r"^\s*([\d.]+)\s*([a-zA-Z]*)\s*$")
+
+
+def parse_size(value: str) -> int:
+    """Parse a docker-style size such as "512.3MiB" or "4GB" into bytes."""
+    match = _SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Unrecognized size: {value!r}")
+    number, unit = match.groups()
+    multiplier = _SIZE_UNITS.get(unit.lower() or "b")
+    if multiplier is None:
+        raise ValueError(f"Unrecognized size unit: {unit!r}")
+    return int(float(number) * multiplier)
+
+
+# The daemon the controller was started against; DOCKER_HOST may be
+# repointed while a sandbox on another host boots (see jamie.agent.hosts)
+CONTROLLER_DOCKER_HOST = os.environ.get("DOCKER_HOST", "")
+
+
+def daemon_environment(host: str = "") -> Dict[str, str]:
+    """The process environment with DOCKER_HOST pointing at host, or the controller's daemon."""
+    env = dict(os.environ)
+    host = host or CONTROLLER_DOCKER_HOST
+    if host:
+        env["DOCKER_HOST"] = host
+    else:
+        env.pop("DOCKER_HOST", None)
+    return env
+
+
+class DockerError(Exception):
+    """A docker CLI command failed."""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class DockerCLI:
+    """Runs docker commands asynchronously."""
+
+    def __init__(self, binary: str = "docker", timeout: float = 120.0, host: str = ""):
+        self.binary = binary
+        self.timeout = timeout
+        # DOCKER_HOST of the daemon to talk to; empty for the controller's own
+        self.host = host
+
+    def for_host(self, host: str) -> "DockerCLI":
+        """A CLI like this one that talks to another daemon."""
+        return DockerCLI(self.binary, self.timeout, host=host)
+
+    def _command(self, args: List[str]) -> List[str]:
+        return [self.binary, *args]
+
+    async def run(self, *args: str, timeout: Optional[float] = None) -> str:
+        """Run a docker command and return its stdout.
+
+        Raises:
+            DockerError: If the command can't be started, times out or fails
+        """
+        cmd = self._command(list(args))
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=daemon_environment(self.host),
+            )
+        except FileNotFoundError as e:
+            raise DockerError(f"docker CLI not found: {self.binary}") from e
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(),
+                timeout=timeout or self.timeout,
+            )
+        except asyncio.TimeoutError as e:
+            proc.kill()
+            await proc.wait()
+            raise DockerError(f"docker {args[0]} timed out") from e
+
+        if proc.returncode != 0:
+            err = stderr.decode(errors="replace").strip()
+            raise DockerError(
+                f"docker {args[0]} failed: {err}",
+                returncode=proc.returncode,
+                stderr=err,
+            )
+        return stdout.decode(errors="replace").strip()
+
+    async def events(self, *filters: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream docker events matching filters (e.g. "event=die") as they happen.
+
+        Yields each event's JSON until docker stops streaming.
+
+        Raises:
+            DockerError: If the command can't be started or fails
+        """
+        args = ["events", "--format", "{{json .}}"]
+        for event_filter in filters:
+            args += ["--filter", event_filter]
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self._command(args),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=daemon_environment(self.host),
+            )
+        except FileNotFoundError as e:
+            raise DockerError(f"docker CLI not found: {self.binary}") from e
+
+        try:
+            async for line in proc.stdout:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    log.warning("docker_event_unparseable", line=line[:200])
+            await proc.wait()
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        if proc.returncode != 0:
+            err = (await proc.stderr.read()).decode(errors="replace").strip()
+            raise DockerError(
+                f"docker events failed: {err}",
+                returncode=proc.returncode,
+                stderr=err,
+            )
+
+    async def commit(self, container: str, image: str) -> str:
+        """Commit a container's filesystem as a new image. Returns the image ID."""
+        return await self.run("commit", container, image)
+
+    async def remove_image(self, image: str) -> None:
+        """Remove an image, ignoring images that are already gone."""
+        try:
+            await self.run("rmi", image)
+        except DockerError as e:
+            if "No such image" not in e.stderr:
+                raise
+
+    async def image_exists(self, image: str) -> bool:
+        """Check whether an image is present locally."""
+        try:
+            await self.run("image", "inspect", "--format", "{{.Id}}", image)
+            return True
+        except DockerError:
+            return False
+
+    async def pull(self, image: str) -> None:
+        """Pull an image from its registry."""
+        await self.run("pull", "--quiet", image, timeout=max(self.timeout, 900))
+
+    async def touch_image(self, image: str) -> None:
+        """Create and remove a throwaway container so the image's layers are warm."""
+        await self.run("run", "--rm", "--entrypoint", "true", image)
+
+    async def copy(self, source: str, destination: str) -> None:
+        """Copy files between the local filesystem and a container (docker cp)."""
+        await self.run("cp", source, destination)
+
+    async def exec(self, container: str, *cmd: str, user: Optional[str] = None) -> str:
+        """Run a command inside a running container."""
+        args = ["exec"]
+        if user:
+            args += ["--user", user]
+        return await self.run(*args, container, *cmd)
+
+    async def run_in_network(
+        self, container: str, image: str, *cmd: str, cap_add: Sequence[str] = ()
+    ) -> str:
+        """Run a throwaway container in another container's network namespace."""
+        args = ["run", "--rm", "--network", f"container:{container}"]
+        for capability in cap_add:
+            args += ["--cap-add", capability]
+        return await self.run(*args, image, *cmd, timeout=60)
+
+    async def container_running(self, container: str) -> bool:
+        """Whether a container exists and is running. Never raises."""
+        try:
+            out = await self.run(
+                "inspect", "--format", "{{.State.Running}}", container,
+                timeout=10,
+            )
+        except DockerError:
+            return False
+        return out == "true"
+
+    async def list_containers(self, name_prefix: str) -> List[str]:
+        """Names of all containers (running or not) whose name starts with a prefix."""
+        out = await self.run(
+            "ps", "--all", "--filter", f"name=^{name_prefix}", "--format", "{{.Names}}",
+            timeout=30,
+        )
+        # The name filter is a regex match; re-check the prefix literally
+        return [name for name in out.splitlines() if name.startswith(name_prefix)]
+
+    async def container_resources(self, container: str) -> Tuple[float, int]:
+        """CPU and memory limits of a container as (cpus, bytes); 0 means unlimited."""
+        out = await self.run(
+            "inspect", "--format", "{{.HostConfig.NanoCpus}} {{.HostConfig.Memory}}", container,
+            timeout=10,
+        )
+        nano_cpus, memory = out.split()
+        return int(nano_cpus) / 1e9, int(memory)
+
+    async def update_memory(self, container: str, limit: str) -> None:
+        """Change a running container's memory limit (swap included, so none is added)."""
+        await self.run(
+            "update", "--memory", limit, "--memory-swap", limit, container, timeout=30
+        )
+
+    async def update_cpuset(self, container: str, cpus: str, mems: str = "") -> None:
+        """Pin a running container to CPU list cpus and, if given, memory nodes mems."""
+        args = ["--cpuset-cpus", cpus]
+        if mems:
+            args += ["--cpuset-mems", mems]
+        await self.run("update", *args, container, timeout=30)
+
+    async def host_report(self, name_prefix: str) -> Tuple[int, int, List[str]]:
+        """The daemon's CPUs, memory bytes and running containers whose name has a prefix."""
+        info = await self.run("info", "--format", "{{.NCPU}} {{.MemTotal}}", timeout=30)
+        cpus, memory = info.split()
+        out = await self.run(
+            "ps", "--filter", f"name=^{name_prefix}", "--format", "{{.Names}}", timeout=30
+        )
+        running = [name for name in out.splitlines() if name.startswith(name_prefix)]
+        return int(cpus), int(memory), running
+
+    async def remove_container(self, container: str) -> None:
+        """Force-remove a container, ignoring containers that are already gone."""
+        try:
+            await self.run("rm", "--force", container, timeout=60)
+        except DockerError as e:
+            if "No such container" not in e.stderr:
+                raise
+
+    async def container_root(self, container: str) -> str:
+        """Host path of a container's merged root filesystem (overlay2 and similar)."""
+        out = await self.run(
+            "inspect", "--format", "{{.GraphDriver.Data.MergedDir}}", container,
+            timeout=10,
+        )
+        if not out or out == "<no value>":
+            raise DockerError(f"No merged root filesystem for {container}")
+        return out
+
+    async def container_pid(self, container: str) -> int:
+        """Host PID of a running container's init process."""
+        out = await self.run("inspect", "--format", "{{.State.Pid}}", container, timeout=10)
+        pid = int(out)
+        if pid <= 0:
+            raise DockerError(f"{container} is not running")
+        return pid
+
+    async def memory_usage(self, container: str) -> int:
+        """Current memory usage of a container in bytes."""
+        out = await self.run(
+            "stats", "--no-stream", "--format", "{{.MemUsage}}", container,
+            timeout=30,
+        )
+        # e.g. "1.2GiB / 4GiB"
+        return parse_size(out.split("/")[0])
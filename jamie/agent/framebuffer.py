@@ -0,0 +1,288 @@
+"""Screen capture straight from a sandbox's framebuffer file.
+
+Xvfb started with ``-fbdir DIR`` keeps its screen in ``DIR/Xvfb_screen0``,
+an XWD image it updates in place. Mapping that file gives the controller the
+current pixels without a computer-server round trip or a PNG encode inside
+the sandbox. Frames are memoryviews into the mapping: nothing is copied
+until a caller converts one (e.g. to PNG for the VLM).
+
+Reads are not synchronized with the X server, so a frame taken mid-draw can
+mix two screen states, just like a VNC client's would.
+"""
+
+import asyncio
+import io
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+if TYPE_CHECKING:
+    from jamie.agent.imaging import ScreenshotEncoder
+
+log = get_logger(__name__)
+
+# Name of screen 0's file in Xvfb's -fbdir
+XVFB_SCREEN_FILE = "Xvfb_screen0"
+
+# Histogram of screenshot capture time, labeled by backend
+CAPTURE_METRIC = "screenshot_capture_seconds"
+CAPTURE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+XWD_FILE_VERSION = 7
+ZPIXMAP = 2
+LSB_FIRST = 0
+
+# XWDFileHeader: 25 CARD32 fields
+_HEADER_FIELDS = (
+    "header_size", "file_version", "pixmap_format", "pixmap_depth",
+    "pixmap_width", "pixmap_height", "xoffset", "byte_order", "bitmap_unit",
+    "bitmap_bit_order", "bitmap_pad", "bits_per_pixel", "bytes_per_line",
+    "visual_class", "red_mask", "green_mask", "blue_mask", "bits_per_rgb",
+    "colormap_entries", "ncolors", "window_width", "window_height",
+    "window_x", "window_y", "window_bdrwidth",
+)
+_HEADER_SIZE = 4 * len(_HEADER_FIELDS)
+_COLOR_SIZE = 12
+
+
+class FramebufferError(Exception):
+    """The framebuffer file is missing, truncated or in a format we can't read."""
+    pass
+
+
+@dataclass
+class XWDHeader:
+    """The parts of an XWD header needed to interpret its pixels."""
+
+    width: int
+    height: int
+    depth: int
+    bits_per_pixel: int
+    bytes_per_line: int
+    byte_order: int
+    red_mask: int
+    green_mask: int
+    blue_mask: int
+    # Offset of the first pixel in the file
+    pixel_offset: int
+
+    @property
+    def raw_mode(self) -> str:
+        """Pillow raw decoder mode for these pixels."""
+        masks = (self.red_mask, self.green_mask, self.blue_mask)
+        lsb = self.byte_order == LSB_FIRST
+        if self.bits_per_pixel == 32 and masks == (0xFF0000, 0x00FF00, 0x0000FF):
+            return "BGRX" if lsb else "XRGB"
+        if self.bits_per_pixel == 32 and masks == (0x0000FF, 0x00FF00, 0xFF0000):
+            return "RGBX" if lsb else "XBGR"
+        if self.bits_per_pixel == 24 and masks == (0xFF0000, 0x00FF00, 0x0000FF):
+            return "BGR" if lsb else "RGB"
+        if self.bits_per_pixel == 16 and masks == (0xF800, 0x07E0, 0x001F) and lsb:
+            return "BGR;16"
+        raise FramebufferError(
+            f"Unsupported pixel format: {self.bits_per_pixel} bpp, "
+            f"masks {tuple(hex(m) for m in masks)}, byte order {self.byte_order}"
+        )
+
+
+def parse_header(buffer) -> XWDHeader:
+    """Parse the XWD header at the start of buffer.
+
+    Xvfb writes the header big-endian; little-endian headers are accepted too.
+    """
+    if len(buffer) < _HEADER_SIZE:
+        raise FramebufferError("File too short for an XWD header")
+    for endian in (">", "<"):
+        values = dict(zip(_HEADER_FIELDS, struct.unpack_from(f"{endian}25I", buffer)))
+        if values["file_version"] == XWD_FILE_VERSION:
+            break
+    else:
+        raise FramebufferError("Not an XWD version 7 file")
+    if values["pixmap_format"] != ZPIXMAP:
+        raise FramebufferError(f"Unsupported pixmap format {values['pixmap_format']}")
+
+    header = XWDHeader(
+        width=values["pixmap_width"],
+        height=values["pixmap_height"],
+        depth=values["pixmap_depth"],
+        bits_per_pixel=values["bits_per_pixel"],
+        bytes_per_line=values["bytes_per_line"],
+        byte_order=values["byte_order"],
+        red_mask=values["red_mask"],
+        green_mask=values["green_mask"],
+        blue_mask=values["blue_mask"],
+        pixel_offset=values["header_size"] + values["ncolors"] * _COLOR_SIZE,
+    )
+    if header.pixel_offset + header.bytes_per_line * header.height > len(buffer):
+        raise FramebufferError("Framebuffer file is shorter than its header says")
+    return header
+
+
+@dataclass
+class Frame:
+    """One screen's pixels, viewed in place in the framebuffer mapping."""
+
+    header: XWDHeader
+    # Rows of bytes_per_line bytes, top to bottom; shares memory with the file
+    pixels: memoryview
+    captured_at: float
+
+    @property
+    def width(self) -> int:
+        return self.header.width
+
+    @property
+    def height(self) -> int:
+        return self.header.height
+
+    def row(self, y: int) -> memoryview:
+        """Pixels of row y, without copying."""
+        stride = self.header.bytes_per_line
+        return self.pixels[y * stride:(y + 1) * stride]
+
+    def to_image(self):
+        """Copy the frame into an RGB Pillow image."""
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError("Pillow is required to convert framebuffer frames") from None
+        return Image.frombuffer(
+            "RGB",
+            (self.width, self.height),
+            self.pixels,
+            "raw",
+            self.header.raw_mode,
+            self.header.bytes_per_line,
+            1,
+        )
+
+    def to_png(self) -> bytes:
+        """Encode the frame as PNG, like a computer-server screenshot."""
+        out = io.BytesIO()
+        self.to_image().save(out, format="PNG", compress_level=1)
+        return out.getvalue()
+
+
+class FramebufferReader:
+    """Maps an XWD framebuffer file and hands out zero-copy frames."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._open()
+
+    def _open(self) -> None:
+        try:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self.close()
+            raise FramebufferError(f"Can't map {self.path}: {e}") from e
+
+    def frame(self) -> Frame:
+        """The current screen contents.
+
+        Remaps the file first if the X server resized it.
+        """
+        if self._map is None:
+            raise FramebufferError("Framebuffer reader is closed")
+        if os.fstat(self._file.fileno()).st_size != len(self._map):
+            self._remap()
+        header = parse_header(self._map)
+        start = header.pixel_offset
+        end = start + header.bytes_per_line * header.height
+        return Frame(
+            header=header,
+            pixels=memoryview(self._map)[start:end],
+            captured_at=time.time(),
+        )
+
+    def _remap(self) -> None:
+        self.close()
+        self._open()
+
+    def close(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Frames still reference it; it goes away with them
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FramebufferInterface:
+    """Computer interface whose screenshots come from the framebuffer.
+
+    Frames are encoded by the screenshot encoder when there is one, or as
+    PNG otherwise. Everything else, and screenshots whenever the framebuffer
+    can't be read, goes to the wrapped computer-server interface.
+    """
+
+    def __init__(
+        self,
+        interface,
+        reader: FramebufferReader,
+        metrics: Optional[MetricsCollector] = None,
+        encoder: Optional["ScreenshotEncoder"] = None,
+        phase: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self._interface = interface
+        self._reader = reader
+        self._metrics = metrics
+        self._encoder = encoder
+        self._phase = phase or (lambda: None)
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def screenshot(self) -> bytes:
+        started = time.monotonic()
+        try:
+            if self._encoder:
+                image = await self._encoder.encode(self._reader.frame(), self._phase())
+            else:
+                image = await asyncio.to_thread(lambda: self._reader.frame().to_png())
+            backend = "framebuffer"
+        except (FramebufferError, OSError, ValueError, RuntimeError) as e:
+            log.warning("framebuffer_capture_failed", path=self._reader.path, error=str(e))
+            image = await self._interface.screenshot()
+            if self._encoder:
+                image = await self._encoder.encode(image, self._phase())
+            backend = "server"
+        self.metrics.observe(
+            CAPTURE_METRIC, time.monotonic() - started, buckets=CAPTURE_BUCKETS, backend=backend
+        )
+        return image
+
+    def __getattr__(self, name: str):
+        return getattr(self._interface, name)
+
+
+class FramebufferComputer:
+    """A Computer whose interface takes screenshots from the framebuffer."""
+
+    def __init__(
+        self,
+        computer,
+        reader: FramebufferReader,
+        metrics: Optional[MetricsCollector] = None,
+        encoder: Optional["ScreenshotEncoder"] = None,
+        phase: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self._computer = computer
+        self.interface = FramebufferInterface(computer.interface, reader, metrics, encoder, phase)
+
+    def __getattr__(self, name: str):
+        return getattr(self._computer, name)
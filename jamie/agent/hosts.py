@@ -0,0 +1,283 @@
+"""Multi-host sandbox placement for Jamie agent.
+
+One docker daemon caps the streams a controller can run at what one machine
+holds. With placement configured, each sandbox is booted on one of several
+daemons (remote hosts, or local stand-ins on other sockets): the one with
+the least memory committed to sandboxes, relative to what it has, that
+still fits the new sandbox. Hosts report their memory and running sandboxes
+every ``refresh_interval`` seconds; placements made since the last report
+are counted on top. A sandbox keeps its host for its lifetime, restarts
+included.
+
+The CUA provider creates containers with the ``docker`` CLI and the
+controller's environment, so while a sandbox on another host boots or stops
+``DOCKER_HOST`` points at that host. Boots on the same daemon overlap;
+boots on different daemons take turns. ``DockerCLI`` sets the daemon on
+each command, so the controller's own docker calls are unaffected.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Set
+
+from jamie.agent.docker import DockerCLI, DockerError, daemon_environment, parse_size
+from jamie.shared.config import PlacementConfig, SandboxHost, get_placement_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Same as jamie.agent.sandbox.CONTAINER_PREFIX, which imports this module
+SANDBOX_PREFIX = "jamie-sbx-"
+
+
+class NoHostAvailableError(Exception):
+    """No host has room for another sandbox."""
+    pass
+
+
+@dataclass
+class HostState:
+    """A host's last capacity report and the sandboxes placed on it."""
+
+    host: SandboxHost
+    reachable: bool = False
+    cpus: int = 0
+    memory_bytes: int = 0
+    # Sandbox containers the daemon reported running
+    reported: Set[str] = field(default_factory=set)
+    # Sandboxes placed here that are still running -> their memory limit
+    placed: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def committed_bytes(self, default_footprint: int) -> int:
+        """Memory promised to sandboxes: placed ones, plus others the daemon runs."""
+        others = len(self.reported - self.placed.keys())
+        return sum(self.placed.values()) + others * default_footprint
+
+    @property
+    def sandboxes(self) -> int:
+        """Sandboxes running or placed, including ones not reported yet."""
+        return len(self.reported | self.placed.keys())
+
+
+class HostPlacer:
+    """Places sandboxes on the least-loaded host that fits them."""
+
+    def __init__(
+        self,
+        config: Optional[PlacementConfig] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+        default_footprint: int = 4 * 1000 ** 3,
+    ):
+        self.config = config or PlacementConfig()
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        # Assumed memory of sandboxes the daemon runs that weren't placed here;
+        # SandboxConfig's default limit
+        self.default_footprint = default_footprint
+        self.hosts: Dict[str, HostState] = {
+            host.name: HostState(host) for host in self.config.hosts
+        }
+        self._reserve = parse_size(self.config.memory_reserve)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def start(self) -> None:
+        """Get a first report from every host, then keep them current."""
+        if self._task is None:
+            await self.refresh()
+            self._task = asyncio.create_task(self._loop())
+            log.info(
+                "placement_started",
+                hosts=len(self.hosts),
+                reachable=sum(state.reachable for state in self.hosts.values()),
+            )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> None:
+        """Ask every host for its capacity."""
+        await asyncio.gather(*(self._refresh_host(state) for state in self.hosts.values()))
+
+    async def _refresh_host(self, state: HostState) -> None:
+        docker = self._docker.for_host(state.host.docker_host)
+        try:
+            state.cpus, state.memory_bytes, running = await docker.host_report(SANDBOX_PREFIX)
+        except (DockerError, ValueError) as e:
+            if state.reachable:
+                log.warning("placement_host_unreachable", host=state.host.name, error=str(e))
+            state.reachable = False
+            state.error = str(e)
+            return
+        state.reported = set(running)
+        state.reachable = True
+        state.error = None
+        self._set_gauges(state)
+
+    def load(self, state: HostState, extra_bytes: int = 0) -> float:
+        """Share of a host's usable memory committed to sandboxes, plus extra_bytes."""
+        usable = state.memory_bytes - self._reserve
+        if usable <= 0:
+            return float("inf")
+        return (state.committed_bytes(self.default_footprint) + extra_bytes) / usable
+
+    def _fits(self, state: HostState, footprint: int) -> bool:
+        if not state.reachable:
+            return False
+        limit = state.host.max_sandboxes
+        if limit and state.sandboxes >= limit:
+            return False
+        return self.load(state, footprint) <= 1.0
+
+    def place(self, name: str, footprint: int, pinned: Optional[str] = None) -> SandboxHost:
+        """Pick the host for a sandbox and count it there until ``release``.
+
+        A pinned sandbox goes back to its host whatever that host's load.
+
+        Raises:
+            NoHostAvailableError: If no host has room
+        """
+        if pinned is not None and pinned in self.hosts:
+            state = self.hosts[pinned]
+        else:
+            candidates = [s for s in self.hosts.values() if self._fits(s, footprint)]
+            if not candidates:
+                raise NoHostAvailableError(
+                    f"No sandbox host has room for {footprint // (1024 * 1024)}MB"
+                )
+            state = min(candidates, key=lambda s: (self.load(s, footprint), s.sandboxes))
+        state.placed[name] = footprint
+        self.metrics.increment("sandbox_placements_total", host=state.host.name)
+        self._set_gauges(state)
+        log.info(
+            "sandbox_placed",
+            sandbox=name,
+            host=state.host.name,
+            pinned=pinned is not None,
+            load=round(self.load(state), 3),
+        )
+        return state.host
+
+    def release(self, name: str) -> None:
+        """Stop counting a sandbox that was stopped or failed to boot."""
+        for state in self.hosts.values():
+            if state.placed.pop(name, None) is not None:
+                self._set_gauges(state)
+
+    def _set_gauges(self, state: HostState) -> None:
+        name = state.host.name
+        self.metrics.set_gauge("sandbox_host_sandboxes", state.sandboxes, host=name)
+        if state.memory_bytes:
+            self.metrics.set_gauge("sandbox_host_memory_load", self.load(state), host=name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Each host's capacity and load for /stats."""
+        return {
+            name: {
+                "reachable": state.reachable,
+                "cpus": state.cpus,
+                "memory_gb": round(state.memory_bytes / 1000 ** 3, 1),
+                "sandboxes": state.sandboxes,
+                "placed": sorted(state.placed),
+                "memory_load": round(self.load(state), 3) if state.memory_bytes else None,
+                "error": state.error,
+            }
+            for name, state in self.hosts.items()
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.error("placement_refresh_failed", error=str(e))
+
+
+class ProviderDaemon:
+    """Points DOCKER_HOST at one daemon at a time for the CUA provider's docker calls."""
+
+    def __init__(self):
+        self._cond: Optional[asyncio.Condition] = None
+        self._host: Optional[str] = None
+        self._users = 0
+
+    @asynccontextmanager
+    async def use(self, docker_host: str) -> AsyncIterator[None]:
+        """Hold DOCKER_HOST at docker_host ("" for the controller's daemon) for the body."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._users == 0 or self._host == docker_host)
+            if self._users == 0:
+                self._host = docker_host
+                self._point(docker_host)
+            self._users += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._users -= 1
+                if self._users == 0:
+                    self._host = None
+                    self._point("")
+                self._cond.notify_all()
+
+    @staticmethod
+    def _point(docker_host: str) -> None:
+        value = daemon_environment(docker_host).get("DOCKER_HOST")
+        if value:
+            os.environ["DOCKER_HOST"] = value
+        else:
+            os.environ.pop("DOCKER_HOST", None)
+
+
+# Global instances
+def placement_daemons(docker: DockerCLI, hosts: Sequence[SandboxHost]) -> Dict[str, DockerCLI]:
+    """DOCKER_HOST -> CLI for each daemon sandboxes are placed on.
+    
+    Just docker's own daemon when no hosts are configured.
+    """
+    docker_hosts = list(dict.fromkeys(host.docker_host for host in hosts))
+    if not docker_hosts:
+        return {docker.host: docker}
+    return {
+        docker_host: docker if docker_host == docker.host else docker.for_host(docker_host)
+        for docker_host in docker_hosts
+    }
+
+
+_placer: Optional[HostPlacer] = None
+_provider_daemon: Optional[ProviderDaemon] = None
+
+
+def get_host_placer() -> Optional[HostPlacer]:
+    """Get the process-wide host placer, or None if no hosts are configured."""
+    global _placer
+    if _placer is None:
+        config = get_placement_config()
+        if config.hosts:
+            _placer = HostPlacer(config)
+    return _placer
+
+
+def get_provider_daemon() -> ProviderDaemon:
+    """Get the process-wide DOCKER_HOST switch."""
+    global _provider_daemon
+    if _provider_daemon is None:
+        _provider_daemon = ProviderDaemon()
+    return _provider_daemon
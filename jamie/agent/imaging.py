@@ -0,0 +1,217 @@
+"""Screenshot encoding pipeline for Jamie agent.
+
+Screenshots otherwise reach the model exactly as captured. Re-encoding them
+(another format, lower quality, fewer colors) trades fidelity for upload size
+and model latency, but it is CPU-bound work that must stay off the event loop
+the FastAPI handlers share. The encoder runs it on a small, bounded thread
+pool and records bytes and encode time per frame, labeled by format and agent
+phase, so settings can be tuned per phase.
+"""
+
+import asyncio
+import dataclasses
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from jamie.agent.framebuffer import Frame
+from jamie.shared.config import ImagingConfig, get_imaging_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Histograms of encode time and encoded size, labeled by format and phase
+ENCODE_METRIC = "screenshot_encode_seconds"
+BYTES_METRIC = "screenshot_bytes"
+ENCODE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTES_BUCKETS = (16e3, 32e3, 64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 4e6)
+
+# Pillow format names
+FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+# Returns the agent phase a screenshot is taken in, if known
+PhaseSource = Callable[[], Optional[str]]
+
+# Crop box: left, top, right, bottom
+Box = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class EncodeSettings:
+    """How to encode one screenshot."""
+
+    format: str = "png"
+    # JPEG/WebP quality
+    quality: int = 80
+    # PNG palette size; 0 keeps full color
+    colors: int = 0
+
+    def __post_init__(self) -> None:
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported screenshot format {self.format!r}")
+        if self.colors and not 2 <= self.colors <= 256:
+            raise ValueError("colors must be 0 or between 2 and 256")
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether a PNG can be sent on as captured."""
+        return self.format == "png" and not self.colors
+
+
+def _pil():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Pillow is required to re-encode screenshots") from None
+    return Image
+
+
+def encode_image(image, settings: EncodeSettings) -> bytes:
+    """Encode a Pillow image with the given settings."""
+    pil = _pil()
+    image = image.convert("RGB")
+    out = io.BytesIO()
+    if settings.format == "png":
+        if settings.colors:
+            image = image.quantize(colors=settings.colors, method=pil.Quantize.FASTOCTREE)
+        image.save(out, format="PNG", compress_level=1)
+    elif settings.format == "jpeg":
+        image.save(out, format="JPEG", quality=settings.quality)
+    else:
+        image.save(out, format="WEBP", quality=settings.quality, method=0)
+    return out.getvalue()
+
+
+class ScreenshotEncoder:
+    """Encodes screenshots on a bounded thread pool."""
+
+    def __init__(
+        self,
+        default: Optional[EncodeSettings] = None,
+        phases: Optional[Dict[str, EncodeSettings]] = None,
+        max_workers: int = 2,
+        metrics: Optional[MetricsCollector] = None,
+    ):
+        self.default = default or EncodeSettings()
+        self.phases = dict(phases or {})
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="jamie-encode")
+        # Frames wait here rather than queueing up inside the executor
+        self._slots = asyncio.Semaphore(max_workers)
+        self._metrics = metrics
+
+    @classmethod
+    def from_config(cls, config: ImagingConfig) -> "ScreenshotEncoder":
+        default = EncodeSettings(format=config.format, quality=config.quality, colors=config.colors)
+        phases = {
+            phase: dataclasses.replace(default, **override.model_dump(exclude_none=True))
+            for phase, override in config.phases.items()
+        }
+        return cls(default, phases, max_workers=config.max_workers)
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    def settings_for(self, phase: Optional[str]) -> EncodeSettings:
+        return self.phases.get(phase, self.default) if phase else self.default
+
+    async def encode(
+        self,
+        source: Union[bytes, Frame],
+        phase: Optional[str] = None,
+        box: Optional[Box] = None,
+    ) -> bytes:
+        """Encode a captured PNG or a framebuffer frame for the given phase.
+        
+        With a box, only that part of the screen is kept; it is cropped and
+        encoded in the same pass.
+        """
+        settings = self.settings_for(phase)
+        if isinstance(source, bytes) and settings.passthrough and box is None:
+            return source
+
+        started = time.monotonic()
+        async with self._slots:
+            data = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._encode, source, settings, box
+            )
+        labels = {"format": settings.format, "phase": phase or "unknown"}
+        self.metrics.observe(
+            ENCODE_METRIC, time.monotonic() - started, buckets=ENCODE_BUCKETS, **labels
+        )
+        self.metrics.observe(BYTES_METRIC, len(data), buckets=BYTES_BUCKETS, **labels)
+        return data
+
+    def _encode(
+        self, source: Union[bytes, Frame], settings: EncodeSettings, box: Optional[Box]
+    ) -> bytes:
+        if isinstance(source, Frame):
+            image = source.to_image()
+        else:
+            image = _pil().open(io.BytesIO(source))
+        if box is not None:
+            image = image.crop(box)
+        return encode_image(image, settings)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EncodingInterface:
+    """Computer interface whose screenshots go through the encoder."""
+
+    def __init__(self, interface, encoder: ScreenshotEncoder, phase: PhaseSource):
+        self._interface = interface
+        self._encoder = encoder
+        self._phase = phase
+
+    async def screenshot(self) -> bytes:
+        return await self._encoder.encode(await self._interface.screenshot(), self._phase())
+
+    def __getattr__(self, name: str):
+        return getattr(self._interface, name)
+
+
+class EncodingComputer:
+    """A Computer whose interface re-encodes screenshots."""
+
+    def __init__(self, computer, encoder: ScreenshotEncoder, phase: PhaseSource):
+        self._computer = computer
+        self.interface = EncodingInterface(computer.interface, encoder, phase)
+
+    def __getattr__(self, name: str):
+        return getattr(self._computer, name)
+
+
+_encoder: Optional[ScreenshotEncoder] = None
+_png_encoder: Optional[ScreenshotEncoder] = None
+
+
+def get_screenshot_encoder() -> Optional[ScreenshotEncoder]:
+    """Get the shared screenshot encoder, or None if re-encoding is disabled."""
+    global _encoder
+    if _encoder is None:
+        config = get_imaging_config()
+        if config.enabled:
+            _encoder = ScreenshotEncoder.from_config(config)
+            log.info(
+                "screenshot_encoder_started",
+                format=config.format,
+                phases=sorted(config.phases),
+                max_workers=config.max_workers,
+            )
+    return _encoder
+
+
+def get_png_encoder() -> ScreenshotEncoder:
+    """Get a full-color PNG encoder, for screenshots that must be re-encoded anyway.
+    
+    E.g. cropped ones, when re-encoding is disabled.
+    """
+    global _png_encoder
+    if _png_encoder is None:
+        _png_encoder = ScreenshotEncoder()
+    return _png_encoder
@@ -0,0 +1,208 @@
+"""Sandbox launch governor for Jamie agent.
+
+Every stream request that can't lease a warm sandbox boots one, and a burst
+of requests would start all of their containers at the same moment. Image
+layers, the browser's first start and the desktop all hit the disk and CPU
+together, so each boot gets slower than it would be on its own. Boots go
+through the governor instead: at most ``max_concurrent`` run at once, their
+starts are ``stagger`` seconds apart, and the longest-waiting request goes
+next, with sessions ahead of the pool's background refills.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from jamie.shared.config import LaunchConfig
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Launch priorities: a session waiting for its sandbox, and pool refills
+SESSION = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {SESSION: "session", BACKGROUND: "background"}
+
+# Histogram of seconds from a boot being requested to it starting, labeled by priority
+WAIT_METRIC = "sandbox_launch_wait_seconds"
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    requested_at: float
+    seq: int
+    name: str = field(compare=False)
+    granted: "asyncio.Future[None]" = field(compare=False)
+
+
+class LaunchGovernor:
+    """Admits sandbox boots a few at a time, longest-waiting first."""
+
+    def __init__(
+        self,
+        config: Optional[LaunchConfig] = None,
+        metrics: Optional[MetricsCollector] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or LaunchConfig()
+        self._metrics = metrics
+        self._clock = clock
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._last_start: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Totals for /stats
+        self._launches = 0
+        self._max_wait = 0.0
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    @property
+    def active(self) -> int:
+        """Boots currently running."""
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        """Boots queued behind the running ones."""
+        return len(self._waiting)
+
+    @asynccontextmanager
+    async def launch(
+        self,
+        name: str,
+        priority: int = SESSION,
+        requested_at: Optional[float] = None,
+    ) -> AsyncIterator[float]:
+        """Hold a boot slot for the body; yields the seconds spent queued.
+
+        requested_at (on the governor's clock) is when the caller started
+        waiting for a sandbox, so time it already spent elsewhere, e.g. on a
+        reservation that failed, counts towards its place in the queue.
+        """
+        waited = await self._acquire(name, priority, requested_at)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    async def _acquire(self, name: str, priority: int, requested_at: Optional[float]) -> float:
+        requested_at = self._clock() if requested_at is None else requested_at
+        waiter = _Waiter(
+            priority=priority,
+            requested_at=requested_at,
+            seq=next(self._seq),
+            name=name,
+            granted=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._waiting, waiter)
+        self._dispatch()
+        try:
+            await waiter.granted
+        except asyncio.CancelledError:
+            if not waiter.granted.cancelled():
+                # Granted as we were cancelled; hand the slot on
+                self._release()
+            elif waiter in self._waiting:
+                self._waiting.remove(waiter)
+                heapq.heapify(self._waiting)
+                self._set_gauges()
+            raise
+
+        waited = max(0.0, self._clock() - requested_at)
+        self._launches += 1
+        self._max_wait = max(self._max_wait, waited)
+        label = PRIORITY_NAMES.get(priority, str(priority))
+        self.metrics.observe(WAIT_METRIC, waited, priority=label)
+        log.info(
+            "sandbox_launch_started",
+            name=name,
+            priority=label,
+            waited_seconds=round(waited, 3),
+            active=self._active,
+            waiting=len(self._waiting),
+        )
+        return waited
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start as many queued boots as the limit and the stagger allow."""
+        while self._waiting and self._active < self.config.max_concurrent:
+            now = self._clock()
+            if self._last_start is not None:
+                delay = self._last_start + self.config.stagger - now
+                if delay > 0:
+                    self._schedule(delay)
+                    break
+            waiter = heapq.heappop(self._waiting)
+            if waiter.granted.done():
+                # Cancelled, not yet out of the queue
+                continue
+            self._active += 1
+            self._last_start = now
+            waiter.granted.set_result(None)
+        self._set_gauges()
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            return
+
+        def wake() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay, wake)
+
+    def _set_gauges(self) -> None:
+        self.metrics.set_gauge("sandbox_launches_active", self._active)
+        self.metrics.set_gauge("sandbox_launches_waiting", len(self._waiting))
+
+    def stats(self) -> Dict[str, Any]:
+        """Running and queued boots for /stats."""
+        now = self._clock()
+        return {
+            "max_concurrent": self.config.max_concurrent,
+            "stagger": self.config.stagger,
+            "active": self._active,
+            "launches": self._launches,
+            "max_wait_seconds": round(self._max_wait, 3),
+            "waiting": [
+                {
+                    "name": waiter.name,
+                    "priority": PRIORITY_NAMES.get(waiter.priority, str(waiter.priority)),
+                    "waited_seconds": round(now - waiter.requested_at, 3),
+                }
+                for waiter in sorted(self._waiting)
+            ],
+        }
+
+
+async def start_sandbox(
+    manager: Any,
+    governor: Optional[LaunchGovernor],
+    priority: int = SESSION,
+    requested_at: Optional[float] = None,
+) -> Optional[float]:
+    """Start a SandboxManager, through the governor if there is one.
+
+    Returns the seconds the boot was queued, or None without a governor.
+    """
+    if governor is None:
+        await manager.start()
+        return None
+    async with governor.launch(manager.container_name, priority, requested_at) as waited:
+        await manager.start()
+    return waited
@@ -0,0 +1,457 @@
+"""Docker-free sandbox provider for Jamie agent.
+
+Starts a sandbox's display as plain child processes of the controller: an
+Xvfb server, a window manager, and whatever the agent launches (the
+browser). Each sandbox gets its own directory tree under the configured
+root, which stands in for the container's filesystem: sandbox paths such as
+the browser profile path are mapped into it, and it is deleted when the
+sandbox stops. Input goes through xdotool and screenshots come straight
+from Xvfb's -fbdir framebuffer file, so there is no computer-server either.
+
+Without a container there is no resource limit, image or snapshot; the
+sandbox is only as isolated as its directory and process group.
+"""
+
+import asyncio
+import ctypes
+import os
+import shlex
+import shutil
+import signal
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from jamie.agent.framebuffer import XVFB_SCREEN_FILE, FramebufferError, FramebufferReader
+from jamie.shared.config import SandboxProviderConfig, get_sandbox_provider_config
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+LOCAL_PROVIDER = "local"
+
+# Display numbers claimed by sandboxes of this process
+_claimed_displays: Set[int] = set()
+
+# cua key names -> X keysyms
+_KEYSYMS = {
+    "enter": "Return",
+    "return": "Return",
+    "esc": "Escape",
+    "escape": "Escape",
+    "backspace": "BackSpace",
+    "tab": "Tab",
+    "space": "space",
+    "delete": "Delete",
+    "home": "Home",
+    "end": "End",
+    "pageup": "Page_Up",
+    "pagedown": "Page_Down",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+    "ctrl": "ctrl",
+    "control": "ctrl",
+    "alt": "alt",
+    "shift": "shift",
+    "cmd": "super",
+    "command": "super",
+    "super": "super",
+    "win": "super",
+    "meta": "super",
+}
+
+_BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+
+class LocalSandboxError(Exception):
+    """A local sandbox process failed to start or a command in it failed."""
+    pass
+
+
+@dataclass
+class CommandResult:
+    """Output of a command run in a local sandbox."""
+
+    stdout: str
+    stderr: str
+    returncode: int
+
+
+def keysym(key: str) -> str:
+    """The X keysym xdotool expects for a cua key name."""
+    lowered = key.lower()
+    if lowered in _KEYSYMS:
+        return _KEYSYMS[lowered]
+    if len(lowered) in (2, 3) and lowered[0] == "f" and lowered[1:].isdigit():
+        return lowered.upper()
+    return key
+
+
+def copy_path(source: str, destination: str) -> None:
+    """Copy like ``docker cp``: ``dir/.`` copies the directory's contents."""
+    if source.endswith("/."):
+        shutil.copytree(source[:-2], destination, symlinks=True, dirs_exist_ok=True)
+    elif os.path.isdir(source):
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, os.path.basename(source.rstrip("/")))
+        shutil.copytree(source, destination, symlinks=True, dirs_exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        shutil.copy2(source, destination)
+
+
+def _die_with_parent() -> None:
+    """Have the kernel SIGTERM this process when the controller dies."""
+    try:
+        # PR_SET_PDEATHSIG
+        ctypes.CDLL(None).prctl(1, signal.SIGTERM)
+    except (OSError, AttributeError):
+        pass
+
+
+def _claim_display(first: int) -> int:
+    """Claim the lowest free X display number from first on."""
+    number = first
+    while (
+        number in _claimed_displays
+        or os.path.exists(f"/tmp/.X{number}-lock")
+        or os.path.exists(f"/tmp/.X11-unix/X{number}")
+    ):
+        number += 1
+    _claimed_displays.add(number)
+    return number
+
+
+def _group_stats(groups: Set[int]) -> Tuple[int, int]:
+    """CPU clock ticks and resident bytes of every process in the given process groups."""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    ticks = 0
+    rss = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesized command name, which may contain spaces
+        fields = stat[stat.rindex(")") + 2:].split()
+        if int(fields[2]) in groups:
+            ticks += int(fields[11]) + int(fields[12])
+            rss += int(fields[21]) * page_size
+    return ticks, rss
+
+
+class LocalInterface:
+    """Computer interface for a local sandbox's display."""
+
+    def __init__(self, computer: "LocalComputer"):
+        self._computer = computer
+
+    async def _xdotool(self, *args: object) -> str:
+        result = await self._computer.exec(
+            self._computer.config.local_xdotool, *(str(arg) for arg in args)
+        )
+        if result.returncode != 0:
+            raise LocalSandboxError(f"xdotool {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    async def screenshot(self) -> bytes:
+        reader = self._computer.framebuffer
+        if reader is None:
+            raise LocalSandboxError("Local sandbox is not running")
+        return await asyncio.to_thread(lambda: reader.frame().to_png())
+
+    async def get_screen_size(self) -> Dict[str, int]:
+        width, height = self._computer.display.split("x")
+        return {"width": int(width), "height": int(height)}
+
+    async def get_cursor_position(self) -> Dict[str, int]:
+        out = await self._xdotool("getmouselocation", "--shell")
+        values = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+        return {"x": int(values["X"]), "y": int(values["Y"])}
+
+    async def move_cursor(self, x: int, y: int) -> None:
+        await self._xdotool("mousemove", x, y)
+
+    async def _click(
+        self, button: int, x: Optional[int], y: Optional[int], repeat: int = 1
+    ) -> None:
+        args: List[object] = []
+        if x is not None and y is not None:
+            args += ["mousemove", x, y]
+        args += ["click", "--repeat", repeat, button]
+        await self._xdotool(*args)
+
+    async def left_click(self, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        await self._click(1, x, y)
+
+    async def right_click(self, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        await self._click(3, x, y)
+
+    async def double_click(self, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        await self._click(1, x, y, repeat=2)
+
+    async def mouse_down(
+        self, x: Optional[int] = None, y: Optional[int] = None, button: str = "left"
+    ) -> None:
+        args: List[object] = ["mousemove", x, y] if x is not None and y is not None else []
+        await self._xdotool(*args, "mousedown", _BUTTONS[button])
+
+    async def mouse_up(
+        self, x: Optional[int] = None, y: Optional[int] = None, button: str = "left"
+    ) -> None:
+        args: List[object] = ["mousemove", x, y] if x is not None and y is not None else []
+        await self._xdotool(*args, "mouseup", _BUTTONS[button])
+
+    async def drag_to(self, x: int, y: int, button: str = "left", duration: float = 0.5) -> None:
+        await self._xdotool("mousedown", _BUTTONS[button])
+        await asyncio.sleep(duration)
+        await self._xdotool("mousemove", x, y, "mouseup", _BUTTONS[button])
+
+    async def type_text(self, text: str) -> None:
+        await self._xdotool("type", "--delay", 12, "--", text)
+
+    async def press_key(self, key: str) -> None:
+        await self._xdotool("key", "--", keysym(key))
+
+    async def press(self, key: str) -> None:
+        await self.press_key(key)
+
+    async def hotkey(self, *keys: str) -> None:
+        await self._xdotool("key", "--", "+".join(keysym(key) for key in keys))
+
+    async def key_down(self, key: str) -> None:
+        await self._xdotool("keydown", "--", keysym(key))
+
+    async def key_up(self, key: str) -> None:
+        await self._xdotool("keyup", "--", keysym(key))
+
+    async def scroll(self, x: int, y: int) -> None:
+        """Scroll by x/y wheel clicks; positive is right/down."""
+        for amount, negative, positive in ((y, 4, 5), (x, 6, 7)):
+            if amount:
+                button = positive if amount > 0 else negative
+                await self._xdotool("click", "--repeat", abs(amount), button)
+
+    async def scroll_down(self, clicks: int = 1) -> None:
+        await self.scroll(0, clicks)
+
+    async def scroll_up(self, clicks: int = 1) -> None:
+        await self.scroll(0, -clicks)
+
+    async def run_command(self, command: str) -> CommandResult:
+        """Run a shell command on the sandbox's display, in its home directory."""
+        return await self._computer.shell(command)
+
+
+class LocalComputer:
+    """A sandbox display run as child processes instead of a container.
+
+    Takes the same arguments as CUA's ``Computer``; image, memory and CPU
+    limits don't apply and are ignored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        display: str = "1024x768",
+        user: str = "cua",
+        config: Optional[SandboxProviderConfig] = None,
+        **kwargs,
+    ):
+        self.name = name
+        self.display = display
+        self.user = user
+        self.config = config or get_sandbox_provider_config()
+        self.root = os.path.join(self.config.local_root, name)
+        self.interface = LocalInterface(self)
+        self.framebuffer: Optional[FramebufferReader] = None
+        # Monotonic time the display came up
+        self.display_ready_at: Optional[float] = None
+        self._display_number: Optional[int] = None
+        self._xvfb: Optional[asyncio.subprocess.Process] = None
+        self._window_manager: Optional[asyncio.subprocess.Process] = None
+        # Process groups of everything started in the sandbox
+        self._groups: Set[int] = set()
+
+    @property
+    def home(self) -> str:
+        return self.host_path(f"/home/{self.user}")
+
+    @property
+    def framebuffer_path(self) -> str:
+        return os.path.join(self.root, "fb", XVFB_SCREEN_FILE)
+
+    @property
+    def env(self) -> Dict[str, str]:
+        return {
+            **os.environ,
+            "DISPLAY": f":{self._display_number}",
+            "HOME": self.home,
+            "TMPDIR": self.host_path("/tmp"),
+            "XDG_RUNTIME_DIR": self.host_path("/run/user"),
+        }
+
+    def host_path(self, path: str) -> str:
+        """Where a path inside the sandbox lives on the controller."""
+        return os.path.join(self.root, path.lstrip("/"))
+
+    async def run(self) -> None:
+        """Start the display and window manager; returns once the display is up."""
+        for path in (self.home, self.host_path("/tmp"), self.host_path("/run/user")):
+            os.makedirs(path, mode=0o700, exist_ok=True)
+        os.makedirs(os.path.dirname(self.framebuffer_path), exist_ok=True)
+        self._display_number = _claim_display(self.config.local_first_display)
+        try:
+            self._xvfb = await self._spawn(
+                "xvfb",
+                self.config.local_xvfb,
+                f":{self._display_number}",
+                "-screen", "0", f"{self.display}x24",
+                "-fbdir", os.path.dirname(self.framebuffer_path),
+                "-nolisten", "tcp",
+            )
+            await self._wait_for_display()
+            self.display_ready_at = time.monotonic()
+            if self.config.local_window_manager:
+                self._window_manager = await self._spawn(
+                    "window-manager", *shlex.split(self.config.local_window_manager)
+                )
+        except BaseException:
+            await self.stop()
+            raise
+        log.info("local_sandbox_started", name=self.name, display=self._display_number)
+
+    async def _spawn(self, label: str, *cmd: str) -> asyncio.subprocess.Process:
+        logfile = open(os.path.join(self.root, f"{label}.log"), "ab")
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                env=self.env,
+                cwd=self.home,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=logfile,
+                stderr=logfile,
+                start_new_session=True,
+                # Don't outlive a crashed controller; there is no reaper for these
+                preexec_fn=_die_with_parent,
+            )
+        except OSError as e:
+            raise LocalSandboxError(f"Can't start {cmd[0]}: {e}") from e
+        finally:
+            logfile.close()
+        self._groups.add(proc.pid)
+        return proc
+
+    async def _wait_for_display(self) -> None:
+        """Wait for Xvfb's framebuffer file, which it creates after its socket."""
+        deadline = time.monotonic() + self.config.local_start_timeout
+        while True:
+            if self._xvfb.returncode is not None:
+                raise LocalSandboxError(
+                    f"Xvfb exited with {self._xvfb.returncode}; see {self.root}/xvfb.log"
+                )
+            try:
+                self.framebuffer = FramebufferReader(self.framebuffer_path)
+                self.framebuffer.frame()
+                return
+            except FramebufferError:
+                if self.framebuffer:
+                    self.framebuffer.close()
+                    self.framebuffer = None
+            if time.monotonic() > deadline:
+                raise LocalSandboxError(f"Display :{self._display_number} didn't come up")
+            await asyncio.sleep(0.02)
+
+    async def wait(self) -> int:
+        """Wait for the display server to exit, e.g. killed for memory; returns its exit code."""
+        if self._xvfb is None:
+            raise LocalSandboxError("Local sandbox is not running")
+        return await self._xvfb.wait()
+
+    async def exec(self, *cmd: str) -> CommandResult:
+        """Run a program on the sandbox's display and wait for it."""
+        if self._display_number is None:
+            raise LocalSandboxError("Local sandbox is not running")
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=self.env,
+            cwd=self.home,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        return CommandResult(
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            returncode=proc.returncode,
+        )
+
+    async def shell(self, command: str) -> CommandResult:
+        """Run a shell command; anything it leaves running is stopped with the sandbox."""
+        if self._display_number is None:
+            raise LocalSandboxError("Local sandbox is not running")
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            env=self.env,
+            cwd=self.home,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        self._groups.add(proc.pid)
+        stdout, stderr = await proc.communicate()
+        return CommandResult(
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            returncode=proc.returncode,
+        )
+
+    async def copy_in(self, source: str, destination: str) -> None:
+        await asyncio.to_thread(copy_path, source, self.host_path(destination))
+
+    async def copy_out(self, source: str, destination: str) -> None:
+        await asyncio.to_thread(copy_path, self.host_path(source), destination)
+
+    def usage(self) -> Tuple[int, int]:
+        """CPU clock ticks used and resident bytes of the sandbox's processes."""
+        return _group_stats(self._groups)
+
+    def memory_usage(self) -> int:
+        """Resident memory of the sandbox's processes in bytes."""
+        return self.usage()[1]
+
+    async def stop(self) -> None:
+        """Stop every process of the sandbox and delete its directory."""
+        if self.framebuffer:
+            self.framebuffer.close()
+            self.framebuffer = None
+        for group in self._groups:
+            try:
+                os.killpg(group, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass
+        for proc in (self._window_manager, self._xvfb):
+            if proc and proc.returncode is None:
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+        # Stragglers that ignored SIGTERM
+        for group in self._groups:
+            try:
+                os.killpg(group, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self._groups.clear()
+        if self._display_number is not None:
+            _claimed_displays.discard(self._display_number)
+            self._display_number = None
+        await asyncio.to_thread(shutil.rmtree, self.root, True)
+        log.info("local_sandbox_stopped", name=self.name)
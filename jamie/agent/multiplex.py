@@ -0,0 +1,513 @@
+"""Multiplexed sandboxes: several Discord accounts in one container.
+
+A full XFCE sandbox per stream is expensive. In multiplexed mode a sandbox
+runs with a display several slots wide, and each slot is a browser window
+tiled into its own region of that display, on its own per-account profile.
+Each session's agent gets a ``ScopedComputer`` for its slot: screenshots are
+cropped to the slot's region (and encoded once, with the screenshot
+encoder's settings), pointer coordinates are translated into it,
+and keyboard input goes to the slot's window, which is focused first.
+Actions from different slots of one sandbox are serialized so a focus
+switch can't land between another slot's focus and keystroke.
+
+Cropping screenshots needs Pillow (installed with the ``agent`` extra).
+"""
+
+import asyncio
+import dataclasses
+import functools
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from jamie.agent.hosts import HostPlacer
+from jamie.agent.imaging import Box, get_png_encoder
+from jamie.agent.launch import SESSION, LaunchGovernor, start_sandbox
+from jamie.agent.pool import PoolExhaustedError, SandboxLease
+from jamie.agent.sandbox import SandboxConfig, SandboxManager
+from jamie.agent.shaping import VIDEO_CLASS, NetworkShape
+from jamie.agent.snapshot import account_key
+from jamie.shared.config import DiscordAccount, MultiplexConfig
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+DISCORD_LOGIN_URL = "https://discord.com/login"
+
+# Interface methods whose first two arguments are screen coordinates
+POINTER_METHODS = (
+    "left_click",
+    "right_click",
+    "double_click",
+    "move_cursor",
+    "drag_to",
+    "mouse_down",
+    "mouse_up",
+)
+# Interface methods that act wherever the cursor is
+SCROLL_METHODS = ("scroll", "scroll_up", "scroll_down")
+# Interface methods that act on whichever window has keyboard focus
+KEYBOARD_METHODS = (
+    "type_text",
+    "press_key",
+    "press",
+    "hotkey",
+    "key_down",
+    "key_up",
+)
+
+
+def parse_display(display: str) -> Tuple[int, int]:
+    """Parse "1024x768" into (width, height)."""
+    width, _, height = display.lower().partition("x")
+    return int(width), int(height)
+
+
+@dataclass(frozen=True)
+class Region:
+    """A rectangle of the sandbox display, in display pixels."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+    def to_display(self, x: float, y: float) -> Tuple[int, int]:
+        """Translate slot coordinates to display coordinates, clamped to the region."""
+        clamped_x = min(max(int(x), 0), self.width - 1)
+        clamped_y = min(max(int(y), 0), self.height - 1)
+        return self.x + clamped_x, self.y + clamped_y
+
+    @property
+    def box(self) -> Box:
+        """The region as a crop box."""
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+
+def tile_regions(slot_display: str, slots: int) -> List[Region]:
+    """Regions for ``slots`` slots of ``slot_display`` size, side by side."""
+    width, height = parse_display(slot_display)
+    return [Region(x=i * width, y=0, width=width, height=height) for i in range(slots)]
+
+
+def sandbox_display(slot_display: str, slots: int) -> str:
+    """Display resolution for a sandbox holding ``slots`` side-by-side slots."""
+    width, height = parse_display(slot_display)
+    return f"{width * slots}x{height}"
+
+
+class ScopedInterface:
+    """A computer interface limited to one slot's window and region."""
+
+    def __init__(self, slot: "SandboxSlot"):
+        self._slot = slot
+
+    @property
+    def _interface(self) -> Any:
+        return self._slot.parent.manager.computer.interface
+
+    async def screenshot(self) -> bytes:
+        manager = self._slot.parent.manager
+        async with self._slot.parent.lock:
+            source = await manager.capture()
+        # The raw capture, so the slot's crop is the only encode
+        encoder = manager.encoder or get_png_encoder()
+        return await encoder.encode(source, self._slot.phase, box=self._slot.region.box)
+
+    async def get_screen_size(self) -> Dict[str, int]:
+        return {"width": self._slot.region.width, "height": self._slot.region.height}
+
+    async def get_cursor_position(self) -> Dict[str, int]:
+        position = await self._interface.get_cursor_position()
+        region = self._slot.region
+        return {"x": position["x"] - region.x, "y": position["y"] - region.y}
+
+    async def _pointer(self, name: str, x: float, y: float, *args, **kwargs) -> Any:
+        display_x, display_y = self._slot.region.to_display(x, y)
+        async with self._slot.parent.lock:
+            result = await getattr(self._interface, name)(display_x, display_y, *args, **kwargs)
+            self._slot.cursor = (display_x, display_y)
+            # Clicking a window gives it focus
+            self._slot.parent.focused = self._slot.index
+            return result
+
+    async def _scroll(self, name: str, *args, **kwargs) -> Any:
+        async with self._slot.parent.lock:
+            # Another slot may have moved the cursor out of our window
+            await self._interface.move_cursor(*self._slot.cursor)
+            return await getattr(self._interface, name)(*args, **kwargs)
+
+    async def _keyboard(self, name: str, *args, **kwargs) -> Any:
+        async with self._slot.parent.lock:
+            await self._slot.focus()
+            return await getattr(self._interface, name)(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in POINTER_METHODS:
+            return lambda *args, **kwargs: self._pointer(name, *args, **kwargs)
+        if name in SCROLL_METHODS:
+            return lambda *args, **kwargs: self._scroll(name, *args, **kwargs)
+        if name in KEYBOARD_METHODS:
+            return lambda *args, **kwargs: self._keyboard(name, *args, **kwargs)
+        # Anything else (run_command, clipboard, ...) isn't tied to a window
+        return getattr(self._interface, name)
+
+
+class ScopedComputer:
+    """A CUA Computer whose interface only sees one slot."""
+
+    def __init__(self, slot: "SandboxSlot"):
+        self._computer = slot.parent.manager.computer
+        self.interface = ScopedInterface(slot)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._computer, name)
+
+
+class MultiplexedSandbox:
+    """One sandbox container shared by several slots."""
+
+    def __init__(self, manager: SandboxManager, regions: List[Region]):
+        self.manager = manager
+        self.regions = regions
+        # Account email occupying each slot, None when free
+        self.occupants: List[Optional[str]] = [None] * len(regions)
+        # Serializes focus changes and input across slots
+        self.lock = asyncio.Lock()
+        self.focused: Optional[int] = None
+
+    def free_slot(self) -> Optional[int]:
+        for index, occupant in enumerate(self.occupants):
+            if occupant is None:
+                return index
+        return None
+
+    @property
+    def empty(self) -> bool:
+        return all(occupant is None for occupant in self.occupants)
+
+
+class SandboxSlot:
+    """One slot of a multiplexed sandbox, usable where a SandboxManager is.
+
+    Browser, copy and health operations go to the shared container; the
+    browser runs on the slot's own profile and window.
+    """
+
+    def __init__(self, parent: MultiplexedSandbox, index: int, email: str):
+        self.parent = parent
+        self.index = index
+        self.region = parent.regions[index]
+        base = parent.manager.config
+        self.config = dataclasses.replace(
+            base,
+            display=f"{self.region.width}x{self.region.height}",
+            browser_profile_path=f"{base.browser_profile_path}-{account_key(email)}",
+        )
+        self.window_class = f"jamie-slot-{index}"
+        # Agent phase the slot's session is in; picks screenshot encoding settings
+        self.phase: Optional[str] = None
+        # Last pointer position in display coordinates, for scrolling
+        self.cursor = self.region.to_display(self.region.width / 2, self.region.height / 2)
+        self.owner: Optional[str] = None
+        self._computer = ScopedComputer(self)
+
+    @property
+    def computer(self) -> ScopedComputer:
+        return self._computer
+
+    @property
+    def container_name(self) -> str:
+        return self.parent.manager.container_name
+
+    @property
+    def is_running(self) -> bool:
+        return self.parent.manager.is_running
+
+    @property
+    def docker_host(self) -> str:
+        return self.parent.manager.docker_host
+
+    @property
+    def is_local(self) -> bool:
+        return self.parent.manager.is_local
+
+    @property
+    def boot_timings(self) -> Dict[str, float]:
+        return self.parent.manager.boot_timings
+
+    async def wait_exited(self) -> int:
+        return await self.parent.manager.wait_exited()
+
+    async def focus(self) -> None:
+        """Give this slot's window keyboard focus. Caller holds the sandbox lock."""
+        if self.parent.focused == self.index:
+            return
+        await self.parent.manager.computer.interface.run_command(
+            f"xdotool search --limit 1 --class {self.window_class} windowactivate --sync"
+        )
+        self.parent.focused = self.index
+
+    def _window_args(self) -> Tuple[str, ...]:
+        region = self.region
+        return (
+            "--new-window",
+            f"--class={self.window_class}",
+            f"--window-position={region.x},{region.y}",
+            f"--window-size={region.width},{region.height}",
+        )
+
+    async def launch_browser(self, url: str) -> None:
+        """Open the slot's browser window in its region."""
+        await self.parent.manager.launch_browser(
+            url,
+            profile_path=self.config.browser_profile_path,
+            extra_args=self._window_args(),
+        )
+        # The new window may have taken focus
+        self.parent.focused = None
+
+    async def browser_running(self) -> bool:
+        return await self.parent.manager.browser_running(self.config.browser_profile_path)
+
+    async def restart_browser(self, url: str) -> None:
+        """Restart the slot's browser; the other slots' browsers keep running."""
+        await self.parent.manager.restart_browser(
+            url,
+            profile_path=self.config.browser_profile_path,
+            extra_args=self._window_args(),
+        )
+        self.parent.focused = None
+
+    async def restart(self) -> None:
+        raise RuntimeError("A multiplexed sandbox is shared; only a slot's browser can restart")
+
+    async def close_browser(self) -> None:
+        await self.parent.manager.close_browser(profile_path=self.config.browser_profile_path)
+        if self.parent.focused == self.index:
+            self.parent.focused = None
+
+    async def health_check(self) -> bool:
+        return await self.parent.manager.health_check()
+
+    async def copy_in(self, source: str, destination: str) -> None:
+        await self.parent.manager.copy_in(source, destination)
+
+    async def copy_out(self, source: str, destination: str) -> None:
+        await self.parent.manager.copy_out(source, destination)
+
+    async def memory_usage_mb(self) -> Optional[float]:
+        # Memory belongs to the shared container, not to one slot
+        return None
+
+    async def set_performance_profile(self, name: str) -> None:
+        raise RuntimeError("Slots run with their sandbox's performance profile")
+
+    @property
+    def network_shape(self) -> Optional[NetworkShape]:
+        return self.parent.manager.network_shape
+
+    async def set_network_class(self, name: str) -> None:
+        # Slots share their sandbox's interface and its limits; one slot can't change them
+        return None
+
+    async def sync_profile(self, reason: str) -> bool:
+        # Slot profiles stay on the container filesystem
+        return False
+
+    async def record_owner(self, session_id: Optional[str]) -> None:
+        await self.parent.manager.record_owner(session_id, slot=f"slot-{self.index}")
+
+    async def commit_snapshot(self, image: str) -> str:
+        raise RuntimeError("Multiplexed sandboxes can't be snapshotted per account")
+
+
+class SlotLease(SandboxLease):
+    """Lease on one slot; releasing it frees the slot, not the container."""
+
+    def __init__(self, slot: SandboxSlot, multiplexer: "SandboxMultiplexer"):
+        super().__init__(slot)
+        self._multiplexer = multiplexer
+
+    async def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        await self._multiplexer._release_slot(self.manager)
+
+    async def recycle(self) -> None:
+        await self.release()
+
+
+class SandboxMultiplexer:
+    """Hands out browser slots across a few shared sandboxes.
+
+    Every slot is logged into its own Discord account, so concurrent sessions
+    are bounded by the configured accounts as well as by
+    ``max_sandboxes * slots_per_sandbox``.
+    """
+
+    def __init__(
+        self,
+        config: MultiplexConfig,
+        image: str,
+        manager_factory: Optional[Callable[[SandboxConfig], SandboxManager]] = None,
+        governor: Optional[LaunchGovernor] = None,
+        placer: Optional[HostPlacer] = None,
+    ):
+        self.config = config
+        self.image = image
+        # Shared sandboxes boot and are placed on hosts like any other sandbox
+        self._manager_factory = manager_factory or functools.partial(
+            SandboxManager, placer=placer
+        )
+        self._governor = governor
+        self._sandboxes: List[MultiplexedSandbox] = []
+        self._busy_accounts: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self._boot_lock = asyncio.Lock()
+
+    @property
+    def accounts(self) -> List[DiscordAccount]:
+        return self.config.accounts
+
+    def checkout_account(self) -> DiscordAccount:
+        """Claim a Discord account no session is using.
+
+        An account whose last slot is still being released stays unavailable,
+        so a new session can't take over the browser of one that is stopping.
+
+        Raises:
+            PoolExhaustedError: If every account is streaming already
+        """
+        occupied = {
+            occupant for sandbox in self._sandboxes for occupant in sandbox.occupants
+        }
+        for account in self.accounts:
+            if account.email not in self._busy_accounts and account.email not in occupied:
+                self._busy_accounts.add(account.email)
+                return account
+        raise PoolExhaustedError("Every multiplexed Discord account is in use")
+
+    def return_account(self, email: str) -> None:
+        self._busy_accounts.discard(email)
+
+    async def acquire(self, email: str) -> SlotLease:
+        """Get a slot for ``email``, booting another sandbox if all are full.
+
+        Raises:
+            PoolExhaustedError: If every slot is taken and no more sandboxes may boot
+        """
+        requested_at = time.monotonic()
+        slot = await self._claim_slot(email)
+        if slot is None:
+            async with self._boot_lock:
+                # Another boot may have freed up room while we waited
+                slot = await self._claim_slot(email)
+                if slot is None:
+                    await self._boot_sandbox(requested_at)
+                    slot = await self._claim_slot(email)
+        if slot is None:
+            raise PoolExhaustedError("No multiplexed sandbox slot available")
+
+        try:
+            await slot.close_browser()
+            await slot.launch_browser(DISCORD_LOGIN_URL)
+        except Exception:
+            await self._release_slot(slot)
+            raise
+        log.info(
+            "multiplex_slot_acquired",
+            container=slot.container_name,
+            slot=slot.index,
+            account=account_key(email),
+        )
+        return SlotLease(slot, self)
+
+    async def stop(self) -> None:
+        """Stop every multiplexed sandbox."""
+        async with self._lock:
+            sandboxes = list(self._sandboxes)
+            self._sandboxes.clear()
+        for sandbox in sandboxes:
+            try:
+                await sandbox.manager.stop()
+            except Exception as e:
+                log.warning("multiplex_stop_failed", error=str(e))
+
+    def stats(self) -> Dict:
+        """Get slot and account usage."""
+        used = sum(
+            1 for sandbox in self._sandboxes for occupant in sandbox.occupants if occupant
+        )
+        total = len(self._sandboxes) * self.config.slots_per_sandbox
+        return {
+            "sandboxes": len(self._sandboxes),
+            "max_sandboxes": self.config.max_sandboxes,
+            "slots_total": total,
+            "slots_used": used,
+            "accounts_total": len(self.accounts),
+            "accounts_busy": len(self._busy_accounts),
+        }
+
+    async def _claim_slot(self, email: str) -> Optional[SandboxSlot]:
+        async with self._lock:
+            for sandbox in self._sandboxes:
+                if not sandbox.manager.is_running:
+                    continue
+                index = sandbox.free_slot()
+                if index is not None:
+                    sandbox.occupants[index] = email
+                    return SandboxSlot(sandbox, index, email)
+        return None
+
+    async def _boot_sandbox(self, requested_at: float) -> None:
+        """Boot one more shared sandbox, if the limit allows. Caller holds the boot lock."""
+        async with self._lock:
+            if len(self._sandboxes) >= self.config.max_sandboxes:
+                return
+
+        slots = self.config.slots_per_sandbox
+        config = SandboxConfig(
+            image=self.image,
+            display=sandbox_display(self.config.slot_display, slots),
+            cpu=self.config.sandbox_cpu,
+            memory=self.config.sandbox_memory,
+            # Several streams share the one interface; slots can't switch class
+            network_class=VIDEO_CLASS,
+            # Slot profiles would share one tmpfs with nothing syncing them
+            working_storage=False,
+        )
+        manager = self._manager_factory(config)
+        started = time.monotonic()
+        await start_sandbox(manager, self._governor, SESSION, requested_at=requested_at)
+        sandbox = MultiplexedSandbox(manager, tile_regions(self.config.slot_display, slots))
+        async with self._lock:
+            self._sandboxes.append(sandbox)
+        log.info(
+            "multiplex_sandbox_started",
+            container=manager.container_name,
+            slots=slots,
+            duration=round(time.monotonic() - started, 2),
+        )
+
+    async def _release_slot(self, slot: SandboxSlot) -> None:
+        """Close the slot's browser and free it; stop sandboxes nobody uses."""
+        try:
+            await slot.close_browser()
+        except Exception as e:
+            log.warning("multiplex_close_browser_failed", error=str(e))
+
+        sandbox = slot.parent
+        stop = False
+        async with self._lock:
+            sandbox.occupants[slot.index] = None
+            # Keep one sandbox warm; extra ones go once they're empty
+            if sandbox.empty and len(self._sandboxes) > 1 and sandbox in self._sandboxes:
+                self._sandboxes.remove(sandbox)
+                stop = True
+        if stop:
+            try:
+                await sandbox.manager.stop()
+            except Exception as e:
+                log.warning("multiplex_stop_failed", error=str(e))
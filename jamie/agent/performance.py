@@ -0,0 +1,136 @@
+"""Browser performance profiles for Jamie agent.
+
+Sandboxes have no GPU, so the content tab's video decode and Discord's
+WebRTC encode of the share both run on the sandbox's few CPUs. A performance
+profile is a named set of browser flags and managed policies that trims the
+browser's own work, plus the stream quality the agent picks when it starts
+the share. Sessions choose a profile; the CPU they used is recorded per
+profile so profiles can be compared. A profile can also set the sandbox's
+memory limit and stop desktop services, which is how the density profile
+fits more sandboxes on a host.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+# Histogram of sandbox CPU use while streaming, in cores, labeled by profile
+CPU_METRIC = "sandbox_cpu_cores"
+CPU_BUCKETS = (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 3.0, 4.0)
+
+
+@dataclass
+class PerformanceProfile:
+    """Browser settings that trade quality for CPU."""
+
+    name: str
+    description: str
+    # Chromium command line flags
+    flags: Tuple[str, ...] = ()
+    # Managed Chromium policies
+    policies: Dict[str, Any] = field(default_factory=dict)
+    # Stream quality to choose in Discord's share dialog; empty leaves it alone
+    share_resolution: str = ""
+    share_frame_rate: Optional[int] = None
+    # Container memory limit, e.g. "2GB"; empty keeps the sandbox's configured one
+    memory: str = ""
+    # Desktop processes stopped once the sandbox is up
+    stopped_services: Tuple[str, ...] = ()
+
+    @property
+    def stream_quality(self) -> str:
+        """Instruction for the share prompt's stream quality step."""
+        if not self.share_resolution and not self.share_frame_rate:
+            return "Leave the resolution and frame rate settings as they are"
+        wanted = " and ".join(filter(None, [
+            self.share_resolution and f"{self.share_resolution} resolution",
+            self.share_frame_rate and f"{self.share_frame_rate} FPS frame rate",
+        ]))
+        return (
+            f"If the dialog offers stream quality settings, choose {wanted} "
+            "(or the lowest offered if those aren't available)"
+        )
+
+
+PERFORMANCE_PROFILES: Dict[str, PerformanceProfile] = {
+    profile.name: profile for profile in (
+        PerformanceProfile(
+            name="standard",
+            description="Browser defaults",
+        ),
+        PerformanceProfile(
+            name="low_cpu",
+            description="Less compositor, animation and background work; 720p/15 FPS share",
+            flags=(
+                # Sites that honor prefers-reduced-motion skip their animations
+                "--force-prefers-reduced-motion",
+                "--disable-smooth-scrolling",
+                "--disable-background-networking",
+                "--disable-features=Translate,MediaRouter,OptimizationHints,BackForwardCache",
+            ),
+            policies={
+                # No GPU to fall back from
+                "HardwareAccelerationModeEnabled": False,
+                "BackgroundModeEnabled": False,
+                "TranslateEnabled": False,
+                "SpellcheckEnabled": False,
+                "SearchSuggestEnabled": False,
+                "MetricsReportingEnabled": False,
+                # No prefetching or preconnecting
+                "NetworkPredictionOptions": 2,
+            },
+            share_resolution="720p",
+            share_frame_rate=15,
+        ),
+        PerformanceProfile(
+            name="density",
+            description="Fewer renderer processes, small caches, trimmed desktop; 2GB sandboxes",
+            flags=(
+                # Sites share renderers instead of getting a process each
+                "--renderer-process-limit=2",
+                "--process-per-site",
+                "--disk-cache-size=33554432",
+                "--js-flags=--max-old-space-size=512",
+                "--disable-background-networking",
+                "--disable-features=Translate,MediaRouter,OptimizationHints,BackForwardCache",
+            ),
+            policies={
+                "DiskCacheSize": 33554432,
+                "HardwareAccelerationModeEnabled": False,
+                "BackgroundModeEnabled": False,
+                "TranslateEnabled": False,
+                "SpellcheckEnabled": False,
+                "SearchSuggestEnabled": False,
+                "MetricsReportingEnabled": False,
+                "NetworkPredictionOptions": 2,
+            },
+            memory="2GB",
+            # XFCE extras nobody sees in a sandbox; the window manager and panel stay
+            stopped_services=(
+                "xfdesktop",
+                "xfce4-power-manager",
+                "xfce4-screensaver",
+                "xfce4-notifyd",
+                "tumblerd",
+                "light-locker",
+                "blueman-applet",
+                "nm-applet",
+                "update-notifier",
+            ),
+        ),
+    )
+}
+
+
+def get_performance_profile(name: str) -> PerformanceProfile:
+    """Look up a profile by name.
+
+    Raises:
+        KeyError: If there is no such profile
+    """
+    try:
+        return PERFORMANCE_PROFILES[name]
+    except KeyError:
+        raise KeyError(
+            f"Unknown performance profile {name!r}; "
+            f"choose one of {', '.join(PERFORMANCE_PROFILES)}"
+        ) from None
@@ -0,0 +1,461 @@
+"""Warm sandbox pool for Jamie agent.
+
+Keeps a number of CUA sandboxes booted (and, when a warm-up hook is given,
+already logged into Discord) so a streaming session can lease one instead of
+paying for container boot and login on the request path.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from computer import Computer
+
+from jamie.agent.docker import parse_size
+from jamie.agent.launch import BACKGROUND, SESSION, LaunchGovernor, start_sandbox
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, memory_footprint
+from jamie.shared.config import PoolConfig
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+# Creates a not-yet-started sandbox for the pool
+ManagerFactory = Callable[[], SandboxManager]
+# Runs against a freshly booted sandbox, e.g. to log into Discord
+WarmupHook = Callable[[SandboxManager], Awaitable[None]]
+
+
+class PoolExhaustedError(Exception):
+    """No sandbox became available within the lease timeout."""
+    pass
+
+
+@dataclass
+class PooledSandbox:
+    """A sandbox owned by the pool."""
+
+    manager: SandboxManager
+    created_at: float
+    last_used: float
+    logged_in: bool = False
+    leases: int = 0
+    baseline_memory_mb: Optional[float] = None
+
+
+class SandboxLease:
+    """A sandbox handed out to a single streaming session.
+
+    Leases that don't come from a pool own their sandbox outright and stop it
+    on release.
+    """
+
+    def __init__(
+        self,
+        manager: SandboxManager,
+        logged_in: bool = False,
+        pool: Optional["SandboxPool"] = None,
+        member: Optional[PooledSandbox] = None,
+        recycled: bool = False,
+    ):
+        self.manager = manager
+        self.logged_in = logged_in
+        # Whether an earlier session already used this sandbox
+        self.recycled = recycled
+        self._pool = pool
+        self._member = member
+        self._released = False
+
+    @property
+    def computer(self) -> Optional[Computer]:
+        """Get the leased CUA Computer instance."""
+        return self.manager.computer
+
+    @property
+    def pooled(self) -> bool:
+        """Whether this lease came from a pool."""
+        return self._pool is not None
+
+    async def release(self) -> None:
+        """Give the sandbox back. Safe to call more than once."""
+        if self._released:
+            return
+        self._released = True
+        if self._pool and self._member:
+            await self._pool._discard(self._member)
+        else:
+            await self.manager.stop()
+
+    async def recycle(self) -> None:
+        """Hand a sandbox that was reset to idle back for reuse.
+
+        The pool may still retire it (reuse or memory limits, failed health
+        check, recycling disabled); leases without a pool just release.
+        """
+        if self._released:
+            return
+        self._released = True
+        if self._pool and self._member:
+            await self._pool._recycle(self._member)
+        else:
+            await self.manager.stop()
+
+
+class SandboxPool:
+    """Pool of pre-booted sandboxes.
+
+    The pool keeps ``min_size`` sandboxes idle and ready, booting them in the
+    background, and never owns more than ``max_size``. Idle members are health
+    checked periodically and replaced when they stop responding. Released
+    sandboxes are stopped; with recycling enabled, sandboxes that were reset
+    after a clean stop go back to the idle set until they hit the reuse or
+    memory-growth limits. ``set_target_idle`` moves the number kept ready
+    away from ``min_size`` while the pool runs. With a memory budget, the
+    pool also never owns more sandboxes than their memory limits fit in it.
+    """
+
+    def __init__(
+        self,
+        config: Optional[PoolConfig] = None,
+        manager_factory: Optional[ManagerFactory] = None,
+        warmup: Optional[WarmupHook] = None,
+        footprint_bytes: Optional[int] = None,
+        governor: Optional[LaunchGovernor] = None,
+    ):
+        self.config = config or PoolConfig()
+        self._manager_factory = manager_factory or SandboxManager
+        self._warmup = warmup
+        # Memory limit of each sandbox the factory makes
+        self.footprint_bytes = footprint_bytes or memory_footprint(SandboxConfig())
+        # Paces boots alongside the controller's other sandbox launches
+        self._governor = governor
+
+        self._cond = asyncio.Condition()
+        self._idle: Deque[PooledSandbox] = deque()
+        self._leased: Set[int] = set()
+        self._booting = 0
+        self._checking = 0
+        self._waiters = 0
+        # Idle sandboxes to keep ready; starts at min_size, an autoscaler may move it
+        self._target_idle = self.config.min_size
+        self._tasks: Set[asyncio.Task] = set()
+        self._health_task: Optional[asyncio.Task] = None
+        self._running = False
+
+        # Counters for /stats
+        self._leases_total = 0
+        self._boot_failures = 0
+        self._health_evictions = 0
+        self._recycles = 0
+        self._retirements = 0
+
+    @property
+    def size(self) -> int:
+        """Total sandboxes owned by the pool, including ones still booting."""
+        return len(self._idle) + len(self._leased) + self._booting + self._checking
+
+    @property
+    def capacity(self) -> int:
+        """Most sandboxes the pool may own: ``max_size``, or fewer if the memory budget says so."""
+        if not self.config.memory_budget:
+            return self.config.max_size
+        fits = parse_size(self.config.memory_budget) // self.footprint_bytes
+        return max(1, min(self.config.max_size, fits))
+    
+    @property
+    def target_idle(self) -> int:
+        """Sandboxes the pool currently keeps idle or booting."""
+        return self._target_idle
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the pool has been started."""
+        return self._running
+
+    async def start(self) -> None:
+        """Start filling the pool and the idle health checks."""
+        if self._running:
+            return
+        self._running = True
+        async with self._cond:
+            self._replenish()
+        self._health_task = asyncio.create_task(self._health_loop())
+        log.info(
+            "pool_started",
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            capacity=self.capacity,
+        )
+
+    async def stop(self) -> None:
+        """Stop the pool and every sandbox it still owns."""
+        self._running = False
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        async with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for member in idle:
+            await self._stop_member(member)
+        log.info("pool_stopped")
+
+    async def acquire(self, timeout: Optional[float] = None) -> SandboxLease:
+        """Lease a sandbox, waiting up to ``timeout`` seconds for one.
+
+        Raises:
+            PoolExhaustedError: If no sandbox is available in time
+        """
+        if not self._running:
+            raise RuntimeError("Pool not running")
+
+        timeout = self.config.lease_timeout if timeout is None else timeout
+        requested_at = time.monotonic()
+        deadline = requested_at + timeout
+
+        async with self._cond:
+            self._waiters += 1
+            try:
+                while not self._idle:
+                    # Boot one more sandbox per waiter that isn't covered yet
+                    if self._booting < self._waiters and self.size < self.capacity:
+                        # Someone is waiting on this one, so it boots ahead of refills
+                        self._spawn(SESSION, requested_at)
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"No sandbox available within {timeout:.0f}s"
+                        )
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+                member = self._idle.popleft()
+                self._leased.add(id(member))
+            finally:
+                self._waiters -= 1
+
+            member.leases += 1
+            member.last_used = time.time()
+            self._leases_total += 1
+            self._replenish()
+
+        recycled = member.leases > 1
+        log.info(
+            "pool_lease_acquired",
+            logged_in=member.logged_in,
+            recycled=recycled,
+            idle=len(self._idle),
+        )
+        return SandboxLease(
+            member.manager,
+            logged_in=member.logged_in,
+            pool=self,
+            member=member,
+            recycled=recycled,
+        )
+
+    async def set_target_idle(self, target: int) -> int:
+        """Change how many sandboxes are kept ready, booting or stopping idle ones.
+
+        The target is capped at the pool's capacity. Returns the target that applies.
+        """
+        surplus: List[PooledSandbox] = []
+        async with self._cond:
+            self._target_idle = max(0, min(target, self.capacity))
+            self._replenish()
+            ready = len(self._idle) + self._booting + self._checking
+            # Stop the most recently returned sandboxes; acquire hands out the oldest
+            while self._idle and ready > self._target_idle:
+                surplus.append(self._idle.pop())
+                ready -= 1
+
+        for member in surplus:
+            await self._stop_member(member)
+        if surplus:
+            log.info("pool_idle_released", released=len(surplus), target=self._target_idle)
+        return self._target_idle
+
+    async def check_idle(self) -> int:
+        """Health check every idle sandbox and evict failing ones.
+
+        Returns the number of evicted sandboxes.
+        """
+        async with self._cond:
+            members = list(self._idle)
+            self._idle.clear()
+            self._checking += len(members)
+
+        results = await asyncio.gather(
+            *(member.manager.health_check() for member in members),
+            return_exceptions=True,
+        )
+
+        evicted: List[PooledSandbox] = []
+        async with self._cond:
+            self._checking -= len(members)
+            for member, healthy in zip(members, results):
+                if healthy is True:
+                    self._idle.append(member)
+                else:
+                    evicted.append(member)
+            self._health_evictions += len(evicted)
+            self._replenish()
+            self._cond.notify_all()
+
+        for member in evicted:
+            log.warning("pool_member_unhealthy", age_seconds=round(time.time() - member.created_at))
+            await self._stop_member(member)
+        return len(evicted)
+
+    def stats(self) -> Dict:
+        """Get a snapshot of pool state."""
+        return {
+            "min_size": self.config.min_size,
+            "max_size": self.config.max_size,
+            "capacity": self.capacity,
+            "memory_footprint_mb": round(self.footprint_bytes / (1024 * 1024)),
+            "target_idle": self._target_idle,
+            "idle": len(self._idle),
+            "leased": len(self._leased),
+            "booting": self._booting,
+            "leases_total": self._leases_total,
+            "boot_failures": self._boot_failures,
+            "health_evictions": self._health_evictions,
+            "recycles": self._recycles,
+            "retirements": self._retirements,
+        }
+
+    async def _discard(self, member: PooledSandbox) -> None:
+        """Drop a leased sandbox and boot a replacement."""
+        async with self._cond:
+            self._leased.discard(id(member))
+            self._replenish()
+        await self._stop_member(member)
+
+    async def _recycle(self, member: PooledSandbox) -> None:
+        """Return a reset sandbox to the idle set, or retire it."""
+        reason = await self._retire_reason(member)
+        if reason:
+            log.info("pool_member_retired", reason=reason, leases=member.leases)
+            self._retirements += 1
+            await self._discard(member)
+            return
+
+        async with self._cond:
+            self._leased.discard(id(member))
+            if self._running:
+                member.last_used = time.time()
+                member.logged_in = True
+                self._idle.append(member)
+                self._recycles += 1
+                self._cond.notify_all()
+                log.info("pool_member_recycled", leases=member.leases, idle=len(self._idle))
+                return
+
+        await self._stop_member(member)
+
+    async def _retire_reason(self, member: PooledSandbox) -> Optional[str]:
+        """Why a sandbox must not be reused, or None if it can be."""
+        if not self.config.recycle:
+            return "recycling_disabled"
+        if member.leases > self.config.max_reuses:
+            return "max_reuses"
+        if member.baseline_memory_mb is not None:
+            current = await member.manager.memory_usage_mb()
+            if current is not None:
+                growth = current - member.baseline_memory_mb
+                if growth > self.config.max_memory_growth_mb:
+                    return "memory_growth"
+        if not await member.manager.health_check():
+            return "unhealthy"
+        return None
+
+    def _replenish(self) -> None:
+        """Boot sandboxes until the target are idle or booting. Caller holds the lock."""
+        if not self._running:
+            return
+        ready = len(self._idle) + self._booting + self._checking
+        while ready < self._target_idle and self.size < self.capacity:
+            self._spawn()
+            ready += 1
+
+    def _spawn(self, priority: int = BACKGROUND, requested_at: Optional[float] = None) -> None:
+        """Start booting one sandbox in the background. Caller holds the lock."""
+        self._booting += 1
+        task = asyncio.create_task(self._boot_member(priority, requested_at))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _boot_member(self, priority: int, requested_at: Optional[float]) -> None:
+        """Boot and warm up a sandbox, then add it to the idle set."""
+        manager = self._manager_factory()
+        member: Optional[PooledSandbox] = None
+        try:
+            await start_sandbox(manager, self._governor, priority, requested_at)
+            logged_in = False
+            if self._warmup:
+                await self._warmup(manager)
+                logged_in = True
+            baseline = None
+            if self.config.recycle:
+                # Reference point for the memory-growth retirement limit
+                baseline = await manager.memory_usage_mb()
+            now = time.time()
+            member = PooledSandbox(
+                manager=manager,
+                created_at=now,
+                last_used=now,
+                logged_in=logged_in,
+                baseline_memory_mb=baseline,
+            )
+        except asyncio.CancelledError:
+            await self._stop_manager(manager)
+            async with self._cond:
+                self._booting -= 1
+            raise
+        except Exception as e:
+            log.error("pool_boot_failed", error=str(e))
+            await self._stop_manager(manager)
+
+        async with self._cond:
+            self._booting -= 1
+            if member is None:
+                self._boot_failures += 1
+            elif self._running:
+                self._idle.append(member)
+                log.info("pool_member_ready", idle=len(self._idle), size=self.size)
+            self._cond.notify_all()
+
+        if member is not None and not self._running:
+            await self._stop_member(member)
+
+    async def _health_loop(self) -> None:
+        """Periodically health check idle sandboxes."""
+        while self._running:
+            await asyncio.sleep(self.config.health_check_interval)
+            try:
+                await self.check_idle()
+            except Exception as e:
+                log.error("pool_health_check_failed", error=str(e))
+
+    async def _stop_member(self, member: PooledSandbox) -> None:
+        await self._stop_manager(member.manager)
+
+    @staticmethod
+    async def _stop_manager(manager: SandboxManager) -> None:
+        try:
+            await manager.stop()
+        except Exception as e:
+            log.warning("pool_stop_failed", error=str(e))
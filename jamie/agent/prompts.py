@@ -54,6 +54,30 @@ IMPORTANT:
 - Take a screenshot after each major step to verify progress
 """
 
+# =============================================================================
+# VERIFY SESSION PROMPT
+# =============================================================================
+
+VERIFY_DISCORD_SESSION_PROMPT = """
+You are checking whether Discord web is already logged in.
+
+GOAL: Report the login state without changing anything.
+
+STEPS:
+1. Take a screenshot
+2. If no browser window is visible, open the browser and go to discord.com/app
+3. Wait for Discord to load (3-5 seconds) and take another screenshot
+
+VERIFICATION:
+- If you see the Discord app with the server list in the left sidebar → report: SESSION_VALID
+- If you see the login form, a QR code login page, or any other page → report: SESSION_INVALID
+
+IMPORTANT:
+- Do NOT type credentials or try to log in
+- Do NOT click anything inside Discord
+- Finish in as few steps as possible
+"""
+
 # =============================================================================
 # JOIN VOICE CHANNEL PROMPT
 # =============================================================================
@@ -121,6 +145,7 @@ FOR VIDEO CONTENT (YouTube, Twitch, Vimeo):
 7. If the video doesn't auto-play, locate and click the play button
 8. If there's an ad, wait for it to finish or click "Skip Ad" when available
 9. Optionally expand to theater mode for better viewing (if available)
+10. Video quality: {video_quality}
 
 FOR OTHER CONTENT:
 6. Wait for all content to load
@@ -173,8 +198,9 @@ STEPS:
 6. Click on the tab containing the streaming content ({url})
    - Look for the thumbnail matching your content
 7. IMPORTANT: If there's an "Also share tab audio" or "Share audio" checkbox, make sure it's CHECKED
-8. Click the "Share" or "Go Live" button (usually blue)
-9. Wait for the stream to start (1-2 seconds)
+8. Stream quality: {stream_quality}
+9. Click the "Share" or "Go Live" button (usually blue)
+10. Wait for the stream to start (1-2 seconds)
 
 VERIFICATION:
 - You should see a small preview of your stream in Discord
@@ -275,6 +301,36 @@ IMPORTANT:
 - Take a screenshot to confirm you're no longer in the voice channel
 """
 
+# =============================================================================
+# RESET TO IDLE PROMPT
+# =============================================================================
+
+RESET_TO_IDLE_PROMPT = """
+You are resetting the browser so it can be reused for another stream.
+
+GOAL: Leave exactly one browser tab open, showing Discord, not in any voice channel.
+
+STEPS:
+1. Take a screenshot
+2. Close every browser tab that is not Discord (click the tab's X or press Ctrl+W on it)
+3. If there is no Discord tab left, open discord.com/app in the remaining tab
+4. In Discord, click the Discord logo (Home) at the top of the server list
+5. Close any open dialogs or popups with Escape
+
+VERIFICATION:
+- Exactly one tab is open and it shows Discord
+- The voice controls bar at the bottom is not visible (not connected to voice)
+- If both are true, report: RESET_COMPLETE
+
+ERROR HANDLING:
+- If you are still connected to a voice channel → report: RESET_FAILED_IN_VOICE
+- If Discord shows the login page → report: RESET_FAILED_LOGGED_OUT
+
+IMPORTANT:
+- Do NOT log out of Discord
+- Do NOT close the browser window itself
+"""
+
 # =============================================================================
 # HELPER/UTILITY PROMPTS
 # =============================================================================
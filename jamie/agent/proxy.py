@@ -0,0 +1,958 @@
+"""Caching forward proxy for sandbox browser traffic.
+
+Every fresh sandbox otherwise downloads the Discord web client and the
+content site's static assets from scratch. Sandbox browsers are pointed at
+this proxy through a managed Chromium policy; it keeps cacheable responses in
+a bounded on-disk store and evicts the least recently used ones.
+
+Only ``cache_hosts``, static asset CDNs, go through the proxy (a PAC script
+sends everything else, video included, directly). Hosts that serve logins,
+APIs or account data (``PRIVATE_HOSTS``) are never proxied, whatever the
+configuration says. Asset HTTPS arrives as CONNECT tunnels, which the proxy
+decrypts with certificates from its own CA: sandbox browsers are told to
+accept certificates with its host key. Without ``openssl`` the tunnels are
+relayed as-is and only plain HTTP responses are cached.
+
+Requests carrying cookies or credentials are never answered from or stored
+in the cache, and responses are stored per value of the request headers
+their ``Vary`` names, so one account's responses never reach another.
+"""
+
+import asyncio
+import base64
+import fnmatch
+import hashlib
+import ipaddress
+import json
+import os
+import secrets
+import ssl
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+from jamie.agent.docker import parse_size
+from jamie.shared.config import ProxyConfig
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+Headers = List[Tuple[str, str]]
+
+# Assets worth caching even when the origin sends no freshness information
+STATIC_EXTENSIONS = (
+    ".js", ".mjs", ".css", ".wasm", ".woff", ".woff2", ".ttf", ".otf",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".mp3",
+)
+
+# Logins, API calls and account data; never sent through (or decrypted by) the proxy
+PRIVATE_HOSTS = (
+    "discord.com",
+    "*.discord.com",
+    "discordapp.com",
+    "discord.gg",
+    "*.discord.gg",
+    "youtube.com",
+    "www.youtube.com",
+    "m.youtube.com",
+    "accounts.google.com",
+)
+
+HOP_BY_HOP = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade",
+})
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _private(pattern: str) -> bool:
+    """Whether a host, or a cache_hosts pattern, takes in any of PRIVATE_HOSTS."""
+    pattern = pattern.lower()
+    return any(
+        fnmatch.fnmatchcase(pattern, private) or fnmatch.fnmatchcase(private, pattern)
+        for private in PRIVATE_HOSTS
+    )
+
+
+def proxied_hosts(config: ProxyConfig) -> List[str]:
+    """The cache_hosts patterns the proxy serves: those clear of PRIVATE_HOSTS."""
+    return [pattern for pattern in config.cache_hosts if not _private(pattern)]
+
+
+def pac_script(config: ProxyConfig) -> str:
+    """PAC script sending proxied hosts through the proxy and everything else direct."""
+    proxy = json.dumps(f"PROXY {config.sandbox_address}")
+    return (
+        "function FindProxyForURL(url, host) {\n"
+        f"  var hosts = {json.dumps(proxied_hosts(config))};\n"
+        "  for (var i = 0; i < hosts.length; i++) {\n"
+        f"    if (shExpMatch(host, hosts[i])) return {proxy};\n"
+        "  }\n"
+        "  return \"DIRECT\";\n"
+        "}\n"
+    )
+
+
+def proxy_policy(config: ProxyConfig) -> Dict[str, str]:
+    """Managed Chromium policies that send a sandbox's browser through the proxy."""
+    script = base64.b64encode(pac_script(config).encode()).decode()
+    return {
+        "ProxyMode": "pac_script",
+        "ProxyPacUrl": f"data:application/x-ns-proxy-autoconfig;base64,{script}",
+    }
+
+
+def proxy_flags(config: ProxyConfig) -> Tuple[str, ...]:
+    """Browser flags accepting the proxy's host certificates, once it has a CA."""
+    if not config.intercept:
+        return ()
+    spki = CertificateAuthority.read_spki(config.ca_dir)
+    return (f"--ignore-certificate-errors-spki-list={spki}",) if spki else ()
+
+
+def cached_host(config: ProxyConfig, host: str) -> bool:
+    """Whether host is one of the proxy's cache_hosts, and not a private one."""
+    host = host.lower().strip("[]")
+    if _private(host):
+        return False
+    return any(fnmatch.fnmatchcase(host, pattern.lower()) for pattern in config.cache_hosts)
+
+
+def _vary(headers: Headers) -> List[str]:
+    """Request header names a response's Vary says it depends on."""
+    names = (_header(headers, "vary") or "").split(",")
+    return sorted({name.strip().lower() for name in names if name.strip()})
+
+
+def _header(headers: Headers, name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _end_to_end(headers: Headers) -> Headers:
+    """Headers minus hop-by-hop ones, including those named in Connection."""
+    named = {
+        token.strip().lower()
+        for token in (_header(headers, "connection") or "").split(",")
+    }
+    return [
+        (key, value) for key, value in headers
+        if key.lower() not in HOP_BY_HOP and key.lower() not in named
+    ]
+
+
+def freshness(url: str, headers: Headers, default_ttl: float) -> Optional[float]:
+    """Seconds a 200 response to GET ``url`` may be served from cache, or None."""
+    directives: Dict[str, str] = {}
+    for part in (_header(headers, "cache-control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if {"no-store", "no-cache", "private"} & directives.keys():
+        return None
+    if _header(headers, "set-cookie") is not None:
+        return None
+    if "*" in _vary(headers):
+        return None
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                ttl = float(directives[name])
+            except ValueError:
+                return None
+            return ttl if ttl > 0 else None
+
+    expires = _header(headers, "expires")
+    if expires:
+        try:
+            ttl = parsedate_to_datetime(expires).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+        return ttl if ttl > 0 else None
+
+    if urlsplit(url).path.lower().endswith(STATIC_EXTENSIONS) and default_ttl > 0:
+        return default_ttl
+    return None
+
+
+@dataclass
+class CacheEntry:
+    """Metadata of one cached response; the body lives next to it on disk."""
+
+    url: str
+    status: int
+    reason: str
+    headers: Headers
+    size: int
+    expires_at: float
+    stored_at: float = field(default_factory=time.time)
+    # Request headers the response varies on, part of its key
+    vary: List[str] = field(default_factory=list)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class AssetCache:
+    """Bounded on-disk response store with least-recently-used eviction.
+
+    Each entry is a ``<key>.body`` file and a ``<key>.json`` metadata file;
+    hits touch the body so recency survives a controller restart. The key is
+    the URL plus the request's values of the headers the response varies on.
+    Entries left by a previous run are indexed by ``start()``.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        max_bytes: int,
+        max_entry_bytes: Optional[int] = None,
+        metrics: Optional[MetricsCollector] = None,
+    ):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes or max_bytes, max_bytes)
+        self._metrics = metrics
+        # Least recently used first
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # URL -> the headers its last stored response varied on
+        self._vary: Dict[str, List[str]] = {}
+        self._bytes = 0
+
+        # Counters for /stats
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __contains__(self, url: str) -> bool:
+        return any(entry.url == url for entry in self._entries.values())
+
+    async def start(self) -> None:
+        """Index entries left on disk, least recently used first."""
+        found = await asyncio.to_thread(self._scan)
+        for key, entry in found:
+            self._entries[key] = entry
+            self._vary[entry.url] = entry.vary
+            self._bytes += entry.size
+        self._evict()
+        self._update_gauges()
+        if found:
+            log.info("proxy_cache_loaded", entries=len(self._entries), bytes=self._bytes)
+
+    async def get(
+        self, url: str, request_headers: Headers = ()
+    ) -> Optional[Tuple[CacheEntry, bytes]]:
+        """The fresh cached response for a request, counting a hit or a miss."""
+        key = self._key(url, self._vary.get(url, []), request_headers)
+        entry = self._entries.get(key)
+        if entry is not None and not entry.fresh:
+            self._remove(key)
+            entry = None
+
+        body = None
+        if entry is not None:
+            try:
+                body = await asyncio.to_thread(self._read_body, key)
+            except OSError:
+                self._remove(key)
+                entry = None
+
+        if entry is None or body is None:
+            self.misses += 1
+            self._update_gauges()
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.metrics.increment("proxy_cache_hit_bytes_total", len(body))
+        self._update_gauges()
+        return entry, body
+
+    async def put(
+        self,
+        url: str,
+        status: int,
+        reason: str,
+        headers: Headers,
+        body: bytes,
+        ttl: float,
+        request_headers: Headers = (),
+    ) -> bool:
+        """Store a response for ttl seconds. Returns False if it is too large."""
+        if len(body) > self.max_entry_bytes:
+            return False
+        vary = _vary(headers)
+        key = self._key(url, vary, request_headers)
+        entry = CacheEntry(
+            url=url,
+            status=status,
+            reason=reason,
+            headers=headers,
+            size=len(body),
+            expires_at=time.time() + ttl,
+            vary=vary,
+        )
+        await asyncio.to_thread(self._write, key, entry, body)
+        self._vary[url] = vary
+
+        previous = self._entries.pop(key, None)
+        if previous:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self.stores += 1
+        self._evict()
+        self._update_gauges()
+        return True
+
+    def stats(self) -> Dict:
+        """Get cache occupancy and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def _key(self, url: str, vary: List[str], request_headers: Headers) -> str:
+        parts = [url] + [f"{name}: {_header(request_headers, name) or ''}" for name in vary]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root_dir, f"{key}.{suffix}")
+
+    def _read_body(self, key: str) -> bytes:
+        path = self._path(key, "body")
+        with open(path, "rb") as f:
+            body = f.read()
+        os.utime(path)
+        return body
+
+    def _write(self, key: str, entry: CacheEntry, body: bytes) -> None:
+        os.makedirs(self.root_dir, exist_ok=True)
+        # Body first: metadata on disk implies a complete body
+        for suffix, data in (("body", body), ("json", json.dumps(asdict(entry)).encode())):
+            path = self._path(key, suffix)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+
+    def _scan(self) -> List[Tuple[str, CacheEntry]]:
+        """Entries on disk, least recently used first; unreadable ones are deleted."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        found = []
+        for name in os.listdir(self.root_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            try:
+                with open(self._path(key, "json")) as f:
+                    data = json.load(f)
+                entry = CacheEntry(**{**data, "headers": [tuple(h) for h in data["headers"]]})
+                used_at = os.stat(self._path(key, "body")).st_mtime
+            except (OSError, TypeError, ValueError, KeyError):
+                self._unlink(key)
+                continue
+            found.append((used_at, key, entry))
+        return [(key, entry) for _, key, entry in sorted(found, key=lambda item: item[0])]
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            self.metrics.increment("proxy_cache_evictions_total")
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry.size
+        self._unlink(key)
+
+    def _unlink(self, key: str) -> None:
+        for suffix in ("json", "body"):
+            try:
+                os.unlink(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _update_gauges(self) -> None:
+        stats = self.stats()
+        self.metrics.set_gauge("proxy_cache_bytes", stats["bytes"])
+        self.metrics.set_gauge("proxy_cache_entries", stats["entries"])
+        self.metrics.set_gauge("proxy_cache_hit_ratio", stats["hit_rate"])
+
+
+class BadRequestError(Exception):
+    """The client sent something that isn't a proxy request we understand."""
+    pass
+
+
+@dataclass
+class ProxyRequest:
+    """Request line and headers of one client request."""
+
+    method: str
+    target: str
+    version: str
+    headers: Headers
+
+    def header(self, name: str) -> Optional[str]:
+        return _header(self.headers, name)
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = (self.header("proxy-connection") or self.header("connection") or "").lower()
+        if self.version == "HTTP/1.1":
+            return "close" not in connection
+        return "keep-alive" in connection
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[ProxyRequest]:
+    """Read the next request head, or None at end of stream."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise BadRequestError(f"Malformed request line: {line[:100]!r}")
+
+    headers: Headers = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise BadRequestError("Connection closed inside headers")
+        if line in (b"\r\n", b"\n"):
+            break
+        name, sep, value = line.decode("latin-1").partition(":")
+        if not sep:
+            raise BadRequestError(f"Malformed header: {line[:100]!r}")
+        headers.append((name.strip(), value.strip()))
+    return ProxyRequest(method.upper(), target, version.upper(), headers)
+
+
+async def _read_body(reader: asyncio.StreamReader, request: ProxyRequest) -> bytes:
+    if "chunked" in (request.header("transfer-encoding") or "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    length = request.header("content-length")
+    if length:
+        try:
+            return await reader.readexactly(int(length))
+        except ValueError:
+            raise BadRequestError(f"Bad Content-Length: {length!r}")
+    return b""
+
+
+def _head(status: int, reason: str, headers: Headers) -> bytes:
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{key}: {value}" for key, value in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, reason: str, text: str) -> None:
+    body = text.encode()
+    writer.write(_head(status, reason, [
+        ("Content-Type", "text/plain; charset=utf-8"),
+        ("Content-Length", str(len(body))),
+        ("Connection", "close"),
+    ]) + body)
+    await writer.drain()
+
+
+class CertificateAuthority:
+    """The proxy's CA and the host certificates it issues, made with ``openssl``.
+
+    Every host certificate shares one key, so browsers need to accept just
+    that key (``--ignore-certificate-errors-spki-list``).
+    """
+
+    def __init__(self, root_dir: str, openssl: str = "openssl"):
+        self.root_dir = root_dir
+        self.openssl = openssl
+        self._contexts: Dict[str, ssl.SSLContext] = {}
+        self._lock = asyncio.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root_dir, name)
+
+    @property
+    def ca_path(self) -> str:
+        return self._path("ca.pem")
+
+    @staticmethod
+    def read_spki(root_dir: str) -> Optional[str]:
+        """Base64 SHA-256 of the host key, or None before the CA exists."""
+        try:
+            with open(os.path.join(root_dir, "host.spki")) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    async def _run(self, *args: str, stdin: Optional[bytes] = None) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            self.openssl, *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await process.communicate(stdin)
+        if process.returncode != 0:
+            raise RuntimeError(f"openssl {args[0]} failed: {err.decode(errors='replace').strip()}")
+        return out
+
+    async def ensure(self) -> None:
+        """Create the CA and the host key, unless they exist.
+
+        Raises:
+            OSError: If openssl can't be run
+            RuntimeError: If openssl fails
+        """
+        if self.read_spki(self.root_dir) and os.path.exists(self.ca_path):
+            return
+        os.makedirs(os.path.join(self.root_dir, "hosts"), exist_ok=True)
+        await self._run(
+            "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", self._path("ca.key"), "-out", self.ca_path, "-days", "3650",
+            "-subj", "/CN=Jamie sandbox proxy CA",
+            "-addext", "basicConstraints=critical,CA:TRUE",
+            "-addext", "keyUsage=critical,keyCertSign,cRLSign",
+        )
+        await self._run(
+            "genpkey", "-algorithm", "RSA", "-pkeyopt", "rsa_keygen_bits:2048",
+            "-out", self._path("host.key"),
+        )
+        public_key = await self._run("pkey", "-in", self._path("host.key"), "-pubout",
+                                     "-outform", "DER")
+        with open(self._path("host.spki"), "w") as f:
+            f.write(base64.b64encode(hashlib.sha256(public_key).digest()).decode())
+        log.info("proxy_ca_created", ca=self.ca_path)
+
+    async def context(self, host: str) -> ssl.SSLContext:
+        """Server TLS context presenting a certificate for host."""
+        host = host.lower().strip("[]")
+        async with self._lock:
+            if host not in self._contexts:
+                chain = await self._issue(host)
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+                context.load_cert_chain(chain, self._path("host.key"))
+                context.set_alpn_protocols(["http/1.1"])
+                self._contexts[host] = context
+            return self._contexts[host]
+
+    async def _issue(self, host: str) -> str:
+        """Write host's certificate and the CA's to one file; returns its path."""
+        name = hashlib.sha256(host.encode()).hexdigest()[:32]
+        chain = os.path.join(self.root_dir, "hosts", f"{name}.pem")
+        if os.path.exists(chain):
+            return chain
+        try:
+            ipaddress.ip_address(host)
+            alt_name = f"IP:{host}"
+        except ValueError:
+            alt_name = f"DNS:{host}"
+        extensions = os.path.join(self.root_dir, "hosts", f"{name}.ext")
+        with open(extensions, "w") as f:
+            f.write(
+                f"subjectAltName={alt_name}\n"
+                "basicConstraints=CA:FALSE\n"
+                "extendedKeyUsage=serverAuth\n"
+            )
+        request = await self._run(
+            "req", "-new", "-key", self._path("host.key"), "-subj", f"/CN={host[:64]}",
+        )
+        certificate = await self._run(
+            "x509", "-req", "-CA", self.ca_path, "-CAkey", self._path("ca.key"),
+            "-set_serial", str(secrets.randbits(63)), "-days", "397",
+            "-extfile", extensions,
+            stdin=request,
+        )
+        with open(self.ca_path, "rb") as f:
+            authority = f.read()
+        with open(chain, "wb") as f:
+            f.write(certificate + authority)
+        return chain
+
+
+class CachingProxy:
+    """HTTP/1.1 forward proxy that serves cacheable responses from an AssetCache."""
+
+    def __init__(
+        self,
+        config: Optional[ProxyConfig] = None,
+        cache: Optional[AssetCache] = None,
+        metrics: Optional[MetricsCollector] = None,
+        upstream_ssl: Optional[ssl.SSLContext] = None,
+    ):
+        self.config = config or ProxyConfig()
+        self._metrics = metrics
+        self.cache = cache or AssetCache(
+            self.config.cache_dir,
+            max_bytes=parse_size(self.config.max_size),
+            max_entry_bytes=parse_size(self.config.max_entry_size),
+            metrics=metrics,
+        )
+        self._allowed_clients = [
+            ipaddress.ip_network(network, strict=False) for network in self.config.allowed_clients
+        ]
+        self._server: Optional[asyncio.Server] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Decrypts CONNECT tunnels when interception is on and openssl works
+        self._ca: Optional[CertificateAuthority] = None
+        # Trusted CAs for origins; the system's by default
+        self._upstream_ssl = upstream_ssl
+        self._clients: Set[asyncio.StreamWriter] = set()
+        # Open CONNECT tunnels
+        self._tunnels = 0
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    @property
+    def port(self) -> Optional[int]:
+        """Port actually listened on (the configured one may be 0)."""
+        if not self._server or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        if self._server:
+            return
+        await self.cache.start()
+        skipped = sorted(set(self.config.cache_hosts) - set(proxied_hosts(self.config)))
+        if skipped:
+            log.warning("proxy_private_hosts_skipped", patterns=skipped)
+        if self.config.intercept:
+            ca = CertificateAuthority(self.config.ca_dir)
+            try:
+                await ca.ensure()
+                self._ca = ca
+            except (OSError, RuntimeError) as e:
+                log.warning("proxy_interception_unavailable", error=str(e))
+        # Bodies are relayed as the origin encoded them
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=self._upstream_ssl or True),
+            auto_decompress=False,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60),
+        )
+        self._server = await asyncio.start_server(
+            self._handle, self.config.host, self.config.port
+        )
+        log.info(
+            "proxy_started",
+            port=self.port,
+            cache_dir=self.cache.root_dir,
+            max_bytes=self.cache.max_bytes,
+            intercepting=self._ca is not None,
+        )
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict:
+        """Get cache stats plus live connection counts."""
+        return {
+            **self.cache.stats(),
+            "connections": len(self._clients),
+            "open_tunnels": self._tunnels,
+            "intercepting": self._ca is not None,
+        }
+
+    def _client_allowed(self, writer: asyncio.StreamWriter) -> bool:
+        """Whether the connection comes from a sandbox network."""
+        peer = writer.get_extra_info("peername")
+        try:
+            address = ipaddress.ip_address(peer[0])
+        except (TypeError, ValueError, IndexError):
+            return False
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        return any(address in network for network in self._allowed_clients)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if not self._client_allowed(writer):
+            self.metrics.increment("proxy_requests_total", result="denied")
+            log.warning("proxy_client_denied", peer=writer.get_extra_info("peername"))
+            writer.close()
+            return
+        self._clients.add(writer)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                if request.method == "CONNECT":
+                    await self._tunnel(request, reader, writer)
+                    break
+                if not await self._forward(request, reader, writer):
+                    break
+        except BadRequestError as e:
+            try:
+                await _respond(writer, 400, "Bad Request", str(e))
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            log.error("proxy_request_failed", error=str(e))
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _forward(
+        self,
+        request: ProxyRequest,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> bool:
+        """Answer one HTTP request. Returns whether to keep the connection."""
+        if not request.target.lower().startswith(("http://", "https://")):
+            await _respond(writer, 400, "Bad Request", "Expected an absolute URL")
+            return False
+        if not cached_host(self.config, urlsplit(request.target).hostname or ""):
+            self.metrics.increment("proxy_requests_total", result="denied")
+            await _respond(writer, 403, "Forbidden", "Not a cached host")
+            return False
+        body = await _read_body(reader, request)
+        keep_alive = request.keep_alive
+        # Anything tied to an account stays out of the cache, both ways
+        cacheable = (
+            request.method == "GET"
+            and request.header("range") is None
+            and request.header("authorization") is None
+            and request.header("cookie") is None
+        )
+
+        if cacheable:
+            cached = await self.cache.get(request.target, request.headers)
+            if cached:
+                entry, content = cached
+                writer.write(_head(entry.status, entry.reason, [
+                    *entry.headers,
+                    ("Content-Length", str(len(content))),
+                    ("X-Cache", "HIT"),
+                    *([] if keep_alive else [("Connection", "close")]),
+                ]) + content)
+                await writer.drain()
+                self.metrics.increment("proxy_requests_total", result="hit")
+                return keep_alive
+
+        upstream_headers = [
+            (key, value) for key, value in _end_to_end(request.headers)
+            if key.lower() not in ("host", "content-length")
+        ]
+        started = False
+        try:
+            async with self._session.request(
+                request.method,
+                URL(request.target, encoded=True),
+                headers=upstream_headers,
+                data=body or None,
+                allow_redirects=False,
+                skip_auto_headers=("Accept-Encoding", "User-Agent"),
+            ) as response:
+                started = True
+                keep_alive = await self._relay(request, response, writer, cacheable, keep_alive)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning("proxy_upstream_failed", url=request.target, error=str(e))
+            if not started:
+                await _respond(writer, 502, "Bad Gateway", f"Upstream request failed: {e}")
+            return False
+
+        self.metrics.increment("proxy_requests_total", result="miss" if cacheable else "bypass")
+        return keep_alive
+
+    async def _relay(
+        self,
+        request: ProxyRequest,
+        response: aiohttp.ClientResponse,
+        writer: asyncio.StreamWriter,
+        cacheable: bool,
+        keep_alive: bool,
+    ) -> bool:
+        """Stream an origin response to the client, caching it if allowed."""
+        headers = _end_to_end([(k.decode("latin-1"), v.decode("latin-1"))
+                               for k, v in response.raw_headers])
+        length = _header(headers, "content-length")
+        no_body = request.method == "HEAD" or response.status in (204, 304) or response.status < 200
+
+        ttl = None
+        if cacheable and response.status == 200:
+            ttl = freshness(request.target, headers, self.config.default_ttl)
+        if ttl and length and (not length.isdigit() or int(length) > self.cache.max_entry_bytes):
+            ttl = None
+
+        chunked = False
+        if not no_body and length is None:
+            if request.version == "HTTP/1.1":
+                chunked = True
+                headers.append(("Transfer-Encoding", "chunked"))
+            else:
+                # Close-delimited, the only option HTTP/1.0 clients have
+                keep_alive = False
+        response_headers = [*headers, ("X-Cache", "MISS" if cacheable else "BYPASS")]
+        if not keep_alive:
+            response_headers.append(("Connection", "close"))
+        writer.write(_head(response.status, response.reason or "", response_headers))
+
+        stored: Optional[List[bytes]] = [] if ttl else None
+        stored_size = 0
+        if not no_body:
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                await writer.drain()
+                if stored is not None:
+                    stored.append(chunk)
+                    stored_size += len(chunk)
+                    if stored_size > self.cache.max_entry_bytes:
+                        stored = None
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+        if stored is not None and ttl:
+            cache_headers = [
+                (key, value) for key, value in headers
+                if key.lower() not in ("content-length", "transfer-encoding")
+            ]
+            await self.cache.put(
+                request.target, response.status, response.reason or "OK",
+                cache_headers, b"".join(stored), ttl, request.headers,
+            )
+        return keep_alive
+
+    async def _tunnel(
+        self,
+        request: ProxyRequest,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve a CONNECT tunnel (HTTPS): decrypted and cached, or relayed byte for byte."""
+        host, _, port = request.target.rpartition(":")
+        if not port.isdigit() or int(port) not in self.config.connect_ports:
+            self.metrics.increment("proxy_requests_total", result="denied")
+            await _respond(writer, 403, "Forbidden", f"CONNECT to port {port} not allowed")
+            return
+        if not cached_host(self.config, host):
+            self.metrics.increment("proxy_requests_total", result="denied")
+            await _respond(writer, 403, "Forbidden", "Not a cached host")
+            return
+        if self._ca:
+            await self._intercept(host, int(port), reader, writer)
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.wait_for(
+                asyncio.open_connection(host.strip("[]"), int(port)), timeout=30
+            )
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            log.warning("proxy_tunnel_failed", target=request.target, error=str(e))
+            await _respond(writer, 502, "Bad Gateway", f"Could not connect: {e}")
+            return
+
+        writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        await writer.drain()
+        self.metrics.increment("proxy_requests_total", result="tunnel")
+        self._tunnels += 1
+        try:
+            await asyncio.gather(
+                _pipe(reader, upstream_writer),
+                _pipe(upstream_reader, writer),
+            )
+        finally:
+            self._tunnels -= 1
+            upstream_writer.close()
+
+
+    async def _intercept(
+        self,
+        host: str,
+        port: int,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Terminate a tunnel's TLS with a certificate for host and proxy its requests."""
+        try:
+            context = await self._ca.context(host)
+        except (OSError, RuntimeError, ssl.SSLError) as e:
+            log.warning("proxy_certificate_failed", host=host, error=str(e))
+            await _respond(writer, 502, "Bad Gateway", f"No certificate for {host}")
+            return
+        writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        await writer.drain()
+        try:
+            await writer.start_tls(context)
+        except (ssl.SSLError, ConnectionError) as e:
+            # Usually a client that doesn't accept our certificates
+            log.warning("proxy_tls_failed", host=host, error=str(e))
+            self.metrics.increment("proxy_requests_total", result="tls_failed")
+            return
+        origin = f"https://{host}" if port == 443 else f"https://{host}:{port}"
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+            if request.target.startswith("/"):
+                request.target = origin + request.target
+            if not await self._forward(request, reader, writer):
+                break
+
+
+async def _pipe(source: asyncio.StreamReader, destination: asyncio.StreamWriter) -> None:
+    """Copy until either side goes away, then close the destination."""
+    try:
+        while True:
+            data = await source.read(_CHUNK_SIZE)
+            if not data:
+                break
+            destination.write(data)
+            await destination.drain()
+    except ConnectionError:
+        pass
+    finally:
+        destination.close()
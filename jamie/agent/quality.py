@@ -0,0 +1,157 @@
+"""Content video quality selection for Jamie agent.
+
+Players pick their quality for the bandwidth they see, which in a sandbox is
+usually 1080p or more for a display that is 768 lines tall. Sandboxes have
+no GPU, so every one of those extra pixels is decoded on the CPU the share's
+encode also needs. Before the content tab opens, the agent picks the largest
+quality that fits the display, one or two steps lower while the host is
+busy, and pins the player to it: through a URL parameter where the service
+has one (Vimeo), otherwise by telling the agent which quality to choose in
+the player's settings (YouTube, Twitch).
+
+Load is the session's own sandbox's CPU use per allotted core when telemetry
+has sampled it, or the controller's load average for sandboxes running on
+the controller's machine.
+"""
+
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from jamie.shared.config import QualityConfig
+from jamie.shared.url_patterns import StreamingService, parse_url
+
+# Vertical resolutions each service's player offers
+LADDERS: Dict[StreamingService, Tuple[int, ...]] = {
+    StreamingService.YOUTUBE: (144, 240, 360, 480, 720, 1080, 1440, 2160),
+    StreamingService.TWITCH: (160, 360, 480, 720, 1080),
+    StreamingService.VIMEO: (240, 360, 540, 720, 1080, 1440, 2160),
+}
+
+DEFAULT_INSTRUCTION = "Leave the player's quality setting as it is"
+
+
+@dataclass
+class ContentQuality:
+    """The video quality picked for a session's content."""
+
+    service: str
+    # Player quality, e.g. 720 for "720p"; None where there is nothing to pick
+    height: Optional[int]
+    # Why this quality: "display", "load" or "unsupported"
+    reason: str
+    # URL to open, with any quality parameter added
+    url: str
+    # Instruction for the open-URL prompt's video quality step
+    instruction: str = DEFAULT_INSTRUCTION
+    # Host load per CPU when the quality was picked
+    load: Optional[float] = None
+
+    @property
+    def label(self) -> Optional[str]:
+        return None if self.height is None else f"{self.height}p"
+
+    def to_dict(self) -> Dict[str, Any]:
+        details = asdict(self)
+        details["label"] = self.label
+        return details
+
+
+def host_load() -> Optional[float]:
+    """One-minute load average per CPU, or None where the OS doesn't report it."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return None
+
+
+def sandbox_load(cpu_cores: float, cpus: str) -> Optional[float]:
+    """CPU use per core the sandbox is allotted, or None if it has no CPU limit."""
+    try:
+        allotted = float(cpus)
+    except ValueError:
+        return None
+    return cpu_cores / allotted if allotted > 0 else None
+
+
+def vimeo_player_url(url: str, video_id: str, label: str) -> str:
+    """Vimeo player URL at a quality, keeping the original URL's parameters.
+    
+    Unlisted videos only play with their hash: the ``h`` parameter, or the
+    path segment after the ID of a vimeo.com link.
+    """
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key != "quality"
+    ]
+    segments = [segment for segment in parts.path.split("/") if segment]
+    after = segments[segments.index(video_id) + 1:] if video_id in segments else []
+    if after and re.fullmatch(r"[0-9a-f]+", after[0]) and "h" not in dict(params):
+        params.append(("h", after[0]))
+    params.append(("quality", label))
+    return f"https://player.vimeo.com/video/{video_id}?{urlencode(params)}"
+
+
+def display_height(display: str) -> int:
+    """Lines of a "WIDTHxHEIGHT" display."""
+    return int(display.lower().split("x")[1])
+
+
+def pick_height(
+    ladder: Tuple[int, ...],
+    display: str,
+    load: Optional[float],
+    config: QualityConfig,
+) -> Tuple[int, str]:
+    """The ladder's largest quality that fits the display, lowered for load."""
+    fits = [index for index, height in enumerate(ladder) if height <= display_height(display)]
+    index = fits[-1] if fits else 0
+    steps = 0
+    if load is not None and load >= config.overloaded_load:
+        steps = 2
+    elif load is not None and load >= config.busy_load:
+        steps = 1
+    # Load never pushes quality below min_height, or below what the display picked
+    floor = next((i for i, height in enumerate(ladder) if height >= config.min_height), index)
+    lowered = max(index - steps, min(floor, index))
+    return ladder[lowered], "load" if lowered < index else "display"
+
+
+def select_quality(
+    url: str,
+    display: str,
+    load: Optional[float] = None,
+    config: Optional[QualityConfig] = None,
+) -> ContentQuality:
+    """Pick the video quality for url in a display of the given size."""
+    config = config or QualityConfig()
+    parsed = parse_url(url)
+    service = parsed.service if parsed else StreamingService.GENERIC
+    ladder = LADDERS.get(service)
+    if not config.enabled or ladder is None:
+        return ContentQuality(service=service.value, height=None, reason="unsupported", url=url)
+
+    height, reason = pick_height(ladder, display, load, config)
+    quality = ContentQuality(
+        service=service.value,
+        height=height,
+        reason=reason,
+        url=url,
+        load=None if load is None else round(load, 2),
+    )
+    if service == StreamingService.VIMEO and parsed.video_id:
+        # Vimeo's player takes the quality as a URL parameter
+        quality.url = vimeo_player_url(url, parsed.video_id, quality.label)
+        quality.instruction = (
+            f"The URL already sets {quality.label}; leave the player's quality setting alone"
+        )
+    else:
+        quality.instruction = (
+            f"Open the player's Settings (gear icon) > Quality and choose {quality.label} "
+            "(any frame rate; the closest lower option if it isn't offered). "
+            "Do not leave it on Auto or Source"
+        )
+    return quality
@@ -0,0 +1,204 @@
+"""Orphaned sandbox reaper for Jamie agent.
+
+If the controller crashes, its in-memory sessions are gone but their sandbox
+containers keep running, each holding its CPU and memory budget. The reaper
+periodically lists this controller instance's sandbox containers on every
+Docker host sandboxes are placed on and removes the ones no live sandbox in
+this process owns, once they have stayed unowned for a grace period. The
+sessions a container was serving are read back from it and logged.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from jamie.agent.docker import DockerCLI, parse_size
+from jamie.agent.hosts import placement_daemons
+from jamie.agent.sandbox import (
+    CONTAINER_PREFIX,
+    OWNER_DIR,
+    SandboxConfig,
+    SandboxRegistry,
+    container_instance,
+    get_instance_id,
+    get_sandbox_registry,
+    instance_tag,
+)
+from jamie.shared.config import ReaperConfig, SandboxHost, get_placement_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Sessions of recently reaped containers shown in /stats
+RECENT_SESSIONS = 20
+
+
+class SandboxReaper:
+    """Finds and removes sandbox containers nobody owns."""
+
+    def __init__(
+        self,
+        config: Optional[ReaperConfig] = None,
+        registry: Optional[SandboxRegistry] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+        hosts: Optional[List[SandboxHost]] = None,
+    ):
+        self.config = config or ReaperConfig()
+        self.instance_id = self.config.instance_id or get_instance_id()
+        self._registry = registry
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        self._hosts = get_placement_config().hosts if hosts is None else hosts
+        self._task: Optional[asyncio.Task] = None
+        # Orphan container name -> monotonic time it was first seen unowned
+        self._unowned_since: Dict[str, float] = {}
+        # Orphan container name -> DOCKER_HOST of the daemon running it
+        self._orphan_hosts: Dict[str, str] = {}
+        self._orphaned_sessions: Deque[str] = deque(maxlen=RECENT_SESSIONS)
+
+        # Totals for /stats
+        self._reaped = 0
+        self._reclaimed_cpus = 0.0
+        self._reclaimed_memory_bytes = 0
+        self._last_sweep: Optional[float] = None
+
+    @property
+    def registry(self) -> SandboxRegistry:
+        return self._registry or get_sandbox_registry()
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def start(self) -> None:
+        """Start sweeping in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            log.info(
+                "reaper_started",
+                instance_id=self.instance_id,
+                daemons=len(placement_daemons(self._docker, self._hosts)),
+                grace_period=self.config.grace_period,
+            )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sweep(self) -> int:
+        """Remove orphans past their grace period. Returns how many were reaped."""
+        now = time.monotonic()
+        instance = instance_tag(self.instance_id)
+        daemons = placement_daemons(self._docker, self._hosts)
+        listings = await asyncio.gather(
+            *(docker.list_containers(CONTAINER_PREFIX) for docker in daemons.values()),
+            return_exceptions=True,
+        )
+        orphans: Dict[str, str] = {}
+        for docker_host, names in zip(daemons, listings):
+            if isinstance(names, Exception):
+                # Keep its orphans' clocks running until it answers again
+                log.warning("reaper_list_failed", docker_host=docker_host, error=str(names))
+                orphans.update({
+                    name: host for name, host in self._orphan_hosts.items()
+                    if host == docker_host and name not in self.registry
+                })
+                continue
+            for name in names:
+                if container_instance(name) == instance and name not in self.registry:
+                    orphans[name] = docker_host
+
+        # Forget containers that went away or were (re)claimed
+        self._unowned_since = {
+            name: self._unowned_since.get(name, now) for name in orphans
+        }
+        self._orphan_hosts = orphans
+
+        reaped = 0
+        for name, since in list(self._unowned_since.items()):
+            if now - since < self.config.grace_period:
+                continue
+            try:
+                await self._reap(name, daemons[orphans[name]])
+            except Exception as e:
+                log.warning("reaper_remove_failed", container=name, error=str(e))
+                continue
+            del self._unowned_since[name]
+            del self._orphan_hosts[name]
+            reaped += 1
+
+        self._last_sweep = time.time()
+        return reaped
+
+    def stats(self) -> Dict:
+        """Get live ownership and reclaimed capacity."""
+        owners = self.registry.owners()
+        in_session = sum(1 for owner in owners.values() if owner)
+        return {
+            "instance_id": self.instance_id,
+            "live_sandboxes": len(owners),
+            "in_session": in_session,
+            "unassigned": len(owners) - in_session,
+            "orphans_pending": len(self._unowned_since),
+            "reaped_total": self._reaped,
+            "reclaimed_cpus": round(self._reclaimed_cpus, 2),
+            "reclaimed_memory_mb": round(self._reclaimed_memory_bytes / (1024 * 1024), 1),
+            "last_sweep_at": self._last_sweep,
+            "orphaned_sessions": list(self._orphaned_sessions),
+        }
+
+    async def _reap(self, name: str, docker: DockerCLI) -> None:
+        cpus, memory = await self._resources(name, docker)
+        sessions = await self._sessions(name, docker)
+        await docker.remove_container(name)
+        self._reaped += 1
+        self._reclaimed_cpus += cpus
+        self._reclaimed_memory_bytes += memory
+        self._orphaned_sessions.extend(sessions)
+        self.metrics.increment("sandboxes_reaped_total")
+        log.warning(
+            "reaper_removed_orphan",
+            container=name,
+            docker_host=docker.host,
+            sessions=sessions,
+            cpus=cpus,
+            memory_bytes=memory,
+        )
+
+    async def _sessions(self, name: str, docker: DockerCLI) -> List[str]:
+        """Sessions the container recorded as using it, if it still can say."""
+        try:
+            out = await docker.exec(name, "sh", "-c", f"cat {OWNER_DIR}/* 2>/dev/null; true")
+        except Exception:
+            return []
+        return out.split()
+
+    async def _resources(self, name: str, docker: DockerCLI) -> Tuple[float, int]:
+        """The container's CPU/memory limits, or the sandbox defaults if unlimited."""
+        defaults = SandboxConfig(name=name)
+        try:
+            cpus, memory = await docker.container_resources(name)
+        except Exception:
+            cpus, memory = 0.0, 0
+        return (
+            cpus or float(defaults.cpu),
+            memory or parse_size(defaults.memory),
+        )
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                reaped = await self.sweep()
+                if reaped:
+                    log.info("reaper_sweep_completed", reaped=reaped)
+            except Exception as e:
+                log.error("reaper_sweep_failed", error=str(e))
+            await asyncio.sleep(self.config.interval)
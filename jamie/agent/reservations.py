@@ -0,0 +1,186 @@
+"""Speculative sandbox reservations for Jamie agent.
+
+The bot calls ``POST /prepare`` as soon as a DM with a URL arrives, before it
+has looked up the user's voice channel and created a session. The controller
+starts getting a sandbox right away under a short-lived token; the following
+``POST /stream`` carrying that token claims it instead of booting its own.
+A request the bot turns away releases its token with ``DELETE /prepare/{token}``;
+reservations nobody claims or releases expire and give their sandbox back.
+"""
+
+import asyncio
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from jamie.agent.pool import SandboxLease
+from jamie.shared.config import ReservationConfig
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+# Gets a sandbox for a reservation: a pool lease or a freshly booted one
+LeaseProvider = Callable[[], Awaitable[SandboxLease]]
+
+
+class ReservationLimitError(Exception):
+    """Too many unclaimed reservations are already holding sandboxes."""
+    pass
+
+
+@dataclass
+class Reservation:
+    """A sandbox being readied for a stream request that hasn't arrived yet."""
+
+    token: str
+    lease: "asyncio.Task[SandboxLease]"
+    created_at: float
+    expires_at: float
+    requester_id: Optional[str] = None
+
+    @property
+    def expires_in(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class ReservationManager:
+    """Hands out reservation tokens and releases sandboxes nobody claimed."""
+
+    def __init__(self, provider: LeaseProvider, config: Optional[ReservationConfig] = None):
+        self._provider = provider
+        self.config = config or ReservationConfig()
+        self._reservations: Dict[str, Reservation] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._releasing: Set[asyncio.Task] = set()
+
+        # Counters for /stats
+        self._prepared = 0
+        self._claimed = 0
+        self._expired = 0
+        self._cancelled = 0
+        self._failed = 0
+
+    def prepare(self, requester_id: Optional[str] = None) -> Reservation:
+        """Start getting a sandbox and return its reservation.
+
+        Raises:
+            ReservationLimitError: If max_active reservations are outstanding
+        """
+        if len(self._reservations) >= self.config.max_active:
+            raise ReservationLimitError(
+                f"{len(self._reservations)} reservations already outstanding"
+            )
+
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        reservation = Reservation(
+            token=token,
+            lease=asyncio.create_task(self._provider()),
+            created_at=now,
+            expires_at=now + self.config.ttl_seconds,
+            requester_id=requester_id,
+        )
+        self._reservations[token] = reservation
+        self._timers[token] = asyncio.create_task(self._expire_later(token))
+        self._prepared += 1
+        log.info(
+            "reservation_prepared",
+            requester_id=requester_id,
+            ttl=self.config.ttl_seconds,
+            active=len(self._reservations),
+        )
+        return reservation
+
+    def claim(self, token: str) -> Optional["asyncio.Task[SandboxLease]"]:
+        """Take over a reservation's sandbox.
+
+        Returns the task producing the lease (it may still be booting), or
+        None if the token is unknown or already expired.
+        """
+        reservation = self._reservations.pop(token, None)
+        if reservation is None:
+            log.info("reservation_claim_missed")
+            return None
+        self._cancel_timer(token)
+        self._claimed += 1
+        log.info(
+            "reservation_claimed",
+            requester_id=reservation.requester_id,
+            age_seconds=round(time.monotonic() - reservation.created_at, 2),
+            booted=reservation.lease.done(),
+        )
+        return reservation.lease
+
+    def cancel(self, token: str) -> bool:
+        """Give back a reservation's sandbox before it expires.
+
+        Returns False if the token is unknown, already claimed or expired.
+        """
+        reservation = self._reservations.pop(token, None)
+        if reservation is None:
+            return False
+        self._cancel_timer(token)
+        self._cancelled += 1
+        log.info("reservation_cancelled", requester_id=reservation.requester_id)
+        self._release_later(reservation)
+        return True
+
+    async def stop(self) -> None:
+        """Release every outstanding reservation."""
+        tokens = list(self._reservations)
+        for token in tokens:
+            self._cancel_timer(token)
+        await asyncio.gather(
+            *(self._release(self._reservations.pop(token)) for token in tokens),
+            return_exceptions=True,
+        )
+        if self._releasing:
+            await asyncio.gather(*self._releasing, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        """Get reservation counts."""
+        return {
+            "active": len(self._reservations),
+            "prepared": self._prepared,
+            "claimed": self._claimed,
+            "expired": self._expired,
+            "cancelled": self._cancelled,
+            "failed": self._failed,
+        }
+
+    async def _expire_later(self, token: str) -> None:
+        await asyncio.sleep(self.config.ttl_seconds)
+        reservation = self._reservations.pop(token, None)
+        self._timers.pop(token, None)
+        if reservation is None:
+            return
+        self._expired += 1
+        log.info("reservation_expired", requester_id=reservation.requester_id)
+        await self._release_later(reservation)
+
+    def _release_later(self, reservation: Reservation) -> "asyncio.Task[None]":
+        # Tracked so stop() can wait for releases already under way
+        task = asyncio.ensure_future(self._release(reservation))
+        self._releasing.add(task)
+        task.add_done_callback(self._releasing.discard)
+        return task
+
+    async def _release(self, reservation: Reservation) -> None:
+        """Give back a reservation's sandbox, waiting for it to finish booting.
+
+        A boot is never cancelled half way; that could leave the container
+        behind the provider's back.
+        """
+        try:
+            lease = await reservation.lease
+        except Exception as e:
+            self._failed += 1
+            log.warning("reservation_boot_failed", error=str(e))
+            return
+        await lease.release()
+
+    def _cancel_timer(self, token: str) -> None:
+        timer = self._timers.pop(token, None)
+        if timer:
+            timer.cancel()
@@ -1,33 +1,398 @@
 """CUA Sandbox management for Jamie agent."""
 
-from typing import Optional
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
 import asyncio
+import json
+import os
+import re
+import shlex
+import time
+import uuid
 
 # CUA imports
 from computer import Computer
 
+from jamie.agent.cpuset import CpuAllocator, CpusetAllocation, cores_needed, get_cpu_allocator
+from jamie.agent.docker import DockerCLI, DockerError, parse_size
+from jamie.agent.framebuffer import (
+    XVFB_SCREEN_FILE,
+    Frame,
+    FramebufferComputer,
+    FramebufferError,
+    FramebufferReader,
+)
+from jamie.agent.hosts import HostPlacer, get_host_placer, get_provider_daemon
+from jamie.agent.imaging import EncodingComputer, ScreenshotEncoder, get_screenshot_encoder
+from jamie.agent.local import LOCAL_PROVIDER, LocalComputer
+from jamie.agent.performance import PerformanceProfile, get_performance_profile
+from jamie.agent.proxy import proxy_flags, proxy_policy
+from jamie.agent.shaping import (
+    LIMIT_METRIC,
+    PAGE_CLASS,
+    NetworkShape,
+    network_shape,
+    tc_script,
+)
+from jamie.agent.storage import (
+    ON_TMPFS,
+    SYNC_METRIC,
+    seed_script,
+    sync_script,
+    working_paths,
+)
+from jamie.shared.config import (
+    CaptureConfig,
+    PerformanceConfig,
+    ProxyConfig,
+    ReaperConfig,
+    SandboxHost,
+    SandboxProviderConfig,
+    get_capture_config,
+    get_performance_config,
+    get_proxy_config,
+    get_reaper_config,
+    get_sandbox_provider_config,
+    get_shaping_config,
+    get_storage_config,
+)
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Histogram of SandboxManager.start() stage durations, labeled by stage
+BOOT_STAGE_METRIC = "sandbox_boot_stage_seconds"
+
+
+# Sandbox containers are named jamie-sbx-<controller instance>-<random id>.
+# The CUA provider gives us no way to set docker labels, so the name is how
+# the reaper tells this controller's containers apart, and the sessions
+# using a container are recorded inside it, one file per slot.
+CONTAINER_PREFIX = "jamie-sbx-"
+OWNER_DIR = "/tmp/jamie-owners"
+_INSTANCE_UNSAFE = re.compile(r"[^a-zA-Z0-9_.]+")
+
+
+def load_instance_id(config: ReaperConfig) -> str:
+    """The configured instance ID, or the one kept in instance_id_file.
+    
+    Generated and written there on first use, so it survives restarts and
+    hostname changes as long as the file does.
+    """
+    if config.instance_id:
+        return config.instance_id
+    try:
+        with open(config.instance_id_file) as f:
+            instance_id = f.read().strip()
+        if instance_id:
+            return instance_id
+    except FileNotFoundError:
+        pass
+    instance_id = uuid.uuid4().hex[:12]
+    try:
+        os.makedirs(os.path.dirname(config.instance_id_file) or ".", exist_ok=True)
+        with open(config.instance_id_file, "w") as f:
+            f.write(instance_id + "\n")
+    except OSError as e:
+        # Containers of this run will look foreign to the next one
+        log.warning("instance_id_not_kept", path=config.instance_id_file, error=str(e))
+    log.info("instance_id_generated", instance_id=instance_id)
+    return instance_id
+
+
+# Resolved once per process
+_instance_id: Optional[str] = None
+
+
+def get_instance_id() -> str:
+    """This controller's instance ID."""
+    global _instance_id
+    if _instance_id is None:
+        _instance_id = load_instance_id(get_reaper_config())
+    return _instance_id
+
+
+def instance_tag(instance_id: str) -> str:
+    """The form of a controller instance ID used in container names."""
+    return _INSTANCE_UNSAFE.sub("_", instance_id)
+
+
+def container_name(instance_id: str) -> str:
+    """A fresh container name for a sandbox of controller ``instance_id``."""
+    return f"{CONTAINER_PREFIX}{instance_tag(instance_id)}-{uuid.uuid4().hex[:12]}"
+
+
+def container_instance(name: str) -> Optional[str]:
+    """The controller instance encoded in a sandbox container name, if any."""
+    if not name.startswith(CONTAINER_PREFIX):
+        return None
+    instance, sep, _ = name[len(CONTAINER_PREFIX):].rpartition("-")
+    return instance if sep and instance else None
+
+
+@dataclass
+class SandboxDefaults:
+    """What a SandboxConfig falls back on, resolved from configuration once."""
+    
+    provider_type: str
+    instance_id: str
+    performance_profile: str
+    capture_backend: str
+    framebuffer_dir: str
+    # The caching proxy's, when it is enabled
+    browser_policies: Dict[str, Any] = field(default_factory=dict)
+    browser_flags: Tuple[str, ...] = ()
+
+
+def load_sandbox_defaults(
+    provider: Optional[SandboxProviderConfig] = None,
+    performance: Optional[PerformanceConfig] = None,
+    capture: Optional[CaptureConfig] = None,
+    proxy: Optional[ProxyConfig] = None,
+    instance_id: Optional[str] = None,
+) -> SandboxDefaults:
+    """Resolve sandbox defaults; configs not passed in are read from the environment."""
+    provider = provider or get_sandbox_provider_config()
+    performance = performance or get_performance_config()
+    capture = capture or get_capture_config()
+    proxy = proxy or get_proxy_config()
+    return SandboxDefaults(
+        provider_type=provider.provider,
+        instance_id=instance_id or get_instance_id(),
+        performance_profile=performance.default_profile,
+        capture_backend=capture.backend,
+        framebuffer_dir=capture.framebuffer_dir,
+        browser_policies=proxy_policy(proxy) if proxy.enabled else {},
+        browser_flags=proxy_flags(proxy) if proxy.enabled else (),
+    )
+
+
+_defaults: Optional[SandboxDefaults] = None
+
+
+def get_sandbox_defaults() -> SandboxDefaults:
+    """Get the process-wide sandbox defaults, resolving them on first use."""
+    global _defaults
+    if _defaults is None:
+        _defaults = load_sandbox_defaults()
+    return _defaults
+
+
+def set_sandbox_defaults(defaults: SandboxDefaults) -> None:
+    """Use defaults for every SandboxConfig built from now on."""
+    global _defaults
+    _defaults = defaults
+
 
 @dataclass
 class SandboxConfig:
     """Configuration for CUA sandbox."""
     
     os_type: str = "linux"
-    provider_type: str = "docker"
+    # "docker" or "local"; the configured provider when left empty
+    provider_type: str = ""
     image: str = "trycua/cua-xfce:latest"
     display: str = "1024x768"
     memory: str = "4GB"
     cpu: str = "2"
     timeout: int = 120
+    health_check_timeout: float = 10.0
+    # How often to ask docker whether the container is up while booting
+    boot_probe_interval: float = 0.25
+    # Container name, so we can address the container behind the CUA provider;
+    # generated from the controller instance ID when left empty
+    name: str = ""
+    # Browser inside the sandbox
+    browser_command: str = "chromium"
+    browser_profile_path: str = "/home/cua/.config/chromium"
+    browser_user: str = "cua"
+    # Seconds a closed browser gets to exit before it is killed
+    browser_exit_timeout: float = 5.0
+    # Managed Chromium policies and flags written into the sandbox before the
+    # browser starts, on top of the performance profile's; the caching
+    # proxy's policies are added when it is enabled
+    browser_policies: Dict[str, Any] = field(default_factory=dict)
+    browser_policy_dir: str = "/etc/chromium/policies/managed"
+    browser_flags: Tuple[str, ...] = ()
+    # Sourced by the Debian chromium launcher, so flags also apply to
+    # browsers the agent opens itself
+    browser_flags_file: str = "/etc/chromium.d/jamie"
+    # Browser performance profile; the configured default when left empty
+    performance_profile: str = ""
+    # Screenshot source ("server" or "framebuffer") and, for "framebuffer",
+    # the in-sandbox directory of Xvfb's -fbdir; configured defaults if empty
+    capture_backend: str = ""
+    framebuffer_dir: str = ""
+    # Network rate limits, when shaping is enabled: "page" or "video"
+    network_class: str = PAGE_CLASS
+    # Run the browser profile and cache from tmpfs, when that is enabled
+    working_storage: bool = True
+    # What empty fields fall back on; the process-wide defaults when None
+    defaults: Optional[SandboxDefaults] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        defaults = self.defaults or get_sandbox_defaults()
+        self.provider_type = self.provider_type or defaults.provider_type
+        self.name = self.name or container_name(defaults.instance_id)
+        self.performance_profile = self.performance_profile or defaults.performance_profile
+        self.capture_backend = self.capture_backend or defaults.capture_backend
+        self.framebuffer_dir = self.framebuffer_dir or defaults.framebuffer_dir
+        self.browser_policies = {**defaults.browser_policies, **self.browser_policies}
+        # Kept once when the config is copied with dataclasses.replace
+        flags = [flag for flag in defaults.browser_flags if flag not in self.browser_flags]
+        self.browser_flags = (*flags, *self.browser_flags)
+
+
+def memory_footprint(config: SandboxConfig) -> int:
+    """Bytes a sandbox may use: its performance profile's memory limit, or the configured one."""
+    profile = get_performance_profile(config.performance_profile)
+    return parse_size(profile.memory or config.memory)
+
+
+def _write_file_command(path: str, content: str) -> str:
+    """Shell command creating path (and its directory) with content."""
+    directory = path.rsplit("/", 1)[0] or "/"
+    return "mkdir -p {dir} && printf %s {content} > {path}".format(
+        dir=shlex.quote(directory),
+        content=shlex.quote(content),
+        path=shlex.quote(path),
+    )
+
+
+# Builds the Computer for a sandbox; tests swap in a fake provider here
+ComputerFactory = Callable[..., Computer]
+
+
+def default_computer_factory(provider_type: str) -> ComputerFactory:
+    """The Computer class for a provider: CUA's, or ours for local sandboxes."""
+    return LocalComputer if provider_type == LOCAL_PROVIDER else Computer
+
+
+class SandboxRegistry:
+    """Sandboxes this controller process currently owns, by container name.
+    
+    Anything running under this controller's instance ID that isn't in here
+    is an orphan, e.g. left behind by a crashed controller.
+    """
+    
+    def __init__(self):
+        self._sandboxes: Dict[str, "SandboxManager"] = {}
+    
+    def add(self, sandbox: "SandboxManager") -> None:
+        self._sandboxes[sandbox.container_name] = sandbox
+    
+    def discard(self, sandbox: "SandboxManager") -> None:
+        if self._sandboxes.get(sandbox.container_name) is sandbox:
+            del self._sandboxes[sandbox.container_name]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._sandboxes
+    
+    def names(self) -> List[str]:
+        return list(self._sandboxes)
+    
+    def sandboxes(self) -> List["SandboxManager"]:
+        return list(self._sandboxes.values())
+    
+    def owners(self) -> Dict[str, Optional[str]]:
+        """Container name -> owning session ID (None for pooled or reserved)."""
+        return {name: sandbox.owner for name, sandbox in self._sandboxes.items()}
+
+
+# Global registry instance
+_registry: Optional[SandboxRegistry] = None
+
+
+def get_sandbox_registry() -> SandboxRegistry:
+    """Get or create the process-wide sandbox registry."""
+    global _registry
+    if _registry is None:
+        _registry = SandboxRegistry()
+    return _registry
 
 
 class SandboxManager:
-    """Manages CUA sandbox lifecycle."""
+    """Manages CUA sandbox lifecycle.
+    
+    ``start()`` records how long each boot stage took in ``boot_timings``
+    and the ``sandbox_boot_stage_seconds`` histogram:
     
-    def __init__(self, config: Optional[SandboxConfig] = None):
+    - ``create``: until docker reports the container running (for local
+      sandboxes: until the display is up)
+    - ``handshake``: the rest of ``Computer.run()`` (VNC and computer-server
+      coming up); includes ``create`` when docker couldn't be asked
+    - ``first_screenshot``: the first screenshot round trip
+    - ``total``: the whole of ``start()``
+    """
+    
+    def __init__(
+        self,
+        config: Optional[SandboxConfig] = None,
+        computer_factory: Optional[ComputerFactory] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+        registry: Optional[SandboxRegistry] = None,
+        encoder: Optional[ScreenshotEncoder] = None,
+        placer: Optional[HostPlacer] = None,
+        cpu_allocator: Optional[CpuAllocator] = None,
+    ):
         self.config = config or SandboxConfig()
+        self._computer_factory = computer_factory or default_computer_factory(
+            self.config.provider_type
+        )
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        self._registry = registry
+        self._encoder = encoder
+        self._placer = placer
+        self._cpu_allocator = cpu_allocator
         self._computer: Optional[Computer] = None
+        self._framebuffer: Optional[FramebufferReader] = None
+        # What the agent gets: the Computer with framebuffer capture and/or
+        # screenshot re-encoding layered on, when either is enabled
+        self._capture_computer = None
         self._is_running: bool = False
+        self.boot_timings: Dict[str, float] = {}
+        # Session currently using the sandbox, if any
+        self.owner: Optional[str] = None
+        # Agent phase the session is in; picks screenshot encoding settings
+        self.phase: Optional[str] = None
+        # Network limits in force, if shaping is enabled and applied
+        self.network_shape: Optional[NetworkShape] = None
+        # Docker host the sandbox was placed on; kept across restarts
+        self.host: Optional[SandboxHost] = None
+        # Cores dedicated to the container, if CPU pinning is enabled and it fit
+        self.cpuset: Optional[CpusetAllocation] = None
+        # Profile on the container filesystem while the browser's is on tmpfs
+        self._durable_profile_path: Optional[str] = None
+        self._cache_dir: Optional[str] = None
+        self._sync_task: Optional[asyncio.Task] = None
+    
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+    
+    @property
+    def registry(self) -> SandboxRegistry:
+        return self._registry or get_sandbox_registry()
+    
+    @property
+    def encoder(self) -> Optional[ScreenshotEncoder]:
+        return self._encoder or get_screenshot_encoder()
+    
+    @property
+    def placer(self) -> Optional[HostPlacer]:
+        return self._placer or get_host_placer()
+    
+    @property
+    def cpu_allocator(self) -> Optional[CpuAllocator]:
+        return self._cpu_allocator or get_cpu_allocator()
+    
+    @property
+    def docker_host(self) -> str:
+        """DOCKER_HOST of the daemon running the sandbox; empty for the controller's."""
+        return self.host.docker_host if self.host else ""
     
     @property
     def is_running(self) -> bool:
@@ -36,34 +401,658 @@ class SandboxManager:
     
     @property
     def computer(self) -> Optional[Computer]:
-        """Get the CUA Computer instance."""
-        return self._computer
+        """Get the CUA Computer instance, with the configured screenshot capture."""
+        return self._capture_computer or self._computer
+    
+    @property
+    def is_local(self) -> bool:
+        """Whether the sandbox runs as local processes rather than a container."""
+        return self.config.provider_type == LOCAL_PROVIDER
+    
+    @property
+    def container_name(self) -> str:
+        """Name of the sandbox container."""
+        return self.config.name
+    
+    @property
+    def performance_profile(self) -> PerformanceProfile:
+        return get_performance_profile(self.config.performance_profile)
+    
+    @property
+    def browser_policies(self) -> Dict[str, Any]:
+        """Managed policies: the performance profile's plus the configured ones."""
+        return {**self.performance_profile.policies, **self.config.browser_policies}
+    
+    @property
+    def browser_flags(self) -> Tuple[str, ...]:
+        """Browser flags: the performance profile's plus the configured ones."""
+        flags = (*self.performance_profile.flags, *self.config.browser_flags)
+        if self._cache_dir:
+            flags = (*flags, f"--disk-cache-dir={self._cache_dir}")
+            if not any(flag.startswith("--disk-cache-size=") for flag in flags):
+                cache_bytes = get_storage_config().cache_size_mb * 1024 * 1024
+                flags = (*flags, f"--disk-cache-size={cache_bytes}")
+        return flags
+    
+    @property
+    def on_tmpfs(self) -> bool:
+        """Whether the browser profile is a working copy on tmpfs."""
+        return self._durable_profile_path is not None
+    
+    @property
+    def durable_profile_path(self) -> str:
+        """The profile snapshots keep: on the container filesystem."""
+        return self._durable_profile_path or self.config.browser_profile_path
+    
+    @property
+    def memory_limit(self) -> str:
+        """Container memory limit: the performance profile's, or the configured one."""
+        return self.performance_profile.memory or self.config.memory
     
     async def start(self) -> Computer:
         """Start the CUA sandbox and return Computer instance."""
         if self._is_running:
             raise RuntimeError("Sandbox already running")
         
-        self._computer = Computer(
+        self.boot_timings = {}
+        started = time.monotonic()
+        computer_args: Dict[str, Any] = {}
+        if self.is_local:
+            # Home directory of the local sandbox
+            computer_args["user"] = self.config.browser_user
+        elif self.placer and self.config.provider_type == "docker":
+            self._place()
+            # Where computer-server and VNC are reached
+            computer_args["host"] = self.host.address
+        self._computer = self._computer_factory(
             os_type=self.config.os_type,
             provider_type=self.config.provider_type,
             image=self.config.image,
+            name=self.config.name,
             display=self.config.display,
-            memory=self.config.memory,
+            memory=self.memory_limit,
             cpu=self.config.cpu,
             timeout=self.config.timeout,
+            **computer_args,
         )
         
-        await self._computer.run()
+        # Registered before the container exists so the reaper never races us
+        self.registry.add(self)
+        try:
+            container_up = await self._run_computer()
+        except BaseException:
+            self.registry.discard(self)
+            self._unplace()
+            raise
+        handshake_from = started
+        if container_up is not None:
+            self._record_stage("create", container_up - started)
+            handshake_from = container_up
+        self._record_stage("handshake", time.monotonic() - handshake_from)
+        try:
+            await self._pin_cpus()
+            await self._prepare_working_storage()
+            await self._stop_desktop_services()
+            await self._apply_browser_settings()
+            await self._apply_network_shaping()
+            await self._open_framebuffer()
+        except BaseException:
+            # Nobody will stop a sandbox that never started: give back its
+            # container, cores and registration now
+            try:
+                await self._teardown()
+            except Exception as e:
+                log.warning("sandbox_boot_cleanup_failed", container=self.config.name, error=str(e))
+            raise
+        if not self._capture_computer and self.encoder:
+            self._capture_computer = EncodingComputer(
+                self._computer, self.encoder, lambda: self.phase
+            )
+        
+        screenshot_started = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                self._computer.interface.screenshot(),
+                timeout=self.config.health_check_timeout,
+            )
+            self._record_stage("first_screenshot", time.monotonic() - screenshot_started)
+        except Exception as e:
+            # The agent takes its own screenshots; only the timing is lost
+            log.warning("sandbox_first_screenshot_failed", error=str(e))
+        
         self._is_running = True
-        return self._computer
+        self._record_stage("total", time.monotonic() - started)
+        log.info("sandbox_started", container=self.config.name, stages=self.boot_timings)
+        return self.computer
+    
+    def _place(self) -> None:
+        """Pick the sandbox's host (the one it had, on a restart) and talk to its daemon.
+        
+        Raises:
+            NoHostAvailableError: If no host has room
+        """
+        self.host = self.placer.place(
+            self.config.name,
+            parse_size(self.memory_limit),
+            pinned=self.host.name if self.host else None,
+        )
+        if self._docker.host != self.host.docker_host:
+            self._docker = self._docker.for_host(self.host.docker_host)
+    
+    def _unplace(self) -> None:
+        if self.host and self.placer:
+            self.placer.release(self.config.name)
+    
+    async def _run_computer(self) -> Optional[float]:
+        """Run ``Computer.run()`` while polling docker for the container.
+        
+        Returns the monotonic time docker first reported the container
+        running (or a local sandbox's display came up), or None if it never
+        did or can't be told.
+        """
+        probe = self.config.provider_type == "docker"
+        if probe:
+            async with get_provider_daemon().use(self.docker_host):
+                container_up = await self._probe_computer(probe)
+        else:
+            container_up = await self._probe_computer(probe)
+        if self.is_local:
+            return getattr(self._computer, "display_ready_at", None)
+        return container_up
+    
+    async def _probe_computer(self, probe: bool) -> Optional[float]:
+        run = asyncio.ensure_future(self._computer.run())
+        container_up: Optional[float] = None
+        try:
+            while not run.done():
+                if probe and container_up is None:
+                    if await self._docker.container_running(self.config.name):
+                        container_up = time.monotonic()
+                await asyncio.wait({run}, timeout=self.config.boot_probe_interval)
+        finally:
+            if not run.done():
+                run.cancel()
+        await run
+        return container_up
+    
+    async def _apply_browser_settings(self) -> None:
+        """Write (or clear) the managed browser policies and flags in the sandbox.
+        
+        Always written, so settings baked into a snapshot image don't linger.
+        """
+        if self.config.provider_type != "docker":
+            return
+        policy_file = f"{self.config.browser_policy_dir}/jamie.json"
+        policies = self.browser_policies
+        file_flags = self.browser_flags
+        if self.on_tmpfs:
+            # Browsers the agent opens itself use the working profile too
+            file_flags = (f"--user-data-dir={self.config.browser_profile_path}", *file_flags)
+        flags = " ".join(file_flags)
+        steps = [
+            _write_file_command(policy_file, json.dumps(policies)) if policies
+            else f"rm -f {shlex.quote(policy_file)}",
+            _write_file_command(
+                self.config.browser_flags_file,
+                f'export CHROMIUM_FLAGS="$CHROMIUM_FLAGS {flags}"\n',
+            ) if flags
+            else f"rm -f {shlex.quote(self.config.browser_flags_file)}",
+        ]
+        try:
+            await self._docker.exec(self.config.name, "sh", "-c", " && ".join(steps), user="root")
+        except DockerError as e:
+            # The browser still works, just without them
+            log.warning("sandbox_browser_settings_failed", container=self.config.name, error=str(e))
+    
+    async def _prepare_working_storage(self) -> None:
+        """Move the browser profile and cache to tmpfs, if enabled and there is room.
+        
+        The profile on the container filesystem is copied as the working
+        copy's starting point and stays the durable one.
+        """
+        storage = get_storage_config()
+        if (
+            not storage.tmpfs
+            or not self.config.working_storage
+            or self.config.provider_type != "docker"
+        ):
+            return
+        durable = self.durable_profile_path
+        started = time.monotonic()
+        try:
+            out = await self._docker.exec(
+                self.config.name,
+                "sh", "-c",
+                seed_script(durable, storage.tmpfs_dir, self.config.browser_user,
+                            storage.min_free_mb),
+                user="root",
+            )
+        except DockerError as e:
+            log.warning("sandbox_tmpfs_failed", container=self.config.name, error=str(e))
+            return
+        if out.strip() != ON_TMPFS:
+            log.warning(
+                "sandbox_tmpfs_too_small", container=self.config.name, free_kb=out.strip()
+            )
+            return
+        self._durable_profile_path = durable
+        self.config.browser_profile_path, self._cache_dir = working_paths(storage.tmpfs_dir)
+        self._sync_task = asyncio.create_task(self._sync_loop(storage.sync_interval))
+        log.info(
+            "sandbox_working_storage_ready",
+            container=self.config.name,
+            seconds=round(time.monotonic() - started, 3),
+        )
+    
+    async def record_owner(self, session_id: Optional[str], slot: str = "sandbox") -> None:
+        """Record (or clear) the session using the sandbox, or one of its slots.
+        
+        Kept in the container so the reaper can tell whose sandbox a crashed
+        controller left behind.
+        """
+        if self.config.provider_type != "docker":
+            return
+        path = f"{OWNER_DIR}/{slot}"
+        command = (
+            _write_file_command(path, session_id + "\n") if session_id
+            else f"rm -f {shlex.quote(path)}"
+        )
+        try:
+            await self._docker.exec(self.config.name, "sh", "-c", command, user="root")
+        except DockerError as e:
+            log.warning("sandbox_owner_record_failed", container=self.config.name, error=str(e))
+    
+    async def sync_profile(self, reason: str) -> bool:
+        """Copy cookies and local storage from the tmpfs profile to the durable one.
+        
+        Returns whether anything was synced; a no-op unless the profile is on tmpfs.
+        """
+        if not self.on_tmpfs or not self._is_running:
+            return False
+        script = sync_script(self.config.browser_profile_path, self.durable_profile_path)
+        started = time.monotonic()
+        try:
+            await self._docker.exec(
+                self.config.name,
+                "sh", "-c", script,
+                user="root",
+            )
+        except DockerError as e:
+            self.metrics.increment("sandbox_profile_sync_failures_total", reason=reason)
+            log.warning(
+                "sandbox_profile_sync_failed",
+                container=self.config.name,
+                reason=reason,
+                error=str(e),
+            )
+            return False
+        self.metrics.observe(SYNC_METRIC, time.monotonic() - started, reason=reason)
+        return True
+    
+    async def _sync_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.sync_profile("interval")
+    
+    async def _leave_working_storage(self) -> None:
+        """Sync a last time and point the config back at the durable profile."""
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if not self.on_tmpfs:
+            return
+        await self.sync_profile("shutdown")
+        self.config.browser_profile_path = self._durable_profile_path
+        self._durable_profile_path = None
+        self._cache_dir = None
+    
+    async def _stop_desktop_services(self) -> None:
+        """Stop the desktop processes the performance profile has no use for."""
+        services = self.performance_profile.stopped_services
+        if self.config.provider_type != "docker" or not services:
+            return
+        # pkill exits 1 for services the image doesn't run
+        script = "; ".join(f"pkill -x {shlex.quote(name)}" for name in services) + "; true"
+        try:
+            await self._docker.exec(self.config.name, "sh", "-c", script, user="root")
+        except DockerError as e:
+            log.warning("sandbox_desktop_trim_failed", container=self.config.name, error=str(e))
+    
+    async def _apply_memory_limit(self) -> None:
+        """Move a running container to the performance profile's memory limit."""
+        if self.config.provider_type != "docker":
+            return
+        try:
+            await self._docker.update_memory(self.config.name, self.memory_limit)
+        except DockerError as e:
+            # Keeps the limit it booted with
+            log.warning("sandbox_memory_limit_failed", container=self.config.name, error=str(e))
+    
+    async def _pin_cpus(self) -> None:
+        """Pin the container to cores of its own, if CPU pinning is enabled."""
+        allocator = self.cpu_allocator
+        if allocator is None or self.config.provider_type != "docker":
+            return
+        try:
+            self.cpuset = await allocator.allocate(
+                self.config.name, cores_needed(self.config.cpu), self.host
+            )
+            if self.cpuset is None:
+                return
+            mems = self.cpuset.mems if allocator.config.pin_memory else ""
+            await self._docker.update_cpuset(self.config.name, self.cpuset.cpuset, mems)
+        except (DockerError, ValueError) as e:
+            # Runs on whichever cores the scheduler picks
+            log.warning("sandbox_cpuset_failed", container=self.config.name, error=str(e))
+            self._unpin_cpus()
+    
+    def _unpin_cpus(self) -> None:
+        if self.cpuset and self.cpu_allocator:
+            self.cpu_allocator.release(self.config.name)
+        self.cpuset = None
+    
+    async def _apply_network_shaping(self) -> None:
+        """Rate limit the container's network to its network class's limits.
+        
+        Left unshaped (and logged) when the limits can't be applied.
+        """
+        shaping_config = get_shaping_config()
+        if not shaping_config.enabled or self.config.provider_type != "docker":
+            return
+        shape = network_shape(self.config.network_class, shaping_config)
+        try:
+            await self._docker.run_in_network(
+                self.config.name,
+                shaping_config.image,
+                "sh", "-c", tc_script(shape, shaping_config.interface),
+                cap_add=("NET_ADMIN",),
+            )
+        except DockerError as e:
+            log.warning("sandbox_network_shaping_failed", container=self.config.name, error=str(e))
+            return
+        self.network_shape = shape
+        for direction, bits in shape.limits().items():
+            self.metrics.set_gauge(
+                LIMIT_METRIC, bits, sandbox=self.config.name, direction=direction
+            )
+    
+    async def _open_framebuffer(self) -> None:
+        """Map the display's framebuffer file when that capture backend is configured.
+        
+        Needs the controller to see the container's root filesystem at the
+        path docker reports; otherwise screenshots stay with computer-server.
+        """
+        if self.config.capture_backend != "framebuffer" and not self.is_local:
+            return
+        try:
+            if self.is_local:
+                # Local displays always have one
+                path = self._computer.framebuffer_path
+            else:
+                root = await self._docker.container_root(self.config.name)
+                path = os.path.join(
+                    root, self.config.framebuffer_dir.lstrip("/"), XVFB_SCREEN_FILE
+                )
+            self._framebuffer = FramebufferReader(path)
+            # Fail now rather than on the agent's first screenshot
+            self._framebuffer.frame()
+        except (DockerError, FramebufferError) as e:
+            self._close_framebuffer()
+            log.warning("sandbox_framebuffer_unavailable", container=self.config.name, error=str(e))
+            return
+        self._capture_computer = FramebufferComputer(
+            self._computer,
+            self._framebuffer,
+            metrics=self._metrics,
+            encoder=self.encoder,
+            phase=lambda: self.phase,
+        )
+    
+    def _close_framebuffer(self) -> None:
+        if self._framebuffer:
+            self._framebuffer.close()
+        self._framebuffer = None
+        self._capture_computer = None
+    
+    def capture_frame(self) -> Optional[Frame]:
+        """The current screen straight from the framebuffer, or None if it isn't mapped.
+        
+        The frame shares memory with the framebuffer, so it keeps changing;
+        copy what must stay put.
+        """
+        if not self._framebuffer:
+            return None
+        try:
+            return self._framebuffer.frame()
+        except (FramebufferError, OSError) as e:
+            log.warning("sandbox_frame_capture_failed", container=self.config.name, error=str(e))
+            return None
+    
+    async def capture(self) -> Union[bytes, Frame]:
+        """The screen before any re-encoding: a framebuffer frame if mapped, else a PNG."""
+        if not self._computer or not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        frame = self.capture_frame()
+        if frame is not None:
+            return frame
+        return await self._computer.interface.screenshot()
+    
+    async def set_performance_profile(self, name: str) -> None:
+        """Switch performance profile; a running browser keeps the old one until restarted.
+        
+        The memory limit and desktop services change straight away.
+        
+        Raises:
+            KeyError: If there is no such profile
+        """
+        previous = self.memory_limit
+        get_performance_profile(name)
+        self.config.performance_profile = name
+        if self._is_running:
+            if self.memory_limit != previous:
+                await self._apply_memory_limit()
+            await self._stop_desktop_services()
+            await self._apply_browser_settings()
+    
+    async def set_network_class(self, name: str) -> None:
+        """Switch network class, re-applying the limits while running.
+        
+        Raises:
+            KeyError: If there is no such class
+        """
+        network_shape(name, get_shaping_config())
+        if name == self.config.network_class:
+            return
+        self.config.network_class = name
+        if self._is_running:
+            await self._apply_network_shaping()
+    
+    def _record_stage(self, stage: str, seconds: float) -> None:
+        self.boot_timings[stage] = round(seconds, 3)
+        self.metrics.observe(BOOT_STAGE_METRIC, seconds, stage=stage)
     
     async def stop(self) -> None:
         """Stop the CUA sandbox."""
         if self._computer and self._is_running:
-            await self._computer.stop()
-            self._is_running = False
-            self._computer = None
+            await self._teardown()
+    
+    async def _teardown(self) -> None:
+        """Stop the container and release everything it holds."""
+        self._close_framebuffer()
+        await self._leave_working_storage()
+        try:
+            if self.config.provider_type == "docker":
+                async with get_provider_daemon().use(self.docker_host):
+                    await self._computer.stop()
+            else:
+                await self._computer.stop()
+        finally:
+            # If stopping failed the container is an orphan for the reaper
+            self.registry.discard(self)
+            self._unplace()
+            self._unpin_cpus()
+        self._is_running = False
+        if self.network_shape:
+            for direction in self.network_shape.limits():
+                self.metrics.remove_gauge(
+                    LIMIT_METRIC, sandbox=self.config.name, direction=direction
+                )
+            self.network_shape = None
+        self._computer = None
+    
+    async def wait_exited(self) -> int:
+        """Wait for a local sandbox's display server to exit; returns its exit code.
+        
+        Containers have no such wait; their deaths come from docker events.
+        """
+        if not self.is_local or not self._computer:
+            raise RuntimeError("Only a running local sandbox can be waited on")
+        return await self._computer.wait()
+    
+    async def health_check(self) -> bool:
+        """Check that the sandbox still answers a screenshot request."""
+        if not self._computer or not self._is_running:
+            return False
+        try:
+            await asyncio.wait_for(
+                self._computer.interface.screenshot(),
+                timeout=self.config.health_check_timeout,
+            )
+            return True
+        except Exception:
+            return False
+    
+    async def commit_snapshot(self, image: str) -> str:
+        """Commit the running sandbox's filesystem as image. Returns the image ID."""
+        if not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        if self.is_local:
+            raise RuntimeError("Local sandboxes have no image to snapshot")
+        # tmpfs isn't part of the image
+        await self.sync_profile("snapshot")
+        return await self._docker.commit(self.config.name, image)
+    
+    async def memory_usage_mb(self) -> Optional[float]:
+        """Current container memory usage in MB, or None if it can't be read."""
+        if not self._is_running:
+            return None
+        try:
+            if self.is_local:
+                return await asyncio.to_thread(self._computer.memory_usage) / (1024 * 1024)
+            return await self._docker.memory_usage(self.config.name) / (1024 * 1024)
+        except Exception:
+            return None
+    
+    async def copy_in(self, source: str, destination: str) -> None:
+        """Copy a local file or directory into the sandbox, owned by the browser user."""
+        if not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        if self.is_local:
+            await self._computer.copy_in(source, destination)
+            return
+        await self._docker.copy(source, f"{self.config.name}:{destination}")
+        await self._docker.exec(
+            self.config.name,
+            "chown", "-R", f"{self.config.browser_user}:{self.config.browser_user}", destination,
+            user="root",
+        )
+    
+    async def copy_out(self, source: str, destination: str) -> None:
+        """Copy a file or directory out of the sandbox."""
+        if not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        if self.is_local:
+            await self._computer.copy_out(source, destination)
+            return
+        await self._docker.copy(f"{self.config.name}:{source}", destination)
+    
+    async def launch_browser(
+        self,
+        url: str,
+        profile_path: Optional[str] = None,
+        extra_args: Sequence[str] = (),
+    ) -> None:
+        """Start the browser detached at url, on profile_path or the configured profile."""
+        if not self._computer or not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        profile = self._sandbox_path(profile_path or self.config.browser_profile_path)
+        command = " ".join([
+            "nohup",
+            shlex.quote(self.config.browser_command),
+            f"--user-data-dir={shlex.quote(profile)}",
+            "--no-first-run",
+            *(shlex.quote(arg) for arg in (*self.browser_flags, *extra_args)),
+            shlex.quote(url),
+            ">/dev/null 2>&1 &",
+        ])
+        await self._computer.interface.run_command(command)
+    
+    async def close_browser(self, profile_path: Optional[str] = None) -> None:
+        """Stop the browser processes on one profile, or every browser in the sandbox."""
+        if not self._computer or not self._is_running:
+            raise RuntimeError("Sandbox not running")
+        pattern = shlex.quote(self._browser_pattern(profile_path))
+        await self._computer.interface.run_command(f"pkill -f -- {pattern} || true")
+    
+    async def browser_running(self, profile_path: Optional[str] = None) -> bool:
+        """Whether a browser runs on profile_path, or any browser in the sandbox."""
+        if not self._computer or not self._is_running:
+            return False
+        pattern = shlex.quote(self._browser_pattern(profile_path))
+        result = await self._computer.interface.run_command(
+            f"pgrep -f -- {pattern} >/dev/null && echo running || true"
+        )
+        return "running" in (getattr(result, "stdout", None) or "")
+    
+    async def restart_browser(
+        self,
+        url: str,
+        profile_path: Optional[str] = None,
+        extra_args: Sequence[str] = (),
+    ) -> None:
+        """Restart the browser at url without restarting the sandbox.
+        
+        A hung browser may ignore being closed; whatever is left of it after
+        ``browser_exit_timeout`` is killed.
+        """
+        started = time.monotonic()
+        await self.close_browser(profile_path)
+        deadline = started + self.config.browser_exit_timeout
+        while await self.browser_running(profile_path):
+            if time.monotonic() >= deadline:
+                pattern = shlex.quote(self._browser_pattern(profile_path))
+                profile = shlex.quote(
+                    self._sandbox_path(profile_path or self.config.browser_profile_path)
+                )
+                # A killed browser leaves its profile locked
+                await self._computer.interface.run_command(
+                    f"pkill -KILL -f -- {pattern}; rm -f {profile}/SingletonLock; true"
+                )
+                break
+            await asyncio.sleep(0.2)
+        await self.launch_browser(url, profile_path, extra_args)
+        log.info(
+            "sandbox_browser_restarted",
+            container=self.config.name,
+            seconds=round(time.monotonic() - started, 3),
+        )
+    
+    def _browser_pattern(self, profile_path: Optional[str] = None) -> str:
+        """pgrep/pkill pattern for the browsers on one profile, or all of the sandbox's."""
+        if profile_path:
+            return f"--user-data-dir={re.escape(self._sandbox_path(profile_path))}( |$)"
+        if self.is_local:
+            # Not every browser on the host; those of this sandbox live in its tree
+            return f"--user-data-dir={re.escape(self._computer.root)}/"
+        return self.config.browser_command
+    
+    def _sandbox_path(self, path: str) -> str:
+        """A sandbox path as the sandbox's processes see it."""
+        return self._computer.host_path(path) if self.is_local else path
     
     async def restart(self) -> Computer:
         """Restart the sandbox."""
@@ -0,0 +1,114 @@
+"""Per-sandbox network shaping for Jamie agent.
+
+Sandboxes on one host share its uplink. A session pulling a high-bitrate
+video can take most of it, and every other session's WebRTC share then
+stutters. Each container sandbox gets rate limits on its own interface:
+
+- download is policed to its network class's rate (higher for video
+  content than for plain pages), which makes TCP back off;
+- upload is capped with HTB, and UDP (the share's WebRTC media) goes in a
+  class with a guaranteed share of the cap and first claim on the rest, so
+  uploads and page traffic can't starve the stream.
+
+``tc`` runs in a throwaway helper container that joins the sandbox's
+network namespace with NET_ADMIN, so the sandbox image needs neither ``tc``
+nor extra capabilities.
+"""
+
+import shlex
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from jamie.shared.config import ShapingConfig
+from jamie.shared.url_patterns import StreamingService
+
+# Network classes: sandboxes without a session, and sessions by content
+PAGE_CLASS = "page"
+VIDEO_CLASS = "video"
+VIDEO_SERVICES = {StreamingService.YOUTUBE, StreamingService.TWITCH, StreamingService.VIMEO}
+
+# Gauge of each sandbox's limits, labeled by sandbox and direction
+LIMIT_METRIC = "sandbox_network_limit_bits_per_second"
+
+
+@dataclass
+class NetworkShape:
+    """Rate limits for one sandbox."""
+
+    network_class: str
+    download_bits: int
+    upload_bits: int
+    # Upload guaranteed to WebRTC media (UDP)
+    media_bits: int
+
+    def limits(self) -> Dict[str, int]:
+        return {"receive": self.download_bits, "transmit": self.upload_bits}
+
+
+def content_class(service: str) -> str:
+    """The network class for a session streaming a service's content."""
+    return VIDEO_CLASS if service in VIDEO_SERVICES else PAGE_CLASS
+
+
+def network_shape(network_class: str, config: ShapingConfig) -> NetworkShape:
+    """The limits of a network class.
+
+    Raises:
+        KeyError: If there is no such class
+    """
+    download_mbit = {
+        PAGE_CLASS: config.page_download_mbit,
+        VIDEO_CLASS: config.video_download_mbit,
+    }.get(network_class)
+    if download_mbit is None:
+        raise KeyError(f"Unknown network class {network_class!r}")
+    upload_bits = int(config.upload_mbit * 1e6)
+    return NetworkShape(
+        network_class=network_class,
+        download_bits=int(download_mbit * 1e6),
+        upload_bits=upload_bits,
+        media_bits=int(upload_bits * config.media_share),
+    )
+
+
+def tc_script(shape: NetworkShape, interface: str = "eth0") -> str:
+    """Shell script replacing whatever shaping the interface had with shape's."""
+    dev = shlex.quote(interface)
+    up = shape.upload_bits // 1000
+    media = shape.media_bits // 1000
+    down = shape.download_bits // 1000
+    # 50ms worth of download, so a burst doesn't get policed straight away
+    burst = max(shape.download_bits // 8 // 20, 16 * 1024)
+    steps = [
+        f"tc qdisc del dev {dev} root 2>/dev/null",
+        f"tc qdisc del dev {dev} ingress 2>/dev/null",
+        # Upload: UDP first, everything else borrows what it leaves
+        f"tc qdisc add dev {dev} root handle 1: htb default 20",
+        f"tc class add dev {dev} parent 1: classid 1:1 htb rate {up}kbit ceil {up}kbit",
+        f"tc class add dev {dev} parent 1:1 classid 1:10 htb rate {media}kbit "
+        f"ceil {up}kbit prio 0",
+        f"tc class add dev {dev} parent 1:1 classid 1:20 htb rate {max(up - media, 1)}kbit "
+        f"ceil {up}kbit prio 1",
+        f"tc qdisc add dev {dev} parent 1:10 fq_codel",
+        f"tc qdisc add dev {dev} parent 1:20 fq_codel",
+        f"tc filter add dev {dev} parent 1: protocol ip prio 1 u32 "
+        f"match ip protocol 17 0xff flowid 1:10",
+        # Download: drop beyond the rate so senders slow down
+        f"tc qdisc add dev {dev} handle ffff: ingress",
+        f"tc filter add dev {dev} parent ffff: protocol all prio 1 matchall "
+        f"action police rate {down}kbit burst {burst} drop",
+    ]
+    # The deletes fail when there was nothing to delete
+    return "; ".join(steps[:2]) + "; " + " && ".join(steps[2:])
+
+
+def describe(shape: Optional[NetworkShape]) -> Optional[Dict[str, object]]:
+    """A shape's limits in Mbit/s, for webhook details and /stats."""
+    if shape is None:
+        return None
+    return {
+        "network_class": shape.network_class,
+        "download_mbit": shape.download_bits / 1e6,
+        "upload_mbit": shape.upload_bits / 1e6,
+        "media_mbit": shape.media_bits / 1e6,
+    }
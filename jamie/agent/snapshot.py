@@ -0,0 +1,171 @@
+"""Logged-in sandbox snapshots for Jamie agent.
+
+After a sandbox completes the Discord login, its filesystem (browser profile
+included) is committed as a versioned image. Later sandboxes boot from that
+image and only need a quick check that the session is still valid instead of
+the full login flow. Snapshots that fail the check are invalidated so the
+next session falls back to a full login and produces a fresh version.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from jamie.agent.docker import DockerCLI, DockerError
+from jamie.agent.sandbox import SandboxManager
+from jamie.shared.logging import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_REPOSITORY = "jamie-discord-session"
+
+
+def account_key(email: str) -> str:
+    """Stable, non-reversible key for a Discord account."""
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:16]
+
+
+@dataclass
+class Snapshot:
+    """A committed logged-in sandbox image."""
+
+    version: int
+    image: str
+    base_image: str
+    account: str
+    created_at: float
+    valid: bool = True
+    invalidated_reason: Optional[str] = None
+
+
+class SnapshotStore:
+    """Tracks snapshot images and their validity.
+
+    Metadata is kept in a JSON file under ``state_dir`` so versions survive
+    controller restarts. Only the newest ``keep`` images per account are kept
+    on the Docker host.
+    """
+
+    METADATA_FILE = "snapshots.json"
+
+    def __init__(
+        self,
+        state_dir: str,
+        repository: str = DEFAULT_REPOSITORY,
+        keep: int = 2,
+        docker: Optional[DockerCLI] = None,
+    ):
+        self.state_dir = state_dir
+        self.repository = repository
+        self.keep = keep
+        self._docker = docker or DockerCLI()
+        self._snapshots: List[Snapshot] = self._load()
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.state_dir, self.METADATA_FILE)
+
+    def current(self, email: str, base_image: str) -> Optional[Snapshot]:
+        """Get the newest valid snapshot for an account and base image."""
+        key = account_key(email)
+        candidates = [
+            s for s in self._snapshots
+            if s.valid and s.account == key and s.base_image == base_image
+        ]
+        return max(candidates, key=lambda s: s.version, default=None)
+
+    def find_by_image(self, image: str) -> Optional[Snapshot]:
+        """Get the snapshot a sandbox image refers to, if any."""
+        for snapshot in self._snapshots:
+            if snapshot.image == image:
+                return snapshot
+        return None
+
+    async def create(self, sandbox: SandboxManager, email: str, base_image: str) -> Snapshot:
+        """Commit a logged-in sandbox as the next snapshot version."""
+        key = account_key(email)
+        version = max((s.version for s in self._snapshots), default=0) + 1
+        image = f"{self.repository}:{key}-v{version}"
+
+        started = time.monotonic()
+        await sandbox.commit_snapshot(image)
+
+        snapshot = Snapshot(
+            version=version,
+            image=image,
+            base_image=base_image,
+            account=key,
+            created_at=time.time(),
+        )
+        self._snapshots.append(snapshot)
+        self._save()
+        log.info(
+            "snapshot_created",
+            image=image,
+            version=version,
+            duration=round(time.monotonic() - started, 2),
+        )
+
+        await self._prune(key)
+        return snapshot
+
+    async def invalidate(self, snapshot: Snapshot, reason: str) -> None:
+        """Mark a snapshot unusable and remove its image."""
+        if not snapshot.valid:
+            return
+        snapshot.valid = False
+        snapshot.invalidated_reason = reason
+        self._save()
+        log.warning("snapshot_invalidated", image=snapshot.image, reason=reason)
+        await self._remove_image(snapshot)
+
+    def entries(self) -> List[Dict]:
+        """Get metadata for all known snapshots."""
+        return [asdict(s) for s in self._snapshots]
+
+    async def _prune(self, key: str) -> None:
+        """Drop images beyond the newest ``keep`` valid versions for an account."""
+        valid = sorted(
+            (s for s in self._snapshots if s.valid and s.account == key),
+            key=lambda s: s.version,
+            reverse=True,
+        )
+        for snapshot in valid[self.keep:]:
+            snapshot.valid = False
+            snapshot.invalidated_reason = "superseded"
+            await self._remove_image(snapshot)
+        # Forget invalid entries we no longer need to remember
+        self._snapshots = [
+            s for s in self._snapshots
+            if s.valid or s.account != key or s.invalidated_reason != "superseded"
+        ]
+        self._save()
+
+    async def _remove_image(self, snapshot: Snapshot) -> None:
+        try:
+            await self._docker.remove_image(snapshot.image)
+        except DockerError as e:
+            # Image may still be in use by a running sandbox; leave it for later
+            log.warning("snapshot_remove_failed", image=snapshot.image, error=str(e))
+
+    def _load(self) -> List[Snapshot]:
+        try:
+            with open(self._path) as f:
+                return [Snapshot(**item) for item in json.load(f)]
+        except FileNotFoundError:
+            return []
+        except (ValueError, TypeError) as e:
+            log.warning("snapshot_metadata_unreadable", path=self._path, error=str(e))
+            return []
+
+    def _save(self) -> None:
+        """Write metadata atomically so a crash never leaves a torn file."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.state_dir, prefix=".snapshots-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.entries(), f, indent=2)
+        os.replace(tmp, self._path)
@@ -0,0 +1,76 @@
+"""tmpfs working storage for sandbox browsers.
+
+Chromium writes its cache, history and session files continuously while
+pages load, and in a container those writes go through the overlay
+filesystem. The browser runs from a copy of its profile on tmpfs instead
+(``/dev/shm``, which every container has), with its disk cache next to it.
+The profile on the container filesystem stays the durable copy that
+snapshots commit and the next boot starts from, and only what a later
+session needs is synced back to it: the login cookies, the key that
+encrypts them, and local storage.
+"""
+
+import shlex
+from typing import Tuple
+
+# Profile files kept across sessions, relative to the profile directory
+SYNC_PATHS: Tuple[str, ...] = (
+    # Holds the key Chromium encrypts cookies with
+    "Local State",
+    # Chromium 96+ keeps cookies under Network/; older builds in Default/
+    "Default/Network/Cookies",
+    "Default/Network/Cookies-journal",
+    "Default/Cookies",
+    "Default/Cookies-journal",
+    "Default/Local Storage",
+)
+
+# Histogram of profile sync durations, labeled by reason
+SYNC_METRIC = "sandbox_profile_sync_seconds"
+
+# What seed_script prints when the profile moved to tmpfs
+ON_TMPFS = "tmpfs"
+
+
+def working_paths(tmpfs_dir: str) -> Tuple[str, str]:
+    """The (profile, cache) directories under a working storage directory."""
+    return f"{tmpfs_dir}/profile", f"{tmpfs_dir}/cache"
+
+
+def seed_script(durable: str, tmpfs_dir: str, user: str, min_free_mb: int) -> str:
+    """Shell script copying the durable profile to tmpfs.
+
+    Prints ``ON_TMPFS`` once the working copy is ready, anything else when
+    the tmpfs is too small and the browser should stay where it was.
+    """
+    profile, cache = working_paths(tmpfs_dir)
+    root = shlex.quote(tmpfs_dir)
+    source = shlex.quote(durable)
+    owner = shlex.quote(f"{user}:{user}")
+    return (
+        f"mkdir -p {root} && "
+        f"free=$(df -Pk {root} | awk 'NR==2 {{print $4}}'); "
+        f"if [ \"${{free:-0}}\" -lt {min_free_mb * 1024} ]; then echo \"$free\"; exit 0; fi; "
+        f"mkdir -p {shlex.quote(profile)} {shlex.quote(cache)} && "
+        f"if [ -d {source} ]; then cp -a {source}/. {shlex.quote(profile)}/; fi && "
+        f"chown -R {owner} {root} && echo {ON_TMPFS}"
+    )
+
+
+def sync_script(working: str, durable: str, paths: Tuple[str, ...] = SYNC_PATHS) -> str:
+    """Shell script copying paths from the working profile over the durable one.
+
+    Each path is copied next to its destination and renamed into place, so an
+    interrupted sync leaves the previous copy usable.
+    """
+    steps = []
+    for path in paths:
+        source = shlex.quote(f"{working}/{path}")
+        target = shlex.quote(f"{durable}/{path}")
+        staging = shlex.quote(f"{durable}/{path}.sync")
+        parent = shlex.quote(f"{durable}/{path}".rsplit("/", 1)[0])
+        steps.append(
+            f"if [ -e {source} ]; then mkdir -p {parent} && rm -rf {staging} && "
+            f"cp -a {source} {staging} && rm -rf {target} && mv {staging} {target}; fi"
+        )
+    return "set -e; " + "; ".join(steps)
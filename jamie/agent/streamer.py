@@ -1,25 +1,49 @@
 """CUA Streaming Agent for Discord automation."""
 
 import asyncio
+import shutil
+import tempfile
+import time
 import aiohttp
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Awaitable, Dict, List, Optional
 from datetime import datetime
 
 # CUA imports
 from computer import Computer
 from agent import ComputerAgent
 
+from jamie.agent.browser_profiles import BrowserProfileManager, ProfileHealth, check_profile
+from jamie.agent.performance import CPU_BUCKETS, CPU_METRIC, get_performance_profile
+from jamie.agent.launch import SESSION, LaunchGovernor, start_sandbox
 from jamie.agent.sandbox import SandboxManager, SandboxConfig
+from jamie.agent.pool import SandboxLease, SandboxPool
+from jamie.agent.quality import ContentQuality, host_load, sandbox_load, select_quality
+from jamie.agent.shaping import PAGE_CLASS, content_class, describe
+from jamie.agent.snapshot import SnapshotStore
+from jamie.agent.telemetry import TelemetryCollector
+from jamie.agent.watchdog import SandboxWatchdog, Watch
 from jamie.agent.prompts import (
     DISCORD_LOGIN_PROMPT,
+    VERIFY_DISCORD_SESSION_PROMPT,
     JOIN_VOICE_CHANNEL_PROMPT,
     OPEN_URL_IN_NEW_TAB_PROMPT,
     START_SCREEN_SHARE_PROMPT,
     STOP_SCREEN_SHARE_PROMPT,
     LEAVE_VOICE_CHANNEL_PROMPT,
+    RESET_TO_IDLE_PROMPT,
 )
+from jamie.shared.config import get_quality_config, get_recovery_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import get_metrics
+
+log = get_logger(__name__)
+
+DISCORD_APP_URL = "https://discord.com/app"
+
+# Histogram of seconds a session took to recover, labeled by tier ("browser", "sandbox")
+RECOVERY_METRIC = "session_recovery_seconds"
 
 
 class AgentState(str, Enum):
@@ -31,6 +55,7 @@ class AgentState(str, Enum):
     OPENING_URL = "opening_url"
     STARTING_SHARE = "starting_share"
     STREAMING = "streaming"
+    RECOVERING = "recovering"
     STOPPING = "stopping"
     STOPPED = "stopped"
     ERROR = "error"
@@ -58,6 +83,7 @@ class AgentContext:
     max_budget: float = 2.0
     sandbox_image: str = "trycua/cua-xfce:latest"
     display_resolution: str = "1024x768"
+    performance_profile: str = "standard"
     
     # Webhook for status updates
     webhook_url: Optional[str] = None
@@ -74,6 +100,24 @@ class AgentRun:
     error_message: Optional[str] = None
     cost_so_far: float = 0.0
     iterations: int = 0
+    # Where the sandbox came from and how long getting it took, per stage
+    sandbox_source: Optional[str] = None
+    boot_timings: Dict[str, float] = field(default_factory=dict)
+    # Performance profile the browser actually ran with, and its CPU use
+    performance_profile: Optional[str] = None
+    cpu_samples: List[float] = field(default_factory=list)
+    # Video quality the content player was pinned to
+    content_quality: Optional[ContentQuality] = None
+    # Network class of the sandbox while streaming
+    network_class: Optional[str] = None
+    # Recoveries from browser failures: tier, reason and seconds each took
+    recoveries: List[Dict[str, object]] = field(default_factory=list)
+    
+    @property
+    def cpu_cores_avg(self) -> Optional[float]:
+        if not self.cpu_samples:
+            return None
+        return round(sum(self.cpu_samples) / len(self.cpu_samples), 3)
     
     def update_state(self, state: AgentState, error: Optional[str] = None) -> None:
         """Update agent state."""
@@ -86,9 +130,46 @@ class AgentRun:
 class StreamingAgent:
     """CUA-powered agent that streams content to Discord voice channels."""
     
-    def __init__(self, context: AgentContext):
+    def __init__(
+        self,
+        context: AgentContext,
+        pool: Optional[SandboxPool] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        profiles: Optional[BrowserProfileManager] = None,
+        reserved: Optional[Awaitable[SandboxLease]] = None,
+        watchdog: Optional[SandboxWatchdog] = None,
+        governor: Optional[LaunchGovernor] = None,
+        telemetry: Optional[TelemetryCollector] = None,
+    ):
         self.context = context
         self.run: Optional[AgentRun] = None
+        self._pool = pool
+        self._governor = governor
+        # When the request came in; fresh boots queue by how long it has waited
+        self._requested_at = time.monotonic()
+        # Sandbox from a POST /prepare reservation, possibly still booting
+        self._reserved = reserved
+        self._snapshots = snapshots
+        self._profiles = profiles
+        self._profile_attached = False
+        self._watchdog = watchdog
+        self._watch: Optional[Watch] = None
+        # CPU use comes from its samples; the last one recorded, so none counts twice
+        self._telemetry = telemetry
+        self._cpu_sampled_at: Optional[float] = None
+        # Why the sandbox died under the session, once the watchdog says so
+        self._sandbox_lost: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        # Set by a graceful stop(), which then owns the cleanup, and once it is done
+        self._stop_requested = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._recovery = get_recovery_config()
+        # Whether the liveness probe has seen this image's browser; None until
+        # the first probe. Images with another browser are never probed again.
+        self._browser_seen: Optional[bool] = None
+        # Set once the sandbox is back to "logged in, not in voice, one tab"
+        self._reusable = False
+        self._lease: Optional[SandboxLease] = None
         self._sandbox: Optional[SandboxManager] = None
         self._computer: Optional[Computer] = None
         self._agent: Optional[ComputerAgent] = None
@@ -97,50 +178,67 @@ class StreamingAgent:
     async def start(self) -> None:
         """Start the streaming session."""
         self.run = AgentRun(context=self.context)
+        # Cancelled by the watchdog if the sandbox dies
+        self._task = asyncio.current_task()
         
         try:
             await self._setup_sandbox()
-            await self._login_discord()
-            await self._join_voice_channel()
-            await self._open_url()
-            await self._start_screen_share()
-            
-            self.run.update_state(AgentState.STREAMING)
-            await self._send_status_update("streaming")
+            await self._ensure_logged_in()
+            await self._go_live()
             
             # Keep running until stopped
             while self.run.state == AgentState.STREAMING:
-                await asyncio.sleep(5)
-                # Health check: verify we're still connected
-                # Could take periodic screenshots and verify stream is active
+                try:
+                    await asyncio.wait_for(self._stop_requested.wait(), timeout=5)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                await self._sample_cpu()
+                await self._check_browser()
                 
+        except asyncio.CancelledError:
+            if self._sandbox_lost is None:
+                raise
+            # Already reported by _on_sandbox_lost; fail like any other error
+            self._task.uncancel()
+            raise SandboxLostError(self._sandbox_lost) from None
         except Exception as e:
             self.run.update_state(AgentState.ERROR, str(e))
             await self._send_status_update("error", str(e))
             raise
         finally:
-            # Ensure cleanup happens even on error
-            await self._cleanup()
+            # Ensure cleanup happens even on error; a graceful stop() cleans
+            # up itself, once the sandbox is reset for reuse. Until it has,
+            # the sandbox (and the account on it) is still in use.
+            if self._stop_requested.is_set():
+                await self._stopped.wait()
+            else:
+                await self._cleanup()
     
     async def stop(self) -> None:
         """Stop the streaming session."""
         if self.run and self.run.state == AgentState.STREAMING:
             self.run.update_state(AgentState.STOPPING)
-            await self._send_status_update("stopping")
-            
+            self._stop_requested.set()
             try:
-                # Stop screen share and leave voice channel
-                await self._stop_screen_share()
-                await self._leave_voice_channel()
-            except Exception as e:
-                # Log but don't fail on cleanup errors
-                self.run.error_message = f"Cleanup warning: {e}"
-            
-            # Cleanup sandbox
-            await self._cleanup()
-            
-            self.run.update_state(AgentState.STOPPED)
-            await self._send_status_update("stopped")
+                await self._send_status_update("stopping")
+                
+                try:
+                    # Stop screen share and leave voice channel
+                    await self._stop_screen_share()
+                    await self._leave_voice_channel()
+                    await self._reset_for_reuse()
+                except Exception as e:
+                    # Log but don't fail on cleanup errors
+                    self.run.error_message = f"Cleanup warning: {e}"
+                
+                # Cleanup sandbox
+                await self._cleanup()
+                
+                self.run.update_state(AgentState.STOPPED)
+                await self._send_status_update("stopped")
+            finally:
+                self._stopped.set()
         elif self.run:
             # Force stop if in other states
             self.run.update_state(AgentState.STOPPED)
@@ -151,19 +249,420 @@ class StreamingAgent:
         self.run.update_state(AgentState.STARTING_SANDBOX)
         await self._send_status_update("starting_sandbox")
         
+        if self._reserved is not None:
+            self._lease = await self._claim_reserved()
+        if self._lease is None and self._pool:
+            self._lease = await self._acquire_pooled()
+        elif self._lease is None:
+            self._lease = await self._boot_fresh()
+        
+        self._attach(self._lease.manager)
+        await self._sandbox.record_owner(self.context.session_id)
+        if self._watchdog:
+            self._watch = self._watchdog.watch(self._sandbox, self._on_sandbox_lost)
+        await self._apply_performance_profile()
+    
+    async def _on_sandbox_lost(self, reason: str) -> None:
+        """Fail the session right away when the watchdog sees its sandbox die."""
+        self._watch = None
+        if not self.run or self.run.state in (
+            AgentState.STOPPING, AgentState.STOPPED, AgentState.ERROR
+        ):
+            return
+        error = f"Sandbox lost: {reason}"
+        self._sandbox_lost = error
+        self.run.update_state(AgentState.ERROR, error)
+        log.error("session_sandbox_lost", session_id=self.context.session_id, reason=reason)
+        await self._send_status_update("error", error)
+        # Unwinds start(), whose cleanup frees the sandbox
+        if self._task and not self._task.done():
+            self._task.cancel()
+    
+    async def _apply_performance_profile(self) -> None:
+        """Move a sandbox booted with another performance profile to the session's."""
+        wanted = self.context.performance_profile
+        if self._sandbox.config.performance_profile != wanted:
+            try:
+                await self._sandbox.set_performance_profile(wanted)
+                # Flags only take effect in a new browser process
+                await self._sandbox.close_browser()
+                await self._sandbox.launch_browser(DISCORD_APP_URL)
+            except Exception as e:
+                log.warning(
+                    "performance_profile_switch_failed",
+                    session_id=self.context.session_id,
+                    profile=wanted,
+                    error=str(e),
+                )
+        self.run.performance_profile = self._sandbox.config.performance_profile
+    
+    async def _apply_network_class(self, name: str) -> None:
+        """Give the sandbox the network limits of the session's content."""
+        try:
+            await self._sandbox.set_network_class(name)
+        except Exception as e:
+            log.warning(
+                "network_class_switch_failed",
+                session_id=self.context.session_id,
+                network_class=name,
+                error=str(e),
+            )
+        self.run.network_class = self._sandbox.config.network_class
+    
+    async def _sample_cpu(self) -> None:
+        """Record the sandbox's CPU use under the session's performance profile.
+        
+        Uses the telemetry collector's latest sample of the session's sandbox;
+        sessions on a shared sandbox have none of their own.
+        """
+        if not self._telemetry:
+            return
+        sample = self._telemetry.latest(self.context.session_id)
+        if sample is None or sample.timestamp == self._cpu_sampled_at:
+            return
+        self._cpu_sampled_at = sample.timestamp
+        cores = sample.cpu_cores
+        self.run.cpu_samples.append(cores)
+        get_metrics().observe(
+            CPU_METRIC, cores, buckets=CPU_BUCKETS, profile=self.run.performance_profile
+        )
+    
+    async def _go_live(self) -> None:
+        """Join voice, open the URL and share it, recovering once per failed browser.
+        
+        Only failures that left the browser or sandbox down are recovered;
+        model, budget and other errors are raised as they are.
+        """
+        while True:
+            try:
+                await self._join_voice_channel()
+                await self._open_url()
+                await self._start_screen_share()
+                break
+            except AgentTaskError:
+                # The agent saw the page; the browser is fine
+                raise
+            except Exception as e:
+                if not await self._browser_down():
+                    raise
+                if not await self._recover(f"{self.run.state.value}: {e}"):
+                    raise
+        
+        self.run.update_state(AgentState.STREAMING)
+        await self._send_status_update("streaming")
+    
+    async def _check_browser(self) -> None:
+        """Bring the stream back if the browser died under it."""
+        if not self._sandbox or self.run.state != AgentState.STREAMING:
+            return
+        if self._browser_seen is False:
+            return
+        try:
+            if await self._sandbox.browser_running():
+                self._browser_seen = True
+                return
+        except Exception:
+            # Can't tell; the watchdog covers a dead sandbox
+            return
+        if self._browser_seen is None:
+            # Live, yet no configured browser: the image runs some other one
+            self._browser_seen = False
+            log.info(
+                "session_browser_probe_disabled",
+                session_id=self.context.session_id,
+                browser=self._sandbox.config.browser_command,
+            )
+            return
+        if self.run.state != AgentState.STREAMING:
+            # Stopped while we looked
+            return
+        log.warning("session_browser_exited", session_id=self.context.session_id)
+        if not await self._recover("browser exited while streaming"):
+            raise BrowserLostError("Browser exited while streaming")
+        await self._go_live()
+    
+    async def _browser_down(self) -> bool:
+        """Whether the sandbox stopped answering or its browser exited."""
+        if not self._sandbox:
+            return False
+        try:
+            if not await self._sandbox.health_check():
+                return True
+            if self._browser_seen is False:
+                # The image runs a browser we can't look for
+                return False
+            return not await self._sandbox.browser_running()
+        except Exception:
+            return True
+    
+    async def _recover(self, reason: str) -> bool:
+        """Get the sandbox back to a logged-in Discord tab after a browser failure.
+        
+        Restarts just the browser first, and the whole sandbox if that fails.
+        Returns False if recovery is off or the session used up its attempts.
+        """
+        if not self._recovery.enabled or not self._sandbox:
+            return False
+        if len(self.run.recoveries) >= self._recovery.max_attempts:
+            return False
+        self.run.update_state(AgentState.RECOVERING)
+        await self._send_status_update("recovering", reason)
+        log.warning("session_recovering", session_id=self.context.session_id, reason=reason)
+        
+        started = time.monotonic()
+        tier = "browser"
+        try:
+            await self._restart_browser()
+        except Exception as e:
+            log.warning(
+                "session_browser_restart_failed",
+                session_id=self.context.session_id,
+                error=str(e),
+            )
+            tier = "sandbox"
+            try:
+                await self._restart_sandbox()
+            except Exception:
+                get_metrics().increment("session_recoveries_total", tier=tier, outcome="failed")
+                raise
+        
+        seconds = time.monotonic() - started
+        get_metrics().observe(RECOVERY_METRIC, seconds, tier=tier)
+        get_metrics().increment("session_recoveries_total", tier=tier, outcome="recovered")
+        self.run.recoveries.append({"tier": tier, "reason": reason, "seconds": round(seconds, 3)})
+        log.info(
+            "session_recovered",
+            session_id=self.context.session_id,
+            tier=tier,
+            seconds=round(seconds, 3),
+        )
+        return True
+    
+    async def _restart_browser(self) -> None:
+        """Restart only the browser, back on the Discord tab."""
+        await asyncio.wait_for(
+            self._sandbox.restart_browser(DISCORD_APP_URL),
+            timeout=self._recovery.browser_timeout,
+        )
+        if not await self._sandbox.browser_running():
+            raise RuntimeError("Browser didn't start again")
+        if not await self._sandbox.health_check():
+            raise RuntimeError("Sandbox doesn't answer after the browser restart")
+    
+    async def _restart_sandbox(self) -> None:
+        """Restart the whole sandbox and log it back in."""
+        # Stopping the sandbox isn't a crash
+        if self._watch:
+            self._watchdog.unwatch(self._watch)
+            self._watch = None
+        await self._sandbox.restart()
+        self._attach(self._sandbox)
+        await self._sandbox.record_owner(self.context.session_id)
+        if self._watchdog:
+            self._watch = self._watchdog.watch(self._sandbox, self._on_sandbox_lost)
+        # The container's browser state went with it
+        self._lease.logged_in = False
+        await self._ensure_logged_in()
+    
+    async def _acquire_pooled(self) -> SandboxLease:
+        """Lease a pooled sandbox: already booted, usually already logged in."""
+        started = time.monotonic()
+        lease = await self._pool.acquire()
+        waited = time.monotonic() - started
+        get_metrics().observe("sandbox_lease_seconds", waited)
+        self.run.sandbox_source = "recycled" if lease.recycled else "pool"
+        self.run.boot_timings = {"lease": round(waited, 3)}
+        if lease.recycled:
+            log.info("sandbox_recycled", session_id=self.context.session_id)
+        return lease
+    
+    async def _boot_fresh(self) -> SandboxLease:
+        """Boot a sandbox just for this session."""
         config = SandboxConfig(
-            image=self.context.sandbox_image,
+            image=self._boot_image(),
             display=self.context.display_resolution,
+            performance_profile=self.context.performance_profile,
         )
-        self._sandbox = SandboxManager(config)
-        self._computer = await self._sandbox.start()
-        
+        sandbox = SandboxManager(config)
+        waited = await start_sandbox(
+            sandbox, self._governor, SESSION, requested_at=self._requested_at
+        )
+        self.run.sandbox_source = "fresh"
+        self.run.boot_timings = dict(sandbox.boot_timings)
+        if waited is not None:
+            self.run.boot_timings["launch_wait"] = round(waited, 3)
+        return SandboxLease(sandbox)
+    
+    async def _claim_reserved(self) -> Optional[SandboxLease]:
+        """Wait for the reserved sandbox; None if its boot failed."""
+        started = time.monotonic()
+        try:
+            lease = await self._reserved
+        except Exception as e:
+            log.warning(
+                "reserved_sandbox_failed",
+                session_id=self.context.session_id,
+                error=str(e),
+            )
+            return None
+        self.run.sandbox_source = "reserved"
+        self.run.boot_timings = {
+            **lease.manager.boot_timings,
+            "claim_wait": round(time.monotonic() - started, 3),
+        }
+        return lease
+    
+    def _boot_image(self) -> str:
+        """Pick the image to boot: the current login snapshot if there is one."""
+        if self._snapshots:
+            snapshot = self._snapshots.current(
+                self.context.discord_email, self.context.sandbox_image
+            )
+            if snapshot:
+                return snapshot.image
+        return self.context.sandbox_image
+    
+    def _attach(self, sandbox: SandboxManager) -> None:
+        """Bind a running sandbox and create the CUA agent for it."""
+        self._sandbox = sandbox
+        sandbox.owner = self.context.session_id
+        self._computer = sandbox.computer
         self._agent = ComputerAgent(
             model=self.context.model,
             tools=[self._computer],
             max_trajectory_budget=self.context.max_budget,
         )
     
+    async def _ensure_logged_in(self) -> None:
+        """Get the sandbox logged into Discord as cheaply as possible.
+        
+        Warm pooled sandboxes are already logged in. A healthy persistent
+        browser profile is copied in and needs no VLM work at all. Sandboxes
+        booted from a snapshot only need a quick verification; if that fails
+        the snapshot is invalidated and we fall back to the full login, which
+        then produces a fresh snapshot and golden profile.
+        """
+        if self._lease and self._lease.logged_in:
+            return
+        
+        if self._profiles and await self._attach_profile():
+            return
+        
+        snapshot = None
+        if self._snapshots:
+            snapshot = self._snapshots.find_by_image(self._sandbox.config.image)
+        
+        if snapshot and snapshot.valid:
+            if await self._verify_session():
+                log.info(
+                    "snapshot_session_valid",
+                    session_id=self.context.session_id,
+                    image=snapshot.image,
+                )
+                return
+            await self._snapshots.invalidate(snapshot, "verification_failed")
+        
+        await self._login_discord()
+        # The new login's cookies survive the sandbox even without a snapshot
+        await self._sandbox.sync_profile("login")
+        
+        if self._snapshots:
+            try:
+                await self._snapshots.create(
+                    self._sandbox, self.context.discord_email, self.context.sandbox_image
+                )
+            except Exception as e:
+                # A missing snapshot only costs the next session a login
+                log.warning(
+                    "snapshot_create_failed",
+                    session_id=self.context.session_id,
+                    error=str(e),
+                )
+        
+        if self._profiles:
+            try:
+                await self._profiles.capture(
+                    self._sandbox, self.context.discord_email, promote=True
+                )
+                self._profile_attached = True
+            except Exception as e:
+                log.warning(
+                    "profile_capture_failed",
+                    session_id=self.context.session_id,
+                    error=str(e),
+                )
+    
+    async def _attach_profile(self) -> bool:
+        """Start the browser on the account's persistent profile, if it is healthy."""
+        email = self.context.discord_email
+        if self._profiles.prepare(email) is not ProfileHealth.HEALTHY:
+            return False
+        
+        try:
+            await self._sandbox.close_browser()
+            await self._profiles.attach(self._sandbox, email)
+            await self._sandbox.launch_browser(DISCORD_APP_URL)
+        except Exception as e:
+            log.warning("profile_attach_failed", session_id=self.context.session_id, error=str(e))
+            return False
+        
+        self._profile_attached = True
+        log.info("profile_attached", session_id=self.context.session_id)
+        return True
+    
+    async def _verify_session(self) -> bool:
+        """Check whether Discord is already logged in, without logging in.
+        
+        The sandbox's profile cookies usually settle it; a VLM turn only runs
+        when the profile can't be read.
+        """
+        self.run.update_state(AgentState.LOGGING_IN)
+        await self._send_status_update("logging_in")
+        
+        health = await self._check_sandbox_profile()
+        if health is not None:
+            log.info(
+                "session_verified_from_profile",
+                session_id=self.context.session_id,
+                health=health.value,
+            )
+            return health is ProfileHealth.HEALTHY
+        
+        try:
+            text = await self._run_agent_task(VERIFY_DISCORD_SESSION_PROMPT)
+        except Exception as e:
+            log.warning(
+                "session_verification_failed",
+                session_id=self.context.session_id,
+                error=str(e),
+            )
+            return False
+        
+        text = text.upper()
+        return "SESSION_VALID" in text and "SESSION_INVALID" not in text
+    
+    async def _check_sandbox_profile(self) -> Optional[ProfileHealth]:
+        """Check the cookies of the sandbox's browser profile.
+        
+        Returns None when that is inconclusive: the profile couldn't be copied
+        out, or isn't where the browser is expected to keep it.
+        """
+        download = tempfile.mkdtemp(prefix="jamie-verify-")
+        try:
+            await self._sandbox.copy_out(self._sandbox.config.browser_profile_path + "/.", download)
+            health = await asyncio.to_thread(check_profile, download)
+        except Exception as e:
+            log.warning(
+                "session_profile_check_failed",
+                session_id=self.context.session_id,
+                error=str(e),
+            )
+            return None
+        finally:
+            shutil.rmtree(download, ignore_errors=True)
+        
+        return None if health is ProfileHealth.MISSING else health
+    
     async def _login_discord(self) -> None:
         """Log into Discord web."""
         self.run.update_state(AgentState.LOGGING_IN)
@@ -196,19 +695,62 @@ class StreamingAgent:
         self.run.update_state(AgentState.OPENING_URL)
         await self._send_status_update("opening_url")
         
+        quality = select_quality(
+            self.context.url,
+            self.context.display_resolution,
+            load=self._content_load(),
+            config=get_quality_config(),
+        )
+        self.run.content_quality = quality
+        if quality.height is not None:
+            get_metrics().increment(
+                "content_quality_total", service=quality.service, quality=quality.label
+            )
+        log.info(
+            "content_quality_selected",
+            session_id=self.context.session_id,
+            service=quality.service,
+            quality=quality.label,
+            reason=quality.reason,
+            load=quality.load,
+        )
+        
+        await self._apply_network_class(content_class(quality.service))
+        
         prompt = OPEN_URL_IN_NEW_TAB_PROMPT.format(
-            url=self.context.url,
+            url=quality.url,
+            video_quality=quality.instruction,
         )
         
         await self._run_agent_task(prompt)
     
+    def _content_load(self) -> Optional[float]:
+        """Load per CPU the content quality is picked for.
+        
+        The session's sandbox's own CPU use, from its latest telemetry
+        sample; without one, the controller's load average if the sandbox
+        runs on the controller's machine (it says nothing about other hosts).
+        """
+        sample = self._telemetry.latest(self.context.session_id) if self._telemetry else None
+        if sample is not None:
+            return sandbox_load(sample.cpu_cores, self._sandbox.config.cpu)
+        if not self._sandbox.docker_host:
+            return host_load()
+        return None
+    
     async def _start_screen_share(self) -> None:
         """Start screen/tab sharing."""
         self.run.update_state(AgentState.STARTING_SHARE)
         await self._send_status_update("starting_share")
         
+        profile = get_performance_profile(
+            self.run.performance_profile or self.context.performance_profile
+        )
+        # The tab shows the URL as opened, quality parameter and all
+        quality = self.run.content_quality
         prompt = START_SCREEN_SHARE_PROMPT.format(
-            url=self.context.url,
+            url=quality.url if quality else self.context.url,
+            stream_quality=profile.stream_quality,
         )
         
         await self._run_agent_task(prompt)
@@ -223,11 +765,27 @@ class StreamingAgent:
         prompt = LEAVE_VOICE_CHANNEL_PROMPT
         await self._run_agent_task(prompt)
     
-    async def _run_agent_task(self, prompt: str) -> None:
-        """Run a task through the CUA agent and track usage."""
+    async def _reset_for_reuse(self) -> None:
+        """Reset a pooled sandbox to idle Discord so the pool can recycle it."""
+        if not (self._pool and self._pool.config.recycle and self._lease and self._lease.pooled):
+            return
+        text = await self._run_agent_task(RESET_TO_IDLE_PROMPT)
+        self._reusable = "RESET_COMPLETE" in text.upper()
+        if self._reusable:
+            # Idle sandboxes go back to the idle limits
+            await self._apply_network_class(PAGE_CLASS)
+    
+    async def _run_agent_task(self, prompt: str) -> str:
+        """Run a task through the CUA agent and track usage.
+        
+        Returns the text of the agent's last message.
+        """
         if not self._agent:
             raise RuntimeError("Agent not initialized")
+        # Screenshots are encoded with this phase's settings
+        self._sandbox.phase = self.run.state.value
         
+        last_text = ""
         async for result in self._agent.run(prompt):
             self.run.iterations += 1
             
@@ -243,6 +801,7 @@ class StreamingAgent:
                     content = item.get("content", [{}])
                     if content and isinstance(content, list):
                         text = content[0].get("text", "")
+                        last_text = text
                         # Check for failure indicators
                         if any(err in text.upper() for err in [
                             "LOGIN_FAILED", "CAPTCHA", "2FA_REQUIRED",
@@ -250,6 +809,8 @@ class StreamingAgent:
                             "SHARE_FAILED", "PERMISSION_DENIED"
                         ]):
                             raise AgentTaskError(f"Agent reported error: {text}")
+        
+        return last_text
     
     async def _send_status_update(self, status: str, error: Optional[str] = None) -> None:
         """Send status update via webhook."""
@@ -272,6 +833,20 @@ class StreamingAgent:
             if error:
                 payload["error"] = error
             
+            if self.run and self.run.sandbox_source:
+                payload["details"] = {
+                    "sandbox_source": self.run.sandbox_source,
+                    "boot_timings": self.run.boot_timings,
+                    "performance_profile": self.run.performance_profile,
+                    "cpu_cores_avg": self.run.cpu_cores_avg,
+                }
+                if self.run.recoveries:
+                    payload["details"]["recoveries"] = self.run.recoveries
+                if self.run.content_quality:
+                    payload["details"]["content_quality"] = self.run.content_quality.to_dict()
+                if self._sandbox and self._sandbox.network_shape:
+                    payload["details"]["network"] = describe(self._sandbox.network_shape)
+            
             async with self._http_session.post(
                 self.context.webhook_url,
                 json=payload,
@@ -287,6 +862,11 @@ class StreamingAgent:
     
     async def _cleanup(self) -> None:
         """Clean up all resources."""
+        # Stopping the sandbox isn't a crash
+        if self._watch:
+            self._watchdog.unwatch(self._watch)
+            self._watch = None
+        
         # Close HTTP session
         if self._http_session:
             try:
@@ -295,13 +875,31 @@ class StreamingAgent:
                 pass
             self._http_session = None
         
-        # Stop sandbox
-        if self._sandbox:
+        # Keep refreshed cookies for the next session
+        if self._profiles and self._profile_attached and self._sandbox:
+            try:
+                await self._profiles.capture(self._sandbox, self.context.discord_email)
+            except Exception:
+                pass
+            self._profile_attached = False
+        
+        # Release sandbox (stops it, or hands it back to the pool)
+        if self._lease:
+            self._lease.manager.owner = None
+            self._lease.manager.phase = None
             try:
-                await self._sandbox.stop()
+                if self._reusable:
+                    await self._lease.manager.record_owner(None)
+                    # Stopping syncs on its own; a recycled sandbox keeps running
+                    await self._lease.manager.sync_profile("session_end")
+                    await self._lease.recycle()
+                else:
+                    await self._lease.release()
             except Exception:
                 pass
-            self._sandbox = None
+            self._lease = None
+            self._reusable = False
+        self._sandbox = None
         
         self._computer = None
         self._agent = None
@@ -310,3 +908,30 @@ class StreamingAgent:
 class AgentTaskError(Exception):
     """Error during agent task execution."""
     pass
+
+
+class SandboxLostError(Exception):
+    """The session's sandbox died while the session was using it."""
+    pass
+
+
+class BrowserLostError(Exception):
+    """The session's browser died and couldn't be brought back."""
+    pass
+
+
+async def login_sandbox(
+    sandbox: SandboxManager,
+    context: AgentContext,
+    snapshots: Optional[SnapshotStore] = None,
+    profiles: Optional[BrowserProfileManager] = None,
+) -> None:
+    """Log a running sandbox into Discord outside of a streaming session.
+    
+    Used to warm up pooled sandboxes. Raises AgentTaskError if the agent
+    reports a login failure.
+    """
+    agent = StreamingAgent(context, snapshots=snapshots, profiles=profiles)
+    agent.run = AgentRun(context=context)
+    agent._attach(sandbox)
+    await agent._ensure_logged_in()
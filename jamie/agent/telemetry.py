@@ -0,0 +1,394 @@
+"""Per-sandbox resource telemetry for Jamie agent.
+
+Sandboxes are sized by guesswork (``SandboxConfig`` asks for 2 CPUs and 4GB
+each). The collector samples what every running sandbox actually uses (CPU,
+memory, network and CPU throttling) so containers and hosts can be sized
+from data, and so a browser starved of CPU while encoding the share shows up
+as throttling.
+
+Container sandboxes are read straight from their cgroup v2 files and their
+init process's /proc entry, which costs a few small file reads per sandbox
+per sample; no ``docker stats`` process runs. That needs the host's cgroup
+hierarchy and /proc visible to the controller (``pid: host`` and a
+read-only /sys/fs/cgroup mount when it runs in a container). Local
+sandboxes are read from /proc for their process groups.
+
+Samples go into a bounded ring buffer per session, and the latest sample of
+each sandbox is exported as gauges. Network bytes are also counted per
+network class, and a shaped sandbox's rates are exported as a share of its
+limits, so the shaping limits can be tuned from what sessions use.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Optional, Protocol, Tuple
+
+from jamie.agent.docker import DockerCLI, DockerError
+from jamie.agent.sandbox import SandboxManager, SandboxRegistry, get_sandbox_registry
+from jamie.agent.shaping import NetworkShape
+from jamie.shared.config import TelemetryConfig
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Gauges of each sandbox's latest sample, labeled by sandbox
+GAUGES = {
+    "cpu_cores": "sandbox_cpu_usage_cores",
+    "memory_bytes": "sandbox_memory_bytes",
+    "memory_limit_bytes": "sandbox_memory_limit_bytes",
+    "net_rx_bytes_per_second": "sandbox_network_receive_bytes_per_second",
+    "net_tx_bytes_per_second": "sandbox_network_transmit_bytes_per_second",
+    "throttled_ratio": "sandbox_cpu_throttled_ratio",
+}
+
+# Network use as a share of a shaped sandbox's limits, labeled by sandbox and direction
+UTILIZATION_GAUGE = "sandbox_network_limit_utilization"
+# Bytes moved by sandboxes, labeled by direction and network class
+BYTES_COUNTER = "sandbox_network_bytes_total"
+
+
+@dataclass
+class Reading:
+    """Cumulative counters read from a sandbox at one point in time."""
+
+    at: float
+    cpu_usec: int
+    memory_bytes: int
+    memory_limit_bytes: Optional[int] = None
+    # CFS bandwidth periods, and how many (and how long) the sandbox was throttled
+    nr_periods: Optional[int] = None
+    nr_throttled: Optional[int] = None
+    throttled_usec: Optional[int] = None
+    rx_bytes: Optional[int] = None
+    tx_bytes: Optional[int] = None
+
+
+@dataclass
+class ResourceSample:
+    """A sandbox's resource use between two readings."""
+
+    timestamp: float
+    cpu_cores: float
+    memory_bytes: int
+    memory_limit_bytes: Optional[int]
+    net_rx_bytes_per_second: Optional[float]
+    net_tx_bytes_per_second: Optional[float]
+    # Share of CFS periods in which the sandbox wanted more CPU than it may use
+    throttled_ratio: Optional[float]
+    throttled_seconds: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _delta(current: Optional[int], previous: Optional[int]) -> Optional[int]:
+    if current is None or previous is None:
+        return None
+    return max(0, current - previous)
+
+
+def sample_between(previous: Reading, current: Reading) -> ResourceSample:
+    """The resource use between two readings of the same sandbox."""
+    elapsed = max(current.at - previous.at, 1e-6)
+    rx = _delta(current.rx_bytes, previous.rx_bytes)
+    tx = _delta(current.tx_bytes, previous.tx_bytes)
+    periods = _delta(current.nr_periods, previous.nr_periods)
+    throttled = _delta(current.nr_throttled, previous.nr_throttled)
+    throttled_usec = _delta(current.throttled_usec, previous.throttled_usec)
+    throttled_ratio = None
+    if periods is not None:
+        throttled_ratio = round((throttled or 0) / periods, 3) if periods else 0.0
+    return ResourceSample(
+        timestamp=time.time(),
+        cpu_cores=round(max(0, current.cpu_usec - previous.cpu_usec) / 1e6 / elapsed, 3),
+        memory_bytes=current.memory_bytes,
+        memory_limit_bytes=current.memory_limit_bytes,
+        net_rx_bytes_per_second=None if rx is None else round(rx / elapsed, 1),
+        net_tx_bytes_per_second=None if tx is None else round(tx / elapsed, 1),
+        throttled_ratio=throttled_ratio,
+        throttled_seconds=None if throttled_usec is None else throttled_usec / 1e6,
+    )
+
+
+def _read_int(path: str) -> Optional[int]:
+    with open(path) as f:
+        value = f.read().strip()
+    return None if value == "max" else int(value)
+
+
+def _read_keyed(path: str) -> Dict[str, int]:
+    with open(path) as f:
+        return {key: int(value) for key, value in (line.split() for line in f if line.strip())}
+
+
+def read_net_dev(path: str) -> Tuple[int, int]:
+    """Received and transmitted bytes over all interfaces but loopback."""
+    rx = tx = 0
+    with open(path) as f:
+        # Two header lines, then "iface: rx_bytes ... (8 rx fields) tx_bytes ..."
+        for line in list(f)[2:]:
+            interface, _, counters = line.partition(":")
+            if interface.strip() == "lo":
+                continue
+            fields = counters.split()
+            rx += int(fields[0])
+            tx += int(fields[8])
+    return rx, tx
+
+
+class Source(Protocol):
+    def read(self) -> Reading: ...
+
+
+class CgroupSource:
+    """Reads a container's cgroup v2 files and its network namespace's counters."""
+
+    def __init__(self, cgroup_dir: str, net_dev_path: Optional[str] = None):
+        self.cgroup_dir = cgroup_dir
+        self.net_dev_path = net_dev_path
+
+    def read(self) -> Reading:
+        cpu = _read_keyed(os.path.join(self.cgroup_dir, "cpu.stat"))
+        reading = Reading(
+            at=time.monotonic(),
+            cpu_usec=cpu["usage_usec"],
+            memory_bytes=_read_int(os.path.join(self.cgroup_dir, "memory.current")) or 0,
+            memory_limit_bytes=_read_int(os.path.join(self.cgroup_dir, "memory.max")),
+            nr_periods=cpu.get("nr_periods"),
+            nr_throttled=cpu.get("nr_throttled"),
+            throttled_usec=cpu.get("throttled_usec"),
+        )
+        if self.net_dev_path:
+            reading.rx_bytes, reading.tx_bytes = read_net_dev(self.net_dev_path)
+        return reading
+
+
+class ProcessGroupSource:
+    """Reads a local sandbox's processes; no limits, network or throttling to report."""
+
+    def __init__(self, computer: Any):
+        self._computer = computer
+        self._ticks_per_second = os.sysconf("SC_CLK_TCK")
+
+    def read(self) -> Reading:
+        ticks, rss = self._computer.usage()
+        return Reading(
+            at=time.monotonic(),
+            cpu_usec=ticks * 1_000_000 // self._ticks_per_second,
+            memory_bytes=rss,
+        )
+
+
+def cgroup_path(proc_root: str, pid: int) -> str:
+    """A process's cgroup v2 path, relative to the hierarchy root."""
+    with open(os.path.join(proc_root, str(pid), "cgroup")) as f:
+        for line in f:
+            hierarchy, _, path = line.strip().split(":", 2)
+            if hierarchy == "0":
+                return path
+    raise ValueError(f"Process {pid} has no cgroup v2 membership")
+
+
+@dataclass
+class _Tracked:
+    source: Source
+    last: Optional[Reading] = None
+    latest: Optional[ResourceSample] = None
+    owner: Optional[str] = None
+    shape: Optional[NetworkShape] = None
+
+
+class TelemetryCollector:
+    """Samples every running sandbox and keeps recent samples per session."""
+
+    def __init__(
+        self,
+        config: Optional[TelemetryConfig] = None,
+        registry: Optional[SandboxRegistry] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+    ):
+        self.config = config or TelemetryConfig()
+        self._registry = registry
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        self._task: Optional[asyncio.Task] = None
+        self._tracked: Dict[str, _Tracked] = {}
+        # Sandboxes we can't read, so we don't keep trying
+        self._unavailable: Dict[str, str] = {}
+        # Session ID -> its recent samples, least recently sampled first
+        self._sessions: "OrderedDict[str, Deque[ResourceSample]]" = OrderedDict()
+
+    @property
+    def registry(self) -> SandboxRegistry:
+        return self._registry or get_sandbox_registry()
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                log.warning("telemetry_sample_failed", error=str(e))
+            await asyncio.sleep(self.config.interval)
+
+    async def sample(self) -> None:
+        """Take one sample of every running sandbox."""
+        running = {s.container_name: s for s in self.registry.sandboxes() if s.is_running}
+        for name in list(self._tracked):
+            if name not in running:
+                self._forget(name)
+        for name in list(self._unavailable):
+            if name not in running:
+                del self._unavailable[name]
+        for name, sandbox in running.items():
+            if name not in self._tracked and name not in self._unavailable:
+                await self._track(name, sandbox)
+            if name in self._tracked:
+                self._tracked[name].owner = sandbox.owner
+                self._tracked[name].shape = sandbox.network_shape
+
+        readings = await asyncio.to_thread(self._read_all)
+        for name, reading in readings.items():
+            tracked = self._tracked[name]
+            if tracked.last is not None:
+                self._count_bytes(tracked, tracked.last, reading)
+                self._record(name, tracked, sample_between(tracked.last, reading))
+            tracked.last = reading
+
+    async def _track(self, name: str, sandbox: SandboxManager) -> None:
+        try:
+            if sandbox.is_local:
+                source: Source = ProcessGroupSource(sandbox.computer)
+            else:
+                pid = await self._docker.container_pid(name)
+                cgroup = await asyncio.to_thread(cgroup_path, self.config.proc_root, pid)
+                source = CgroupSource(
+                    os.path.join(self.config.cgroup_root, cgroup.lstrip("/")),
+                    os.path.join(self.config.proc_root, str(pid), "net", "dev"),
+                )
+            source.read()
+        except (DockerError, OSError, ValueError, KeyError) as e:
+            self._unavailable[name] = str(e)
+            log.warning("telemetry_unavailable", sandbox=name, error=str(e))
+            return
+        self._tracked[name] = _Tracked(source=source)
+
+    def _read_all(self) -> Dict[str, Reading]:
+        readings = {}
+        for name, tracked in list(self._tracked.items()):
+            try:
+                readings[name] = tracked.source.read()
+            except (OSError, ValueError, KeyError) as e:
+                # Usually the sandbox stopping between listing and reading
+                log.debug("telemetry_read_failed", sandbox=name, error=str(e))
+        return readings
+
+    def _record(self, name: str, tracked: _Tracked, sample: ResourceSample) -> None:
+        tracked.latest = sample
+        for field, gauge in GAUGES.items():
+            value = getattr(sample, field)
+            if value is not None:
+                self.metrics.set_gauge(gauge, value, sandbox=name)
+        if tracked.shape:
+            for direction, rate in (
+                ("receive", sample.net_rx_bytes_per_second),
+                ("transmit", sample.net_tx_bytes_per_second),
+            ):
+                if rate is not None:
+                    limit = tracked.shape.limits()[direction]
+                    self.metrics.set_gauge(
+                        UTILIZATION_GAUGE, round(rate * 8 / limit, 3),
+                        sandbox=name, direction=direction,
+                    )
+        if tracked.owner:
+            samples = self._sessions.pop(tracked.owner, None)
+            if samples is None:
+                samples = deque(maxlen=self.config.samples_per_session)
+            samples.append(sample)
+            self._sessions[tracked.owner] = samples
+            while len(self._sessions) > self.config.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def _count_bytes(self, tracked: _Tracked, previous: Reading, current: Reading) -> None:
+        network_class = tracked.shape.network_class if tracked.shape else "unshaped"
+        for direction, before, after in (
+            ("receive", previous.rx_bytes, current.rx_bytes),
+            ("transmit", previous.tx_bytes, current.tx_bytes),
+        ):
+            moved = _delta(after, before)
+            if moved:
+                self.metrics.increment(
+                    BYTES_COUNTER, moved, direction=direction, network_class=network_class
+                )
+
+    def _forget(self, name: str) -> None:
+        del self._tracked[name]
+        for gauge in GAUGES.values():
+            self.metrics.remove_gauge(gauge, sandbox=name)
+        for direction in ("receive", "transmit"):
+            self.metrics.remove_gauge(UTILIZATION_GAUGE, sandbox=name, direction=direction)
+
+    def session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A session's samples and their summary, or None if it has none."""
+        samples = self._sessions.get(session_id)
+        if not samples:
+            return None
+        cpu = [s.cpu_cores for s in samples]
+        throttled = [s.throttled_ratio for s in samples if s.throttled_ratio is not None]
+        return {
+            "session_id": session_id,
+            "interval": self.config.interval,
+            "summary": {
+                "samples": len(samples),
+                "cpu_cores_avg": round(sum(cpu) / len(cpu), 3),
+                "cpu_cores_max": max(cpu),
+                "memory_bytes_max": max(s.memory_bytes for s in samples),
+                "memory_limit_bytes": samples[-1].memory_limit_bytes,
+                "throttled_ratio_avg": (
+                    round(sum(throttled) / len(throttled), 3) if throttled else None
+                ),
+                "throttled_seconds": sum(s.throttled_seconds or 0.0 for s in samples),
+            },
+            "samples": [s.to_dict() for s in samples],
+        }
+
+    def latest(self, session_id: str) -> Optional[ResourceSample]:
+        """The most recent sample of a session's sandbox, if it has any."""
+        samples = self._sessions.get(session_id)
+        return samples[-1] if samples else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Latest sample of every sandbox, for /stats."""
+        return {
+            "interval": self.config.interval,
+            "sandboxes": {
+                name: {
+                    "owner": tracked.owner,
+                    "latest": tracked.latest.to_dict() if tracked.latest else None,
+                }
+                for name, tracked in self._tracked.items()
+            },
+            "unavailable": dict(self._unavailable),
+            "sessions": len(self._sessions),
+        }
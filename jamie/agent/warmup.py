@@ -0,0 +1,151 @@
+"""Controller warm-up and readiness for Jamie agent.
+
+The first sandbox after a deploy otherwise pays for pulling the sandbox image
+and cold Docker layers. At startup the controller pulls and touches the image
+(and optionally boots one canary sandbox) before it reports ready. Readiness
+is separate from /health liveness: a warming controller is alive but should
+not be sent streams yet.
+
+A failed pull is fine when the image is already on the daemon (a locally
+built image, or a registry that is rate-limiting us). Other failures are
+retried with backoff before the controller reports FAILED.
+"""
+
+import asyncio
+import time
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from jamie.agent.docker import DockerCLI, DockerError
+from jamie.agent.local import LOCAL_PROVIDER
+from jamie.agent.sandbox import SandboxConfig, SandboxManager
+from jamie.shared.config import WarmupConfig, get_sandbox_provider_config
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Builds the canary sandbox
+CanaryFactory = Callable[[SandboxConfig], SandboxManager]
+
+
+class ReadinessState(str, Enum):
+    """Readiness of the controller to accept streams."""
+    STARTING = "starting"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ControllerWarmup:
+    """Runs the startup warm-up steps and tracks readiness."""
+
+    def __init__(
+        self,
+        config: Optional[WarmupConfig] = None,
+        docker: Optional[DockerCLI] = None,
+        canary_factory: Optional[CanaryFactory] = None,
+        metrics: Optional[MetricsCollector] = None,
+    ):
+        self.config = config or WarmupConfig()
+        self._docker = docker or DockerCLI()
+        self._canary_factory = canary_factory or SandboxManager
+        self._metrics = metrics
+        self.state = ReadinessState.STARTING
+        self.error: Optional[str] = None
+        self.duration_seconds: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the controller should accept streams."""
+        return self.state == ReadinessState.READY
+
+    async def run(self, image: str, display: str = "1024x768") -> None:
+        """Warm up for ``image``. Never raises; failures are reported as FAILED."""
+        if not self.config.enabled:
+            self.mark_ready()
+            return
+
+        self.state = ReadinessState.WARMING
+        started = time.monotonic()
+        log.info("warmup_started", image=image)
+
+        try:
+            for attempt in range(1, self.config.max_attempts + 1):
+                try:
+                    await self._warm(image, display)
+                    break
+                except Exception as e:
+                    if attempt == self.config.max_attempts:
+                        self.fail(str(e))
+                        return
+                    self.error = str(e)
+                    delay = self.config.retry_delay * 2 ** (attempt - 1)
+                    log.warning("warmup_retrying", attempt=attempt, delay=delay, error=str(e))
+                    await asyncio.sleep(delay)
+        finally:
+            self.duration_seconds = round(time.monotonic() - started, 3)
+            self.metrics.set_gauge("controller_warmup_seconds", self.duration_seconds)
+
+        self.error = None
+        self.mark_ready()
+        log.info("warmup_completed", duration=self.duration_seconds, steps=self.steps)
+
+    def mark_ready(self) -> None:
+        self.state = ReadinessState.READY
+        self.metrics.set_gauge("controller_ready", 1)
+
+    def fail(self, error: str) -> None:
+        self.state = ReadinessState.FAILED
+        self.error = error
+        self.metrics.set_gauge("controller_ready", 0)
+        log.error("warmup_failed", error=error)
+
+    def status(self) -> Dict:
+        """Get readiness details for /ready and /stats."""
+        return {
+            "ready": self.ready,
+            "state": self.state.value,
+            "warmup_seconds": self.duration_seconds,
+            "steps": dict(self.steps),
+            "error": self.error,
+        }
+
+    async def _warm(self, image: str, display: str) -> None:
+        # Local sandboxes don't use the image
+        containers = get_sandbox_provider_config().provider != LOCAL_PROVIDER
+        if self.config.prepull and containers:
+            await self._step("pull", self._pull(image))
+        if self.config.touch and containers:
+            await self._step("touch", self._docker.touch_image(image))
+        if self.config.canary:
+            await self._step("canary", self._boot_canary(image, display))
+
+    async def _pull(self, image: str) -> None:
+        """Pull the image, or make do with the daemon's copy if the pull fails."""
+        try:
+            await self._docker.pull(image)
+        except DockerError as e:
+            if not await self._docker.image_exists(image):
+                raise
+            log.warning("warmup_pull_failed_using_local_image", image=image, error=str(e))
+
+    async def _step(self, name: str, operation) -> None:
+        started = time.monotonic()
+        await operation
+        elapsed = round(time.monotonic() - started, 3)
+        self.steps[name] = elapsed
+        self.metrics.set_gauge("controller_warmup_step_seconds", elapsed, step=name)
+
+    async def _boot_canary(self, image: str, display: str) -> None:
+        """Boot one sandbox end to end and throw it away."""
+        canary = self._canary_factory(SandboxConfig(image=image, display=display))
+        try:
+            await canary.start()
+        finally:
+            await canary.stop()
@@ -0,0 +1,177 @@
+"""Sandbox watchdog for Jamie agent.
+
+A sandbox that is OOM-killed or crashes would otherwise only be noticed when
+the session's next agent action fails, which can be minutes into a stream.
+The watchdog hears about it when it happens instead: one ``docker events``
+subscription per Docker host sandboxes are placed on covers every container
+sandbox, and a local sandbox is watched by awaiting its display server's
+exit. Neither polls, so watching a session costs nothing until its sandbox
+dies.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from jamie.agent.docker import DockerCLI, DockerError
+from jamie.agent.hosts import placement_daemons
+from jamie.agent.local import LOCAL_PROVIDER
+from jamie.shared.config import (
+    SandboxHost,
+    WatchdogConfig,
+    get_placement_config,
+    get_sandbox_provider_config,
+)
+from jamie.shared.logging import get_logger
+from jamie.shared.metrics import MetricsCollector, get_metrics
+
+log = get_logger(__name__)
+
+# Called with a description of how the sandbox died
+SandboxLostCallback = Callable[[str], Awaitable[None]]
+
+
+@dataclass
+class Watch:
+    """One session's interest in one sandbox."""
+
+    name: str
+    callback: SandboxLostCallback
+    # Waits for a local sandbox's display server
+    task: Optional[asyncio.Task] = None
+
+
+class SandboxWatchdog:
+    """Tells sessions the moment their sandbox dies."""
+
+    def __init__(
+        self,
+        config: Optional[WatchdogConfig] = None,
+        docker: Optional[DockerCLI] = None,
+        metrics: Optional[MetricsCollector] = None,
+        hosts: Optional[List[SandboxHost]] = None,
+    ):
+        self.config = config or WatchdogConfig()
+        self._docker = docker or DockerCLI()
+        self._metrics = metrics
+        self._hosts = get_placement_config().hosts if hosts is None else hosts
+        # Container name -> watches on it (several for a multiplexed sandbox)
+        self._watches: Dict[str, List[Watch]] = {}
+        # DOCKER_HOST -> task following that daemon's events
+        self._events_tasks: Dict[str, asyncio.Task] = {}
+        self._callbacks: Set[asyncio.Task] = set()
+        # DOCKER_HOSTs whose event stream is currently open
+        self._subscribed: Set[str] = set()
+
+        # Totals for /stats
+        self._events = 0
+        self._lost = 0
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        return self._metrics or get_metrics()
+
+    async def start(self) -> None:
+        """Subscribe to each daemon's container events, unless sandboxes run locally."""
+        if self._events_tasks or get_sandbox_provider_config().provider == LOCAL_PROVIDER:
+            return
+        for docker_host, docker in placement_daemons(self._docker, self._hosts).items():
+            self._events_tasks[docker_host] = asyncio.create_task(
+                self._follow_events(docker_host, docker)
+            )
+
+    async def stop(self) -> None:
+        tasks = [watch.task for watches in self._watches.values() for watch in watches]
+        tasks += [*self._events_tasks.values(), *self._callbacks]
+        for task in tasks:
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*(task for task in tasks if task), return_exceptions=True)
+        self._watches.clear()
+        self._events_tasks.clear()
+
+    def watch(self, sandbox: Any, callback: SandboxLostCallback) -> Watch:
+        """Call callback once if sandbox dies before it is unwatched.
+
+        Unwatch before stopping a sandbox on purpose.
+        """
+        watch = Watch(name=sandbox.container_name, callback=callback)
+        if sandbox.is_local:
+            watch.task = asyncio.create_task(self._wait_local(watch, sandbox))
+        self._watches.setdefault(watch.name, []).append(watch)
+        return watch
+
+    def unwatch(self, watch: Watch) -> None:
+        watches = self._watches.get(watch.name, [])
+        if watch in watches:
+            watches.remove(watch)
+        if not watches:
+            self._watches.pop(watch.name, None)
+        if watch.task and watch.task is not asyncio.current_task():
+            watch.task.cancel()
+
+    async def _follow_events(self, docker_host: str, docker: DockerCLI) -> None:
+        """Follow a daemon's container deaths, resubscribing whenever the stream drops."""
+        while True:
+            try:
+                self._subscribed.add(docker_host)
+                async for event in docker.events(
+                    "type=container", "event=die", "event=oom"
+                ):
+                    self._events += 1
+                    self._handle_event(event)
+                log.warning("watchdog_events_ended", docker_host=docker_host)
+            except DockerError as e:
+                log.warning("watchdog_events_failed", docker_host=docker_host, error=str(e))
+            finally:
+                self._subscribed.discard(docker_host)
+            await asyncio.sleep(self.config.resubscribe_interval)
+
+    def _handle_event(self, event: Dict[str, Any]) -> None:
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        name = attributes.get("name", "")
+        if name not in self._watches:
+            return
+        # An OOM kill sends "oom" before "die"; the first one wins
+        if event.get("Action") == "oom":
+            self._report(name, "oom", "sandbox container ran out of memory")
+        else:
+            exit_code = attributes.get("exitCode", "?")
+            self._report(name, "died", f"sandbox container exited with code {exit_code}")
+
+    async def _wait_local(self, watch: Watch, sandbox: Any) -> None:
+        try:
+            code = await sandbox.wait_exited()
+        except Exception as e:
+            log.warning("watchdog_wait_failed", sandbox=watch.name, error=str(e))
+            return
+        # Killed for memory shows up as SIGKILL
+        cause = "oom" if code == -9 else "died"
+        self._report(watch.name, cause, f"sandbox display exited with code {code}")
+
+    def _report(self, name: str, cause: str, reason: str) -> None:
+        """Tell everyone watching name that it died, once."""
+        watches = self._watches.pop(name, [])
+        if not watches:
+            return
+        self._lost += 1
+        self.metrics.increment("sandbox_lost_total", cause=cause)
+        log.error("sandbox_lost", sandbox=name, cause=cause, reason=reason, sessions=len(watches))
+        for watch in watches:
+            if watch.task and watch.task is not asyncio.current_task():
+                watch.task.cancel()
+            task = asyncio.create_task(watch.callback(reason))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Watchdog details for /stats."""
+        # Every daemon's event stream is open
+        subscribed = bool(self._events_tasks) and self._subscribed >= set(self._events_tasks)
+        return {
+            "watched_sandboxes": len(self._watches),
+            "subscribed": subscribed,
+            "subscribed_daemons": len(self._subscribed),
+            "events": self._events,
+            "sandboxes_lost": self._lost,
+        }
@@ -37,6 +37,8 @@ class CUAClient:
 
     Provides async methods for communicating with the CUA controller:
     - health_check: Verify controller is healthy
+    - readiness_check: Check whether the controller has finished warming up
+    - prepare_sandbox: Start readying a sandbox before the stream request
     - start_stream: Request a new streaming session
     - stop_stream: Stop an active streaming session
 
@@ -165,6 +167,111 @@ class CUAClient:
 
         return await self._retry(_do_health_check)
 
+    async def readiness_check(self) -> "ReadinessResponse":
+        """Check whether CUA controller is warmed up and ready for streams.
+
+        Unlike health_check this is not retried: a controller that is still
+        warming answers 503 with its state, which is a normal result the
+        caller can route around rather than an error.
+
+        Returns:
+            ReadinessResponse with readiness state
+
+        Raises:
+            CUAClientError: If the controller can't be reached
+        """
+        from jamie.shared.models import ReadinessResponse
+
+        session = await self._get_session()
+        try:
+            async with session.get(f"{self.config.base_url}/ready") as resp:
+                if resp.status in (200, 503):
+                    data = await resp.json()
+                    return ReadinessResponse(**data)
+                raise CUAClientError(
+                    code=ErrorCode.CUA_UNAVAILABLE,
+                    message=f"Readiness check failed with status {resp.status}",
+                )
+        except aiohttp.ClientError as e:
+            raise CUAClientError(
+                code=ErrorCode.CUA_UNAVAILABLE,
+                message=f"Cannot connect to CUA: {e}",
+            )
+
+    async def prepare_sandbox(
+        self, requester_id: Optional[str] = None
+    ) -> Optional["PrepareResponse"]:
+        """Ask CUA to start readying a sandbox for a likely stream request.
+
+        This is speculative, so it is not retried and a controller that
+        has reservations disabled (404), is still warming up (503) or has
+        too many outstanding (429) just yields None.
+
+        Args:
+            requester_id: ID of the user whose DM triggered the reservation
+
+        Returns:
+            PrepareResponse with the reservation token, or None
+
+        Raises:
+            CUAClientError: If the controller can't be reached
+        """
+        from jamie.shared.models import PrepareRequest, PrepareResponse
+
+        session = await self._get_session()
+        request = PrepareRequest(requester_id=requester_id)
+        try:
+            async with session.post(
+                f"{self.config.base_url}/prepare",
+                json=request.model_dump(mode="json"),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return PrepareResponse(**data)
+                if resp.status in (404, 429, 503):
+                    return None
+                raise CUAClientError(
+                    code=ErrorCode.CUA_UNAVAILABLE,
+                    message=f"Prepare request failed with status {resp.status}",
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise CUAClientError(
+                code=ErrorCode.CUA_UNAVAILABLE,
+                message=f"Cannot connect to CUA: {e}",
+            )
+
+    async def release_reservation(self, token: str) -> bool:
+        """Give back a reserved sandbox the bot won't claim.
+
+        Like prepare_sandbox this is not retried; a reservation the
+        controller no longer knows (404) has already been claimed or expired.
+
+        Args:
+            token: Reservation token from prepare_sandbox
+
+        Returns:
+            True if the reservation was released, False if it was gone
+
+        Raises:
+            CUAClientError: If the controller can't be reached
+        """
+        session = await self._get_session()
+        try:
+            async with session.delete(f"{self.config.base_url}/prepare/{token}") as resp:
+                if resp.status == 200:
+                    return True
+                if resp.status == 404:
+                    return False
+                raise CUAClientError(
+                    code=ErrorCode.CUA_UNAVAILABLE,
+                    message=f"Release request failed with status {resp.status}",
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise CUAClientError(
+                code=ErrorCode.CUA_UNAVAILABLE,
+                message=f"Cannot connect to CUA: {e}",
+            )
+
     async def start_stream(self, request: "StreamRequest") -> "StreamResponse":
         """Request CUA to start streaming.
 
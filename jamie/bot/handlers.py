@@ -1,6 +1,7 @@
 """DM message handler for Jamie bot."""
 
-from typing import TYPE_CHECKING
+import asyncio
+from typing import TYPE_CHECKING, Optional
 
 import discord
 
@@ -10,13 +11,16 @@ from jamie.bot.cua_client import CUAClient, CUAClientError
 from jamie.bot.url_patterns import extract_urls, parse_url, StreamingService
 from jamie.bot.voice import find_user_voice_with_guild
 from jamie.shared.logging import get_logger
-from jamie.shared.models import StreamRequest
+from jamie.shared.models import ReadinessResponse, StreamRequest
 
 if TYPE_CHECKING:
     from jamie.bot.bot import JamieBot
 
 log = get_logger(__name__)
 
+# Controller readiness states in which streams should wait rather than start
+WARMING_STATES = ("starting", "warming")
+
 
 class MessageHandler:
     """Handles DM messages and routes to appropriate handlers."""
@@ -140,20 +144,71 @@ class MessageHandler:
             service=parsed.service.value,
         )
 
+        # A warming controller would boot sandboxes while it pulls their image.
+        # One whose warm-up failed still takes streams, just without reservations.
+        readiness = await self._check_readiness()
+        if readiness is not None and readiness.state in WARMING_STATES:
+            await message.reply(msg.error_warming_up())
+            return
+
+        # Start a sandbox booting while we look up voice and create the session
+        reservation = None
+        if readiness is not None and readiness.ready:
+            reservation = asyncio.create_task(self._prepare_sandbox(user_id))
+
         # Delegate to stream request handler
         await self._handle_stream_request(
             message=message,
             user_id=user_id,
             url=parsed.normalized or url,
             service=parsed.service,
+            reservation=reservation,
         )
 
+    async def _check_readiness(self) -> Optional[ReadinessResponse]:
+        """The controller's readiness, or None if it couldn't be asked."""
+        try:
+            return await self.cua_client.readiness_check()
+        except (CUAClientError, asyncio.TimeoutError) as e:
+            log.warning("readiness_check_failed", error=str(e))
+            return None
+
+    async def _prepare_sandbox(self, user_id: str) -> Optional[str]:
+        """Reserve a sandbox on the controller; returns the token or None.
+
+        Never raises: if the reservation fails the stream request simply
+        boots its own sandbox.
+        """
+        try:
+            response = await self.cua_client.prepare_sandbox(user_id)
+        except (CUAClientError, asyncio.TimeoutError) as e:
+            log.warning("prepare_failed", user_id=user_id, error=str(e))
+            return None
+        return response.token if response else None
+
+    async def _drop_reservation(
+        self, reservation: Optional["asyncio.Task[Optional[str]]"]
+    ) -> None:
+        """Release a reservation the request won't claim.
+
+        Waits for /prepare to answer so a token still in flight is released
+        too, rather than holding its sandbox until it expires. Never raises.
+        """
+        token = await reservation if reservation else None
+        if token is None:
+            return
+        try:
+            await self.cua_client.release_reservation(token)
+        except (CUAClientError, asyncio.TimeoutError) as e:
+            log.warning("reservation_release_failed", error=str(e))
+
     async def _handle_stream_request(
         self,
         message: discord.Message,
         user_id: str,
         url: str,
         service: StreamingService,
+        reservation: Optional["asyncio.Task[Optional[str]]"] = None,
     ) -> None:
         """Handle stream request after URL validation.
         
@@ -170,11 +225,14 @@ class MessageHandler:
             user_id: ID of the requesting user
             url: Normalized URL to stream
             service: Detected streaming service type
+            reservation: Pending sandbox reservation token from /prepare;
+                released on the controller if the request is rejected
         """
         # Check if user already has an active stream
         existing_session = await self.session_manager.get_user_session(user_id)
         if existing_session:
             await message.reply(msg.error_already_streaming(existing_session.channel_name))
+            await self._drop_reservation(reservation)
             return
 
         # Find user's voice channel
@@ -184,6 +242,7 @@ class MessageHandler:
 
         if not voice_channel or not guild:
             await message.reply(msg.error_not_in_voice())
+            await self._drop_reservation(reservation)
             return
 
         # Create session via session_manager
@@ -198,6 +257,7 @@ class MessageHandler:
         except ValueError as e:
             log.warning("session_create_failed", user_id=user_id, error=str(e))
             await message.reply(str(e))
+            await self._drop_reservation(reservation)
             return
 
         log.info(
@@ -213,7 +273,7 @@ class MessageHandler:
             f"http://{self.bot.config.webhook_host}:{self.bot.config.webhook_port}/status"
         )
 
-        # Create stream request
+        # Create stream request, claiming the reserved sandbox if we got one
         stream_request = StreamRequest(
             session_id=session.session_id,
             url=url,
@@ -222,6 +282,7 @@ class MessageHandler:
             channel_name=voice_channel.name,
             requester_id=user_id,
             webhook_url=webhook_url,
+            reservation_token=await reservation if reservation else None,
         )
 
         # Send acknowledgment
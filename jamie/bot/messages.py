@@ -208,6 +208,14 @@ def error_already_streaming(channel_name: str) -> str:
     )
 
 
+def error_warming_up() -> str:
+    """Message when the streaming controller hasn't finished starting up."""
+    return (
+        f"{Emoji.LOADING} I'm still warming up after a restart.\n\n"
+        f"{Emoji.HELP} *Send me the URL again in a minute.*"
+    )
+
+
 def error_generic(error_msg: str) -> str:
     """Generic error message with guidance."""
     return (
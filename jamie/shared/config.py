@@ -1,6 +1,8 @@
 """Configuration management for Jamie using pydantic-settings."""
 
-from pydantic import SecretStr, Field
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, SecretStr, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -47,6 +49,677 @@ class ObservabilityConfig(BaseSettings):
     metrics_endpoint: bool = Field(default=True, description="Expose /metrics endpoint")
 
 
+class PoolConfig(BaseSettings):
+    """Configuration for the warm sandbox pool."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_POOL_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Keep pre-booted sandboxes warm")
+    min_size: int = Field(default=1, ge=0, description="Sandboxes to keep booted")
+    max_size: int = Field(default=4, ge=1, description="Upper bound on pooled sandboxes")
+    lease_timeout: float = Field(
+        default=60.0,
+        description="Seconds a stream request waits for a pooled sandbox"
+    )
+    health_check_interval: float = Field(
+        default=60.0,
+        description="Seconds between health checks of idle sandboxes"
+    )
+    
+    # Recycling
+    recycle: bool = Field(
+        default=False,
+        description="Reset and reuse sandboxes after a clean stop instead of tearing them down"
+    )
+    max_reuses: int = Field(
+        default=5,
+        ge=0,
+        description="Sessions a sandbox may serve after its first"
+    )
+    max_memory_growth_mb: float = Field(
+        default=1024.0,
+        description="Retire a recycled sandbox once memory grew this much since boot"
+    )
+    
+    # Memory
+    memory_budget: str = Field(
+        default="",
+        description="Host memory for pooled sandboxes, e.g. \"32GB\"; caps the pool at as "
+        "many sandboxes as their memory limits fit. Empty for max_size alone"
+    )
+
+
+class SnapshotConfig(BaseSettings):
+    """Configuration for logged-in sandbox snapshots."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_SNAPSHOT_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Boot sandboxes from login snapshots")
+    state_dir: str = Field(
+        default="/var/lib/jamie/snapshots",
+        description="Directory holding snapshot metadata"
+    )
+    repository: str = Field(
+        default="jamie-discord-session",
+        description="Docker image repository for snapshot images"
+    )
+    keep: int = Field(default=2, ge=1, description="Snapshot versions to keep per account")
+
+
+class ProfileConfig(BaseSettings):
+    """Configuration for persistent browser profiles."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_PROFILE_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Reuse persistent browser profiles")
+    root_dir: str = Field(
+        default="/home/jamie/.config/chromium",
+        description="Directory holding per-account browser profiles"
+    )
+
+
+class WarmupConfig(BaseSettings):
+    """Configuration for controller warm-up at startup."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_WARMUP_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=True, description="Warm up before reporting ready")
+    prepull: bool = Field(default=False, description="Pull the sandbox image at startup")
+    touch: bool = Field(
+        default=False,
+        description="Run a throwaway container so image layers are cached"
+    )
+    canary: bool = Field(default=False, description="Boot and discard one canary sandbox")
+    max_attempts: int = Field(
+        default=5,
+        ge=1,
+        description="Warm-up attempts before readiness is reported as failed"
+    )
+    retry_delay: float = Field(
+        default=5.0,
+        ge=0,
+        description="Seconds before the first retry; doubles after each failed attempt"
+    )
+
+
+class ReservationConfig(BaseSettings):
+    """Configuration for speculative sandbox reservations (POST /prepare)."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_RESERVATION_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Accept POST /prepare reservations")
+    ttl_seconds: float = Field(
+        default=45.0,
+        gt=0,
+        description="Seconds an unclaimed reservation holds its sandbox"
+    )
+    max_active: int = Field(
+        default=2,
+        ge=1,
+        description="Unclaimed reservations allowed at once"
+    )
+
+
+class ReaperConfig(BaseSettings):
+    """Configuration for reaping orphaned sandbox containers."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_REAPER_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Remove sandboxes no session owns")
+    instance_id: str = Field(
+        default="",
+        description="Controller instance ID baked into sandbox container names; "
+                    "must be stable across restarts and unique per Docker host. "
+                    "Generated once and kept in instance_id_file when empty"
+    )
+    instance_id_file: str = Field(
+        default="/var/lib/jamie/instance-id",
+        description="Where a generated instance ID is kept; put it on a persistent volume"
+    )
+    interval: float = Field(default=60.0, gt=0, description="Seconds between sweeps")
+    grace_period: float = Field(
+        default=300.0,
+        ge=0,
+        description="Seconds a container must stay unowned before it is removed"
+    )
+
+
+class WatchdogConfig(BaseSettings):
+    """Configuration for noticing dead sandboxes as soon as they die."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_WATCHDOG_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(
+        default=False,
+        description="Fail sessions the moment their sandbox dies"
+    )
+    resubscribe_interval: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds to wait before reconnecting to docker's event stream"
+    )
+
+
+class RecoveryConfig(BaseSettings):
+    """Configuration for recovering sessions whose browser failed."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_RECOVERY_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(
+        default=False,
+        description="Restart a failed browser, then the sandbox, instead of failing the session"
+    )
+    max_attempts: int = Field(
+        default=2,
+        ge=0,
+        description="Recoveries per session before its failure is final"
+    )
+    browser_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds a browser restart may take before the sandbox is restarted"
+    )
+
+
+class TelemetryConfig(BaseSettings):
+    """Configuration for per-sandbox resource telemetry."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_TELEMETRY_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Sample running sandboxes' resource use")
+    interval: float = Field(default=5.0, gt=0, description="Seconds between samples")
+    samples_per_session: int = Field(
+        default=720,
+        ge=1,
+        description="Samples kept per session; older ones are dropped"
+    )
+    max_sessions: int = Field(
+        default=100,
+        ge=1,
+        description="Sessions whose samples are kept, most recently sampled first"
+    )
+    cgroup_root: str = Field(
+        default="/sys/fs/cgroup",
+        description="Where the controller sees the host's cgroup v2 hierarchy"
+    )
+    proc_root: str = Field(
+        default="/proc",
+        description="Where the controller sees the host's /proc (container PIDs)"
+    )
+
+
+class AutoscalerConfig(BaseSettings):
+    """Configuration for forecast-driven warm pool capacity."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_AUTOSCALER_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(
+        default=False,
+        description="Size the warm pool from forecast demand (needs the pool enabled)"
+    )
+    interval: float = Field(default=60.0, gt=0, description="Seconds between decisions")
+    lead_time: float = Field(
+        default=180.0,
+        gt=0,
+        description="Seconds ahead to provision for; roughly a pooled sandbox's boot and login"
+    )
+    headroom: float = Field(
+        default=1.5,
+        ge=1.0,
+        description="Multiplier on forecast arrivals within the lead time"
+    )
+    min_idle: int = Field(default=1, ge=0, description="Fewest sandboxes kept ready")
+    max_idle: int = Field(
+        default=0,
+        ge=0,
+        description="Most sandboxes kept ready; 0 means the pool's max_size"
+    )
+    level_window: float = Field(
+        default=900.0,
+        gt=0,
+        description="Seconds of recent demand the short-term rate averages over"
+    )
+    season_alpha: float = Field(
+        default=0.3,
+        gt=0,
+        le=1,
+        description="Weight of the latest week in each hour's learned rate"
+    )
+    scale_down_delay: float = Field(
+        default=900.0,
+        ge=0,
+        description="Seconds a lower target must hold before idle sandboxes are released"
+    )
+    utc_offset_hours: float = Field(
+        default=0.0,
+        description="Offset from UTC of the hours and weekdays demand is learned in"
+    )
+    state_file: str = Field(
+        default="/var/lib/jamie/autoscaler.json",
+        description="Where the learned profile survives restarts; empty to keep it in memory"
+    )
+
+
+class DiscordAccount(BaseModel):
+    """Discord web login for one multiplexed browser slot."""
+    
+    email: str
+    password: SecretStr
+
+
+class MultiplexConfig(BaseSettings):
+    """Configuration for running several Discord accounts in one sandbox."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_MULTIPLEX_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Share sandboxes between sessions")
+    slots_per_sandbox: int = Field(
+        default=2,
+        ge=1,
+        description="Browser windows (sessions) per sandbox container"
+    )
+    max_sandboxes: int = Field(default=2, ge=1, description="Multiplexed sandboxes to run at most")
+    slot_display: str = Field(
+        default="1024x768",
+        description="Screen area of each slot; the sandbox display is this times slots wide"
+    )
+    sandbox_cpu: str = Field(default="3", description="CPUs for each multiplexed sandbox")
+    sandbox_memory: str = Field(default="6GB", description="Memory for each multiplexed sandbox")
+    # JSON list, e.g. [{"email": "a@example.com", "password": "..."}]
+    accounts: List[DiscordAccount] = Field(
+        default_factory=list,
+        description="Discord accounts; each streams at most one session at a time"
+    )
+
+
+class ProxyConfig(BaseSettings):
+    """Configuration for the caching HTTP proxy sandbox browsers go through."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_PROXY_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Run the proxy and point sandboxes at it")
+    host: str = Field(
+        default="172.17.0.1",
+        description="Address the proxy listens on; the default docker bridge's gateway"
+    )
+    port: int = Field(default=3128, description="Port the proxy listens on")
+    allowed_clients: List[str] = Field(
+        default_factory=lambda: ["172.16.0.0/12"],
+        description="Networks (CIDR) of the sandboxes allowed to use the proxy"
+    )
+    connect_ports: List[int] = Field(
+        default_factory=lambda: [443],
+        description="Ports CONNECT tunnels may be opened to"
+    )
+    sandbox_address: str = Field(
+        default="172.17.0.1:3128",
+        description="host:port at which sandbox containers reach the proxy"
+    )
+    cache_hosts: List[str] = Field(
+        default_factory=lambda: [
+            "cdn.discordapp.com",
+            "media.discordapp.net",
+            "i.ytimg.com",
+            "yt3.ggpht.com",
+            "fonts.gstatic.com",
+        ],
+        description="Static asset hosts (shell patterns) sent through the proxy; "
+                    "login and API hosts never are"
+    )
+    intercept: bool = Field(
+        default=True,
+        description="Decrypt HTTPS to cache_hosts with the proxy's own CA so it can be cached"
+    )
+    ca_dir: str = Field(
+        default="/var/lib/jamie/proxy-ca",
+        description="Directory of the proxy's CA and host certificates"
+    )
+    cache_dir: str = Field(
+        default="/var/lib/jamie/proxy-cache",
+        description="Directory of the on-disk asset cache"
+    )
+    max_size: str = Field(default="2GB", description="Cache size above which LRU entries go")
+    max_entry_size: str = Field(default="50MB", description="Largest response that is cached")
+    default_ttl: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Freshness of static assets whose response gives none"
+    )
+
+
+class PerformanceConfig(BaseSettings):
+    """Configuration for browser performance profiles."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_PERFORMANCE_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    default_profile: str = Field(
+        default="standard",
+        description="Performance profile for sessions that don't ask for one"
+    )
+
+
+class QualityConfig(BaseSettings):
+    """Configuration for picking the content player's video quality."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_QUALITY_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(
+        default=False,
+        description="Pin video players to a quality that fits the display and host load"
+    )
+    min_height: int = Field(
+        default=360,
+        ge=0,
+        description="Never pick a quality below this many lines because of load"
+    )
+    busy_load: float = Field(
+        default=0.7,
+        gt=0,
+        description="Host load per CPU from which quality drops one step"
+    )
+    overloaded_load: float = Field(
+        default=0.9,
+        gt=0,
+        description="Host load per CPU from which quality drops two steps"
+    )
+
+
+class ShapingConfig(BaseSettings):
+    """Configuration for per-sandbox network rate limits."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_SHAPING_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Rate limit each sandbox's network")
+    image: str = Field(
+        default="nicolaka/netshoot:latest",
+        description="Image with tc, run in the sandbox's network namespace to apply limits"
+    )
+    interface: str = Field(default="eth0", description="Sandbox network interface to shape")
+    video_download_mbit: float = Field(
+        default=12.0,
+        gt=0,
+        description="Download limit of sessions streaming YouTube, Twitch or Vimeo"
+    )
+    page_download_mbit: float = Field(
+        default=4.0,
+        gt=0,
+        description="Download limit of other sessions and of sandboxes without one"
+    )
+    upload_mbit: float = Field(default=6.0, gt=0, description="Upload limit of every sandbox")
+    media_share: float = Field(
+        default=0.8,
+        gt=0,
+        le=1,
+        description="Share of the upload limit guaranteed to WebRTC media (UDP)"
+    )
+
+
+class LaunchConfig(BaseSettings):
+    """Configuration for pacing concurrent sandbox boots."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_LAUNCH_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Queue sandbox boots through the governor")
+    max_concurrent: int = Field(default=3, ge=1, description="Sandboxes booting at once")
+    stagger: float = Field(
+        default=2.0,
+        ge=0,
+        description="Seconds between the starts of two boots"
+    )
+
+
+class StorageConfig(BaseSettings):
+    """Configuration for sandbox browser working storage."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_STORAGE_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    tmpfs: bool = Field(
+        default=False,
+        description="Run the sandbox browser's profile and cache from tmpfs"
+    )
+    tmpfs_dir: str = Field(
+        default="/dev/shm/jamie",
+        description="Working directory inside the sandbox; /dev/shm is tmpfs in every container"
+    )
+    min_free_mb: int = Field(
+        default=256,
+        ge=0,
+        description="Stay on the container filesystem when the tmpfs has less room than this"
+    )
+    cache_size_mb: int = Field(
+        default=64,
+        ge=1,
+        description="Browser disk cache cap on tmpfs, unless the performance profile sets one"
+    )
+    sync_interval: float = Field(
+        default=120.0,
+        gt=0,
+        description="Seconds between syncs of cookies and local storage to the durable profile"
+    )
+
+
+class SandboxHost(BaseModel):
+    """A docker daemon sandboxes can be placed on."""
+    
+    name: str
+    # DOCKER_HOST of its daemon, e.g. "ssh://jamie@sbx-2"; empty for the controller's own
+    docker_host: str = ""
+    # Where the controller reaches the sandboxes' published ports
+    address: str = "localhost"
+    # Sandboxes to place on it at most; 0 for as many as its memory fits
+    max_sandboxes: int = 0
+    # CPU list of each NUMA node, e.g. ["0-15", "16-31"], for CPU pinning;
+    # docker's CPU count as one node when empty (the controller's own daemon
+    # is read from sysfs)
+    numa_nodes: List[str] = Field(default_factory=list)
+
+
+class PlacementConfig(BaseSettings):
+    """Configuration for placing sandboxes across docker hosts."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_PLACEMENT_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    # JSON list, e.g. [{"name": "sbx-2", "docker_host": "ssh://jamie@sbx-2", "address": "sbx-2"}]
+    hosts: List[SandboxHost] = Field(
+        default_factory=list,
+        description="Hosts to place sandboxes on; empty runs every sandbox on the controller's"
+    )
+    refresh_interval: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds between capacity reports from each host"
+    )
+    memory_reserve: str = Field(
+        default="2GB",
+        description="Memory left free on each host for its own processes"
+    )
+
+
+class CpusetConfig(BaseSettings):
+    """Configuration for pinning sandboxes to dedicated CPUs."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_CPUSET_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(
+        default=False,
+        description="Give each docker sandbox its own cores, on one NUMA node where possible"
+    )
+    reserved_cpus: str = Field(
+        default="0",
+        description="CPU list never handed to sandboxes, left for the controller and the OS"
+    )
+    pin_memory: bool = Field(
+        default=True,
+        description="Also limit a sandbox's memory to the NUMA node its cores are on"
+    )
+
+
+class SandboxProviderConfig(BaseSettings):
+    """Configuration for how sandboxes are run."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_SANDBOX_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    provider: str = Field(
+        default="docker",
+        description="'docker' (CUA containers) or 'local' (Xvfb and browser as "
+                    "child processes of the controller)"
+    )
+    local_root: str = Field(
+        default="/tmp/jamie-local",
+        description="Directory holding each local sandbox's home, temp and framebuffer"
+    )
+    local_xvfb: str = Field(default="Xvfb", description="Xvfb binary for local sandboxes")
+    local_window_manager: str = Field(
+        default="openbox",
+        description="Window manager command for local sandboxes; empty runs none"
+    )
+    local_xdotool: str = Field(default="xdotool", description="xdotool binary for input")
+    local_first_display: int = Field(
+        default=100,
+        ge=1,
+        description="Lowest X display number local sandboxes use"
+    )
+    local_start_timeout: float = Field(
+        default=15.0,
+        gt=0,
+        description="Seconds to wait for a local sandbox's display to come up"
+    )
+
+
+class CaptureConfig(BaseSettings):
+    """Configuration for how screenshots are taken from sandboxes."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_CAPTURE_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    backend: str = Field(
+        default="server",
+        description="'server' (computer-server screenshots) or 'framebuffer' "
+                    "(map the display's Xvfb -fbdir file)"
+    )
+    framebuffer_dir: str = Field(
+        default="/tmp/jamie-fb",
+        description="Directory inside the sandbox that the image's Xvfb -fbdir writes to"
+    )
+
+
+class ScreenshotEncoding(BaseModel):
+    """Screenshot encoding for one agent phase; unset fields keep the defaults."""
+    
+    format: Optional[str] = None
+    quality: Optional[int] = Field(default=None, ge=1, le=100)
+    colors: Optional[int] = Field(default=None, ge=0, le=256)
+
+
+class ImagingConfig(BaseSettings):
+    """Configuration for re-encoding screenshots before they go to the model."""
+    
+    model_config = SettingsConfigDict(
+        env_prefix="JAMIE_IMAGING_",
+        env_file=".env",
+        extra="ignore",
+    )
+    
+    enabled: bool = Field(default=False, description="Re-encode agent screenshots")
+    format: str = Field(default="png", description="png, jpeg or webp")
+    quality: int = Field(default=80, ge=1, le=100, description="JPEG/WebP quality")
+    colors: int = Field(
+        default=0,
+        ge=0,
+        le=256,
+        description="Reduce PNG screenshots to this many palette colors; 0 keeps full color"
+    )
+    max_workers: int = Field(default=2, ge=1, description="Encoder threads")
+    # JSON object keyed by agent state, e.g. {"logging_in": {"format": "jpeg"}}
+    phases: Dict[str, ScreenshotEncoding] = Field(
+        default_factory=dict,
+        description="Per-phase overrides of format, quality and colors"
+    )
+
+
 class AgentConfig(BaseSettings):
     """Configuration for CUA streaming agent."""
     
@@ -98,3 +771,113 @@ def get_agent_config() -> AgentConfig:
 def get_observability_config() -> ObservabilityConfig:
     """Get observability configuration from environment."""
     return ObservabilityConfig()
+
+
+def get_pool_config() -> PoolConfig:
+    """Get sandbox pool configuration from environment."""
+    return PoolConfig()
+
+
+def get_snapshot_config() -> SnapshotConfig:
+    """Get snapshot configuration from environment."""
+    return SnapshotConfig()
+
+
+def get_profile_config() -> ProfileConfig:
+    """Get browser profile configuration from environment."""
+    return ProfileConfig()
+
+
+def get_warmup_config() -> WarmupConfig:
+    """Get warm-up configuration from environment."""
+    return WarmupConfig()
+
+
+def get_reservation_config() -> ReservationConfig:
+    """Get reservation configuration from environment."""
+    return ReservationConfig()
+
+
+def get_reaper_config() -> ReaperConfig:
+    """Get orphan reaper configuration from environment."""
+    return ReaperConfig()
+
+
+def get_watchdog_config() -> WatchdogConfig:
+    """Get sandbox watchdog configuration from environment."""
+    return WatchdogConfig()
+
+
+def get_recovery_config() -> RecoveryConfig:
+    """Get session recovery configuration from environment."""
+    return RecoveryConfig()
+
+
+def get_telemetry_config() -> TelemetryConfig:
+    """Get sandbox telemetry configuration from environment."""
+    return TelemetryConfig()
+
+
+def get_autoscaler_config() -> AutoscalerConfig:
+    """Get warm pool autoscaler configuration from environment."""
+    return AutoscalerConfig()
+
+
+def get_multiplex_config() -> MultiplexConfig:
+    """Get sandbox multiplexing configuration from environment."""
+    return MultiplexConfig()
+
+
+def get_proxy_config() -> ProxyConfig:
+    """Get caching proxy configuration from environment."""
+    return ProxyConfig()
+
+
+def get_performance_config() -> PerformanceConfig:
+    """Get browser performance profile configuration from environment."""
+    return PerformanceConfig()
+
+
+def get_quality_config() -> QualityConfig:
+    """Get content quality selection configuration from environment."""
+    return QualityConfig()
+
+
+def get_shaping_config() -> ShapingConfig:
+    """Get sandbox network shaping configuration from environment."""
+    return ShapingConfig()
+
+
+def get_launch_config() -> LaunchConfig:
+    """Get sandbox launch governor configuration from environment."""
+    return LaunchConfig()
+
+
+def get_storage_config() -> StorageConfig:
+    """Get sandbox working storage configuration from environment."""
+    return StorageConfig()
+
+
+def get_placement_config() -> PlacementConfig:
+    """Get multi-host sandbox placement configuration from environment."""
+    return PlacementConfig()
+
+
+def get_cpuset_config() -> CpusetConfig:
+    """Get sandbox CPU pinning configuration from environment."""
+    return CpusetConfig()
+
+
+def get_sandbox_provider_config() -> SandboxProviderConfig:
+    """Get sandbox provider configuration from environment."""
+    return SandboxProviderConfig()
+
+
+def get_capture_config() -> CaptureConfig:
+    """Get screenshot capture configuration from environment."""
+    return CaptureConfig()
+
+
+def get_imaging_config() -> ImagingConfig:
+    """Get screenshot encoding configuration from environment."""
+    return ImagingConfig()
@@ -10,13 +10,31 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from threading import Lock
-from typing import Dict, Deque, Optional, List
+from typing import Dict, Deque, Optional, List, Tuple
 
 from jamie.shared.logging import get_logger
 
 log = get_logger(__name__)
 
 
+# Sorted (label, value) pairs identifying one series of a labeled metric
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Default histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def _label_set(labels: Dict[str, object]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{{{inner}}}"
+
+
 class MetricType(str, Enum):
     """Types of metrics we track."""
     COUNTER = "counter"
@@ -42,6 +60,36 @@ class StreamMetrics:
         return self.end_time - self.start_time
 
 
+@dataclass
+class Histogram:
+    """Bucketed observations for one series of a histogram."""
+    buckets: Tuple[float, ...]
+    counts: List[int]
+    sum: float = 0.0
+    count: int = 0
+    
+    @classmethod
+    def empty(cls, buckets: Tuple[float, ...]) -> "Histogram":
+        return cls(buckets=buckets, counts=[0] * len(buckets))
+    
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+    
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, as Prometheus expects."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
 class MetricsCollector:
     """Thread-safe metrics collector for Jamie.
     
@@ -49,6 +97,7 @@ class MetricsCollector:
     - Stream counts (total, active, success, failure)
     - Latency metrics (start time, duration)
     - Error rates and codes
+    - Named counters, gauges and histograms recorded by other components
     
     Maintains a rolling window of recent streams for rate calculations.
     """
@@ -77,6 +126,11 @@ class MetricsCollector:
         # Error tracking
         self._error_counts: Dict[str, int] = {}
         
+        # Named, optionally labeled series from other components
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        
     def stream_started(self, session_id: str) -> None:
         """Record a stream starting."""
         with self._lock:
@@ -131,6 +185,63 @@ class MetricsCollector:
                 error_code=error_code,
             )
     
+    def increment(self, name: str, value: float = 1.0, **labels: object) -> None:
+        """Add to a named counter, e.g. increment("profile_lookups_total", result="hit")."""
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_set(labels)
+            series[key] = series.get(key, 0.0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels: object) -> None:
+        """Set a named gauge to its current value."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_set(labels)] = value
+    
+    def remove_gauge(self, name: str, **labels: object) -> None:
+        """Drop a gauge series, e.g. for something that no longer exists."""
+        with self._lock:
+            self._gauges.get(name, {}).pop(_label_set(labels), None)
+    
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Optional[Tuple[float, ...]] = None,
+        **labels: object,
+    ) -> None:
+        """Record one observation in a named histogram.
+        
+        ``buckets`` only applies when the series is first created.
+        """
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_set(labels)
+            if key not in series:
+                series[key] = Histogram.empty(tuple(sorted(buckets or DEFAULT_BUCKETS)))
+            series[key].observe(value)
+    
+    def get_counter(self, name: str, **labels: object) -> float:
+        """Get the current value of a counter series (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_set(labels), 0.0)
+    
+    def get_gauge(self, name: str, **labels: object) -> Optional[float]:
+        """Get the current value of a gauge series, if it has been set."""
+        with self._lock:
+            return self._gauges.get(name, {}).get(_label_set(labels))
+    
+    def get_histogram(self, name: str, **labels: object) -> Optional[Dict]:
+        """Get count, sum and cumulative buckets of a histogram series."""
+        with self._lock:
+            hist = self._histograms.get(name, {}).get(_label_set(labels))
+            if hist is None:
+                return None
+            return {
+                "count": hist.count,
+                "sum": hist.sum,
+                "buckets": dict(hist.cumulative()),
+            }
+    
     def get_active_count(self) -> int:
         """Get count of currently active streams."""
         with self._lock:
@@ -169,8 +280,28 @@ class MetricsCollector:
                 },
                 "errors": dict(self._error_counts),
                 "active_sessions": list(self._active_streams.keys()),
+                "counters": self._flatten(self._counters),
+                "gauges": self._flatten(self._gauges),
+                "histograms": {
+                    f"{name}{_format_labels(labels)}": {
+                        "count": hist.count,
+                        "sum": round(hist.sum, 3),
+                        "avg": round(hist.sum / hist.count, 3) if hist.count else 0.0,
+                    }
+                    for name, series in sorted(self._histograms.items())
+                    for labels, hist in sorted(series.items())
+                },
             }
     
+    @staticmethod
+    def _flatten(metrics: Dict[str, Dict[LabelSet, float]]) -> Dict[str, float]:
+        """Render labeled series as {'name{label="v"}': value}."""
+        return {
+            f"{name}{_format_labels(labels)}": value
+            for name, series in sorted(metrics.items())
+            for labels, value in sorted(series.items())
+        }
+    
     def _percentile(self, sorted_data: List[float], percentile: int) -> Optional[float]:
         """Calculate percentile from sorted data."""
         if not sorted_data:
@@ -230,6 +361,36 @@ class MetricsCollector:
             for code, count in stats['errors'].items():
                 lines.append(f'jamie_errors_total{{code="{code}"}} {count}')
         
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            histograms = {
+                name: {
+                    labels: (hist.cumulative(), hist.sum, hist.count)
+                    for labels, hist in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+        
+        for kind, metrics in (("counter", counters), ("gauge", gauges)):
+            for name, series in sorted(metrics.items()):
+                lines.append("")
+                lines.append(f"# TYPE jamie_{name} {kind}")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"jamie_{name}{_format_labels(labels)} {value}")
+        
+        for name, series in sorted(histograms.items()):
+            lines.append("")
+            lines.append(f"# TYPE jamie_{name} histogram")
+            for labels, (buckets, total, count) in sorted(series.items()):
+                for bound, cumulative in buckets:
+                    bucket_labels = _format_labels(labels + (("le", str(bound)),))
+                    lines.append(f"jamie_{name}_bucket{bucket_labels} {cumulative}")
+                inf_labels = _format_labels(labels + (("le", "+Inf"),))
+                lines.append(f"jamie_{name}_bucket{inf_labels} {count}")
+                lines.append(f"jamie_{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"jamie_{name}_count{_format_labels(labels)} {count}")
+        
         return "\n".join(lines) + "\n"
 
 
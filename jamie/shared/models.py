@@ -34,6 +34,25 @@ class StreamRequest(BaseModel):
     webhook_url: Optional[HttpUrl] = Field(
         None, description="Webhook for status updates"
     )
+    reservation_token: Optional[str] = Field(
+        None, description="Token from POST /prepare whose sandbox to use"
+    )
+    performance_profile: Optional[str] = Field(
+        None, description="Browser performance profile; the controller default if unset"
+    )
+
+
+class PrepareRequest(BaseModel):
+    """Request to start readying a sandbox ahead of a stream request."""
+
+    requester_id: Optional[str] = Field(None, description="Discord user ID who sent the URL")
+
+
+class PrepareResponse(BaseModel):
+    """Reservation for a sandbox being readied."""
+
+    token: str
+    expires_in_seconds: float
 
 
 class StreamResponse(BaseModel):
@@ -73,3 +92,12 @@ class HealthResponse(BaseModel):
     streams_success: Optional[int] = None
     streams_failed: Optional[int] = None
     success_rate_percent: Optional[float] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response, separate from /health liveness."""
+
+    ready: bool
+    state: str
+    warmup_seconds: Optional[float] = None
+    detail: Optional[str] = None
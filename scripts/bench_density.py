@@ -0,0 +1,108 @@
+"""Compare sandbox memory footprints across performance profiles.
+
+Boots sandboxes with each profile side by side, opens the same page in each
+browser, and reports the memory they settle at and how many would fit in a
+gigabyte, measured and by their memory limits:
+
+    python scripts/bench_density.py --profiles standard density --count 3
+
+"standard" is today's ``SandboxConfig`` (4GB limit, full XFCE desktop, the
+browser's default process model). Needs the CUA packages and a docker socket.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from typing import Dict, List
+
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry, memory_footprint
+from jamie.shared.metrics import MetricsCollector
+
+GB = 1000 ** 3
+MB = 1024 * 1024
+
+
+async def bench_profile(
+    profile: str, count: int, url: str, settle: float, image: str, display: str
+) -> Dict[str, object]:
+    """Boot count sandboxes with profile and measure their memory once settled."""
+    managers = [
+        SandboxManager(
+            SandboxConfig(
+                provider_type="docker",
+                image=image,
+                display=display,
+                performance_profile=profile,
+            ),
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+        )
+        for _ in range(count)
+    ]
+    usage: List[float] = []
+    try:
+        await asyncio.gather(*(manager.start() for manager in managers))
+        await asyncio.gather(*(manager.launch_browser(url) for manager in managers))
+        await asyncio.sleep(settle)
+        for manager in managers:
+            mb = await manager.memory_usage_mb()
+            if mb is not None:
+                usage.append(mb)
+            print(f"{profile} {manager.container_name}: {mb} MB", file=sys.stderr)
+    finally:
+        await asyncio.gather(*(manager.stop() for manager in managers), return_exceptions=True)
+
+    limit = memory_footprint(managers[0].config)
+    average = statistics.mean(usage) if usage else None
+    return {
+        "sandboxes": len(usage),
+        "avg_mb": round(average, 1) if average else None,
+        "max_mb": round(max(usage), 1) if usage else None,
+        "limit_mb": round(limit / MB),
+        # Sandboxes per GB of host memory
+        "per_gb_measured": round(GB / (average * MB), 2) if average else None,
+        "per_gb_by_limit": round(GB / limit, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["standard", "density"])
+    parser.add_argument("--count", type=int, default=3, help="Sandboxes per profile")
+    parser.add_argument("--url", default="https://www.youtube.com/watch?v=jNQXAC9IVRw")
+    parser.add_argument("--settle", type=float, default=30.0, help="Seconds before measuring")
+    parser.add_argument("--image", default="trycua/cua-xfce:latest")
+    parser.add_argument("--display", default="1024x768")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = {}
+    for profile in args.profiles:
+        summary[profile] = await bench_profile(
+            profile, args.count, args.url, args.settle, args.image, args.display
+        )
+
+    baseline = summary.get("standard", {}).get("per_gb_measured")
+    for result in summary.values():
+        measured = result["per_gb_measured"]
+        result["vs_standard"] = round(measured / baseline, 2) if measured and baseline else None
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(
+        f"{'profile':<10} {'avg MB':>8} {'max MB':>8} {'limit MB':>9} "
+        f"{'per GB':>7} {'by limit':>9} {'vs std':>7}"
+    )
+    for profile, result in summary.items():
+        print(
+            f"{profile:<10} {result['avg_mb'] or '-':>8} {result['max_mb'] or '-':>8} "
+            f"{result['limit_mb']:>9} {result['per_gb_measured'] or '-':>7} "
+            f"{result['per_gb_by_limit']:>9} {result['vs_standard'] or '-':>7}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
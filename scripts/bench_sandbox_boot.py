@@ -0,0 +1,91 @@
+"""Compare sandbox boot times across providers.
+
+Boots and stops sandboxes one at a time with each provider and reports the
+``SandboxManager`` boot stages (create, handshake, first_screenshot, total):
+
+    python scripts/bench_sandbox_boot.py --providers docker local --runs 5
+
+The docker provider needs the CUA packages and a docker socket; the local
+provider needs Xvfb, xdotool and the window manager on this machine.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.metrics import MetricsCollector
+
+STAGES = ("create", "handshake", "first_screenshot", "total")
+
+
+async def bench_provider(provider: str, runs: int, image: str, display: str) -> Dict[str, List]:
+    """Boot ``runs`` sandboxes with provider; returns each stage's timings."""
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for run in range(runs):
+        manager = SandboxManager(
+            SandboxConfig(provider_type=provider, image=image, display=display),
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+        )
+        try:
+            await manager.start()
+        finally:
+            stop_started = time.monotonic()
+            await manager.stop()
+            stop_seconds = time.monotonic() - stop_started
+        for stage in STAGES:
+            if stage in manager.boot_timings:
+                timings[stage].append(manager.boot_timings[stage])
+        print(
+            f"{provider} run {run + 1}/{runs}: {manager.boot_timings} "
+            f"(stop {stop_seconds:.3f}s)",
+            file=sys.stderr,
+        )
+    return timings
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "min": ordered[0],
+        "median": round(statistics.median(ordered), 3),
+        "p90": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        "max": ordered[-1],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", nargs="+", default=["docker", "local"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--image", default="trycua/cua-xfce:latest")
+    parser.add_argument("--display", default="1024x768")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = {}
+    for provider in args.providers:
+        timings = await bench_provider(provider, args.runs, args.image, args.display)
+        summary[provider] = {
+            stage: summarize(values) for stage, values in timings.items() if values
+        }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{'provider':<10} {'stage':<18} {'min':>8} {'median':>8} {'p90':>8} {'max':>8}")
+    for provider, stages in summary.items():
+        for stage, stats in stages.items():
+            print(
+                f"{provider:<10} {stage:<18} {stats['min']:>8.3f} {stats['median']:>8.3f} "
+                f"{stats['p90']:>8.3f} {stats['max']:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,4 +5,27 @@ Test modules:
     test_models: API model validation tests
     test_controller: API controller tests
     test_webhook_reporter: Webhook status reporter tests
+    test_pool: Warm sandbox pool tests
+    test_autoscaler: Warm capacity autoscaler tests
+    test_launch: Sandbox launch governor tests
+    test_hosts: Multi-host sandbox placement tests
+    test_snapshot: Login snapshot tests
+    test_browser_profiles: Persistent browser profile tests
+    test_warmup: Controller warm-up and readiness tests
+    test_sandbox: Sandbox boot, registration and policy tests
+    test_reservations: Speculative sandbox reservation tests
+    test_reaper: Orphaned sandbox reaper tests
+    test_multiplex: Multiplexed sandbox tests
+    test_proxy: Caching proxy tests
+    test_performance: Browser performance profile tests
+    test_quality: Content video quality selection tests
+    test_framebuffer: Framebuffer screen capture tests
+    test_imaging: Screenshot encoding tests
+    test_local: Local sandbox provider tests
+    test_watchdog: Sandbox watchdog tests
+    test_telemetry: Sandbox resource telemetry tests
+    test_shaping: Sandbox network shaping tests
+    test_storage: Sandbox tmpfs working storage tests
+    test_recovery: Session browser and sandbox recovery tests
+    test_cpuset: Sandbox CPU pinning tests
 """
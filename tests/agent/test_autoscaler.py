@@ -0,0 +1,155 @@
+"""Unit tests for the warm capacity autoscaler (jamie/agent/autoscaler.py)."""
+
+import json
+
+import pytest
+
+from jamie.agent.autoscaler import DemandForecaster, WarmCapacityAutoscaler, hour_of_week
+from jamie.shared.config import AutoscalerConfig
+from jamie.shared.metrics import MetricsCollector
+
+# Monday 2024-01-01 00:00 UTC
+MONDAY = 1704067200.0
+HOUR = 3600.0
+
+
+class FakePool:
+    """Pool that only records its idle target."""
+
+    def __init__(self, target: int = 1, capacity: int = 16):
+        self.capacity = capacity
+        self.target_idle = target
+
+    async def set_target_idle(self, target: int) -> int:
+        self.target_idle = min(target, self.capacity)
+        return self.target_idle
+
+
+class Clock:
+    def __init__(self, now: float = MONDAY):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def learn(forecaster: DemandForecaster, start: float, hours: int, per_hour) -> None:
+    """Feed per_hour(hour_index) requests for each hour, in ten-minute steps."""
+    forecaster.observe(0, start)
+    for index in range(hours):
+        for step in range(1, 7):
+            forecaster.observe(per_hour(index) / 6, start + index * HOUR + step * 600)
+
+
+def make_autoscaler(tmp_path, pool=None, **overrides):
+    settings = {
+        "lead_time": 600.0,
+        "headroom": 1.0,
+        "min_idle": 1,
+        "scale_down_delay": 300.0,
+        "state_file": str(tmp_path / "autoscaler.json"),
+    }
+    settings.update(overrides)
+    clock = Clock()
+    autoscaler = WarmCapacityAutoscaler(
+        pool or FakePool(),
+        AutoscalerConfig(**settings),
+        metrics=MetricsCollector(),
+        clock=clock,
+    )
+    return autoscaler, clock
+
+
+class TestDemandForecaster:
+    """Tests for learning the hourly and weekday request profile."""
+
+    def test_hour_of_week(self):
+        assert hour_of_week(MONDAY) == 0
+        assert hour_of_week(MONDAY + 6 * 24 * HOUR + 23 * HOUR) == 167
+        assert hour_of_week(MONDAY, utc_offset_hours=-1) == 167
+
+    def test_learns_each_hour_and_falls_back_to_hour_of_day(self):
+        forecaster = DemandForecaster()
+        learn(forecaster, MONDAY, 24, lambda hour: 30 if hour == 18 else 2)
+
+        assert forecaster.seasonal(MONDAY + 18 * HOUR) == pytest.approx(30)
+        # Tuesday 18:00 hasn't been seen; Monday's 18:00 stands in
+        assert forecaster.seasonal(MONDAY + 42 * HOUR) == pytest.approx(30)
+
+    def test_new_week_refines_rather_than_replaces(self):
+        forecaster = DemandForecaster(season_alpha=0.5)
+        learn(forecaster, MONDAY, 2, lambda hour: 20)
+        learn(forecaster, MONDAY + 7 * 24 * HOUR, 2, lambda hour: 10)
+
+        assert forecaster.weekly[0] == pytest.approx(15)
+
+    def test_partial_hour_not_learned(self):
+        forecaster = DemandForecaster()
+        forecaster.observe(0, MONDAY + 50 * 60)
+        forecaster.observe(5, MONDAY + HOUR)
+
+        assert forecaster.weekly == {}
+        assert forecaster.level > 0
+
+    def test_recent_burst_beats_quiet_profile(self):
+        forecaster = DemandForecaster(level_window=300)
+        learn(forecaster, MONDAY, 1, lambda hour: 1)
+        for step in range(1, 4):
+            forecaster.observe(10, MONDAY + HOUR + step * 60)
+
+        assert forecaster.forecast(MONDAY + HOUR) > 100
+
+
+class TestWarmCapacityAutoscaler:
+    """Tests for turning forecasts into the pool's idle target."""
+
+    @pytest.mark.asyncio
+    async def test_preboots_ahead_of_learned_peak(self, tmp_path):
+        autoscaler, clock = make_autoscaler(tmp_path)
+        # 60 requests/hour expected from 18:00: 10 within a 10 minute lead time
+        autoscaler.forecaster.weekly[18] = 60.0
+
+        clock.now = MONDAY + 17 * HOUR
+        assert await autoscaler.evaluate() == 1
+        clock.now = MONDAY + 18 * HOUR - 300
+        assert await autoscaler.evaluate() == 10
+
+        metrics = autoscaler.metrics
+        assert metrics.get_gauge("autoscaler_forecast_requests_per_hour") == 60
+        assert metrics.get_counter("autoscaler_decisions_total", action="scale_up") == 1
+        assert autoscaler.stats()["profile"]["mon"][18] == 60
+
+    @pytest.mark.asyncio
+    async def test_scale_down_waits_for_delay(self, tmp_path):
+        autoscaler, clock = make_autoscaler(tmp_path, pool=FakePool(target=6))
+
+        clock.now = MONDAY + 3 * HOUR
+        assert await autoscaler.evaluate() == 6
+        clock.now += 200
+        assert await autoscaler.evaluate() == 6
+        clock.now += 200
+        assert await autoscaler.evaluate() == 1
+        assert autoscaler.stats()["decisions"][-1]["previous"] == 6
+
+    @pytest.mark.asyncio
+    async def test_learns_from_stream_counter_and_persists(self, tmp_path):
+        autoscaler, clock = make_autoscaler(tmp_path)
+        await autoscaler.evaluate()
+        for index in range(12):
+            autoscaler.metrics.stream_started(f"s{index}")
+        clock.now += HOUR
+        await autoscaler.evaluate()
+
+        with open(tmp_path / "autoscaler.json") as f:
+            assert json.load(f)["weekly"] == {"0": pytest.approx(12)}
+
+        restarted, _ = make_autoscaler(tmp_path)
+        restarted._load()
+        assert restarted.forecaster.weekly[0] == pytest.approx(12)
+
+    @pytest.mark.asyncio
+    async def test_target_bounded_by_max_idle(self, tmp_path):
+        autoscaler, clock = make_autoscaler(tmp_path, max_idle=3)
+        autoscaler.forecaster.daily[0] = 1000.0
+
+        assert await autoscaler.evaluate() == 3
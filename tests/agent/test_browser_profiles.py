@@ -0,0 +1,152 @@
+"""Unit tests for persistent browser profiles (jamie/agent/browser_profiles.py)."""
+
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from jamie.agent.browser_profiles import (
+    BrowserProfileManager,
+    ProfileHealth,
+    check_profile,
+)
+from jamie.agent.sandbox import SandboxConfig
+from jamie.shared.metrics import MetricsCollector
+
+EMAIL = "stream@example.com"
+
+
+def make_profile(path, hosts=("discord.com",), cookies=("Default", "Network", "Cookies")):
+    """Create a minimal Chromium profile with cookies for ``hosts``."""
+    os.makedirs(os.path.join(path, *cookies[:-1]), exist_ok=True)
+    with open(os.path.join(path, "Local State"), "w") as f:
+        json.dump({"profile": {}}, f)
+    conn = sqlite3.connect(os.path.join(path, *cookies))
+    conn.execute("CREATE TABLE cookies (host_key TEXT, name TEXT)")
+    conn.executemany(
+        "INSERT INTO cookies VALUES (?, ?)",
+        [(host, "__dcfduid") for host in hosts],
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+class FakeSandbox:
+    """Sandbox whose container filesystem is a local directory."""
+
+    def __init__(self, container_dir):
+        self.config = SandboxConfig(browser_profile_path=str(container_dir))
+
+    async def copy_in(self, source, destination):
+        shutil.copytree(source.rstrip("."), destination, dirs_exist_ok=True)
+
+    async def copy_out(self, source, destination):
+        shutil.copytree(source.rstrip("."), destination, dirs_exist_ok=True)
+
+
+class TestCheckProfile:
+    """Tests for profile health detection."""
+
+    def test_healthy_profile(self, tmp_path):
+        assert check_profile(make_profile(tmp_path / "p")) is ProfileHealth.HEALTHY
+
+    def test_pre_96_cookie_location(self, tmp_path):
+        path = make_profile(tmp_path / "p", cookies=("Default", "Cookies"))
+        assert check_profile(path) is ProfileHealth.HEALTHY
+
+    def test_missing_profile(self, tmp_path):
+        assert check_profile(str(tmp_path / "nope")) is ProfileHealth.MISSING
+
+    def test_logged_out_profile(self, tmp_path):
+        """A profile without Discord cookies is logged out."""
+        path = make_profile(tmp_path / "p", hosts=("example.com",))
+        assert check_profile(path) is ProfileHealth.LOGGED_OUT
+
+    def test_corrupted_local_state(self, tmp_path):
+        path = make_profile(tmp_path / "p")
+        with open(os.path.join(path, "Local State"), "w") as f:
+            f.write("{truncated")
+        assert check_profile(path) is ProfileHealth.CORRUPTED
+
+    def test_corrupted_cookie_store(self, tmp_path):
+        path = make_profile(tmp_path / "p")
+        with open(os.path.join(path, "Default", "Network", "Cookies"), "wb") as f:
+            f.write(b"garbage" * 10)
+        assert check_profile(path) is ProfileHealth.CORRUPTED
+
+
+class TestBrowserProfileManager:
+    """Tests for restore, capture and hit/miss reporting."""
+
+    @pytest.fixture
+    def metrics(self):
+        return MetricsCollector()
+
+    @pytest.fixture
+    def manager(self, tmp_path, metrics):
+        return BrowserProfileManager(str(tmp_path / "profiles"), metrics=metrics)
+
+    def test_prepare_hit(self, manager, metrics):
+        make_profile(manager.live_path(EMAIL))
+
+        assert manager.prepare(EMAIL) is ProfileHealth.HEALTHY
+        assert metrics.get_counter("profile_lookups_total", result="hit") == 1
+
+    def test_prepare_restores_from_golden(self, manager, metrics):
+        """A corrupted live profile is replaced by the golden copy."""
+        live = make_profile(manager.live_path(EMAIL))
+        make_profile(manager.golden_path(EMAIL))
+        with open(os.path.join(live, "Local State"), "w") as f:
+            f.write("{")
+
+        assert manager.prepare(EMAIL) is ProfileHealth.HEALTHY
+        assert check_profile(live) is ProfileHealth.HEALTHY
+        assert metrics.get_counter("profile_lookups_total", result="restored") == 1
+
+    def test_prepare_miss(self, manager, metrics):
+        assert manager.prepare(EMAIL) is ProfileHealth.MISSING
+        assert metrics.get_counter("profile_lookups_total", result="miss") == 1
+        assert manager.stats()["hit_rate_percent"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_capture_promotes_to_golden(self, tmp_path, manager):
+        sandbox = FakeSandbox(tmp_path / "container")
+        make_profile(sandbox.config.browser_profile_path)
+
+        await manager.capture(sandbox, EMAIL, promote=True)
+
+        assert check_profile(manager.live_path(EMAIL)) is ProfileHealth.HEALTHY
+        assert check_profile(manager.golden_path(EMAIL)) is ProfileHealth.HEALTHY
+
+    @pytest.mark.asyncio
+    async def test_capture_keeps_good_profile_over_broken_one(self, tmp_path, manager):
+        """A logged-out sandbox profile never overwrites the live copy."""
+        make_profile(manager.live_path(EMAIL))
+        sandbox = FakeSandbox(tmp_path / "container")
+        make_profile(sandbox.config.browser_profile_path, hosts=())
+
+        await manager.capture(sandbox, EMAIL)
+
+        assert check_profile(manager.live_path(EMAIL)) is ProfileHealth.HEALTHY
+
+    @pytest.mark.asyncio
+    async def test_attach_copies_live_profile(self, tmp_path, manager):
+        make_profile(manager.live_path(EMAIL))
+        sandbox = FakeSandbox(tmp_path / "container")
+
+        await manager.attach(sandbox, EMAIL)
+
+        assert check_profile(sandbox.config.browser_profile_path) is ProfileHealth.HEALTHY
+
+    def test_stats_hit_rate(self, manager):
+        make_profile(manager.live_path(EMAIL))
+        manager.prepare(EMAIL)
+        manager.prepare("other@example.com")
+
+        stats = manager.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate_percent"] == 50.0
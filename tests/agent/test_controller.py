@@ -324,6 +324,208 @@ class TestControllerStartup:
             pass
 
 
+class TestReadiness:
+    """Tests for the /ready endpoint."""
+    
+    def test_ready_before_startup_is_unavailable(self):
+        """Without warm-up state the controller is not ready."""
+        from jamie.agent import controller
+        controller._warmup = None
+        
+        response = TestClient(controller.app).get("/ready")
+        assert response.status_code == 503
+        assert response.json()["state"] == "starting"
+    
+    def test_ready_while_warming(self):
+        """A warming controller answers 503 with its state."""
+        from jamie.agent import controller
+        from jamie.agent.warmup import ControllerWarmup, ReadinessState
+        
+        controller._warmup = ControllerWarmup()
+        controller._warmup.state = ReadinessState.WARMING
+        try:
+            response = TestClient(controller.app).get("/ready")
+            assert response.status_code == 503
+            assert response.json()["ready"] is False
+            assert response.json()["state"] == "warming"
+        finally:
+            controller._warmup = None
+    
+    def test_ready_after_warmup(self):
+        """A warmed-up controller answers 200."""
+        from jamie.agent import controller
+        from jamie.agent.warmup import ControllerWarmup
+        
+        controller._warmup = ControllerWarmup()
+        controller._warmup.mark_ready()
+        try:
+            response = TestClient(controller.app).get("/ready")
+            assert response.status_code == 200
+            assert response.json()["ready"] is True
+        finally:
+            controller._warmup = None
+    
+    @pytest.mark.asyncio
+    async def test_failed_warmup_still_builds_multiplexer(self, monkeypatch):
+        """Sandboxes boot cold rather than never when warm-up fails."""
+        from jamie.agent import controller
+        from jamie.agent.warmup import ControllerWarmup
+        
+        monkeypatch.setenv("JAMIE_MULTIPLEX_ENABLED", "true")
+        warmup = ControllerWarmup()
+        
+        async def run(image, display):
+            warmup.fail("docker pull failed: denied")
+        
+        warmup.run = run
+        config = MagicMock(sandbox_image="img", display_resolution="1024x768")
+        monkeypatch.setattr(controller, "_warmup", warmup)
+        monkeypatch.setattr(controller, "_multiplexer", None)
+        monkeypatch.setattr(controller, "get_config", lambda: config)
+        
+        await controller._warm_up()
+        
+        assert warmup.ready is False
+        assert controller._multiplexer is not None
+
+
+class TestPrepare:
+    """Tests for the /prepare endpoint and reservation claims."""
+    
+    def test_prepare_disabled(self):
+        """Without reservations enabled /prepare is not found."""
+        from jamie.agent import controller
+        controller._reservations = None
+        
+        with patch('jamie.agent.controller.get_reservation_config') as mock_config:
+            mock_config.return_value.enabled = False
+            response = TestClient(controller.app).post("/prepare", json={})
+        assert response.status_code == 404
+    
+    def test_prepare_returns_token(self):
+        """/prepare hands out a reservation token."""
+        from jamie.agent import controller
+        from jamie.agent.reservations import ReservationLimitError
+        
+        reservation = MagicMock(token="tok-1", expires_in=45.0)
+        controller._reservations = MagicMock()
+        controller._reservations.prepare.return_value = reservation
+        try:
+            client = TestClient(controller.app)
+            response = client.post("/prepare", json={"requester_id": "789"})
+            assert response.status_code == 200
+            assert response.json() == {"token": "tok-1", "expires_in_seconds": 45.0}
+            controller._reservations.prepare.assert_called_once_with("789")
+            
+            controller._reservations.prepare.side_effect = ReservationLimitError("full")
+            assert client.post("/prepare", json={}).status_code == 429
+        finally:
+            controller._reservations = None
+    
+    def test_release_reservation(self):
+        """DELETE /prepare/{token} gives back an unclaimed reservation."""
+        from jamie.agent import controller
+        
+        controller._reservations = MagicMock()
+        controller._reservations.cancel.return_value = True
+        try:
+            client = TestClient(controller.app)
+            assert client.delete("/prepare/tok-1").status_code == 200
+            controller._reservations.cancel.assert_called_once_with("tok-1")
+            
+            controller._reservations.cancel.return_value = False
+            assert client.delete("/prepare/tok-1").status_code == 404
+        finally:
+            controller._reservations = None
+    
+    @patch('jamie.agent.controller.StreamingAgent')
+    @patch('jamie.agent.controller.get_config')
+    def test_stream_claims_reservation(self, mock_get_config, mock_agent_cls):
+        """A stream request with a token hands the reserved sandbox to its agent."""
+        from jamie.agent import controller
+        controller._agents.clear()
+        controller._agent_tasks.clear()
+        mock_get_config.return_value = MagicMock()
+        mock_agent_cls.return_value = AsyncMock()
+        
+        reserved = MagicMock()
+        controller._reservations = MagicMock()
+        controller._reservations.claim.return_value = reserved
+        try:
+            response = TestClient(controller.app).post("/stream", json={
+                "session_id": "reserved-session",
+                "url": "https://test.com/video",
+                "guild_id": "123",
+                "channel_id": "456",
+                "channel_name": "Test",
+                "requester_id": "789",
+                "reservation_token": "tok-1",
+            })
+            assert response.status_code == 200
+            controller._reservations.claim.assert_called_once_with("tok-1")
+            assert mock_agent_cls.call_args[1]["reserved"] is reserved
+        finally:
+            controller._reservations = None
+            controller._agents.clear()
+            controller._agent_tasks.clear()
+
+
+class TestPerformanceProfileSelection:
+    """Tests for choosing a browser performance profile per session."""
+    
+    REQUEST = {
+        "session_id": "perf-session",
+        "url": "https://test.com/video",
+        "guild_id": "123",
+        "channel_id": "456",
+        "channel_name": "Test",
+        "requester_id": "789",
+    }
+    
+    @patch('jamie.agent.controller.StreamingAgent')
+    @patch('jamie.agent.controller.get_config')
+    def test_requested_profile_reaches_agent(self, mock_get_config, mock_agent_cls):
+        from jamie.agent import controller
+        controller._agents.clear()
+        controller._agent_tasks.clear()
+        mock_get_config.return_value = MagicMock()
+        mock_agent_cls.return_value = AsyncMock()
+        try:
+            response = TestClient(controller.app).post(
+                "/stream", json={**self.REQUEST, "performance_profile": "low_cpu"}
+            )
+            assert response.status_code == 200
+            assert mock_agent_cls.call_args[0][0].performance_profile == "low_cpu"
+        finally:
+            controller._agents.clear()
+            controller._agent_tasks.clear()
+    
+    @patch('jamie.agent.controller.StreamingAgent')
+    @patch('jamie.agent.controller.get_config')
+    def test_default_profile(self, mock_get_config, mock_agent_cls):
+        from jamie.agent import controller
+        controller._agents.clear()
+        controller._agent_tasks.clear()
+        mock_get_config.return_value = MagicMock()
+        mock_agent_cls.return_value = AsyncMock()
+        try:
+            TestClient(controller.app).post("/stream", json=self.REQUEST)
+            assert mock_agent_cls.call_args[0][0].performance_profile == "standard"
+        finally:
+            controller._agents.clear()
+            controller._agent_tasks.clear()
+    
+    @patch('jamie.agent.controller.StreamingAgent')
+    def test_unknown_profile_rejected(self, mock_agent_cls):
+        from jamie.agent import controller
+        response = TestClient(controller.app).post(
+            "/stream", json={**self.REQUEST, "performance_profile": "turbo"}
+        )
+        assert response.status_code == 400
+        assert "turbo" in response.json()["detail"]
+        mock_agent_cls.assert_not_called()
+
+
 class TestStreamCreatesAgentTask:
     """Tests for verifying agent task creation."""
     
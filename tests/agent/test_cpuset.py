@@ -0,0 +1,124 @@
+"""Unit tests for sandbox CPU pinning (jamie/agent/cpuset.py)."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.cpuset import (
+    LOCAL_HOST,
+    CpuAllocator,
+    HostCpus,
+    format_cpulist,
+    parse_cpulist,
+    read_numa_nodes,
+)
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.config import CpusetConfig, SandboxHost
+from jamie.shared.metrics import MetricsCollector
+
+TWO_NODES = {0: list(range(0, 4)), 1: list(range(4, 8))}
+
+
+class TestCpuLists:
+    """Tests for kernel CPU list parsing and formatting."""
+
+    def test_round_trip(self):
+        assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+        assert format_cpulist([11, 0, 1, 2, 3, 8, 10]) == "0-3,8,10-11"
+        assert format_cpulist([]) == ""
+
+    def test_reads_sysfs_nodes(self, tmp_path):
+        for node, cpus in (("node0", "0-3"), ("node1", "4-7")):
+            (tmp_path / node).mkdir()
+            (tmp_path / node / "cpulist").write_text(cpus + "\n")
+        (tmp_path / "possible").write_text("0-1\n")
+
+        assert read_numa_nodes(str(tmp_path)) == TWO_NODES
+
+
+class TestHostCpus:
+    """Tests for dedicating a host's cores to sandboxes."""
+
+    def test_fills_one_node_before_the_next(self):
+        cpus = HostCpus(TWO_NODES, reserved=[0])
+
+        assert cpus.allocate("a", 2).cpus == (1, 2)
+        assert cpus.allocate("b", 2).cpus == (4, 5)
+        assert cpus.allocate("c", 2).cpus == (6, 7)
+        assert cpus.allocate("d", 2) is None
+
+        cpus.release("b")
+        d = cpus.allocate("d", 2)
+        assert d.cpus == (4, 5) and d.mems == "1"
+        assert cpus.stats()["sandboxes"]["a"] == {"cpus": "1-2", "nodes": "0"}
+
+    def test_splits_across_nodes_only_when_no_node_fits(self):
+        cpus = HostCpus(TWO_NODES)
+        cpus.allocate("a", 3)
+        cpus.allocate("b", 3)
+
+        split = cpus.allocate("c", 2)
+
+        assert split.cpus == (3, 7)
+        assert split.mems == "0-1"
+
+
+@pytest.fixture
+def allocator():
+    return CpuAllocator(
+        CpusetConfig(enabled=True, reserved_cpus="0"),
+        docker=AsyncMock(),
+        metrics=MetricsCollector(),
+        topology=lambda: TWO_NODES,
+    )
+
+
+class TestCpuAllocator:
+    """Tests for pinning sandbox containers."""
+
+    @pytest.mark.asyncio
+    async def test_sandbox_pinned_until_stopped(self, allocator):
+        docker = AsyncMock()
+        docker.container_running = AsyncMock(return_value=True)
+        docker.exec = AsyncMock(return_value="")
+
+        def computer_factory(**kwargs):
+            computer = AsyncMock()
+            computer.interface.screenshot = AsyncMock(return_value=b"png")
+            return computer
+
+        manager = SandboxManager(
+            SandboxConfig(provider_type="docker", name="jamie-sbx-a", cpu="2",
+                          working_storage=False),
+            computer_factory=computer_factory,
+            docker=docker,
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+            cpu_allocator=allocator,
+        )
+
+        await manager.start()
+
+        docker.update_cpuset.assert_awaited_once_with("jamie-sbx-a", "1-2", "0")
+        assert allocator.stats()[LOCAL_HOST]["sandboxes"] == {
+            "jamie-sbx-a": {"cpus": "1-2", "nodes": "0"}
+        }
+
+        await manager.stop()
+
+        assert manager.cpuset is None
+        assert allocator.stats()[LOCAL_HOST]["free"] == 7
+
+    @pytest.mark.asyncio
+    async def test_remote_host_without_topology_leaves_memory_alone(self, allocator):
+        remote = AsyncMock()
+        remote.host_report = AsyncMock(return_value=(16, 64 * 1000 ** 3, []))
+        allocator._docker.for_host = MagicMock(return_value=remote)
+        host = SandboxHost(name="b", docker_host="ssh://b")
+
+        allocation = await allocator.allocate("jamie-sbx-b", 4, host)
+
+        allocator._docker.for_host.assert_called_once_with("ssh://b")
+        assert allocation.cpuset == "1-4"
+        assert allocation.mems == ""
+        allocator.release("jamie-sbx-b")
+        assert allocator.stats()["b"]["free"] == 15
@@ -0,0 +1,183 @@
+"""Unit tests for framebuffer screen capture (jamie/agent/framebuffer.py)."""
+
+import io
+import os
+import struct
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.framebuffer import (
+    XVFB_SCREEN_FILE,
+    FramebufferError,
+    FramebufferInterface,
+    FramebufferReader,
+)
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.metrics import MetricsCollector
+
+Image = pytest.importorskip("PIL.Image")
+
+WINDOW_NAME = b"Xvfb main window\x00"
+
+
+def xwd(width: int, height: int, pixel: bytes = b"\x00\x00\xff\x00", ncolors: int = 2) -> bytes:
+    """An XWD file as Xvfb writes it: 32 bpp, LSB-first pixels, big-endian header."""
+    header_size = 100 + len(WINDOW_NAME)
+    fields = [
+        header_size, 7, 2, 24, width, height, 0, 0, 32, 0, 32, 32, width * 4,
+        4, 0xFF0000, 0x00FF00, 0x0000FF, 8, 256, ncolors, width, height, 0, 0, 0,
+    ]
+    colormap = b"\x00" * 12 * ncolors
+    return struct.pack(">25I", *fields) + WINDOW_NAME + colormap + pixel * (width * height)
+
+
+@pytest.fixture
+def screen(tmp_path):
+    path = tmp_path / XVFB_SCREEN_FILE
+    path.write_bytes(xwd(4, 3))
+    return path
+
+
+class TestFramebufferReader:
+    """Tests for reading frames out of an XWD framebuffer file."""
+
+    def test_frame_views_file_in_place(self, screen):
+        reader = FramebufferReader(str(screen))
+        frame = reader.frame()
+
+        assert (frame.width, frame.height) == (4, 3)
+        assert frame.header.raw_mode == "BGRX"
+        assert bytes(frame.row(0)[:4]) == b"\x00\x00\xff\x00"
+        # A view into the mapping, not a copy
+        assert not isinstance(frame.pixels.obj, bytes)
+        del frame
+        reader.close()
+
+    def test_sees_screen_updates_without_reopening(self, screen):
+        reader = FramebufferReader(str(screen))
+        data = bytearray(screen.read_bytes())
+        offset = len(data) - 4
+        data[offset:] = b"\xff\x00\x00\x00"
+        with open(screen, "r+b") as f:
+            f.seek(offset)
+            f.write(data[offset:])
+
+        frame = reader.frame()
+
+        assert bytes(frame.row(2)[-4:]) == b"\xff\x00\x00\x00"
+        del frame
+        reader.close()
+
+    def test_remaps_after_resize(self, screen):
+        reader = FramebufferReader(str(screen))
+        screen.write_bytes(xwd(8, 6))
+
+        frame = reader.frame()
+
+        assert (frame.width, frame.height) == (8, 6)
+        del frame
+        reader.close()
+
+    def test_to_png(self, screen):
+        reader = FramebufferReader(str(screen))
+        image = Image.open(io.BytesIO(reader.frame().to_png()))
+
+        assert image.size == (4, 3)
+        assert image.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+        reader.close()
+
+    def test_truncated_file(self, screen):
+        screen.write_bytes(xwd(4, 3)[:-8])
+        reader = FramebufferReader(str(screen))
+        with pytest.raises(FramebufferError):
+            reader.frame()
+        reader.close()
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FramebufferError):
+            FramebufferReader(str(tmp_path / "missing"))
+
+
+class TestFramebufferInterface:
+    """Tests for serving agent screenshots from the framebuffer."""
+
+    @pytest.mark.asyncio
+    async def test_screenshot_from_framebuffer(self, screen):
+        server = MagicMock(screenshot=AsyncMock(return_value=b"server"))
+        metrics = MetricsCollector()
+        interface = FramebufferInterface(server, FramebufferReader(str(screen)), metrics)
+
+        png = await interface.screenshot()
+
+        assert Image.open(io.BytesIO(png)).size == (4, 3)
+        server.screenshot.assert_not_awaited()
+        assert metrics.get_histogram("screenshot_capture_seconds", backend="framebuffer")["count"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_server(self, screen):
+        server = MagicMock(screenshot=AsyncMock(return_value=b"server"))
+        reader = FramebufferReader(str(screen))
+        screen.write_bytes(b"garbage" * 20)
+
+        interface = FramebufferInterface(server, reader, MetricsCollector())
+
+        assert await interface.screenshot() == b"server"
+        assert interface.left_click is server.left_click
+
+
+class FakeComputer:
+    def __init__(self, **kwargs):
+        self.interface = MagicMock(screenshot=AsyncMock(return_value=b"server"))
+
+    async def run(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+def make_manager(root, backend="framebuffer") -> SandboxManager:
+    docker = AsyncMock()
+    docker.container_root = AsyncMock(return_value=str(root))
+    return SandboxManager(
+        SandboxConfig(capture_backend=backend, framebuffer_dir="/tmp/fb"),
+        computer_factory=FakeComputer,
+        docker=docker,
+        metrics=MetricsCollector(),
+        registry=SandboxRegistry(),
+    )
+
+
+class TestSandboxFramebuffer:
+    """Tests for the framebuffer capture backend in SandboxManager."""
+
+    @pytest.mark.asyncio
+    async def test_framebuffer_backend(self, tmp_path):
+        os.makedirs(tmp_path / "tmp" / "fb")
+        (tmp_path / "tmp" / "fb" / XVFB_SCREEN_FILE).write_bytes(xwd(4, 3))
+        manager = make_manager(tmp_path)
+
+        computer = await manager.start()
+
+        assert manager.capture_frame().width == 4
+        assert (await computer.interface.screenshot()).startswith(b"\x89PNG")
+        await manager.stop()
+        assert manager.capture_frame() is None
+
+    @pytest.mark.asyncio
+    async def test_unavailable_framebuffer_falls_back(self, tmp_path):
+        manager = make_manager(tmp_path)
+
+        computer = await manager.start()
+
+        assert manager.capture_frame() is None
+        assert await computer.interface.screenshot() == b"server"
+
+    @pytest.mark.asyncio
+    async def test_server_backend_skips_framebuffer(self, tmp_path):
+        manager = make_manager(tmp_path, backend="server")
+
+        await manager.start()
+
+        manager._docker.container_root.assert_not_awaited()
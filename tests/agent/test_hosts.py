@@ -0,0 +1,156 @@
+"""Unit tests for multi-host sandbox placement (jamie/agent/hosts.py)."""
+
+import asyncio
+import os
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.docker import DockerError
+from jamie.agent.hosts import HostPlacer, NoHostAvailableError, ProviderDaemon
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.config import PlacementConfig, SandboxHost
+from jamie.shared.metrics import MetricsCollector
+
+GB = 1000 ** 3
+
+
+def make_placer(reports, **host_overrides) -> HostPlacer:
+    """A placer whose hosts report (cpus, memory bytes, running sandboxes) from reports."""
+    reports = {
+        name: report if isinstance(report, Exception)
+        else (report[0], report[1], [f"jamie-sbx-{name}-{i}" for i in range(report[2])])
+        for name, report in reports.items()
+    }
+    hosts = [
+        SandboxHost(name=name, docker_host=f"ssh://{name}", address=name,
+                    **host_overrides.get(name, {}))
+        for name in reports
+    ]
+    docker = MagicMock()
+
+    def for_host(docker_host):
+        report = reports[docker_host.removeprefix("ssh://")]
+        host_docker = AsyncMock()
+        if isinstance(report, Exception):
+            host_docker.host_report.side_effect = report
+        else:
+            host_docker.host_report.return_value = report
+        return host_docker
+
+    docker.for_host.side_effect = for_host
+    return HostPlacer(
+        PlacementConfig(hosts=hosts, memory_reserve="2GB"),
+        docker=docker,
+        metrics=MetricsCollector(),
+    )
+
+
+class TestHostPlacer:
+    """Tests for picking hosts from capacity reports."""
+
+    @pytest.mark.asyncio
+    async def test_least_loaded_host_wins(self):
+        placer = make_placer({"a": (8, 34 * GB, 4), "b": (8, 18 * GB, 1)})
+        await placer.refresh()
+
+        # a: 16GB of 32GB committed; b: 4GB of 16GB, 8GB with the new one
+        assert placer.place("sbx-1", 4 * GB).name == "b"
+        # b would go to 12GB of 16GB, a only to 20GB of 32GB
+        assert placer.place("sbx-2", 4 * GB).name == "a"
+        # Both would be three quarters full; b runs fewer sandboxes
+        assert placer.place("sbx-3", 4 * GB).name == "b"
+        assert placer.stats()["b"]["placed"] == ["sbx-1", "sbx-3"]
+
+    @pytest.mark.asyncio
+    async def test_full_and_unreachable_hosts_skipped(self):
+        placer = make_placer(
+            {"a": (8, 66 * GB, 2), "b": DockerError("ssh: connect refused"), "c": (4, 6 * GB, 1)},
+            a={"max_sandboxes": 3},
+        )
+        await placer.refresh()
+
+        assert placer.place("sbx-1", 2 * GB).name == "a"
+        # a is at its sandbox limit, b is down and c's 4GB is taken
+        with pytest.raises(NoHostAvailableError):
+            placer.place("sbx-2", 2 * GB)
+        assert placer.stats()["b"]["error"] == "ssh: connect refused"
+
+    @pytest.mark.asyncio
+    async def test_pinned_sandbox_returns_to_its_host(self):
+        placer = make_placer({"a": (8, 34 * GB, 6), "b": (8, 34 * GB, 0)})
+        await placer.refresh()
+
+        assert placer.place("sbx-1", 4 * GB, pinned="a").name == "a"
+        placer.release("sbx-1")
+
+        assert placer.stats()["a"]["placed"] == []
+        assert placer.place("sbx-1", 4 * GB).name == "b"
+
+
+class TestSandboxPlacement:
+    """Tests for SandboxManager booting on its placed host."""
+
+    @pytest.mark.asyncio
+    async def test_boots_and_restarts_on_placed_host(self):
+        placer = make_placer({"a": (8, 34 * GB, 0)})
+        await placer.refresh()
+        docker = AsyncMock()
+        docker.host = ""
+        remote = AsyncMock()
+        remote.host = "ssh://a"
+        remote.container_running.return_value = True
+        docker.for_host = MagicMock(return_value=remote)
+        computers = []
+
+        def computer_factory(**kwargs):
+            computer = MagicMock(kwargs=kwargs)
+            computer.run = AsyncMock()
+            computer.stop = AsyncMock()
+            computer.interface.screenshot = AsyncMock(return_value=b"png")
+            computers.append(computer)
+            return computer
+
+        manager = SandboxManager(
+            SandboxConfig(provider_type="docker", boot_probe_interval=0.01),
+            computer_factory=computer_factory,
+            docker=docker,
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+            placer=placer,
+        )
+
+        await manager.start()
+        assert computers[0].kwargs["host"] == "a"
+        assert manager.docker_host == "ssh://a"
+        remote.container_running.assert_awaited()
+
+        await manager.restart()
+        assert manager.host.name == "a"
+        await manager.stop()
+
+        assert placer.stats()["a"]["placed"] == []
+
+
+class TestProviderDaemon:
+    """Tests for pointing DOCKER_HOST at one daemon at a time."""
+
+    @pytest.mark.asyncio
+    async def test_other_daemon_waits_and_environment_restored(self, monkeypatch):
+        monkeypatch.setattr("jamie.agent.docker.CONTROLLER_DOCKER_HOST", "")
+        monkeypatch.delenv("DOCKER_HOST", raising=False)
+        switch = ProviderDaemon()
+        seen = []
+
+        async def boot(docker_host):
+            async with switch.use(docker_host):
+                seen.append((docker_host, os.environ.get("DOCKER_HOST")))
+                await asyncio.sleep(0.01)
+                seen.append((docker_host, os.environ.get("DOCKER_HOST")))
+
+        await asyncio.gather(boot("ssh://a"), boot("ssh://b"), boot("ssh://a"))
+
+        # Both boots on a ran together, b's ran after them
+        assert [host for host, _ in seen] == ["ssh://a"] * 4 + ["ssh://b"] * 2
+        assert all(host == env for host, env in seen)
+        assert "DOCKER_HOST" not in os.environ
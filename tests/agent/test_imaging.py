@@ -0,0 +1,166 @@
+"""Unit tests for the screenshot encoding pipeline (jamie/agent/imaging.py)."""
+
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.imaging import EncodeSettings, ScreenshotEncoder
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.config import ImagingConfig
+from jamie.shared.metrics import MetricsCollector
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_png(width: int = 64, height: int = 48) -> bytes:
+    image = Image.new("RGB", (width, height))
+    for x in range(width):
+        for y in range(height):
+            image.putpixel((x, y), (x * 4, y * 5, (x + y) % 256))
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+class TestScreenshotEncoder:
+    """Tests for encoding settings and metrics."""
+
+    @pytest.mark.asyncio
+    async def test_png_passes_through(self):
+        metrics = MetricsCollector()
+        encoder = ScreenshotEncoder(metrics=metrics)
+        png = make_png()
+
+        assert await encoder.encode(png, "logging_in") is png
+        assert metrics.get_histogram("screenshot_bytes", format="png", phase="logging_in") is None
+
+    @pytest.mark.asyncio
+    async def test_jpeg_records_bytes_and_time(self):
+        metrics = MetricsCollector()
+        encoder = ScreenshotEncoder(EncodeSettings(format="jpeg", quality=50), metrics=metrics)
+
+        data = await encoder.encode(make_png(), "opening_url")
+
+        assert data[:3] == b"\xff\xd8\xff"
+        sizes = metrics.get_histogram("screenshot_bytes", format="jpeg", phase="opening_url")
+        assert sizes["count"] == 1
+        assert sizes["sum"] == len(data)
+        assert metrics.get_histogram(
+            "screenshot_encode_seconds", format="jpeg", phase="opening_url"
+        )["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_crop_keeps_format(self):
+        encoder = ScreenshotEncoder(EncodeSettings(format="jpeg"), metrics=MetricsCollector())
+
+        data = await encoder.encode(make_png(), box=(32, 0, 64, 48))
+
+        assert data[:3] == b"\xff\xd8\xff"
+        assert Image.open(io.BytesIO(data)).size == (32, 48)
+
+    @pytest.mark.asyncio
+    async def test_cropped_png_does_not_pass_through(self):
+        encoder = ScreenshotEncoder(metrics=MetricsCollector())
+
+        data = await encoder.encode(make_png(), box=(0, 0, 10, 10))
+
+        assert Image.open(io.BytesIO(data)).size == (10, 10)
+
+    @pytest.mark.asyncio
+    async def test_palette_reduction(self):
+        encoder = ScreenshotEncoder(EncodeSettings(colors=16), metrics=MetricsCollector())
+
+        image = Image.open(io.BytesIO(await encoder.encode(make_png())))
+
+        assert image.mode == "P"
+        assert len(image.getcolors()) <= 16
+
+    @pytest.mark.asyncio
+    async def test_phase_overrides(self):
+        config = ImagingConfig(
+            enabled=True,
+            format="png",
+            phases={"logging_in": {"format": "webp", "quality": 40}},
+        )
+        encoder = ScreenshotEncoder.from_config(config)
+
+        assert encoder.settings_for("logging_in") == EncodeSettings(format="webp", quality=40)
+        assert encoder.settings_for("streaming") == EncodeSettings()
+        data = await encoder.encode(make_png(), "logging_in")
+        assert data[:4] == b"RIFF" and data[8:12] == b"WEBP"
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError):
+            EncodeSettings(format="gif")
+
+
+class TestEncoderThreads:
+    """Tests that encoding happens on the bounded pool."""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_the_event_loop_with_bounded_concurrency(self):
+        encoder = ScreenshotEncoder(
+            EncodeSettings(format="jpeg"), max_workers=2, metrics=MetricsCollector()
+        )
+        active = 0
+        peak = 0
+        threads = set()
+        lock = threading.Lock()
+
+        def slow_encode(source, settings, box):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+                threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return b"x"
+
+        encoder._encode = slow_encode
+        await asyncio.gather(*(encoder.encode(b"png") for _ in range(6)))
+
+        assert peak == 2
+        assert all(name.startswith("jamie-encode") for name in threads)
+        encoder.shutdown()
+
+
+class FakeComputer:
+    def __init__(self, **kwargs):
+        self.interface = MagicMock(screenshot=AsyncMock(return_value=make_png()))
+
+    async def run(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class TestSandboxEncoding:
+    """Tests for re-encoding a sandbox's screenshots per agent phase."""
+
+    @pytest.mark.asyncio
+    async def test_agent_screenshots_encoded_for_phase(self):
+        metrics = MetricsCollector()
+        encoder = ScreenshotEncoder(
+            phases={"joining_voice": EncodeSettings(format="jpeg")}, metrics=metrics
+        )
+        manager = SandboxManager(
+            SandboxConfig(capture_backend="server"),
+            computer_factory=FakeComputer,
+            docker=AsyncMock(),
+            metrics=metrics,
+            registry=SandboxRegistry(),
+            encoder=encoder,
+        )
+        computer = await manager.start()
+
+        manager.phase = "joining_voice"
+        assert (await computer.interface.screenshot())[:2] == b"\xff\xd8"
+        manager.phase = "streaming"
+        assert (await computer.interface.screenshot())[:4] == b"\x89PNG"
@@ -0,0 +1,121 @@
+"""Unit tests for the sandbox launch governor (jamie/agent/launch.py)."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock
+
+from jamie.agent.launch import BACKGROUND, SESSION, WAIT_METRIC, LaunchGovernor, start_sandbox
+from jamie.shared.config import LaunchConfig
+from jamie.shared.metrics import MetricsCollector
+
+
+def make_governor(max_concurrent: int = 1, stagger: float = 0.0) -> LaunchGovernor:
+    return LaunchGovernor(
+        LaunchConfig(max_concurrent=max_concurrent, stagger=stagger),
+        metrics=MetricsCollector(),
+    )
+
+
+class TestLaunchGovernor:
+    """Tests for limiting, staggering and ordering boots."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_boots(self):
+        governor = make_governor(max_concurrent=2)
+        running = []
+        peak = 0
+
+        async def boot(name):
+            nonlocal peak
+            async with governor.launch(name):
+                running.append(name)
+                peak = max(peak, len(running))
+                await asyncio.sleep(0.01)
+                running.remove(name)
+
+        await asyncio.gather(*(boot(f"sbx-{i}") for i in range(6)))
+
+        assert peak == 2
+        assert governor.active == 0
+        assert governor.stats()["launches"] == 6
+
+    @pytest.mark.asyncio
+    async def test_staggers_boot_starts(self):
+        governor = make_governor(max_concurrent=3, stagger=0.05)
+        starts = []
+
+        async def boot(name):
+            async with governor.launch(name):
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(boot(f"sbx-{i}") for i in range(3)))
+
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        assert all(gap >= 0.045 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_longest_waiting_session_goes_first(self):
+        governor = make_governor(max_concurrent=1)
+        order = []
+        release = asyncio.Event()
+
+        async def hold():
+            async with governor.launch("running"):
+                await release.wait()
+
+        async def boot(name, priority, requested_at=None):
+            async with governor.launch(name, priority, requested_at):
+                order.append(name)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        now = time.monotonic()
+        queued = [
+            asyncio.create_task(boot("refill", BACKGROUND, now - 60)),
+            asyncio.create_task(boot("new", SESSION, now)),
+            asyncio.create_task(boot("waited", SESSION, now - 5)),
+        ]
+        await asyncio.sleep(0)
+        assert [w["name"] for w in governor.stats()["waiting"]] == ["waited", "new", "refill"]
+
+        release.set()
+        await asyncio.gather(holder, *queued)
+
+        assert order == ["waited", "new", "refill"]
+        assert governor.metrics.get_histogram(WAIT_METRIC, priority="session")["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        governor = make_governor(max_concurrent=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with governor.launch("running"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(start_sandbox(
+            SimpleNamespace(container_name="sbx", start=AsyncMock()), governor
+        ))
+        await asyncio.sleep(0)
+        assert governor.waiting == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        await holder
+
+        assert governor.waiting == 0
+        assert governor.active == 0
+
+    @pytest.mark.asyncio
+    async def test_start_sandbox_without_governor(self):
+        manager = SimpleNamespace(container_name="sbx", start=AsyncMock())
+
+        assert await start_sandbox(manager, None) is None
+        manager.start.assert_awaited_once()
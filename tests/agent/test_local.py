@@ -0,0 +1,213 @@
+"""Unit tests for the local sandbox provider (jamie/agent/local.py)."""
+
+import io
+import os
+import sys
+
+import pytest
+
+from jamie.agent.local import LocalComputer, LocalSandboxError, copy_path, keysym
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.shared.config import SandboxProviderConfig
+from jamie.shared.metrics import MetricsCollector
+
+Image = pytest.importorskip("PIL.Image")
+
+# Writes a 32 bpp XWD screen into -fbdir like Xvfb, then waits to be killed
+FAKE_XVFB = f"""#!{sys.executable}
+import os, struct, sys, time
+args = sys.argv[1:]
+width, height = map(int, args[args.index("-screen") + 2].split("x")[:2])
+fields = [100, 7, 2, 24, width, height, 0, 0, 32, 0, 32, 32, width * 4,
+          4, 0xFF0000, 0x00FF00, 0x0000FF, 8, 256, 0, width, height, 0, 0, 0]
+path = os.path.join(args[args.index("-fbdir") + 1], "Xvfb_screen0")
+with open(path + ".tmp", "wb") as f:
+    f.write(struct.pack(">25I", *fields) + b"\\x00\\x00\\xff\\x00" * width * height)
+os.rename(path + ".tmp", path)
+time.sleep(60)
+"""
+
+# Logs its arguments and answers getmouselocation
+FAKE_XDOTOOL = """#!/bin/sh
+echo "$DISPLAY $*" >> "$HOME/xdotool.log"
+if [ "$1" = getmouselocation ]; then printf 'X=5\\nY=7\\nSCREEN=0\\nWINDOW=1\\n'; fi
+"""
+
+
+def script(path, content: str) -> str:
+    path.write_text(content)
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def provider_config(tmp_path):
+    return SandboxProviderConfig(
+        provider="local",
+        local_root=str(tmp_path / "sandboxes"),
+        local_xvfb=script(tmp_path / "Xvfb", FAKE_XVFB),
+        local_xdotool=script(tmp_path / "xdotool", FAKE_XDOTOOL),
+        local_window_manager="sleep 60",
+        local_first_display=900,
+        local_start_timeout=5.0,
+    )
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A zombie has exited too
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+
+
+class TestLocalComputer:
+    """Tests for running a display as child processes."""
+
+    @pytest.mark.asyncio
+    async def test_start_screenshot_and_stop(self, provider_config):
+        computer = LocalComputer(name="sbx", display="8x6", config=provider_config)
+        await computer.run()
+
+        assert computer.display_ready_at is not None
+        image = Image.open(io.BytesIO(await computer.interface.screenshot()))
+        assert image.size == (8, 6)
+        assert image.getpixel((0, 0)) == (255, 0, 0)
+        result = await computer.interface.run_command("echo $DISPLAY $HOME")
+        assert result.stdout.split() == [":900", os.path.join(computer.root, "home/cua")]
+
+        processes = [computer._xvfb.pid, computer._window_manager.pid]
+        await computer.stop()
+
+        assert not any(alive(pid) for pid in processes)
+        assert not os.path.exists(computer.root)
+
+    @pytest.mark.asyncio
+    async def test_stop_kills_what_commands_left_running(self, provider_config):
+        computer = LocalComputer(name="sbx", display="8x6", config=provider_config)
+        await computer.run()
+        result = await computer.interface.run_command(
+            "nohup sleep 60 >/dev/null 2>&1 & echo $!"
+        )
+        browser = int(result.stdout)
+
+        await computer.stop()
+
+        assert not alive(browser)
+
+    @pytest.mark.asyncio
+    async def test_sandboxes_get_their_own_displays(self, provider_config):
+        first = LocalComputer(name="one", display="8x6", config=provider_config)
+        second = LocalComputer(name="two", display="8x6", config=provider_config)
+        await first.run()
+        await second.run()
+
+        assert first.env["DISPLAY"] != second.env["DISPLAY"]
+        await first.stop()
+        await second.stop()
+
+    @pytest.mark.asyncio
+    async def test_xvfb_failure(self, provider_config, tmp_path):
+        provider_config.local_xvfb = script(tmp_path / "broken", "#!/bin/sh\nexit 1\n")
+        computer = LocalComputer(name="sbx", config=provider_config)
+
+        with pytest.raises(LocalSandboxError, match="Xvfb exited"):
+            await computer.run()
+        # The display number is free again
+        retry = LocalComputer(name="sbx2", display="8x6", config=provider_config)
+        provider_config.local_xvfb = str(tmp_path / "Xvfb")
+        await retry.run()
+        assert retry.env["DISPLAY"] == ":900"
+        await retry.stop()
+
+    @pytest.mark.asyncio
+    async def test_input_goes_through_xdotool(self, provider_config):
+        computer = LocalComputer(name="sbx", display="8x6", config=provider_config)
+        await computer.run()
+        interface = computer.interface
+
+        await interface.left_click(3, 4)
+        await interface.hotkey("ctrl", "enter")
+        await interface.type_text("hello world")
+        await interface.scroll_down(2)
+
+        assert await interface.get_cursor_position() == {"x": 5, "y": 7}
+        with open(os.path.join(computer.home, "xdotool.log")) as f:
+            calls = f.read().splitlines()
+        assert calls[:4] == [
+            ":900 mousemove 3 4 click --repeat 1 1",
+            ":900 key -- ctrl+Return",
+            ":900 type --delay 12 -- hello world",
+            ":900 click --repeat 2 5",
+        ]
+        await computer.stop()
+
+
+class TestHelpers:
+    """Tests for key names and docker-cp-like copies."""
+
+    def test_keysym(self):
+        assert keysym("Enter") == "Return"
+        assert keysym("f5") == "F5"
+        assert keysym("a") == "a"
+
+    def test_copy_directory_contents(self, tmp_path):
+        source = tmp_path / "profile"
+        (source / "Default").mkdir(parents=True)
+        (source / "Default" / "Cookies").write_text("c")
+
+        copy_path(str(source) + "/.", str(tmp_path / "out"))
+        copy_path(str(source), str(tmp_path / "out"))
+
+        assert (tmp_path / "out" / "Default" / "Cookies").read_text() == "c"
+        assert (tmp_path / "out" / "profile" / "Default" / "Cookies").exists()
+
+
+class TestLocalSandboxManager:
+    """Tests for SandboxManager with the local provider."""
+
+    @pytest.fixture
+    def manager(self, provider_config, monkeypatch):
+        monkeypatch.setenv("JAMIE_SANDBOX_PROVIDER", "local")
+        for field in (
+            "local_root", "local_xvfb", "local_xdotool", "local_window_manager",
+            "local_first_display",
+        ):
+            value = str(getattr(provider_config, field))
+            monkeypatch.setenv(f"JAMIE_SANDBOX_{field.upper()}", value)
+        return SandboxManager(
+            SandboxConfig(display="8x6", provider_type="local"),
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+        )
+
+    @pytest.mark.asyncio
+    async def test_boots_without_docker(self, manager, tmp_path):
+        await manager.start()
+
+        assert manager.is_local
+        assert set(manager.boot_timings) == {"create", "handshake", "first_screenshot", "total"}
+        assert manager.capture_frame().width == 8
+        assert await manager.memory_usage_mb() > 0
+        with pytest.raises(RuntimeError):
+            await manager.commit_snapshot("jamie-snap:v1")
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_profile_paths_map_into_sandbox_tree(self, manager, tmp_path):
+        profile = tmp_path / "live"
+        profile.mkdir()
+        (profile / "Local State").write_text("{}")
+        await manager.start()
+        root = manager.computer.root
+
+        await manager.copy_in(str(profile) + "/.", manager.config.browser_profile_path)
+        await manager.copy_out(manager.config.browser_profile_path + "/.", str(tmp_path / "back"))
+
+        mapped = os.path.join(root, manager.config.browser_profile_path.lstrip("/"))
+        assert os.path.exists(os.path.join(mapped, "Local State"))
+        assert (tmp_path / "back" / "Local State").exists()
+        assert manager._sandbox_path(manager.config.browser_profile_path) == mapped
+        await manager.stop()
@@ -0,0 +1,251 @@
+"""Unit tests for multiplexed sandboxes (jamie/agent/multiplex.py)."""
+
+import asyncio
+import io
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.imaging import EncodeSettings, ScreenshotEncoder
+from jamie.agent.launch import LaunchGovernor
+from jamie.agent.multiplex import (
+    Region,
+    SandboxMultiplexer,
+    sandbox_display,
+    tile_regions,
+)
+from jamie.agent.pool import PoolExhaustedError
+from jamie.agent.sandbox import SandboxConfig
+from jamie.shared.config import DiscordAccount, LaunchConfig, MultiplexConfig
+from jamie.shared.metrics import MetricsCollector
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_png(width: int, height: int) -> bytes:
+    """A PNG whose left half is red and right half is blue."""
+    image = Image.new("RGB", (width, height), "blue")
+    image.paste("red", (0, 0, width // 2, height))
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+class FakeManager:
+    """SandboxManager stand-in with a mock computer interface."""
+
+    def __init__(self, config: SandboxConfig):
+        self.config = config
+        self.container_name = config.name
+        self.boot_timings = {}
+        self.is_running = False
+        self.encoder = None
+        self.computer = MagicMock()
+        self.computer.interface.screenshot = AsyncMock(return_value=make_png(200, 50))
+        self.computer.interface.left_click = AsyncMock()
+        self.computer.interface.type_text = AsyncMock()
+        self.computer.interface.move_cursor = AsyncMock()
+        self.computer.interface.scroll_down = AsyncMock()
+        self.computer.interface.run_command = AsyncMock()
+        self.launch_browser = AsyncMock()
+        self.close_browser = AsyncMock()
+
+    async def capture(self):
+        return await self.computer.interface.screenshot()
+
+    async def start(self):
+        self.is_running = True
+
+    async def stop(self):
+        self.is_running = False
+
+
+def make_multiplexer(accounts=2, **overrides) -> SandboxMultiplexer:
+    settings = {
+        "enabled": True,
+        "slots_per_sandbox": 2,
+        "max_sandboxes": 2,
+        "slot_display": "100x50",
+        "accounts": [
+            DiscordAccount(email=f"user{i}@example.com", password="pw") for i in range(accounts)
+        ],
+    }
+    settings.update(overrides)
+    return SandboxMultiplexer(MultiplexConfig(**settings), "image", manager_factory=FakeManager)
+
+
+class TestLayout:
+    """Tests for slot regions and screenshot cropping."""
+
+    def test_tile_regions(self):
+        regions = tile_regions("100x50", 3)
+        assert regions[2] == Region(x=200, y=0, width=100, height=50)
+        assert sandbox_display("100x50", 3) == "300x50"
+
+    def test_to_display_clamps_into_region(self):
+        region = Region(x=100, y=0, width=100, height=50)
+        assert region.to_display(10, 20) == (110, 20)
+        assert region.to_display(500, -5) == (199, 0)
+
+    def test_region_box(self):
+        assert Region(100, 0, 100, 50).box == (100, 0, 200, 50)
+
+    @pytest.mark.asyncio
+    async def test_slot_screenshot_uses_configured_encoding(self):
+        """The slot's crop is encoded once, in the encoder's format for its phase."""
+        multiplexer = make_multiplexer()
+        lease = await multiplexer.acquire("user0@example.com")
+        manager = lease.manager.parent.manager
+        manager.encoder = ScreenshotEncoder(
+            phases={"streaming": EncodeSettings(format="jpeg")}, metrics=MetricsCollector()
+        )
+        lease.manager.phase = "streaming"
+
+        data = await lease.computer.interface.screenshot()
+
+        assert data[:3] == b"\xff\xd8\xff"
+        assert Image.open(io.BytesIO(data)).size == (100, 50)
+        await lease.release()
+
+
+class TestScopedComputer:
+    """Tests for actions scoped to one slot."""
+
+    @pytest.mark.asyncio
+    async def test_actions_are_translated_to_slot(self):
+        multiplexer = make_multiplexer()
+        lease = await multiplexer.acquire("user0@example.com")
+        second = await multiplexer.acquire("user1@example.com")
+        interface = second.computer.interface
+        raw = second.manager.parent.manager.computer.interface
+
+        screenshot = Image.open(io.BytesIO(await interface.screenshot()))
+        assert screenshot.size == (100, 50)
+        assert screenshot.getpixel((0, 0)) == (0, 0, 255)
+        assert await interface.get_screen_size() == {"width": 100, "height": 50}
+
+        await interface.left_click(5, 6)
+        raw.left_click.assert_awaited_with(105, 6)
+
+        await interface.scroll_down(3)
+        raw.move_cursor.assert_awaited_with(105, 6)
+        raw.scroll_down.assert_awaited_with(3)
+
+        await lease.computer.interface.type_text("hello")
+        focus_command = raw.run_command.call_args[0][0]
+        assert "jamie-slot-0" in focus_command
+        raw.type_text.assert_awaited_with("hello")
+
+    @pytest.mark.asyncio
+    async def test_focus_only_when_switching_slots(self):
+        multiplexer = make_multiplexer()
+        lease = await multiplexer.acquire("user0@example.com")
+        raw = lease.manager.parent.manager.computer.interface
+
+        await lease.computer.interface.type_text("a")
+        await lease.computer.interface.type_text("b")
+
+        assert raw.run_command.await_count == 1
+
+
+class TestSandboxMultiplexer:
+    """Tests for slot and account allocation."""
+
+    @pytest.mark.asyncio
+    async def test_slots_share_a_sandbox(self):
+        multiplexer = make_multiplexer()
+        first = await multiplexer.acquire("user0@example.com")
+        second = await multiplexer.acquire("user1@example.com")
+
+        assert first.manager.parent is second.manager.parent
+        assert first.manager.index != second.manager.index
+        profiles = {lease.manager.config.browser_profile_path for lease in (first, second)}
+        assert len(profiles) == 2
+        assert multiplexer.stats()["sandboxes"] == 1
+        assert multiplexer.stats()["slots_used"] == 2
+
+    @pytest.mark.asyncio
+    async def test_boots_another_sandbox_when_full(self):
+        multiplexer = make_multiplexer(accounts=3)
+        leases = [await multiplexer.acquire(f"user{i}@example.com") for i in range(3)]
+
+        assert multiplexer.stats()["sandboxes"] == 2
+        assert leases[2].manager.parent is not leases[0].manager.parent
+
+    @pytest.mark.asyncio
+    async def test_boots_through_launch_governor(self):
+        governor = LaunchGovernor(LaunchConfig(stagger=0.0), metrics=MetricsCollector())
+        multiplexer = make_multiplexer()
+        multiplexer._governor = governor
+
+        lease = await multiplexer.acquire("user0@example.com")
+
+        assert governor.stats()["launches"] == 1
+        assert lease.manager.parent.manager.is_running
+
+    def test_sandboxes_placed_with_controller_placer(self):
+        placer = MagicMock()
+        multiplexer = SandboxMultiplexer(
+            MultiplexConfig(enabled=True), "image", placer=placer
+        )
+
+        assert multiplexer._manager_factory(SandboxConfig()).placer is placer
+
+    @pytest.mark.asyncio
+    async def test_exhausted_when_limit_reached(self):
+        multiplexer = make_multiplexer(accounts=3, max_sandboxes=1)
+        await multiplexer.acquire("user0@example.com")
+        await multiplexer.acquire("user1@example.com")
+
+        with pytest.raises(PoolExhaustedError):
+            await multiplexer.acquire("user2@example.com")
+
+    @pytest.mark.asyncio
+    async def test_release_frees_slot_and_stops_extra_sandbox(self):
+        multiplexer = make_multiplexer(accounts=3)
+        leases = [await multiplexer.acquire(f"user{i}@example.com") for i in range(3)]
+        extra = leases[2].manager.parent.manager
+
+        await leases[2].release()
+
+        assert extra.is_running is False
+        assert multiplexer.stats()["sandboxes"] == 1
+
+        await leases[0].release()
+        assert multiplexer.stats()["slots_used"] == 1
+        assert leases[0].manager.parent.manager.is_running is True
+
+    @pytest.mark.asyncio
+    async def test_account_restarted_while_stopping_waits_for_release(self):
+        multiplexer = make_multiplexer(accounts=1)
+        account = multiplexer.checkout_account()
+        lease = await multiplexer.acquire(account.email)
+        closing = asyncio.Event()
+
+        async def close_browser(profile_path=None):
+            await closing.wait()
+
+        lease.manager.parent.manager.close_browser = close_browser
+        release = asyncio.create_task(lease.release())
+        await asyncio.sleep(0)
+        multiplexer.return_account(account.email)
+
+        # The stopping session's browser is still closing
+        with pytest.raises(PoolExhaustedError):
+            multiplexer.checkout_account()
+
+        closing.set()
+        await release
+        assert multiplexer.checkout_account().email == account.email
+        again = await multiplexer.acquire(account.email)
+        assert again.manager.index == lease.manager.index
+
+    def test_account_checkout(self):
+        multiplexer = make_multiplexer(accounts=1)
+        account = multiplexer.checkout_account()
+
+        with pytest.raises(PoolExhaustedError):
+            multiplexer.checkout_account()
+
+        multiplexer.return_account(account.email)
+        assert multiplexer.checkout_account().email == account.email
@@ -0,0 +1,39 @@
+"""Unit tests for browser performance profiles (jamie/agent/performance.py)."""
+
+import pytest
+
+from jamie.agent.performance import PERFORMANCE_PROFILES, get_performance_profile
+from jamie.agent.prompts import START_SCREEN_SHARE_PROMPT
+
+
+class TestPerformanceProfiles:
+    """Tests for the built-in profiles."""
+
+    def test_unknown_profile(self):
+        with pytest.raises(KeyError, match="low_cpu"):
+            get_performance_profile("turbo")
+
+    def test_standard_leaves_quality_alone(self):
+        assert "as they are" in get_performance_profile("standard").stream_quality
+
+    def test_low_cpu_caps_share(self):
+        quality = get_performance_profile("low_cpu").stream_quality
+        assert "720p resolution" in quality
+        assert "15 FPS" in quality
+
+    def test_density_shrinks_sandbox(self):
+        profile = get_performance_profile("density")
+        assert "--renderer-process-limit=2" in profile.flags
+        assert profile.policies["DiskCacheSize"] == 33554432
+        assert profile.memory == "2GB"
+        assert "xfdesktop" in profile.stopped_services
+        # The panel and window manager keep the desktop usable
+        assert "xfwm4" not in profile.stopped_services
+
+    @pytest.mark.parametrize("name", list(PERFORMANCE_PROFILES))
+    def test_share_prompt_formats(self, name):
+        profile = get_performance_profile(name)
+        prompt = START_SCREEN_SHARE_PROMPT.format(
+            url="https://example.com", stream_quality=profile.stream_quality
+        )
+        assert profile.stream_quality in prompt
@@ -0,0 +1,388 @@
+"""Unit tests for the warm sandbox pool (jamie/agent/pool.py)."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from jamie.agent.pool import PoolExhaustedError, SandboxLease, SandboxPool
+from jamie.agent.prompts import RESET_TO_IDLE_PROMPT
+from jamie.agent.sandbox import SandboxConfig, SandboxManager
+from jamie.agent.streamer import AgentContext, AgentState, StreamingAgent
+from jamie.shared.config import PoolConfig
+
+
+class FakeInterface:
+    """Stand-in for the CUA computer interface."""
+
+    def __init__(self):
+        self.healthy = True
+
+    async def screenshot(self) -> bytes:
+        if not self.healthy:
+            raise ConnectionError("computer-server gone")
+        return b"png"
+
+
+class FakeComputer:
+    """Fake Computer provider that boots instantly."""
+
+    instances: list = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.interface = FakeInterface()
+        self.running = False
+        FakeComputer.instances.append(self)
+
+    async def run(self) -> None:
+        self.running = True
+
+    async def stop(self) -> None:
+        self.running = False
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_computers():
+    """Forget fake computers between tests."""
+    FakeComputer.instances = []
+    yield
+    FakeComputer.instances = []
+
+
+def make_pool(warmup=None, **overrides) -> SandboxPool:
+    """Build a pool that boots fake sandboxes."""
+    settings = {
+        "min_size": 1,
+        "max_size": 2,
+        "lease_timeout": 1.0,
+        "health_check_interval": 3600.0,
+    }
+    settings.update(overrides)
+    return SandboxPool(
+        PoolConfig(**settings),
+        manager_factory=lambda: SandboxManager(SandboxConfig(), computer_factory=FakeComputer),
+        warmup=warmup,
+    )
+
+
+async def wait_for_idle(pool: SandboxPool, count: int) -> None:
+    """Wait until the pool has ``count`` idle sandboxes."""
+    for _ in range(100):
+        if pool.stats()["idle"] >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"pool never reached {count} idle sandboxes")
+
+
+class TestSandboxPool:
+    """Tests for SandboxPool leasing and sizing."""
+
+    @pytest.mark.asyncio
+    async def test_start_fills_to_min_size(self):
+        """Starting the pool boots min_size sandboxes."""
+        pool = make_pool(min_size=2, max_size=3)
+        await pool.start()
+        try:
+            await wait_for_idle(pool, 2)
+            assert len(FakeComputer.instances) == 2
+            assert all(c.running for c in FakeComputer.instances)
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_set_target_idle_boots_and_releases(self):
+        """Raising the idle target boots sandboxes; lowering it stops idle ones."""
+        pool = make_pool(min_size=1, max_size=3)
+        await pool.start()
+        try:
+            await wait_for_idle(pool, 1)
+            assert await pool.set_target_idle(5) == 3
+            await wait_for_idle(pool, 3)
+
+            await pool.set_target_idle(1)
+
+            assert pool.stats()["idle"] == 1
+            assert pool.stats()["target_idle"] == 1
+            assert sum(c.running for c in FakeComputer.instances) == 1
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_memory_budget_caps_capacity(self):
+        """The pool owns no more sandboxes than their memory limits fit in the budget."""
+        pool = make_pool(min_size=1, max_size=8, memory_budget="9GB")
+        pool.footprint_bytes = 2 * 1000 ** 3
+        await pool.start()
+        try:
+            assert pool.capacity == 4
+            assert await pool.set_target_idle(8) == 4
+            await wait_for_idle(pool, 4)
+            assert len(FakeComputer.instances) == 4
+            assert pool.stats()["memory_footprint_mb"] == 1907
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_acquire_returns_warmed_sandbox(self):
+        """Leased sandboxes have been through the warm-up hook."""
+        warmup = AsyncMock()
+        pool = make_pool(warmup=warmup)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            assert lease.logged_in is True
+            assert lease.pooled is True
+            assert lease.computer.running is True
+            warmup.assert_awaited_once_with(lease.manager)
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_release_stops_sandbox_and_replenishes(self):
+        """Released sandboxes are stopped and replaced."""
+        pool = make_pool()
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            computer = lease.computer
+            await lease.release()
+            await lease.release()  # idempotent
+
+            assert computer.running is False
+            await wait_for_idle(pool, 1)
+            assert pool.stats()["leased"] == 0
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_acquire_grows_to_max_size(self):
+        """Pool boots extra sandboxes on demand up to max_size."""
+        pool = make_pool(min_size=1, max_size=2)
+        await pool.start()
+        try:
+            first = await pool.acquire()
+            second = await pool.acquire()
+            assert first.manager is not second.manager
+            assert pool.stats()["leased"] == 2
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_acquire_times_out_when_exhausted(self):
+        """Acquire raises once max_size is leased and the timeout passes."""
+        pool = make_pool(min_size=1, max_size=1)
+        await pool.start()
+        try:
+            await pool.acquire()
+            with pytest.raises(PoolExhaustedError):
+                await pool.acquire(timeout=0.05)
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_waiter_gets_replacement_after_release(self):
+        """A waiting request gets the replacement for a released sandbox."""
+        pool = make_pool(min_size=1, max_size=1)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            waiter = asyncio.create_task(pool.acquire())
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+
+            await lease.release()
+            second = await asyncio.wait_for(waiter, timeout=1.0)
+            assert second.manager is not lease.manager
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_warmup_counts_boot_failure(self):
+        """Sandboxes whose warm-up fails are stopped and not pooled."""
+        warmup = AsyncMock(side_effect=RuntimeError("LOGIN_FAILED"))
+        pool = make_pool(warmup=warmup, min_size=1, max_size=1)
+        await pool.start()
+        try:
+            for _ in range(100):
+                if pool.stats()["boot_failures"]:
+                    break
+                await asyncio.sleep(0.01)
+            assert pool.stats()["boot_failures"] >= 1
+            assert FakeComputer.instances[0].running is False
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_health_check_evicts_unhealthy_idle(self):
+        """Idle sandboxes that fail the health check are replaced."""
+        pool = make_pool(min_size=1, max_size=2)
+        await pool.start()
+        try:
+            await wait_for_idle(pool, 1)
+            broken = FakeComputer.instances[0]
+            broken.interface.healthy = False
+
+            evicted = await pool.check_idle()
+            assert evicted == 1
+            assert broken.running is False
+            assert pool.stats()["health_evictions"] == 1
+
+            await wait_for_idle(pool, 1)
+            assert len(FakeComputer.instances) == 2
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_stops_idle_sandboxes(self):
+        """Stopping the pool stops idle sandboxes."""
+        pool = make_pool(min_size=2, max_size=2)
+        await pool.start()
+        await wait_for_idle(pool, 2)
+        await pool.stop()
+
+        assert not any(c.running for c in FakeComputer.instances)
+        with pytest.raises(RuntimeError):
+            await pool.acquire()
+
+
+class TestSandboxLease:
+    """Tests for leases outside a pool."""
+
+    @pytest.mark.asyncio
+    async def test_standalone_lease_stops_sandbox(self):
+        """A lease without a pool stops its sandbox on release."""
+        manager = SandboxManager(SandboxConfig(), computer_factory=FakeComputer)
+        await manager.start()
+        lease = SandboxLease(manager)
+
+        assert lease.logged_in is False
+        assert lease.pooled is False
+        await lease.release()
+        assert manager.is_running is False
+
+
+class TestSandboxRecycling:
+    """Tests for recycling sandboxes between sessions."""
+
+    @pytest.mark.asyncio
+    async def test_recycled_sandbox_is_reused(self):
+        """A recycled sandbox goes back to idle and is leased again."""
+        pool = make_pool(recycle=True, max_reuses=3, min_size=0, max_size=1)
+        await pool.start()
+        try:
+            first = await pool.acquire()
+            assert first.recycled is False
+            await first.recycle()
+
+            second = await pool.acquire()
+            assert second.manager is first.manager
+            assert second.recycled is True
+            assert second.logged_in is True
+            assert pool.stats()["recycles"] == 1
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_graceful_stop_recycles_session_sandbox(self):
+        """start() returns only once stop() has reset and released the sandbox."""
+        pool = make_pool(recycle=True, min_size=0, max_size=1)
+        await pool.start()
+        try:
+            context = AgentContext(
+                session_id="s1",
+                url="https://example.com",
+                guild_id="g",
+                channel_id="c",
+                channel_name="General",
+            )
+            agent = StreamingAgent(context, pool=pool)
+            for step in ("_ensure_logged_in", "_apply_performance_profile",
+                         "_apply_network_class", "_join_voice_channel", "_open_url",
+                         "_start_screen_share", "_send_status_update"):
+                setattr(agent, step, AsyncMock())
+
+            async def run_agent_task(prompt):
+                if prompt == RESET_TO_IDLE_PROMPT:
+                    # Resetting takes a while
+                    await asyncio.sleep(0.05)
+                return "RESET_COMPLETE"
+
+            agent._run_agent_task = run_agent_task
+
+            session = asyncio.create_task(agent.start())
+            while not agent.run or agent.run.state != AgentState.STREAMING:
+                await asyncio.sleep(0)
+            stopping = asyncio.create_task(agent.stop())
+            await session
+
+            assert stopping.done()
+            assert agent.run.state == AgentState.STOPPED
+            assert pool.stats()["recycles"] == 1
+            assert pool.stats()["retirements"] == 0
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_recycle_disabled_stops_sandbox(self):
+        """Without recycling, recycle() behaves like release()."""
+        pool = make_pool(recycle=False)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            computer = lease.computer
+            await lease.recycle()
+            assert computer.running is False
+            assert pool.stats()["retirements"] == 1
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_max_reuses_forces_restart(self):
+        """Sandboxes are retired after max_reuses extra sessions."""
+        pool = make_pool(recycle=True, max_reuses=1, min_size=0, max_size=1)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            manager = lease.manager
+            await lease.recycle()
+
+            lease = await pool.acquire()
+            assert lease.manager is manager
+            await lease.recycle()
+
+            assert manager.is_running is False
+            lease = await pool.acquire()
+            assert lease.manager is not manager
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_memory_growth_forces_restart(self):
+        """Sandboxes whose memory grew past the limit are retired."""
+        pool = make_pool(recycle=True, max_memory_growth_mb=100)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            lease._member.baseline_memory_mb = 500.0
+            lease.manager.memory_usage_mb = AsyncMock(return_value=900.0)
+            await lease.recycle()
+
+            assert lease.manager.is_running is False
+            assert pool.stats()["retirements"] == 1
+        finally:
+            await pool.stop()
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_sandbox_not_recycled(self):
+        """A sandbox that fails its health check is not reused."""
+        pool = make_pool(recycle=True)
+        await pool.start()
+        try:
+            lease = await pool.acquire()
+            lease.computer.interface.healthy = False
+            await lease.recycle()
+
+            assert lease.manager.is_running is False
+        finally:
+            await pool.stop()
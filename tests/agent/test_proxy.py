@@ -0,0 +1,379 @@
+"""Unit tests for the caching proxy (jamie/agent/proxy.py)."""
+
+import asyncio
+import base64
+import os
+import shutil
+import ssl
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from jamie.agent.proxy import (
+    AssetCache,
+    CachingProxy,
+    CertificateAuthority,
+    cached_host,
+    freshness,
+    pac_script,
+    proxy_policy,
+)
+from jamie.shared.config import ProxyConfig
+from jamie.shared.metrics import MetricsCollector
+
+
+@pytest.fixture
+async def origin():
+    """A local origin server that counts the requests it answers."""
+    hits = {}
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        hits[request.path] = hits.get(request.path, 0) + 1
+        if request.path == "/app.js":
+            return web.Response(body=b"console.log(1)", content_type="application/javascript")
+        if request.path == "/api":
+            return web.json_response({"n": hits["/api"]}, headers={"Cache-Control": "no-store"})
+        if request.path == "/stream.css":
+            response = web.StreamResponse(headers={"Cache-Control": "max-age=60"})
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            for part in (b"body {", b" color: red ", b"}"):
+                await response.write(part)
+            await response.write_eof()
+            return response
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield f"http://127.0.0.1:{port}", hits
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def proxy(tmp_path):
+    metrics = MetricsCollector()
+    proxy = CachingProxy(
+        make_config(tmp_path),
+        metrics=metrics,
+    )
+    await proxy.start()
+    yield proxy
+    await proxy.stop()
+
+
+def make_config(tmp_path, **overrides) -> ProxyConfig:
+    settings = {
+        "host": "127.0.0.1",
+        "port": 0,
+        "allowed_clients": ["127.0.0.0/8"],
+        "cache_hosts": ["127.0.0.1"],
+        "intercept": False,
+        "ca_dir": str(tmp_path / "ca"),
+        "cache_dir": str(tmp_path / "cache"),
+        "max_size": "1MB",
+    }
+    settings.update(overrides)
+    return ProxyConfig(**settings)
+
+
+async def connect(proxy: CachingProxy, target: str) -> bytes:
+    """Send a CONNECT for target and return the proxy's status line."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+    try:
+        writer.write(f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode())
+        return await reader.readline()
+    finally:
+        writer.close()
+
+
+async def fetch(proxy: CachingProxy, url: str, headers=None):
+    async with aiohttp.ClientSession() as session:
+        proxy_url = f"http://127.0.0.1:{proxy.port}"
+        async with session.get(url, proxy=proxy_url, headers=headers) as response:
+            return response.status, response.headers.get("X-Cache"), await response.read()
+
+
+async def fetch_and_cache(proxy: CachingProxy, url: str):
+    """Fetch url, then wait for the proxy to finish storing the response."""
+    result = await fetch(proxy, url)
+    for _ in range(100):
+        if url in proxy.cache:
+            return result
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{url} was never cached")
+
+
+class TestCachingProxy:
+    """Tests for serving requests through the proxy."""
+
+    @pytest.mark.asyncio
+    async def test_static_asset_served_from_cache(self, origin, proxy):
+        base, hits = origin
+
+        first = await fetch_and_cache(proxy, f"{base}/app.js")
+        second = await fetch(proxy, f"{base}/app.js")
+
+        assert first == (200, "MISS", b"console.log(1)")
+        assert second == (200, "HIT", b"console.log(1)")
+        assert hits["/app.js"] == 1
+        assert proxy.stats()["hit_rate"] == 0.5
+        assert proxy.metrics.get_counter("proxy_requests_total", result="hit") == 1
+
+    @pytest.mark.asyncio
+    async def test_no_store_is_not_cached(self, origin, proxy):
+        base, hits = origin
+
+        await fetch(proxy, f"{base}/api")
+        status, cache, body = await fetch(proxy, f"{base}/api")
+
+        assert status == 200
+        assert cache == "MISS"
+        assert body == b'{"n": 2}'
+        assert hits["/api"] == 2
+
+    @pytest.mark.asyncio
+    async def test_request_with_cookie_is_not_cached(self, origin, proxy):
+        base, hits = origin
+
+        await fetch(proxy, f"{base}/app.js", headers={"Cookie": "session=a"})
+        status, cache, _ = await fetch(proxy, f"{base}/app.js", headers={"Cookie": "session=a"})
+
+        assert (status, cache) == (200, "BYPASS")
+        assert hits["/app.js"] == 2
+        assert f"{base}/app.js" not in proxy.cache
+
+    @pytest.mark.asyncio
+    async def test_chunked_response_relayed_and_cached(self, origin, proxy):
+        base, hits = origin
+
+        first = await fetch_and_cache(proxy, f"{base}/stream.css")
+        second = await fetch(proxy, f"{base}/stream.css")
+
+        assert first[2] == second[2] == b"body { color: red }"
+        assert second[1] == "HIT"
+        assert hits["/stream.css"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_refetched(self, origin, proxy):
+        base, hits = origin
+        await fetch_and_cache(proxy, f"{base}/app.js")
+        for entry in proxy.cache._entries.values():
+            entry.expires_at = time.time() - 1
+
+        status, cache, _ = await fetch(proxy, f"{base}/app.js")
+
+        assert (status, cache) == (200, "MISS")
+        assert hits["/app.js"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unreachable_origin_is_bad_gateway(self, proxy):
+        status, _, _ = await fetch(proxy, "http://127.0.0.1:1/app.js")
+        assert status == 502
+
+    @pytest.mark.asyncio
+    async def test_connect_tunnel(self, origin, tmp_path):
+        base, hits = origin
+        target = base.removeprefix("http://")
+        port = int(target.rpartition(":")[2])
+        proxy = CachingProxy(
+            make_config(tmp_path, connect_ports=[port]), metrics=MetricsCollector()
+        )
+        await proxy.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+        try:
+            writer.write(f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n\r\n".encode())
+            assert (await reader.readline()).startswith(b"HTTP/1.1 200")
+            await reader.readline()
+
+            writer.write(b"GET /app.js HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+            response = await reader.read()
+        finally:
+            writer.close()
+            await proxy.stop()
+
+        assert response.startswith(b"HTTP/1.1 200")
+        assert response.endswith(b"console.log(1)")
+        assert hits["/app.js"] == 1
+
+    @pytest.mark.asyncio
+    async def test_connect_only_to_allowed_ports(self, origin, proxy):
+        target = origin[0].removeprefix("http://")
+
+        assert (await connect(proxy, target)).startswith(b"HTTP/1.1 403")
+        assert proxy.metrics.get_counter("proxy_requests_total", result="denied") == 1
+
+    @pytest.mark.asyncio
+    async def test_clients_outside_sandbox_networks_refused(self, origin, tmp_path):
+        proxy = CachingProxy(
+            make_config(tmp_path, allowed_clients=["172.16.0.0/12"]), metrics=MetricsCollector()
+        )
+        await proxy.start()
+        try:
+            with pytest.raises(aiohttp.ClientError):
+                await fetch(proxy, f"{origin[0]}/app.js")
+        finally:
+            await proxy.stop()
+
+        assert origin[1] == {}
+
+    @pytest.mark.asyncio
+    async def test_other_hosts_refused(self, proxy):
+        status, _, _ = await fetch(proxy, "http://localhost:1/app.js")
+
+        assert status == 403
+        assert (await connect(proxy, "example.com:443")).startswith(b"HTTP/1.1 403")
+
+
+class TestInterception:
+    """Tests for caching HTTPS through the proxy's own CA."""
+
+    @pytest.mark.skipif(shutil.which("openssl") is None, reason="needs openssl")
+    @pytest.mark.asyncio
+    async def test_https_asset_served_from_cache(self, tmp_path):
+        # An HTTPS origin with a certificate from a CA of its own
+        origin_ca = CertificateAuthority(str(tmp_path / "origin-ca"))
+        await origin_ca.ensure()
+        hits = []
+
+        async def handler(request: web.Request) -> web.Response:
+            hits.append(request.path)
+            return web.Response(body=b"console.log(1)", content_type="application/javascript")
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=await origin_ca.context("127.0.0.1"))
+        await site.start()
+        port = runner.addresses[0][1]
+
+        proxy = CachingProxy(
+            make_config(tmp_path, intercept=True, connect_ports=[port]),
+            metrics=MetricsCollector(),
+            upstream_ssl=ssl.create_default_context(cafile=origin_ca.ca_path),
+        )
+        await proxy.start()
+        client_ssl = ssl.create_default_context(cafile=str(tmp_path / "ca" / "ca.pem"))
+        url = f"https://127.0.0.1:{port}/app.js"
+        try:
+            async with aiohttp.ClientSession() as session:
+                for _ in range(2):
+                    async with session.get(
+                        url, proxy=f"http://127.0.0.1:{proxy.port}", ssl=client_ssl
+                    ) as response:
+                        assert await response.read() == b"console.log(1)"
+                        cache = response.headers["X-Cache"]
+                    for _ in range(100):
+                        if url in proxy.cache:
+                            break
+                        await asyncio.sleep(0.01)
+        finally:
+            await proxy.stop()
+            await runner.cleanup()
+
+        assert cache == "HIT"
+        assert hits == ["/app.js"]
+        assert proxy.stats()["intercepting"] is True
+        assert CertificateAuthority.read_spki(str(tmp_path / "ca"))
+
+    def test_policy_sends_only_cached_hosts_to_proxy(self, tmp_path):
+        config = make_config(tmp_path, cache_hosts=["discord.com", "*.ytimg.com"],
+                             sandbox_address="172.17.0.1:3128")
+
+        policy = proxy_policy(config)
+        script = base64.b64decode(policy["ProxyPacUrl"].partition("base64,")[2]).decode()
+
+        assert policy["ProxyMode"] == "pac_script"
+        assert script == pac_script(config)
+        assert '"*.ytimg.com"' in script
+        assert '"discord.com"' not in script
+        assert '"PROXY 172.17.0.1:3128"' in script
+        assert 'return "DIRECT"' in script
+
+    def test_private_hosts_never_intercepted(self, tmp_path):
+        config = make_config(tmp_path, cache_hosts=["*.com", "*.discordapp.com"])
+
+        assert cached_host(config, "cdn.discordapp.com")
+        assert not cached_host(config, "discord.com")
+        assert not cached_host(config, "gateway.discord.com")
+        assert not cached_host(config, "accounts.google.com")
+
+
+class TestAssetCache:
+    """Tests for the on-disk LRU store."""
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=10, metrics=MetricsCollector())
+        await cache.put("http://x/a", 200, "OK", [], b"aaaa", ttl=60)
+        await cache.put("http://x/b", 200, "OK", [], b"bbbb", ttl=60)
+        assert await cache.get("http://x/a")
+
+        await cache.put("http://x/c", 200, "OK", [], b"cccc", ttl=60)
+
+        assert "http://x/a" in cache
+        assert "http://x/b" not in cache
+        assert cache.size_bytes == 8
+        assert cache.stats()["evictions"] == 1
+        assert len(os.listdir(tmp_path)) == 4
+
+    @pytest.mark.asyncio
+    async def test_entries_keyed_on_vary(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=100)
+        vary = [("Vary", "Accept-Language")]
+        await cache.put("http://x/a", 200, "OK", vary, b"en", ttl=60,
+                        request_headers=[("Accept-Language", "en")])
+        await cache.put("http://x/a", 200, "OK", vary, b"fr", ttl=60,
+                        request_headers=[("Accept-Language", "fr")])
+
+        _, en = await cache.get("http://x/a", [("Accept-Language", "en")])
+        _, fr = await cache.get("http://x/a", [("accept-language", "fr")])
+
+        assert (en, fr) == (b"en", b"fr")
+        assert await cache.get("http://x/a", [("Accept-Language", "de")]) is None
+
+    @pytest.mark.asyncio
+    async def test_oversized_entry_not_stored(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=100, max_entry_bytes=3)
+        assert await cache.put("http://x/a", 200, "OK", [], b"aaaa", ttl=60) is False
+        assert "http://x/a" not in cache
+
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, tmp_path):
+        cache = AssetCache(str(tmp_path), max_bytes=100, metrics=MetricsCollector())
+        await cache.put("http://x/a", 200, "OK", [("Content-Type", "text/css")], b"a{}", ttl=60)
+
+        reopened = AssetCache(str(tmp_path), max_bytes=100, metrics=MetricsCollector())
+        await reopened.start()
+        entry, body = await reopened.get("http://x/a")
+
+        assert body == b"a{}"
+        assert entry.headers == [("Content-Type", "text/css")]
+        assert reopened.size_bytes == 3
+
+
+class TestFreshness:
+    """Tests for deciding what may be cached and for how long."""
+
+    def test_max_age(self):
+        assert freshness("http://x/api", [("Cache-Control", "public, max-age=120")], 10) == 120
+
+    def test_static_extension_gets_default_ttl(self):
+        assert freshness("http://x/app.js?v=3", [], 10) == 10
+        assert freshness("http://x/page", [], 10) is None
+
+    @pytest.mark.parametrize("headers", [
+        [("Cache-Control", "private, max-age=60")],
+        [("Set-Cookie", "a=b")],
+        [("Vary", "*")],
+        [("Cache-Control", "max-age=0")],
+    ])
+    def test_uncacheable(self, headers):
+        assert freshness("http://x/app.js", headers, 10) is None
@@ -0,0 +1,130 @@
+"""Unit tests for content video quality selection (jamie/agent/quality.py)."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from jamie.agent.prompts import OPEN_URL_IN_NEW_TAB_PROMPT
+from jamie.agent.quality import select_quality
+from jamie.agent.streamer import AgentContext, AgentRun, StreamingAgent
+from jamie.shared.config import QualityConfig
+
+YOUTUBE = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.fixture(autouse=True)
+def quality_pinning(monkeypatch):
+    monkeypatch.setenv("JAMIE_QUALITY_ENABLED", "true")
+
+
+class TestSelectQuality:
+    """Tests for picking a quality from the display and host load."""
+
+    def test_largest_quality_that_fits_display(self):
+        assert select_quality(YOUTUBE, "1024x768").height == 720
+        assert select_quality(YOUTUBE, "1920x1080").height == 1080
+        assert select_quality("https://www.twitch.tv/somechannel", "800x600").height == 480
+
+    @pytest.mark.parametrize("load, height", [(0.2, 720), (0.75, 480), (1.5, 360)])
+    def test_busy_host_lowers_quality(self, load, height):
+        quality = select_quality(YOUTUBE, "1024x768", load=load)
+
+        assert quality.height == height
+        assert quality.reason == ("display" if height == 720 else "load")
+
+    def test_load_never_goes_below_min_height(self):
+        config = QualityConfig(min_height=480)
+        assert select_quality(YOUTUBE, "1024x768", load=2.0, config=config).height == 480
+        # A display smaller than min_height still gets what fits it
+        assert select_quality(YOUTUBE, "320x240", load=2.0, config=config).height == 240
+
+    def test_vimeo_quality_goes_in_url(self):
+        quality = select_quality("https://vimeo.com/76979871", "1024x768")
+
+        assert quality.url == "https://player.vimeo.com/video/76979871?quality=720p"
+        assert "leave the player's quality setting alone" in quality.instruction
+
+    @pytest.mark.parametrize("url", [
+        "https://vimeo.com/76979871?h=9a8b7c6d",
+        "https://vimeo.com/76979871/9a8b7c6d",
+        "https://player.vimeo.com/video/76979871?h=9a8b7c6d&quality=1080p",
+    ])
+    def test_vimeo_unlisted_hash_kept(self, url):
+        quality = select_quality(url, "1024x768")
+
+        assert quality.url == "https://player.vimeo.com/video/76979871?h=9a8b7c6d&quality=720p"
+
+    def test_player_settings_for_youtube(self):
+        quality = select_quality(YOUTUBE, "1024x768")
+
+        assert quality.url == YOUTUBE
+        assert "choose 720p" in quality.instruction
+
+    def test_unsupported_or_disabled_left_alone(self):
+        page = select_quality("https://example.com/page", "1024x768")
+        disabled = select_quality(YOUTUBE, "1024x768", config=QualityConfig(enabled=False))
+
+        for quality in (page, disabled):
+            assert quality.height is None
+            assert quality.reason == "unsupported"
+        assert page.url == "https://example.com/page"
+
+
+class TestOpenUrl:
+    """Tests for the open-URL phase pinning and recording the quality."""
+
+    @staticmethod
+    def make_agent(telemetry=None, docker_host=""):
+        context = AgentContext(
+            session_id="s1",
+            url="https://vimeo.com/76979871",
+            guild_id="g",
+            channel_id="c",
+            channel_name="General",
+        )
+        agent = StreamingAgent(context, telemetry=telemetry)
+        agent.run = AgentRun(context=context)
+        agent._run_agent_task = AsyncMock(return_value="URL_LOADED")
+        agent._sandbox = MagicMock(docker_host=docker_host)
+        agent._sandbox.config.cpu = "2"
+        agent._sandbox.set_network_class = AsyncMock()
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_session_records_quality(self):
+        agent = self.make_agent()
+
+        with patch("jamie.agent.streamer.host_load", MagicMock(return_value=0.1)):
+            await agent._open_url()
+
+        prompt = agent._run_agent_task.await_args.args[0]
+        assert "player.vimeo.com/video/76979871?quality=720p" in prompt
+        assert agent.run.content_quality.to_dict()["label"] == "720p"
+        assert agent.run.content_quality.load == 0.1
+
+    @pytest.mark.asyncio
+    async def test_load_from_session_telemetry(self):
+        """A sandbox using 1.9 of its 2 cores is overloaded whatever the controller's load."""
+        telemetry = MagicMock()
+        telemetry.latest.return_value = MagicMock(cpu_cores=1.9)
+        agent = self.make_agent(telemetry=telemetry, docker_host="ssh://sbx-2")
+
+        with patch("jamie.agent.streamer.host_load", MagicMock(return_value=0.1)):
+            await agent._open_url()
+
+        telemetry.latest.assert_called_with("s1")
+        assert agent.run.content_quality.load == 0.95
+        assert agent.run.content_quality.reason == "load"
+
+    @pytest.mark.asyncio
+    async def test_controller_load_not_used_for_other_hosts(self):
+        agent = self.make_agent(docker_host="ssh://sbx-2")
+
+        with patch("jamie.agent.streamer.host_load", MagicMock(return_value=5.0)):
+            await agent._open_url()
+
+        assert agent.run.content_quality.load is None
+        assert agent.run.content_quality.reason == "display"
+
+    def test_prompt_formats(self):
+        prompt = OPEN_URL_IN_NEW_TAB_PROMPT.format(url=YOUTUBE, video_quality="Choose 480p")
+        assert "10. Video quality: Choose 480p" in prompt
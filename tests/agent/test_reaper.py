@@ -0,0 +1,162 @@
+"""Unit tests for the orphaned sandbox reaper (jamie/agent/reaper.py)."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.reaper import SandboxReaper
+from jamie.agent.sandbox import (
+    SandboxRegistry,
+    SandboxConfig,
+    SandboxManager,
+    container_instance,
+    container_name,
+    load_instance_id,
+)
+from jamie.shared.config import ReaperConfig, SandboxHost
+from jamie.shared.metrics import MetricsCollector
+
+
+def make_docker(containers, host=""):
+    docker = MagicMock()
+    docker.host = host
+    docker.list_containers = AsyncMock(return_value=containers)
+    docker.container_resources = AsyncMock(return_value=(2.0, 4 * 1024 ** 3))
+    docker.remove_container = AsyncMock()
+    docker.exec = AsyncMock(return_value="")
+    return docker
+
+
+def make_reaper(containers, grace_period=0.0, registry=None, hosts=()):
+    docker = make_docker(containers)
+    reaper = SandboxReaper(
+        ReaperConfig(instance_id="ctl-a", grace_period=grace_period),
+        registry=registry or SandboxRegistry(),
+        docker=docker,
+        metrics=MetricsCollector(),
+        hosts=list(hosts),
+    )
+    return reaper, docker
+
+
+class TestContainerNames:
+    """Tests for the instance ID encoded in container names."""
+
+    def test_round_trip(self):
+        assert container_instance(container_name("ctl-a")) == "ctl_a"
+
+    def test_foreign_names(self):
+        assert container_instance("some-other-container") is None
+        assert container_instance("jamie-sbx-") is None
+
+    def test_generated_instance_id_is_kept(self, tmp_path):
+        config = ReaperConfig(instance_id="", instance_id_file=str(tmp_path / "ids" / "id"))
+
+        first = load_instance_id(config)
+
+        assert first
+        assert load_instance_id(config) == first
+        assert (tmp_path / "ids" / "id").read_text().strip() == first
+
+    def test_configured_instance_id_wins(self, tmp_path):
+        config = ReaperConfig(instance_id="ctl-a", instance_id_file=str(tmp_path / "id"))
+
+        assert load_instance_id(config) == "ctl-a"
+        assert not (tmp_path / "id").exists()
+
+
+class TestSandboxReaper:
+    """Tests for finding and removing orphaned sandboxes."""
+
+    @pytest.mark.asyncio
+    async def test_reaps_unowned_container(self):
+        orphan = container_name("ctl-a")
+        reaper, docker = make_reaper([orphan])
+
+        assert await reaper.sweep() == 1
+
+        docker.remove_container.assert_awaited_once_with(orphan)
+        stats = reaper.stats()
+        assert stats["reaped_total"] == 1
+        assert stats["reclaimed_cpus"] == 2.0
+        assert stats["reclaimed_memory_mb"] == 4096.0
+
+    @pytest.mark.asyncio
+    async def test_reports_sessions_recorded_in_container(self):
+        reaper, docker = make_reaper([container_name("ctl-a")])
+        docker.exec.return_value = "session-1\nsession-2\n"
+
+        await reaper.sweep()
+
+        assert reaper.stats()["orphaned_sessions"] == ["session-1", "session-2"]
+
+    @pytest.mark.asyncio
+    async def test_sweeps_every_placement_host(self):
+        local_orphan, remote_orphan = container_name("ctl-a"), container_name("ctl-a")
+        reaper, docker = make_reaper([local_orphan], hosts=[
+            SandboxHost(name="local"),
+            SandboxHost(name="sbx-2", docker_host="ssh://sbx-2"),
+        ])
+        remote = make_docker([remote_orphan], host="ssh://sbx-2")
+        docker.for_host.return_value = remote
+
+        assert await reaper.sweep() == 2
+
+        docker.for_host.assert_called_once_with("ssh://sbx-2")
+        docker.remove_container.assert_awaited_once_with(local_orphan)
+        remote.remove_container.assert_awaited_once_with(remote_orphan)
+
+    @pytest.mark.asyncio
+    async def test_keeps_owned_container(self):
+        registry = SandboxRegistry()
+        sandbox = SandboxManager(SandboxConfig(name=container_name("ctl-a")), registry=registry)
+        registry.add(sandbox)
+        reaper, docker = make_reaper([sandbox.container_name], registry=registry)
+
+        assert await reaper.sweep() == 0
+        docker.remove_container.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_ignores_other_instances(self):
+        """Containers of another controller on the same host are left alone."""
+        reaper, docker = make_reaper([container_name("ctl-b"), container_name("ctl-a-2")])
+
+        assert await reaper.sweep() == 0
+        docker.remove_container.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_grace_period(self):
+        """Orphans are only removed after staying unowned for the grace period."""
+        orphan = container_name("ctl-a")
+        reaper, docker = make_reaper([orphan], grace_period=3600)
+
+        assert await reaper.sweep() == 0
+        assert reaper.stats()["orphans_pending"] == 1
+
+        reaper._unowned_since[orphan] -= 3600
+        assert await reaper.sweep() == 1
+
+    @pytest.mark.asyncio
+    async def test_claimed_container_is_forgotten(self):
+        """A container that gets registered during its grace period is not reaped."""
+        registry = SandboxRegistry()
+        sandbox = SandboxManager(SandboxConfig(name=container_name("ctl-a")), registry=registry)
+        reaper, docker = make_reaper([sandbox.container_name], grace_period=3600, registry=registry)
+
+        await reaper.sweep()
+        registry.add(sandbox)
+        await reaper.sweep()
+
+        assert reaper.stats()["orphans_pending"] == 0
+
+    def test_stats_ownership(self):
+        registry = SandboxRegistry()
+        in_session = SandboxManager(SandboxConfig(), registry=registry)
+        in_session.owner = "session-1"
+        registry.add(in_session)
+        registry.add(SandboxManager(SandboxConfig(), registry=registry))
+        reaper, _ = make_reaper([], registry=registry)
+
+        stats = reaper.stats()
+        assert stats["live_sandboxes"] == 2
+        assert stats["in_session"] == 1
+        assert stats["unassigned"] == 1
@@ -0,0 +1,180 @@
+"""Unit tests for browser-then-sandbox session recovery."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from jamie.agent.pool import SandboxLease
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.agent.streamer import (
+    DISCORD_APP_URL,
+    RECOVERY_METRIC,
+    AgentContext,
+    AgentRun,
+    AgentState,
+    AgentTaskError,
+    BrowserLostError,
+    StreamingAgent,
+)
+from jamie.shared.metrics import MetricsCollector
+
+STEPS = ("_join_voice_channel", "_open_url", "_start_screen_share")
+
+
+class TestRestartBrowser:
+    """Tests for SandboxManager.restart_browser."""
+
+    @pytest.mark.asyncio
+    async def test_hung_browser_killed_and_relaunched(self):
+        commands = []
+
+        async def run_command(command):
+            commands.append(command)
+            # The browser ignores being closed
+            return SimpleNamespace(stdout="running\n" if command.startswith("pgrep") else "")
+
+        computer = MagicMock()
+        computer.interface.run_command = run_command
+        manager = SandboxManager(
+            SandboxConfig(provider_type="docker", browser_exit_timeout=0.05),
+            computer_factory=MagicMock(),
+            docker=AsyncMock(),
+            metrics=MetricsCollector(),
+            registry=SandboxRegistry(),
+        )
+        manager._computer = computer
+        manager._is_running = True
+
+        await manager.restart_browser(DISCORD_APP_URL)
+
+        assert commands[0] == "pkill -f -- chromium || true"
+        kill = next(command for command in commands if "-KILL" in command)
+        assert "SingletonLock" in kill
+        assert commands[-1].startswith("nohup chromium")
+        assert DISCORD_APP_URL in commands[-1]
+
+
+def make_agent(manager) -> StreamingAgent:
+    context = AgentContext(
+        session_id="s1",
+        url="https://example.com",
+        guild_id="g",
+        channel_id="c",
+        channel_name="General",
+    )
+    agent = StreamingAgent(context)
+    agent.run = AgentRun(context=context)
+    agent._sandbox = manager
+    agent._lease = SandboxLease(manager, logged_in=True)
+    agent._send_status_update = AsyncMock()
+    agent._ensure_logged_in = AsyncMock()
+    for step in STEPS:
+        setattr(agent, step, AsyncMock())
+    return agent
+
+
+@pytest.fixture(autouse=True)
+def recovery_enabled(monkeypatch):
+    monkeypatch.setenv("JAMIE_RECOVERY_ENABLED", "true")
+
+
+@pytest.fixture
+def manager():
+    manager = MagicMock(container_name="jamie-sbx-a", is_local=False)
+    manager.restart_browser = AsyncMock()
+    manager.browser_running = AsyncMock(return_value=True)
+    manager.health_check = AsyncMock(return_value=True)
+    manager.restart = AsyncMock()
+    manager.record_owner = AsyncMock()
+    return manager
+
+
+@pytest.fixture
+def metrics():
+    metrics = MetricsCollector()
+    with patch("jamie.agent.streamer.get_metrics", return_value=metrics):
+        yield metrics
+
+
+class TestSessionRecovery:
+    """Tests for StreamingAgent recovering a failed browser."""
+
+    @pytest.mark.asyncio
+    async def test_exited_browser_restarted_and_stream_resumed(self, manager, metrics):
+        agent = make_agent(manager)
+        agent.run.update_state(AgentState.STREAMING)
+        manager.browser_running.side_effect = [True, False, True]
+
+        await agent._check_browser()
+        await agent._check_browser()
+
+        manager.restart_browser.assert_awaited_once_with(DISCORD_APP_URL)
+        manager.restart.assert_not_awaited()
+        for step in STEPS:
+            getattr(agent, step).assert_awaited_once()
+        assert agent.run.state == AgentState.STREAMING
+        assert [r["tier"] for r in agent.run.recoveries] == ["browser"]
+        assert metrics.get_histogram(RECOVERY_METRIC, tier="browser")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_step_escalates_to_sandbox_restart(self, manager, metrics):
+        agent = make_agent(manager)
+        agent._join_voice_channel.side_effect = [asyncio.TimeoutError(), None]
+        manager.health_check.return_value = False
+        manager.restart_browser.side_effect = RuntimeError("no computer-server")
+
+        await agent._go_live()
+
+        manager.restart.assert_awaited_once()
+        agent._ensure_logged_in.assert_awaited_once()
+        assert agent._lease.logged_in is False
+        assert agent._join_voice_channel.await_count == 2
+        assert agent.run.recoveries[0]["tier"] == "sandbox"
+        assert agent.run.recoveries[0]["reason"].startswith("idle")
+        assert metrics.get_histogram(RECOVERY_METRIC, tier="sandbox")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_with_browser_up_not_recovered(self, manager, metrics):
+        """A model or budget error while the browser is fine is just an error."""
+        agent = make_agent(manager)
+        agent._open_url.side_effect = RuntimeError("API rate limit")
+
+        with pytest.raises(RuntimeError, match="rate limit"):
+            await agent._go_live()
+
+        manager.restart_browser.assert_not_awaited()
+        manager.restart.assert_not_awaited()
+        assert agent.run.recoveries == []
+
+    @pytest.mark.asyncio
+    async def test_agent_errors_and_spent_attempts_not_recovered(self, manager, metrics):
+        agent = make_agent(manager)
+        agent._open_url.side_effect = AgentTaskError("Agent reported error: CAPTCHA")
+
+        with pytest.raises(AgentTaskError):
+            await agent._go_live()
+        manager.restart_browser.assert_not_awaited()
+
+        agent.run.update_state(AgentState.STREAMING)
+        agent.run.recoveries = [{"tier": "browser"}] * agent._recovery.max_attempts
+        await agent._check_browser()
+        manager.browser_running.return_value = False
+        with pytest.raises(BrowserLostError):
+            await agent._check_browser()
+
+    @pytest.mark.asyncio
+    async def test_other_browser_images_not_probed(self, manager, metrics):
+        agent = make_agent(manager)
+        agent.run.update_state(AgentState.STREAMING)
+        # e.g. an image running Firefox, which pgrep for chromium never finds
+        manager.browser_running.return_value = False
+
+        await agent._check_browser()
+        await agent._check_browser()
+
+        manager.browser_running.assert_awaited_once()
+        manager.restart_browser.assert_not_awaited()
+        assert agent.run.state == AgentState.STREAMING
+        assert agent.run.recoveries == []
@@ -0,0 +1,119 @@
+"""Unit tests for speculative sandbox reservations (jamie/agent/reservations.py)."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.reservations import ReservationLimitError, ReservationManager
+from jamie.shared.config import ReservationConfig
+
+
+def make_lease():
+    lease = MagicMock()
+    lease.release = AsyncMock()
+    return lease
+
+
+def make_manager(provider=None, **overrides) -> ReservationManager:
+    settings = {"ttl_seconds": 60.0, "max_active": 2}
+    settings.update(overrides)
+    provider = provider or AsyncMock(side_effect=lambda: make_lease())
+    return ReservationManager(provider, ReservationConfig(**settings))
+
+
+class TestReservationManager:
+    """Tests for prepare, claim and expiry."""
+
+    @pytest.mark.asyncio
+    async def test_claim_returns_booted_lease(self):
+        lease = make_lease()
+        manager = make_manager(provider=AsyncMock(return_value=lease))
+
+        reservation = manager.prepare("user-1")
+        claimed = manager.claim(reservation.token)
+
+        assert await claimed is lease
+        assert manager.stats()["claimed"] == 1
+        assert manager.stats()["active"] == 0
+        lease.release.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_claim_while_still_booting(self):
+        """A claim can happen before the sandbox finished booting."""
+        booted = asyncio.Event()
+        lease = make_lease()
+
+        async def slow_boot():
+            await booted.wait()
+            return lease
+
+        manager = make_manager(provider=slow_boot)
+        claimed = manager.claim(manager.prepare().token)
+        assert not claimed.done()
+
+        booted.set()
+        assert await claimed is lease
+
+    @pytest.mark.asyncio
+    async def test_unknown_token_misses(self):
+        manager = make_manager()
+        assert manager.claim("nope") is None
+
+    @pytest.mark.asyncio
+    async def test_unclaimed_reservation_expires_and_releases(self):
+        lease = make_lease()
+        manager = make_manager(provider=AsyncMock(return_value=lease), ttl_seconds=0.01)
+
+        reservation = manager.prepare()
+        await asyncio.sleep(0.05)
+
+        lease.release.assert_awaited_once()
+        assert manager.claim(reservation.token) is None
+        assert manager.stats()["expired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_releases_before_expiry(self):
+        lease = make_lease()
+        manager = make_manager(provider=AsyncMock(return_value=lease))
+
+        reservation = manager.prepare()
+        assert manager.cancel(reservation.token)
+        await manager.stop()
+
+        lease.release.assert_awaited_once()
+        assert manager.claim(reservation.token) is None
+        assert not manager.cancel(reservation.token)
+        assert manager.stats()["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expiry_tolerates_failed_boot(self):
+        manager = make_manager(
+            provider=AsyncMock(side_effect=RuntimeError("boot failed")),
+            ttl_seconds=0.01,
+        )
+
+        manager.prepare()
+        await asyncio.sleep(0.05)
+
+        assert manager.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_max_active_limit(self):
+        manager = make_manager(max_active=1)
+        manager.prepare()
+
+        with pytest.raises(ReservationLimitError):
+            manager.prepare()
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_releases_outstanding(self):
+        lease = make_lease()
+        manager = make_manager(provider=AsyncMock(return_value=lease))
+        manager.prepare()
+
+        await manager.stop()
+
+        lease.release.assert_awaited_once()
+        assert manager.stats()["active"] == 0
@@ -0,0 +1,258 @@
+"""Unit tests for sandbox boot, registration and policies (jamie/agent/sandbox.py)."""
+
+import asyncio
+import dataclasses
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.sandbox import (
+    BOOT_STAGE_METRIC,
+    SandboxConfig,
+    SandboxManager,
+    SandboxRegistry,
+    load_sandbox_defaults,
+    memory_footprint,
+)
+from jamie.shared.config import ProxyConfig, get_proxy_config
+from jamie.shared.metrics import MetricsCollector
+
+
+class FakeInterface:
+    """Stand-in for the CUA computer interface."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    async def screenshot(self) -> bytes:
+        if self.fail:
+            raise ConnectionError("computer-server gone")
+        return b"png"
+
+
+class SlowComputer:
+    """Fake Computer whose run() takes a while, like a real container boot."""
+
+    def __init__(self, screenshot_fails: bool = False, **kwargs):
+        self.kwargs = kwargs
+        self.interface = FakeInterface(fail=screenshot_fails)
+
+    async def run(self) -> None:
+        await asyncio.sleep(0.05)
+
+    async def stop(self) -> None:
+        pass
+
+
+def make_manager(docker_running: bool, metrics: MetricsCollector, **computer_kwargs):
+    docker = AsyncMock()
+    docker.container_running = AsyncMock(return_value=docker_running)
+    manager = SandboxManager(
+        SandboxConfig(boot_probe_interval=0.01),
+        computer_factory=lambda **kw: SlowComputer(**computer_kwargs, **kw),
+        docker=docker,
+        metrics=metrics,
+        registry=SandboxRegistry(),
+    )
+    return manager, docker
+
+
+class TestBootTimings:
+    """Tests for per-stage timings recorded by SandboxManager.start()."""
+
+    @pytest.mark.asyncio
+    async def test_records_all_stages(self):
+        metrics = MetricsCollector()
+        manager, docker = make_manager(docker_running=True, metrics=metrics)
+
+        await manager.start()
+
+        assert set(manager.boot_timings) == {"create", "handshake", "first_screenshot", "total"}
+        assert manager.boot_timings["total"] >= manager.boot_timings["handshake"]
+        docker.container_running.assert_awaited_with(manager.container_name)
+        for stage in manager.boot_timings:
+            assert metrics.get_histogram(BOOT_STAGE_METRIC, stage=stage)["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_handshake_covers_create_without_docker(self):
+        """If docker never reports the container, there is no create stage."""
+        manager, _ = make_manager(docker_running=False, metrics=MetricsCollector())
+
+        await manager.start()
+
+        assert "create" not in manager.boot_timings
+        assert manager.boot_timings["handshake"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_failed_first_screenshot_does_not_fail_start(self):
+        manager, _ = make_manager(
+            docker_running=True, metrics=MetricsCollector(), screenshot_fails=True
+        )
+
+        await manager.start()
+
+        assert manager.is_running is True
+        assert "first_screenshot" not in manager.boot_timings
+        assert "total" in manager.boot_timings
+
+    @pytest.mark.asyncio
+    async def test_failed_run_propagates(self):
+        manager, _ = make_manager(docker_running=True, metrics=MetricsCollector())
+        manager._computer_factory = lambda **kw: AsyncMock(
+            run=AsyncMock(side_effect=RuntimeError("boot failed"))
+        )
+
+        with pytest.raises(RuntimeError, match="boot failed"):
+            await manager.start()
+        assert manager.is_running is False
+
+
+class TestRegistration:
+    """Tests for registering sandboxes so the reaper leaves them alone."""
+
+    @pytest.mark.asyncio
+    async def test_registered_while_running(self):
+        manager, _ = make_manager(docker_running=True, metrics=MetricsCollector())
+
+        await manager.start()
+        assert manager.container_name in manager.registry
+
+        await manager.stop()
+        assert manager.container_name not in manager.registry
+
+    @pytest.mark.asyncio
+    async def test_failed_boot_is_unregistered(self):
+        """A sandbox whose boot failed is left for the reaper."""
+        manager, _ = make_manager(docker_running=True, metrics=MetricsCollector())
+        manager._computer_factory = lambda **kw: AsyncMock(
+            run=AsyncMock(side_effect=RuntimeError("boot failed"))
+        )
+
+        with pytest.raises(RuntimeError):
+            await manager.start()
+        assert manager.container_name not in manager.registry
+
+    @pytest.mark.asyncio
+    async def test_failed_setup_after_boot_stops_sandbox(self):
+        """A step after the container is up failing releases it, like a stop would."""
+        manager, _ = make_manager(docker_running=True, metrics=MetricsCollector())
+        manager._apply_browser_settings = AsyncMock(side_effect=asyncio.CancelledError)
+        allocator = MagicMock()
+        manager._cpu_allocator = allocator
+        manager.cpuset = object()
+        manager._pin_cpus = AsyncMock()
+
+        with pytest.raises(asyncio.CancelledError):
+            await manager.start()
+
+        assert manager.is_running is False
+        assert manager.computer is None
+        assert manager.container_name not in manager.registry
+        allocator.release.assert_called_once_with(manager.container_name)
+
+    @pytest.mark.asyncio
+    async def test_owner_recorded_in_container(self):
+        """The session is kept in the container, so it outlives the controller."""
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+
+        await manager.record_owner("session-1")
+        written = docker.exec.await_args.args[-1]
+        await manager.record_owner(None)
+        cleared = docker.exec.await_args.args[-1]
+
+        assert "/tmp/jamie-owners/sandbox" in written
+        assert "session-1" in written
+        assert cleared == "rm -f /tmp/jamie-owners/sandbox"
+
+
+class TestBrowserPolicies:
+    """Tests for writing managed browser policies into the sandbox."""
+
+    @pytest.mark.asyncio
+    async def test_policies_written_on_start(self):
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+        manager.config.browser_policies = {"ProxyMode": "fixed_servers"}
+
+        await manager.start()
+
+        container, *command = docker.exec.await_args.args
+        assert container == manager.container_name
+        assert command[:2] == ["sh", "-c"]
+        assert '"ProxyMode": "fixed_servers"' in command[2]
+        assert "/etc/chromium/policies/managed/jamie.json" in command[2]
+        assert docker.exec.await_args.kwargs["user"] == "root"
+
+    @pytest.mark.asyncio
+    async def test_stale_settings_cleared(self):
+        """Without policies or flags, leftovers (e.g. from a snapshot) are removed."""
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+
+        await manager.start()
+
+        script = docker.exec.await_args.args[-1]
+        assert "rm -f /etc/chromium/policies/managed/jamie.json" in script
+        assert "rm -f /etc/chromium.d/jamie" in script
+
+    @pytest.mark.asyncio
+    async def test_performance_profile_settings(self):
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+        await manager.start()
+
+        await manager.set_performance_profile("low_cpu")
+
+        script = docker.exec.await_args.args[-1]
+        assert '"NetworkPredictionOptions": 2' in script
+        assert "--force-prefers-reduced-motion" in script
+        assert "CHROMIUM_FLAGS" in script
+        with pytest.raises(KeyError):
+            await manager.set_performance_profile("turbo")
+
+    @pytest.mark.asyncio
+    async def test_density_profile_limits_memory(self):
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+        manager.config.performance_profile = "density"
+
+        await manager.start()
+
+        assert manager.computer.kwargs["memory"] == "2GB"
+        scripts = [call.args[-1] for call in docker.exec.await_args_list]
+        assert any("pkill -x xfdesktop" in script for script in scripts)
+        assert memory_footprint(manager.config) == 2 * 1000 ** 3
+
+    @pytest.mark.asyncio
+    async def test_profile_switch_updates_memory_limit(self):
+        manager, docker = make_manager(docker_running=True, metrics=MetricsCollector())
+        await manager.start()
+        assert manager.computer.kwargs["memory"] == "4GB"
+
+        await manager.set_performance_profile("density")
+        await manager.set_performance_profile("density")
+
+        docker.update_memory.assert_awaited_once_with(manager.container_name, "2GB")
+
+    def test_proxy_policy_added_when_enabled(self, tmp_path):
+        (tmp_path / "host.spki").write_text("c3BraQ==\n")
+        defaults = load_sandbox_defaults(proxy=ProxyConfig(
+            enabled=True, sandbox_address="10.0.0.1:3128", ca_dir=str(tmp_path),
+        ))
+
+        config = SandboxConfig(browser_policies={"ProxyMode": "system"}, defaults=defaults)
+
+        assert config.browser_policies["ProxyMode"] == "system"
+        assert config.browser_policies["ProxyPacUrl"].startswith("data:")
+        assert config.browser_flags == ("--ignore-certificate-errors-spki-list=c3BraQ==",)
+        assert dataclasses.replace(config).browser_flags == config.browser_flags
+
+    def test_defaults_read_once(self, monkeypatch):
+        reads = []
+        monkeypatch.setattr("jamie.agent.sandbox._defaults", None)
+        monkeypatch.setattr(
+            "jamie.agent.sandbox.get_proxy_config",
+            lambda: reads.append(1) or get_proxy_config(),
+        )
+
+        first, second = SandboxConfig(), SandboxConfig()
+
+        assert len(reads) == 1
+        assert first.performance_profile == second.performance_profile
+        assert first.name != second.name
@@ -0,0 +1,129 @@
+"""Unit tests for per-sandbox network shaping (jamie/agent/shaping.py)."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from jamie.agent.docker import DockerError
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.agent.shaping import LIMIT_METRIC, content_class, network_shape, tc_script
+from jamie.shared.config import ShapingConfig
+from jamie.shared.metrics import MetricsCollector
+
+
+class FakeInterface:
+    async def screenshot(self) -> bytes:
+        return b"png"
+
+
+class FakeComputer:
+    def __init__(self, **kwargs):
+        self.interface = FakeInterface()
+
+    async def run(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("JAMIE_SHAPING_ENABLED", "true")
+    monkeypatch.setenv("JAMIE_SHAPING_UPLOAD_MBIT", "5")
+    docker = AsyncMock()
+    docker.container_running = AsyncMock(return_value=True)
+    return SandboxManager(
+        SandboxConfig(),
+        computer_factory=FakeComputer,
+        docker=docker,
+        metrics=MetricsCollector(),
+        registry=SandboxRegistry(),
+    )
+
+
+def applied_script(manager: SandboxManager) -> str:
+    call = manager._docker.run_in_network.await_args
+    assert call.args[:2] == (manager.container_name, "nicolaka/netshoot:latest")
+    assert call.kwargs["cap_add"] == ("NET_ADMIN",)
+    return call.args[-1]
+
+
+class TestNetworkShapes:
+    """Tests for network classes and the tc commands they turn into."""
+
+    def test_content_class(self):
+        assert content_class("youtube") == "video"
+        assert content_class("twitch") == "video"
+        assert content_class("wikipedia") == "page"
+        assert content_class("generic") == "page"
+
+    def test_shapes_from_config(self):
+        config = ShapingConfig(video_download_mbit=20, page_download_mbit=2, upload_mbit=10)
+
+        video = network_shape("video", config)
+        page = network_shape("page", config)
+
+        assert video.download_bits == 20_000_000
+        assert page.download_bits == 2_000_000
+        assert video.upload_bits == page.upload_bits == 10_000_000
+        assert video.media_bits == 8_000_000
+        with pytest.raises(KeyError):
+            network_shape("bulk", config)
+
+    def test_tc_script(self):
+        script = tc_script(network_shape("video", ShapingConfig()), interface="eth1")
+
+        assert "tc qdisc del dev eth1 root 2>/dev/null;" in script
+        assert "htb rate 6000kbit ceil 6000kbit" in script
+        # WebRTC media (UDP) gets the priority class
+        assert "match ip protocol 17 0xff flowid 1:10" in script
+        assert "police rate 12000kbit" in script
+
+
+class TestSandboxShaping:
+    """Tests for SandboxManager applying and switching limits."""
+
+    @pytest.mark.asyncio
+    async def test_limits_applied_at_boot(self, manager):
+        await manager.start()
+
+        assert "police rate 4000kbit" in applied_script(manager)
+        assert manager.network_shape.network_class == "page"
+        assert manager.metrics.get_gauge(
+            LIMIT_METRIC, sandbox=manager.container_name, direction="transmit"
+        ) == 5_000_000
+
+        await manager.stop()
+        assert manager.network_shape is None
+        assert manager.metrics.get_gauge(
+            LIMIT_METRIC, sandbox=manager.container_name, direction="transmit"
+        ) is None
+
+    @pytest.mark.asyncio
+    async def test_switching_class_reapplies(self, manager):
+        await manager.start()
+
+        await manager.set_network_class("video")
+
+        assert "police rate 12000kbit" in applied_script(manager)
+        assert manager.network_shape.network_class == "video"
+        assert manager.metrics.get_gauge(
+            LIMIT_METRIC, sandbox=manager.container_name, direction="receive"
+        ) == 12_000_000
+
+    @pytest.mark.asyncio
+    async def test_failed_shaping_leaves_sandbox_unshaped(self, manager):
+        manager._docker.run_in_network.side_effect = DockerError("no such image")
+
+        await manager.start()
+
+        assert manager.is_running
+        assert manager.network_shape is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, manager, monkeypatch):
+        monkeypatch.delenv("JAMIE_SHAPING_ENABLED")
+
+        await manager.start()
+
+        manager._docker.run_in_network.assert_not_awaited()
@@ -0,0 +1,212 @@
+"""Unit tests for login snapshots (jamie/agent/snapshot.py)."""
+
+import json
+import os
+import sqlite3
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.docker import DockerError
+from jamie.agent.sandbox import SandboxConfig
+from jamie.agent.snapshot import SnapshotStore, account_key
+from jamie.agent.streamer import AgentContext, AgentRun, StreamingAgent
+
+EMAIL = "stream@example.com"
+BASE_IMAGE = "trycua/cua-xfce:latest"
+
+
+def copy_out_profile(*hosts):
+    """copy_out stand-in that writes a profile with cookies for ``hosts``."""
+    async def copy_out(source, destination):
+        os.makedirs(os.path.join(destination, "Default"))
+        with open(os.path.join(destination, "Local State"), "w") as f:
+            json.dump({}, f)
+        conn = sqlite3.connect(os.path.join(destination, "Default", "Cookies"))
+        conn.execute("CREATE TABLE cookies (host_key TEXT)")
+        conn.executemany("INSERT INTO cookies VALUES (?)", [(host,) for host in hosts])
+        conn.commit()
+        conn.close()
+    return AsyncMock(side_effect=copy_out)
+
+
+@pytest.fixture
+def docker():
+    """Fake docker CLI."""
+    return AsyncMock()
+
+
+@pytest.fixture
+def store(tmp_path, docker):
+    """Snapshot store backed by a temp directory."""
+    return SnapshotStore(str(tmp_path), keep=2, docker=docker)
+
+
+@pytest.fixture
+def sandbox():
+    """Running sandbox stand-in."""
+    manager = MagicMock()
+    manager.commit_snapshot = AsyncMock(return_value="sha256:abc")
+    manager.sync_profile = AsyncMock(return_value=False)
+    # Copies nothing out, so verification falls back to the VLM
+    manager.copy_out = AsyncMock()
+    manager.config = SandboxConfig(image=BASE_IMAGE)
+    return manager
+
+
+class TestSnapshotStore:
+    """Tests for snapshot versioning and invalidation."""
+
+    def test_account_key_is_stable_and_opaque(self):
+        """Account keys don't leak the email and ignore case."""
+        key = account_key(EMAIL)
+        assert key == account_key(" Stream@Example.com ")
+        assert "example" not in key
+
+    @pytest.mark.asyncio
+    async def test_create_versions_snapshots(self, store, sandbox):
+        """Each commit produces a new, higher version."""
+        first = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        second = await store.create(sandbox, EMAIL, BASE_IMAGE)
+
+        assert second.version == first.version + 1
+        assert store.current(EMAIL, BASE_IMAGE) == second
+        sandbox.commit_snapshot.assert_awaited_with(second.image)
+
+    @pytest.mark.asyncio
+    async def test_current_matches_account_and_base_image(self, store, sandbox):
+        """Snapshots are not shared across accounts or base images."""
+        await store.create(sandbox, EMAIL, BASE_IMAGE)
+
+        assert store.current("other@example.com", BASE_IMAGE) is None
+        assert store.current(EMAIL, "other-image:latest") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_removes_image(self, store, sandbox, docker):
+        """Invalidated snapshots are skipped and their image removed."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        await store.invalidate(snapshot, "verification_failed")
+
+        assert store.current(EMAIL, BASE_IMAGE) is None
+        assert snapshot.invalidated_reason == "verification_failed"
+        docker.remove_image.assert_awaited_with(snapshot.image)
+
+    @pytest.mark.asyncio
+    async def test_invalidate_tolerates_image_in_use(self, store, sandbox, docker):
+        """Failing to remove the image doesn't undo the invalidation."""
+        docker.remove_image.side_effect = DockerError("in use")
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        await store.invalidate(snapshot, "verification_failed")
+
+        assert store.current(EMAIL, BASE_IMAGE) is None
+
+    @pytest.mark.asyncio
+    async def test_prunes_old_versions(self, store, sandbox, docker):
+        """Only the newest ``keep`` versions stay on the host."""
+        first = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        await store.create(sandbox, EMAIL, BASE_IMAGE)
+        await store.create(sandbox, EMAIL, BASE_IMAGE)
+
+        docker.remove_image.assert_awaited_once_with(first.image)
+        assert store.find_by_image(first.image) is None
+        assert len(store.entries()) == 2
+
+    @pytest.mark.asyncio
+    async def test_metadata_survives_reload(self, tmp_path, store, sandbox, docker):
+        """Versions are persisted across store instances."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+
+        reloaded = SnapshotStore(str(tmp_path), docker=docker)
+        assert reloaded.current(EMAIL, BASE_IMAGE).image == snapshot.image
+
+    def test_corrupt_metadata_starts_empty(self, tmp_path, docker):
+        """An unreadable metadata file doesn't break the controller."""
+        (tmp_path / SnapshotStore.METADATA_FILE).write_text("{not json")
+        store = SnapshotStore(str(tmp_path), docker=docker)
+        assert store.entries() == []
+
+
+class TestSnapshotLogin:
+    """Tests for the snapshot-aware login path in StreamingAgent."""
+
+    def make_agent(self, store, sandbox):
+        context = AgentContext(
+            session_id="s1",
+            url="https://youtube.com/watch?v=abc",
+            guild_id="g",
+            channel_id="c",
+            channel_name="General",
+            discord_email=EMAIL,
+            sandbox_image=BASE_IMAGE,
+        )
+        agent = StreamingAgent(context, snapshots=store)
+        agent.run = AgentRun(context=context)
+        agent._sandbox = sandbox
+        agent._login_discord = AsyncMock()
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_fresh_login_creates_snapshot(self, store, sandbox):
+        """Without a snapshot we log in and commit one."""
+        agent = self.make_agent(store, sandbox)
+        await agent._ensure_logged_in()
+
+        agent._login_discord.assert_awaited_once()
+        assert store.current(EMAIL, BASE_IMAGE) is not None
+
+    @pytest.mark.asyncio
+    async def test_valid_snapshot_skips_login(self, store, sandbox):
+        """A snapshot that passes verification skips the login phase."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        sandbox.config = SandboxConfig(image=snapshot.image)
+        agent = self.make_agent(store, sandbox)
+        agent._run_agent_task = AsyncMock(return_value="SESSION_VALID")
+
+        await agent._ensure_logged_in()
+
+        agent._login_discord.assert_not_awaited()
+        assert snapshot.valid
+
+    @pytest.mark.asyncio
+    async def test_failed_verification_falls_back_to_login(self, store, sandbox):
+        """A stale snapshot is invalidated and replaced after a full login."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        sandbox.config = SandboxConfig(image=snapshot.image)
+        agent = self.make_agent(store, sandbox)
+        agent._run_agent_task = AsyncMock(return_value="SESSION_INVALID")
+
+        await agent._ensure_logged_in()
+
+        agent._login_discord.assert_awaited_once()
+        assert not snapshot.valid
+        assert store.current(EMAIL, BASE_IMAGE).version == snapshot.version + 1
+
+    @pytest.mark.asyncio
+    async def test_profile_cookies_skip_vlm_verification(self, store, sandbox):
+        """Discord cookies in the sandbox's profile verify the session without a VLM turn."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        sandbox.config = SandboxConfig(image=snapshot.image)
+        sandbox.copy_out = copy_out_profile("discord.com")
+        agent = self.make_agent(store, sandbox)
+        agent._run_agent_task = AsyncMock()
+
+        await agent._ensure_logged_in()
+
+        agent._run_agent_task.assert_not_awaited()
+        agent._login_discord.assert_not_awaited()
+        assert snapshot.valid
+
+    @pytest.mark.asyncio
+    async def test_logged_out_profile_skips_vlm_verification(self, store, sandbox):
+        """A profile without Discord cookies fails verification without a VLM turn."""
+        snapshot = await store.create(sandbox, EMAIL, BASE_IMAGE)
+        sandbox.config = SandboxConfig(image=snapshot.image)
+        sandbox.copy_out = copy_out_profile("example.com")
+        agent = self.make_agent(store, sandbox)
+        agent._run_agent_task = AsyncMock()
+
+        await agent._ensure_logged_in()
+
+        agent._run_agent_task.assert_not_awaited()
+        agent._login_discord.assert_awaited_once()
+        assert not snapshot.valid
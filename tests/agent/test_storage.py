@@ -0,0 +1,112 @@
+"""Unit tests for tmpfs working storage (jamie/agent/storage.py)."""
+
+import subprocess
+
+import pytest
+from unittest.mock import AsyncMock
+
+from jamie.agent.sandbox import SandboxConfig, SandboxManager, SandboxRegistry
+from jamie.agent.storage import ON_TMPFS, SYNC_METRIC, seed_script, sync_script
+from jamie.shared.metrics import MetricsCollector
+
+
+def sh(script: str) -> str:
+    return subprocess.run(
+        ["sh", "-c", script], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+class TestScripts:
+    """Tests for the seed and sync shell scripts."""
+
+    def test_sync_copies_only_session_state(self, tmp_path):
+        working, durable = tmp_path / "working", tmp_path / "durable"
+        (working / "Default" / "Local Storage").mkdir(parents=True)
+        (working / "Default" / "Local Storage" / "000003.log").write_text("token")
+        (working / "Default" / "Cookies").write_text("new cookies")
+        (working / "Default" / "Network").mkdir()
+        (working / "Default" / "Network" / "Cookies").write_text("network cookies")
+        (working / "Local State").write_text("{}")
+        (working / "Default" / "History").write_text("visits")
+        (durable / "Default").mkdir(parents=True)
+        (durable / "Default" / "Cookies").write_text("old cookies")
+
+        sh(sync_script(str(working), str(durable)))
+
+        assert (durable / "Default" / "Cookies").read_text() == "new cookies"
+        assert (durable / "Default" / "Network" / "Cookies").read_text() == "network cookies"
+        assert (durable / "Default" / "Local Storage" / "000003.log").read_text() == "token"
+        assert (durable / "Local State").exists()
+        assert not (durable / "Default" / "History").exists()
+        assert not list(durable.rglob("*.sync"))
+
+    def test_seed_stays_put_without_room(self, tmp_path):
+        (tmp_path / "durable").mkdir()
+        out = sh(seed_script(str(tmp_path / "durable"), str(tmp_path / "shm"), "cua", 10 ** 9))
+
+        assert out != ON_TMPFS
+        assert not (tmp_path / "shm" / "profile").exists()
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("JAMIE_STORAGE_TMPFS", "true")
+    docker = AsyncMock()
+    docker.container_running = AsyncMock(return_value=True)
+    docker.exec = AsyncMock(return_value=f"{ON_TMPFS}\n")
+
+    def computer_factory(**kwargs):
+        computer = AsyncMock()
+        computer.interface.screenshot = AsyncMock(return_value=b"png")
+        return computer
+
+    return SandboxManager(
+        SandboxConfig(provider_type="docker", boot_probe_interval=0.01),
+        computer_factory=computer_factory,
+        docker=docker,
+        metrics=MetricsCollector(),
+        registry=SandboxRegistry(),
+    )
+
+
+class TestWorkingStorage:
+    """Tests for SandboxManager running the browser from tmpfs."""
+
+    @pytest.mark.asyncio
+    async def test_browser_moves_to_tmpfs(self, manager):
+        durable = manager.config.browser_profile_path
+
+        await manager.start()
+
+        assert manager.on_tmpfs
+        assert manager.config.browser_profile_path == "/dev/shm/jamie/profile"
+        assert manager.durable_profile_path == durable
+        assert "--disk-cache-dir=/dev/shm/jamie/cache" in manager.browser_flags
+        settings = manager._docker.exec.await_args_list[-1].args[-1]
+        assert "--user-data-dir=/dev/shm/jamie/profile" in settings
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_synced_at_checkpoints_and_stop(self, manager):
+        durable = manager.config.browser_profile_path
+        await manager.start()
+
+        await manager.commit_snapshot("jamie-login:1")
+        await manager.stop()
+
+        metrics = manager.metrics
+        assert metrics.get_histogram(SYNC_METRIC, reason="snapshot")["count"] == 1
+        assert metrics.get_histogram(SYNC_METRIC, reason="shutdown")["count"] == 1
+        assert manager.config.browser_profile_path == durable
+        assert not manager.on_tmpfs
+
+    @pytest.mark.asyncio
+    async def test_disabled_leaves_profile_alone(self, manager, monkeypatch):
+        monkeypatch.setenv("JAMIE_STORAGE_TMPFS", "false")
+        durable = manager.config.browser_profile_path
+
+        await manager.start()
+
+        assert not manager.on_tmpfs
+        assert manager.config.browser_profile_path == durable
+        assert await manager.sync_profile("interval") is False
@@ -0,0 +1,231 @@
+"""Unit tests for sandbox resource telemetry (jamie/agent/telemetry.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from jamie.agent import controller
+from jamie.agent.docker import DockerError
+from jamie.agent.sandbox import SandboxRegistry
+from jamie.agent.shaping import NetworkShape
+from jamie.agent.streamer import AgentContext, AgentRun, StreamingAgent
+from jamie.agent.telemetry import Reading, TelemetryCollector, read_net_dev, sample_between
+from jamie.shared.config import TelemetryConfig
+from jamie.shared.metrics import MetricsCollector
+
+# /proc/<pid>/net/dev, with the unused columns zeroed
+NET_DEV = """Inter-|   Receive                        |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes ...
+    lo: 500 5 0 0 0 0 0 0 500 5 0 0 0 0 0 0
+  eth0: {rx} 100 0 0 0 0 0 0 {tx} 80 0 0 0 0 0 0
+"""
+
+
+class FakeContainer:
+    """A container's cgroup and /proc files under tmp_path."""
+
+    PID = 4242
+
+    def __init__(self, root):
+        self.cgroup = root / "cgroup" / "system.slice" / "docker-abc.scope"
+        self.cgroup.mkdir(parents=True)
+        proc = root / "proc" / str(self.PID)
+        (proc / "net").mkdir(parents=True)
+        (proc / "cgroup").write_text("0::/system.slice/docker-abc.scope\n")
+        self.net_dev = proc / "net" / "dev"
+        (self.cgroup / "memory.max").write_text("4294967296\n")
+        self.update(cpu_usec=0, periods=0, throttled=0, memory=1000, rx=0, tx=0)
+
+    def update(self, cpu_usec, periods, throttled, memory, rx, tx):
+        (self.cgroup / "cpu.stat").write_text(
+            f"usage_usec {cpu_usec}\nuser_usec 0\nsystem_usec 0\n"
+            f"nr_periods {periods}\nnr_throttled {throttled}\n"
+            f"throttled_usec {throttled * 1000}\n"
+        )
+        (self.cgroup / "memory.current").write_text(f"{memory}\n")
+        self.net_dev.write_text(NET_DEV.format(rx=rx, tx=tx))
+
+
+def sandbox(name="jamie-sbx-a", owner="s1", network_shape=None):
+    return SimpleNamespace(
+        container_name=name,
+        is_running=True,
+        is_local=False,
+        owner=owner,
+        network_shape=network_shape,
+    )
+
+
+@pytest.fixture
+def container(tmp_path):
+    return FakeContainer(tmp_path)
+
+
+@pytest.fixture
+def collector(tmp_path):
+    docker = AsyncMock()
+    docker.container_pid = AsyncMock(return_value=FakeContainer.PID)
+    return TelemetryCollector(
+        TelemetryConfig(
+            cgroup_root=str(tmp_path / "cgroup"),
+            proc_root=str(tmp_path / "proc"),
+            samples_per_session=3,
+            max_sessions=2,
+        ),
+        registry=SandboxRegistry(),
+        docker=docker,
+        metrics=MetricsCollector(),
+    )
+
+
+class TestSampleMath:
+    """Tests for turning counter readings into rates."""
+
+    def test_rates_between_readings(self):
+        before = Reading(at=10.0, cpu_usec=1_000_000, memory_bytes=1, nr_periods=100,
+                         nr_throttled=10, throttled_usec=0, rx_bytes=0, tx_bytes=0)
+        after = Reading(at=12.0, cpu_usec=4_000_000, memory_bytes=2, nr_periods=120,
+                        nr_throttled=15, throttled_usec=500_000, rx_bytes=2000, tx_bytes=400)
+
+        sample = sample_between(before, after)
+
+        assert sample.cpu_cores == 1.5
+        assert sample.throttled_ratio == 0.25
+        assert sample.throttled_seconds == 0.5
+        assert sample.net_rx_bytes_per_second == 1000
+        assert sample.net_tx_bytes_per_second == 200
+
+    def test_unknown_counters_stay_unknown(self):
+        sample = sample_between(Reading(at=0, cpu_usec=0, memory_bytes=5),
+                                Reading(at=1, cpu_usec=250_000, memory_bytes=5))
+
+        assert sample.cpu_cores == 0.25
+        assert sample.throttled_ratio is None
+        assert sample.net_rx_bytes_per_second is None
+
+    def test_net_dev_skips_loopback(self, container):
+        container.update(0, 0, 0, 0, rx=1234, tx=567)
+        assert read_net_dev(str(container.net_dev)) == (1234, 567)
+
+
+class TestTelemetryCollector:
+    """Tests for sampling sandboxes and keeping samples per session."""
+
+    @pytest.mark.asyncio
+    async def test_samples_container_from_cgroup(self, collector, container):
+        collector.registry.add(sandbox())
+        await collector.sample()
+        container.update(cpu_usec=10_000_000, periods=100, throttled=40,
+                         memory=2_000_000, rx=10_000, tx=5_000)
+        await collector.sample()
+
+        telemetry = collector.session("s1")
+        assert telemetry["summary"]["samples"] == 1
+        sample = telemetry["samples"][0]
+        assert sample["cpu_cores"] > 0
+        assert sample["memory_bytes"] == 2_000_000
+        assert sample["memory_limit_bytes"] == 4294967296
+        assert sample["throttled_ratio"] == 0.4
+        assert sample["throttled_seconds"] == 0.04
+        metrics = collector.metrics
+        assert metrics.get_gauge("sandbox_memory_bytes", sandbox="jamie-sbx-a") == 2_000_000
+        assert metrics.get_gauge("sandbox_cpu_throttled_ratio", sandbox="jamie-sbx-a") == 0.4
+
+    @pytest.mark.asyncio
+    async def test_network_use_against_shaping_limits(self, collector, container):
+        shape = NetworkShape("video", download_bits=80_000, upload_bits=40_000, media_bits=1)
+        collector.registry.add(sandbox(network_shape=shape))
+        await collector.sample()
+        container.update(cpu_usec=0, periods=0, throttled=0, memory=0, rx=10_000, tx=500)
+        await collector.sample()
+
+        metrics = collector.metrics
+        assert metrics.get_counter(
+            "sandbox_network_bytes_total", direction="receive", network_class="video"
+        ) == 10_000
+        assert metrics.get_counter(
+            "sandbox_network_bytes_total", direction="transmit", network_class="video"
+        ) == 500
+        utilization = metrics.get_gauge(
+            "sandbox_network_limit_utilization", sandbox="jamie-sbx-a", direction="receive"
+        )
+        assert utilization > 0
+
+    @pytest.mark.asyncio
+    async def test_stopped_sandbox_forgotten_but_session_kept(self, collector, container):
+        manager = sandbox()
+        collector.registry.add(manager)
+        await collector.sample()
+        await collector.sample()
+
+        collector.registry.discard(manager)
+        await collector.sample()
+
+        assert collector.stats()["sandboxes"] == {}
+        assert collector.metrics.get_gauge("sandbox_memory_bytes", sandbox="jamie-sbx-a") is None
+        assert collector.session("s1") is not None
+
+    @pytest.mark.asyncio
+    async def test_buffers_are_bounded(self, collector, container):
+        manager = sandbox()
+        collector.registry.add(manager)
+        for _ in range(6):
+            await collector.sample()
+        assert collector.session("s1")["summary"]["samples"] == 3
+
+        for owner in ("s2", "s3"):
+            manager.owner = owner
+            await collector.sample()
+        # Only the two most recently sampled sessions are kept
+        assert collector.session("s1") is None
+        assert collector.session("s3") is not None
+
+    @pytest.mark.asyncio
+    async def test_unreadable_sandbox_marked_unavailable(self, collector):
+        collector._docker.container_pid.side_effect = DockerError("No such container")
+        collector.registry.add(sandbox())
+
+        await collector.sample()
+        await collector.sample()
+
+        assert "jamie-sbx-a" in collector.stats()["unavailable"]
+        collector._docker.container_pid.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_streaming_session_records_each_cpu_sample_once(self, collector, container):
+        collector.registry.add(sandbox())
+        await collector.sample()
+        container.update(cpu_usec=10_000_000, periods=0, throttled=0, memory=0, rx=0, tx=0)
+        await collector.sample()
+        context = AgentContext(
+            session_id="s1", url="https://example.com", guild_id="g", channel_id="c",
+            channel_name="General",
+        )
+        agent = StreamingAgent(context, telemetry=collector)
+        agent.run = AgentRun(context=context)
+
+        await agent._sample_cpu()
+        await agent._sample_cpu()
+
+        assert agent.run.cpu_samples == [collector.latest("s1").cpu_cores]
+
+
+class TestTelemetryEndpoint:
+    """Tests for GET /sessions/{id}/telemetry."""
+
+    @pytest.mark.asyncio
+    async def test_session_telemetry(self, collector, container):
+        collector.registry.add(sandbox())
+        await collector.sample()
+        await collector.sample()
+
+        with patch.object(controller, "_telemetry", collector):
+            client = TestClient(controller.app)
+            found = client.get("/sessions/s1/telemetry")
+            missing = client.get("/sessions/nope/telemetry")
+
+        assert found.status_code == 200
+        assert found.json()["summary"]["samples"] == 1
+        assert missing.status_code == 404
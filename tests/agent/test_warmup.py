@@ -0,0 +1,117 @@
+"""Unit tests for controller warm-up (jamie/agent/warmup.py)."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.docker import DockerError
+from jamie.agent.warmup import ControllerWarmup, ReadinessState
+from jamie.shared.config import WarmupConfig
+from jamie.shared.metrics import MetricsCollector
+
+
+@pytest.fixture(autouse=True)
+def image_steps(monkeypatch):
+    """Pulling and touching are off by default."""
+    monkeypatch.setenv("JAMIE_WARMUP_PREPULL", "true")
+    monkeypatch.setenv("JAMIE_WARMUP_TOUCH", "true")
+
+
+@pytest.fixture
+def docker():
+    return AsyncMock()
+
+
+@pytest.fixture
+def metrics():
+    return MetricsCollector()
+
+
+class TestControllerWarmup:
+    """Tests for warm-up steps and readiness state."""
+
+    def test_starts_not_ready(self, docker):
+        warmup = ControllerWarmup(WarmupConfig(), docker=docker)
+        assert warmup.state == ReadinessState.STARTING
+        assert warmup.ready is False
+
+    @pytest.mark.asyncio
+    async def test_pulls_and_touches_image(self, docker, metrics):
+        warmup = ControllerWarmup(WarmupConfig(), docker=docker, metrics=metrics)
+        await warmup.run("trycua/cua-xfce:latest")
+
+        docker.pull.assert_awaited_once_with("trycua/cua-xfce:latest")
+        docker.touch_image.assert_awaited_once_with("trycua/cua-xfce:latest")
+        assert warmup.ready is True
+        assert set(warmup.steps) == {"pull", "touch"}
+        assert metrics.get_gauge("controller_warmup_seconds") is not None
+        assert metrics.get_gauge("controller_ready") == 1
+
+    @pytest.mark.asyncio
+    async def test_canary_sandbox_booted_and_stopped(self, docker, metrics):
+        canary = MagicMock()
+        canary.start = AsyncMock()
+        canary.stop = AsyncMock()
+        factory = MagicMock(return_value=canary)
+        warmup = ControllerWarmup(
+            WarmupConfig(canary=True),
+            docker=docker,
+            canary_factory=factory,
+            metrics=metrics,
+        )
+
+        await warmup.run("img", "800x600")
+
+        assert factory.call_args[0][0].image == "img"
+        canary.start.assert_awaited_once()
+        canary.stop.assert_awaited_once()
+        assert "canary" in warmup.steps
+
+    @pytest.mark.asyncio
+    async def test_failed_pull_reports_failed(self, docker, metrics):
+        docker.pull.side_effect = DockerError("docker pull failed: denied")
+        docker.image_exists.return_value = False
+        warmup = ControllerWarmup(
+            WarmupConfig(max_attempts=2, retry_delay=0), docker=docker, metrics=metrics
+        )
+
+        await warmup.run("img")
+
+        assert warmup.state == ReadinessState.FAILED
+        assert "denied" in warmup.error
+        assert metrics.get_gauge("controller_ready") == 0
+        assert docker.pull.await_count == 2
+        docker.touch_image.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_failed_pull_of_local_image_is_ready(self, docker, metrics):
+        """A locally built or rate-limited image is used as the daemon has it."""
+        docker.pull.side_effect = DockerError("docker pull failed: toomanyrequests")
+        docker.image_exists.return_value = True
+        warmup = ControllerWarmup(WarmupConfig(), docker=docker, metrics=metrics)
+
+        await warmup.run("img")
+
+        assert warmup.ready is True
+        docker.pull.assert_awaited_once()
+        docker.touch_image.assert_awaited_once_with("img")
+
+    @pytest.mark.asyncio
+    async def test_failure_retried_with_backoff(self, docker, metrics):
+        docker.touch_image.side_effect = [DockerError("daemon busy"), None]
+        warmup = ControllerWarmup(
+            WarmupConfig(retry_delay=0.01), docker=docker, metrics=metrics
+        )
+
+        await warmup.run("img")
+
+        assert warmup.ready is True
+        assert warmup.error is None
+        assert docker.touch_image.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_is_immediately_ready(self, docker, metrics):
+        warmup = ControllerWarmup(WarmupConfig(enabled=False), docker=docker, metrics=metrics)
+        await warmup.run("img")
+
+        assert warmup.ready is True
+        docker.pull.assert_not_awaited()
@@ -0,0 +1,239 @@
+"""Unit tests for the sandbox watchdog (jamie/agent/watchdog.py)."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from jamie.agent.docker import DockerError
+from jamie.agent.pool import SandboxLease
+from jamie.agent.streamer import (
+    AgentContext,
+    AgentState,
+    SandboxLostError,
+    StreamingAgent,
+)
+from jamie.agent.watchdog import SandboxWatchdog
+from jamie.shared.config import SandboxHost, WatchdogConfig
+from jamie.shared.metrics import MetricsCollector
+
+
+def container_event(name: str, action: str = "die", exit_code: str = "137") -> dict:
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {"ID": "abc", "Attributes": {"name": name, "exitCode": exit_code}},
+    }
+
+
+class FakeDocker:
+    """Docker whose event stream the test feeds."""
+
+    def __init__(self, failures: int = 0, host: str = ""):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.subscriptions = 0
+        self.failures = failures
+        self.host = host
+        # DOCKER_HOST -> the FakeDocker for_host hands out for it
+        self.daemons: dict = {}
+
+    def for_host(self, host: str) -> "FakeDocker":
+        return self.daemons.setdefault(host, FakeDocker(host=host))
+
+    async def events(self, *filters):
+        self.subscriptions += 1
+        if self.failures:
+            self.failures -= 1
+            raise DockerError("Cannot connect to the Docker daemon")
+        while True:
+            yield await self.queue.get()
+
+
+def container(name: str = "jamie-sbx-a") -> SimpleNamespace:
+    return SimpleNamespace(container_name=name, is_local=False)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def docker():
+    return FakeDocker()
+
+
+@pytest.fixture
+async def watchdog(docker):
+    watchdog = SandboxWatchdog(
+        WatchdogConfig(resubscribe_interval=0.01), docker=docker, metrics=MetricsCollector()
+    )
+    await watchdog.start()
+    yield watchdog
+    await watchdog.stop()
+
+
+class TestDockerEvents:
+    """Tests for container deaths reported by docker events."""
+
+    @pytest.mark.asyncio
+    async def test_dead_container_reported(self, watchdog, docker):
+        callback = AsyncMock()
+        watchdog.watch(container(), callback)
+
+        await docker.queue.put(container_event("jamie-sbx-a", exit_code="139"))
+        await settle()
+
+        callback.assert_awaited_once_with("sandbox container exited with code 139")
+        assert watchdog.metrics.get_counter("sandbox_lost_total", cause="died") == 1
+        assert watchdog.stats()["watched_sandboxes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_oom_reported_once(self, watchdog, docker):
+        callback = AsyncMock()
+        watchdog.watch(container(), callback)
+
+        await docker.queue.put(container_event("jamie-sbx-a", action="oom"))
+        await docker.queue.put(container_event("jamie-sbx-a"))
+        await settle()
+
+        callback.assert_awaited_once_with("sandbox container ran out of memory")
+
+    @pytest.mark.asyncio
+    async def test_unwatched_and_unknown_containers_ignored(self, watchdog, docker):
+        callback = AsyncMock()
+        watch = watchdog.watch(container(), callback)
+        watchdog.unwatch(watch)
+
+        await docker.queue.put(container_event("jamie-sbx-a"))
+        await docker.queue.put(container_event("someone-elses"))
+        await settle()
+
+        callback.assert_not_awaited()
+        assert watchdog.stats()["events"] == 2
+
+    @pytest.mark.asyncio
+    async def test_every_session_on_a_shared_container_told(self, watchdog, docker):
+        first, second = AsyncMock(), AsyncMock()
+        watchdog.watch(container(), first)
+        watchdog.watch(container(), second)
+
+        await docker.queue.put(container_event("jamie-sbx-a"))
+        await settle()
+
+        first.assert_awaited_once()
+        second.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_resubscribes_after_stream_failure(self):
+        docker = FakeDocker(failures=1)
+        watchdog = SandboxWatchdog(WatchdogConfig(resubscribe_interval=0.01), docker=docker)
+        await watchdog.start()
+        await asyncio.sleep(0.05)
+
+        assert docker.subscriptions == 2
+        assert watchdog.stats()["subscribed"]
+        await watchdog.stop()
+
+    @pytest.mark.asyncio
+    async def test_follows_every_placement_host(self):
+        docker = FakeDocker()
+        watchdog = SandboxWatchdog(
+            docker=docker,
+            metrics=MetricsCollector(),
+            hosts=[
+                SandboxHost(name="local"),
+                SandboxHost(name="sbx-2", docker_host="ssh://sbx-2"),
+            ],
+        )
+        await watchdog.start()
+        callback = AsyncMock()
+        watchdog.watch(container("jamie-sbx-remote"), callback)
+        await settle()
+
+        await docker.daemons["ssh://sbx-2"].queue.put(container_event("jamie-sbx-remote"))
+        await settle()
+
+        assert docker.subscriptions == 1
+        assert watchdog.stats()["subscribed_daemons"] == 2
+        callback.assert_awaited_once()
+        await watchdog.stop()
+
+
+class TestLocalSandboxes:
+    """Tests for local sandboxes, watched through their display process."""
+
+    @pytest.mark.asyncio
+    async def test_display_exit_reported(self, watchdog):
+        exited = asyncio.Event()
+
+        async def wait_exited():
+            await exited.wait()
+            return -9
+
+        sandbox = SimpleNamespace(container_name="local-a", is_local=True, wait_exited=wait_exited)
+        callback = AsyncMock()
+        watchdog.watch(sandbox, callback)
+        await settle()
+        callback.assert_not_awaited()
+
+        exited.set()
+        await settle()
+
+        callback.assert_awaited_once_with("sandbox display exited with code -9")
+        assert watchdog.metrics.get_counter("sandbox_lost_total", cause="oom") == 1
+
+    @pytest.mark.asyncio
+    async def test_unwatch_stops_waiting(self, watchdog):
+        sandbox = SimpleNamespace(
+            container_name="local-a", is_local=True, wait_exited=lambda: asyncio.sleep(60)
+        )
+        watch = watchdog.watch(sandbox, AsyncMock())
+        await settle()
+
+        watchdog.unwatch(watch)
+        await settle()
+
+        assert watch.task.cancelled()
+
+
+class TestStreamingAgentSandboxLoss:
+    """Tests for failing a session the moment its sandbox dies."""
+
+    @pytest.mark.asyncio
+    async def test_streaming_session_fails_and_frees_sandbox(self, watchdog, docker):
+        manager = MagicMock(container_name="jamie-sbx-a", is_local=False)
+        manager.config.performance_profile = "standard"
+        manager.stop = AsyncMock()
+        manager.record_owner = AsyncMock()
+        lease = asyncio.get_running_loop().create_future()
+        lease.set_result(SandboxLease(manager))
+        context = AgentContext(
+            session_id="s1",
+            url="https://example.com",
+            guild_id="g",
+            channel_id="c",
+            channel_name="General",
+        )
+        agent = StreamingAgent(context, reserved=lease, watchdog=watchdog)
+        for step in ("_ensure_logged_in", "_join_voice_channel", "_open_url",
+                     "_start_screen_share", "_send_status_update"):
+            setattr(agent, step, AsyncMock())
+
+        task = asyncio.create_task(agent.start())
+        while not agent.run or agent.run.state != AgentState.STREAMING:
+            await asyncio.sleep(0)
+        await docker.queue.put(container_event("jamie-sbx-a"))
+
+        with pytest.raises(SandboxLostError):
+            await asyncio.wait_for(task, timeout=1)
+
+        assert agent.run.state == AgentState.ERROR
+        assert "exited with code 137" in agent.run.error_message
+        errors = [
+            call for call in agent._send_status_update.await_args_list if call.args[0] == "error"
+        ]
+        assert len(errors) == 1
+        manager.stop.assert_awaited_once()
+        assert watchdog.stats()["watched_sandboxes"] == 0
@@ -1,5 +1,7 @@
 """Unit tests for CUAClient with mocked responses."""
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import aiohttp
@@ -8,6 +10,7 @@ from jamie.bot.cua_client import CUAClient, CUAClientConfig, CUAClientError
 from jamie.shared.errors import ErrorCode
 from jamie.shared.models import (
     HealthResponse,
+    ReadinessResponse,
     StreamRequest,
     StreamResponse,
     StreamStatus,
@@ -59,6 +62,144 @@ class TestCUAClientInit:
         assert client.config.base_url == "http://custom:8080"
 
 
+class TestCUAClientReadinessCheck:
+    """Tests for CUAClient.readiness_check."""
+
+    @pytest.fixture
+    def client(self):
+        return CUAClient(CUAClientConfig(max_retries=1, retry_delay=0.01))
+
+    def _session_returning(self, status, payload):
+        mock_response = AsyncMock()
+        mock_response.status = status
+        mock_response.json = AsyncMock(return_value=payload)
+        mock_session = AsyncMock()
+        mock_session.get = MagicMock(return_value=AsyncMock(
+            __aenter__=AsyncMock(return_value=mock_response),
+            __aexit__=AsyncMock(return_value=None),
+        ))
+        return mock_session
+
+    @pytest.mark.asyncio
+    async def test_ready(self, client):
+        """readiness_check returns ready state on 200."""
+        session = self._session_returning(200, {"ready": True, "state": "ready"})
+        with patch.object(client, '_get_session', return_value=session):
+            result = await client.readiness_check()
+
+        assert isinstance(result, ReadinessResponse)
+        assert result.ready is True
+
+    @pytest.mark.asyncio
+    async def test_warming_is_not_an_error(self, client):
+        """A 503 from a warming controller is reported, not raised."""
+        session = self._session_returning(503, {"ready": False, "state": "warming"})
+        with patch.object(client, '_get_session', return_value=session):
+            result = await client.readiness_check()
+
+        assert result.ready is False
+        assert result.state == "warming"
+
+    @pytest.mark.asyncio
+    async def test_unexpected_status_raises(self, client):
+        """Other statuses raise CUAClientError."""
+        session = self._session_returning(500, {})
+        with patch.object(client, '_get_session', return_value=session):
+            with pytest.raises(CUAClientError):
+                await client.readiness_check()
+
+
+class TestCUAClientPrepareSandbox:
+    """Tests for CUAClient.prepare_sandbox."""
+
+    @pytest.fixture
+    def client(self):
+        return CUAClient(CUAClientConfig(max_retries=1, retry_delay=0.01))
+
+    def _session_returning(self, status, payload):
+        mock_response = AsyncMock()
+        mock_response.status = status
+        mock_response.json = AsyncMock(return_value=payload)
+        mock_session = AsyncMock()
+        mock_session.post = MagicMock(return_value=AsyncMock(
+            __aenter__=AsyncMock(return_value=mock_response),
+            __aexit__=AsyncMock(return_value=None),
+        ))
+        return mock_session
+
+    @pytest.mark.asyncio
+    async def test_returns_reservation(self, client):
+        session = self._session_returning(200, {"token": "tok-1", "expires_in_seconds": 45.0})
+        with patch.object(client, '_get_session', return_value=session):
+            result = await client.prepare_sandbox("user-1")
+
+        assert result.token == "tok-1"
+        assert session.post.call_args[1]["json"] == {"requester_id": "user-1"}
+
+    @pytest.mark.asyncio
+    async def test_declined_reservation_is_none(self, client):
+        """Disabled, warming or full controllers just decline."""
+        for status in (404, 429, 503):
+            session = self._session_returning(status, {"detail": "no"})
+            with patch.object(client, '_get_session', return_value=session):
+                assert await client.prepare_sandbox("user-1") is None
+
+    @pytest.mark.asyncio
+    async def test_unexpected_status_raises(self, client):
+        session = self._session_returning(500, {})
+        with patch.object(client, '_get_session', return_value=session):
+            with pytest.raises(CUAClientError):
+                await client.prepare_sandbox()
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_client_error(self, client):
+        session = AsyncMock()
+        session.post = MagicMock(side_effect=asyncio.TimeoutError())
+        with patch.object(client, '_get_session', return_value=session):
+            with pytest.raises(CUAClientError):
+                await client.prepare_sandbox()
+
+
+class TestCUAClientReleaseReservation:
+    """Tests for CUAClient.release_reservation."""
+
+    @pytest.fixture
+    def client(self):
+        return CUAClient(CUAClientConfig(max_retries=1, retry_delay=0.01))
+
+    def _session_returning(self, status):
+        mock_response = AsyncMock()
+        mock_response.status = status
+        mock_session = AsyncMock()
+        mock_session.delete = MagicMock(return_value=AsyncMock(
+            __aenter__=AsyncMock(return_value=mock_response),
+            __aexit__=AsyncMock(return_value=None),
+        ))
+        return mock_session
+
+    @pytest.mark.asyncio
+    async def test_released(self, client):
+        session = self._session_returning(200)
+        with patch.object(client, '_get_session', return_value=session):
+            assert await client.release_reservation("tok-1") is True
+
+        assert session.delete.call_args[0][0].endswith("/prepare/tok-1")
+
+    @pytest.mark.asyncio
+    async def test_gone_reservation_is_false(self, client):
+        """A claimed or expired reservation is not an error."""
+        session = self._session_returning(404)
+        with patch.object(client, '_get_session', return_value=session):
+            assert await client.release_reservation("tok-1") is False
+
+    @pytest.mark.asyncio
+    async def test_unexpected_status_raises(self, client):
+        session = self._session_returning(500)
+        with patch.object(client, '_get_session', return_value=session):
+            with pytest.raises(CUAClientError):
+                await client.release_reservation("tok-1")
+
+
 class TestCUAClientHealthCheck:
     """Tests for CUAClient.health_check."""
 
@@ -1,5 +1,7 @@
 """Unit tests for MessageHandler with mocked bot/client."""
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import discord
@@ -9,7 +11,12 @@ from jamie.bot.session import SessionManager, SessionState, StreamSession
 from jamie.bot.cua_client import CUAClient, CUAClientError
 from jamie.bot.url_patterns import StreamingService
 from jamie.shared.errors import ErrorCode
-from jamie.shared.models import StreamResponse, StreamStatus
+from jamie.shared.models import (
+    PrepareResponse,
+    ReadinessResponse,
+    StreamResponse,
+    StreamStatus,
+)
 
 
 class MockDiscordUser:
@@ -89,6 +96,11 @@ def mock_cua_client():
     client.start_stream = AsyncMock()
     client.stop_stream = AsyncMock()
     client.health_check = AsyncMock()
+    client.prepare_sandbox = AsyncMock(return_value=None)
+    client.release_reservation = AsyncMock(return_value=True)
+    client.readiness_check = AsyncMock(
+        return_value=ReadinessResponse(ready=True, state="ready")
+    )
     return client
 
 
@@ -403,6 +415,145 @@ class TestHandleURL:
             assert call_kwargs['service'] == StreamingService.YOUTUBE
 
 
+class TestSandboxReservation:
+    """Tests for reserving a sandbox as soon as a URL arrives."""
+
+    @pytest.mark.asyncio
+    async def test_url_triggers_prepare(self, handler, mock_cua_client):
+        """A valid URL reserves a sandbox before the stream request runs."""
+        message = MockDiscordMessage(content="https://youtube.com/watch?v=dQw4w9WgXcQ")
+        mock_cua_client.prepare_sandbox.return_value = PrepareResponse(
+            token="tok-1", expires_in_seconds=45.0
+        )
+
+        with patch.object(
+            handler, '_handle_stream_request', new_callable=AsyncMock
+        ) as mock_stream:
+            await handler._handle_url(message)
+
+            reservation = mock_stream.call_args[1]['reservation']
+            assert await reservation == "tok-1"
+        mock_cua_client.prepare_sandbox.assert_awaited_once_with(str(message.author.id))
+
+    @pytest.mark.asyncio
+    async def test_warming_controller_asks_to_retry(self, handler, mock_cua_client):
+        """Streams wait until the controller has pulled its image."""
+        message = MockDiscordMessage(content="https://youtube.com/watch?v=dQw4w9WgXcQ")
+        mock_cua_client.readiness_check.return_value = ReadinessResponse(
+            ready=False, state="warming"
+        )
+
+        with patch.object(
+            handler, '_handle_stream_request', new_callable=AsyncMock
+        ) as mock_stream:
+            await handler._handle_url(message)
+
+        mock_stream.assert_not_awaited()
+        mock_cua_client.prepare_sandbox.assert_not_awaited()
+        assert "warming up" in message.reply.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_failed_warmup_streams_without_reservation(self, handler, mock_cua_client):
+        """A controller whose warm-up failed boots sandboxes cold."""
+        message = MockDiscordMessage(content="https://youtube.com/watch?v=dQw4w9WgXcQ")
+        mock_cua_client.readiness_check.return_value = ReadinessResponse(
+            ready=False, state="failed"
+        )
+
+        with patch.object(
+            handler, '_handle_stream_request', new_callable=AsyncMock
+        ) as mock_stream:
+            await handler._handle_url(message)
+
+        assert mock_stream.call_args[1]['reservation'] is None
+        mock_cua_client.prepare_sandbox.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_prepare_failure_is_ignored(self, handler, mock_cua_client):
+        """A failed reservation just means no token."""
+        mock_cua_client.prepare_sandbox.side_effect = CUAClientError(
+            code=ErrorCode.CUA_UNAVAILABLE,
+            message="down",
+        )
+        assert await handler._prepare_sandbox("123") is None
+
+    @pytest.mark.asyncio
+    async def test_prepare_timeout_is_ignored(self, handler, mock_cua_client):
+        """A controller that doesn't answer in time also just means no token."""
+        mock_cua_client.prepare_sandbox.side_effect = asyncio.TimeoutError()
+        assert await handler._prepare_sandbox("123") is None
+
+    @pytest.mark.asyncio
+    async def test_rejected_request_releases_reservation(self, handler, mock_cua_client):
+        """A request turned away before claiming its reservation gives it back."""
+        user = MockDiscordUser(user_id=123456789)
+        message = MockDiscordMessage(content="https://youtube.com/watch?v=test", author=user)
+
+        async def token():
+            return "tok-1"
+
+        reservation = asyncio.ensure_future(token())
+
+        with patch(
+            'jamie.bot.handlers.find_user_voice_with_guild',
+            new_callable=AsyncMock,
+            return_value=(None, None),
+        ):
+            await handler._handle_stream_request(
+                message=message,
+                user_id=str(user.id),
+                url="https://youtube.com/watch?v=test",
+                service=StreamingService.YOUTUBE,
+                reservation=reservation,
+            )
+
+        mock_cua_client.release_reservation.assert_awaited_once_with("tok-1")
+        mock_cua_client.start_stream.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_release_is_ignored(self, handler, mock_cua_client):
+        """An unreachable controller just lets the reservation expire."""
+        mock_cua_client.release_reservation.side_effect = CUAClientError(
+            code=ErrorCode.CUA_UNAVAILABLE, message="down"
+        )
+
+        async def token():
+            return "tok-1"
+
+        await handler._drop_reservation(asyncio.ensure_future(token()))
+        mock_cua_client.release_reservation.assert_awaited_once_with("tok-1")
+
+    @pytest.mark.asyncio
+    async def test_token_sent_with_stream_request(self, handler, mock_cua_client):
+        """The reservation token is passed on to /stream."""
+        user = MockDiscordUser(user_id=123456789)
+        message = MockDiscordMessage(content="https://youtube.com/watch?v=test", author=user)
+        mock_cua_client.start_stream.return_value = StreamResponse(
+            session_id="new-session-123",
+            status=StreamStatus.PENDING,
+            message="Request accepted",
+        )
+
+        async def token():
+            return "tok-1"
+
+        with patch(
+            'jamie.bot.handlers.find_user_voice_with_guild',
+            new_callable=AsyncMock,
+            return_value=(MockVoiceChannel(), MockGuild()),
+        ):
+            await handler._handle_stream_request(
+                message=message,
+                user_id=str(user.id),
+                url="https://www.youtube.com/watch?v=test",
+                service=StreamingService.YOUTUBE,
+                reservation=asyncio.ensure_future(token()),
+            )
+
+        request = mock_cua_client.start_stream.call_args[0][0]
+        assert request.reservation_token == "tok-1"
+
+
 class TestHandleStreamRequest:
     """Tests for _handle_stream_request orchestration."""
 
@@ -1,5 +1,6 @@
 """Pytest configuration for Jamie tests."""
 
+import os
 import sys
 from unittest.mock import MagicMock
 
@@ -7,3 +8,6 @@ from unittest.mock import MagicMock
 # These are only needed at runtime when actually running the agent
 sys.modules['computer'] = MagicMock()
 sys.modules['agent'] = MagicMock()
+
+# Name sandboxes without persisting a generated instance ID on this machine
+os.environ.setdefault("JAMIE_REAPER_INSTANCE_ID", "test-controller")
@@ -136,6 +136,76 @@ class TestMetricsCollector:
         # Check error labels
         assert 'jamie_errors_total{code="NetworkError"} 1' in prometheus
     
+    def test_named_counters(self):
+        """Test labeled counters accumulate per label set."""
+        collector = MetricsCollector()
+        collector.increment("profile_lookups_total", result="hit")
+        collector.increment("profile_lookups_total", result="hit")
+        collector.increment("profile_lookups_total", result="miss")
+        
+        assert collector.get_counter("profile_lookups_total", result="hit") == 2
+        assert collector.get_counter("profile_lookups_total", result="miss") == 1
+        assert collector.get_counter("profile_lookups_total", result="other") == 0
+        
+        stats = collector.get_stats()
+        assert stats["counters"]['profile_lookups_total{result="hit"}'] == 2
+    
+    def test_gauges(self):
+        """Test gauges keep the latest value."""
+        collector = MetricsCollector()
+        collector.set_gauge("pool_idle", 3)
+        collector.set_gauge("pool_idle", 1)
+        
+        assert collector.get_gauge("pool_idle") == 1
+        assert collector.get_gauge("unknown") is None
+        assert collector.get_stats()["gauges"]["pool_idle"] == 1
+    
+    def test_prometheus_export_named_series(self):
+        """Test named counters and gauges are exported with labels."""
+        collector = MetricsCollector()
+        collector.increment("profile_lookups_total", result="hit")
+        collector.set_gauge("pool_idle", 2)
+        
+        prometheus = collector.to_prometheus()
+        
+        assert "# TYPE jamie_profile_lookups_total counter" in prometheus
+        assert 'jamie_profile_lookups_total{result="hit"} 1.0' in prometheus
+        assert "# TYPE jamie_pool_idle gauge" in prometheus
+        assert "jamie_pool_idle 2" in prometheus
+    
+    def test_histograms(self):
+        """Test histograms bucket observations per label set."""
+        collector = MetricsCollector()
+        collector.observe("sandbox_boot_stage_seconds", 0.3, stage="create")
+        collector.observe("sandbox_boot_stage_seconds", 4.0, stage="create")
+        collector.observe("sandbox_boot_stage_seconds", 500.0, stage="create")
+        
+        hist = collector.get_histogram("sandbox_boot_stage_seconds", stage="create")
+        assert hist["count"] == 3
+        assert hist["sum"] == 504.3
+        assert hist["buckets"][0.5] == 1
+        assert hist["buckets"][5] == 2
+        assert hist["buckets"][120] == 2
+        assert collector.get_histogram("sandbox_boot_stage_seconds", stage="other") is None
+        
+        stats = collector.get_stats()
+        assert stats["histograms"]['sandbox_boot_stage_seconds{stage="create"}']["count"] == 3
+    
+    def test_prometheus_export_histograms(self):
+        """Test histograms export cumulative buckets, sum and count."""
+        collector = MetricsCollector()
+        collector.observe("boot_seconds", 0.2, buckets=(1, 0.5), stage="create")
+        collector.observe("boot_seconds", 2.0, buckets=(1, 0.5), stage="create")
+        
+        prometheus = collector.to_prometheus()
+        
+        assert "# TYPE jamie_boot_seconds histogram" in prometheus
+        assert 'jamie_boot_seconds_bucket{stage="create",le="0.5"} 1' in prometheus
+        assert 'jamie_boot_seconds_bucket{stage="create",le="1"} 1' in prometheus
+        assert 'jamie_boot_seconds_bucket{stage="create",le="+Inf"} 2' in prometheus
+        assert 'jamie_boot_seconds_sum{stage="create"} 2.2' in prometheus
+        assert 'jamie_boot_seconds_count{stage="create"} 2' in prometheus
+    
     def test_uptime_tracking(self):
         """Test uptime is tracked from collector creation."""
         with patch("time.time") as mock_time: